@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  application_catalog.py: Benchmark reading the application catalog
+"""
+# -------------------------------------------------------------------
+# application_catalog.py: Benchmark reading the application catalog
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/application_catalog.py [--applications N]
+#
+# Creates a catalog of N application files in a temporary directory,
+# and prints the time taken to read all of them: by parsing every
+# file, through a snapshot that does not exist yet (cold), through
+# an up to date snapshot (warm), and through a snapshot after one
+# file has changed.
+from typing import Callable
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import make_directories, write_file
+from dralithus.catalog import catalog_names, catalog_path, load_yaml
+from dralithus.snapshot import documents
+
+APPLICATION = '''\
+description: Application {i}
+labels:
+  team: team{team}
+  tier: {tier}
+repository:
+  url: https://git.example.com/apps/app{i}.git
+  branch: main
+build:
+  - make
+  - make test
+'''
+
+
+def write_catalog(directory: str, count: int) -> None:
+  """
+    Write a catalog of application files.
+
+    :param directory: The catalog directory
+    :param count: The number of applications
+  """
+  make_directories(directory, ['applications'])
+  for i in range(count):
+    write_file(directory, 'applications', f'app{i}',
+               APPLICATION.format(i=i, team=i % 20, tier=('web', 'core', 'batch')[i % 3]))
+
+
+def timed(label: str, function: Callable[[], object]) -> None:
+  """
+    Time a function and print the result.
+
+    :param label: What is being timed
+    :param function: The function to time
+  """
+  start = time.perf_counter()
+  function()
+  print(f'{label:24} {(time.perf_counter() - start) * 1000:10.1f} ms')
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(description='Benchmark reading the application catalog')
+  parser.add_argument('--applications', type=int, default=2000,
+    help='The number of application files')
+  options = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as catalog, tempfile.TemporaryDirectory() as cache:
+    os.environ['DRALITHUS_CACHE_DIR'] = cache
+    write_catalog(catalog, options.applications)
+    timed('parse every file', lambda: [
+      load_yaml(catalog_path(catalog, 'applications', name))
+      for name in catalog_names(catalog, 'applications')])
+    timed('snapshot (cold)', lambda: documents(catalog, 'applications'))
+    # Let the files age, so that they are not checked against their
+    # hashes as files modified just before the snapshot was written.
+    past_ns = time.time_ns() - 60 * 10**9
+    for name in catalog_names(catalog, 'applications'):
+      path = catalog_path(catalog, 'applications', name)
+      os.utime(path, ns=(past_ns, past_ns))
+    documents(catalog, 'applications')
+    timed('snapshot (warm)', lambda: documents(catalog, 'applications'))
+    with open(catalog_path(catalog, 'applications', 'app0'), 'a', encoding='utf-8') as file:
+      file.write('# changed\n')
+    timed('snapshot (one changed)', lambda: documents(catalog, 'applications'))
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
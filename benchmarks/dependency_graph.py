@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  dependency_graph.py: Benchmark recomputing resolved configurations
+"""
+# -------------------------------------------------------------------
+# dependency_graph.py: Benchmark recomputing resolved configurations
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/dependency_graph.py [--applications N] [--environments M] [--hosts H]
+#
+# Creates a catalog of N applications and M environments of H hosts
+# each, with a configuration file for every fifth pair, in a temporary
+# directory. Prints the time taken to resolve the configuration of
+# every application in every environment, as a new run would: through
+# the dependency graph with nothing saved (cold), when nothing has
+# changed (warm), and after a commit that changes the hosts of one
+# environment and the configuration of one application.
+from typing import Callable
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import make_directories, write_file
+from dralithus.catalog import catalog_path
+from dralithus.configuration import resolved
+from dralithus.dependency_graph import DependencyGraph
+
+
+def write_catalog(directory: str, applications: int, environments: int, hosts: int) -> None:
+  """
+    Write a catalog of applications, environments and configuration
+    files.
+
+    :param directory: The catalog directory
+    :param applications: The number of applications
+    :param environments: The number of environments
+    :param hosts: The number of hosts in each environment
+  """
+  make_directories(directory, ('environments', 'applications', 'configuration'))
+  host_list = ''.join(f'  - {{name: host{j}, labels: {{rack: r{j % 50}}}}}\n' for j in range(hosts))
+  for i in range(environments):
+    write_file(directory, 'environments', f'env{i}',
+               f'configuration:\n  region: region{i}\n  build:\n    profile: env{i}\n'
+               f'hosts:\n{host_list}')
+  for i in range(applications):
+    write_file(directory, 'applications', f'app{i}',
+               f'configuration:\n  port: {8000 + i}\n  build:\n    target: app{i}\n')
+    for j in range(environments):
+      if (i + j) % 5 == 0:
+        write_file(directory, 'configuration', f'app{i}-env{j}',
+                   'replicas: 3\nbuild:\n  jobs: 16\n')
+  write_file(directory, 'configuration', 'defaults',
+             'replicas: 1\nbuild:\n  profile: release\n  jobs: 4\n')
+
+
+def incremental(directory: str, pairs: list[tuple[str, str]]) -> int:
+  """
+    Resolve every configuration through the dependency graph, as a new
+    process would, and save the graph.
+
+    :param directory: The catalog directory
+    :param pairs: The application and environment of each configuration
+    :return: The number of artifacts computed
+  """
+  graph = DependencyGraph(directory)
+  for application, environment in pairs:
+    resolved(application, environment, graph)
+  graph.save()
+  return graph.computed
+
+
+def timed(label: str, function: Callable[[], int], unit: str) -> None:
+  """
+    Time a function, and print the result.
+
+    :param label: What is being timed
+    :param function: The function to time
+    :param unit: What the number the function returns counts
+  """
+  start = time.perf_counter()
+  result = function()
+  print(f'{label:28} {(time.perf_counter() - start) * 1000:10.1f} ms {result:8} {unit}')
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(description='Benchmark recomputing resolved configurations')
+  parser.add_argument('--applications', type=int, default=200,
+    help='The number of applications')
+  parser.add_argument('--environments', type=int, default=20,
+    help='The number of environments')
+  parser.add_argument('--hosts', type=int, default=500,
+    help='The number of hosts in each environment')
+  options = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as catalog, tempfile.TemporaryDirectory() as cache:
+    os.environ['DRALITHUS_CATALOG'] = catalog
+    os.environ['DRALITHUS_CACHE_DIR'] = cache
+    write_catalog(catalog, options.applications, options.environments, options.hosts)
+    pairs = [(f'app{i}', f'env{j}')
+             for i in range(options.applications) for j in range(options.environments)]
+    timed('graph (cold)', lambda: incremental(catalog, pairs), 'computed')
+    timed('graph (warm)', lambda: incremental(catalog, pairs), 'computed')
+    with open(catalog_path(catalog, 'environments', 'env0'), 'a', encoding='utf-8') as file:
+      file.write('  - {name: extra, labels: {rack: r0}}\n')
+    with open(catalog_path(catalog, 'applications', 'app0'), 'a', encoding='utf-8') as file:
+      file.write('  replicas: 2\n')
+    timed('graph (one commit)', lambda: incremental(catalog, pairs), 'computed')
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  deploy.py: Benchmark deploying many targets at the same time
+"""
+# -------------------------------------------------------------------
+# deploy.py: Benchmark deploying many targets at the same time
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/deploy.py [--applications N] [--environments M] [--seconds S] [--jobs J]
+#
+# Creates a catalog of N applications and M environments in a
+# temporary directory, in which the deploy command of every
+# application waits S seconds, as a deploy that waits on a remote host
+# would. Prints the time taken by drl deploy to deploy every
+# application to every environment one target at a time, and J
+# targets at a time. Then, with every fifth application depending on
+# the four before it, in a chain, prints the time taken to deploy them
+# J at a time in the order of their critical paths.
+from typing import Callable
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import make_directories, write_file
+from dralithus.application import Application
+from dralithus.deploy_command import DeployCommand
+from dralithus.environment import Environment
+
+
+def write_catalog(
+    directory: str, applications: int, environments: int, seconds: float, chains: bool) -> None:
+  """
+    Write a catalog of applications and environments.
+
+    :param directory: The catalog directory
+    :param applications: The number of applications
+    :param environments: The number of environments
+    :param seconds: How long the deploy command of each application takes
+    :param chains: Whether every fifth application depends on the four
+      before it, in a chain
+  """
+  make_directories(directory, ('environments', 'applications'))
+  for i in range(environments):
+    write_file(directory, 'environments', f'env{i}', f'configuration:\n  region: region{i}\n')
+  for i in range(applications):
+    depends = f'depends: [app{i - 1}]\n' if chains and i % 5 != 0 else ''
+    write_file(directory, 'applications', f'app{i}',
+               f'{depends}configuration:\n  deploy: [sleep, "{seconds}"]\n')
+
+
+def timed(label: str, function: Callable[[], int]) -> None:
+  """
+    Time a function, and print the result.
+
+    :param label: What is being timed
+    :param function: The function to time
+  """
+  start = time.perf_counter()
+  result = function()
+  print(f'{label:28} {(time.perf_counter() - start) * 1000:10.1f} ms  exit code {result}')
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(description='Benchmark deploying many targets at the same time')
+  parser.add_argument('--applications', type=int, default=40,
+    help='The number of applications')
+  parser.add_argument('--environments', type=int, default=6,
+    help='The number of environments')
+  parser.add_argument('--seconds', type=float, default=0.05,
+    help='How long the deploy command of each application takes')
+  parser.add_argument('--jobs', type=int, default=16,
+    help='The number of targets to deploy at the same time')
+  options = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as catalog, tempfile.TemporaryDirectory() as cache:
+    os.environ['DRALITHUS_CATALOG'] = catalog
+    os.environ['DRALITHUS_CACHE_DIR'] = cache
+    write_catalog(catalog, options.applications, options.environments, options.seconds, False)
+    environments = {Environment.load(f'env{i}') for i in range(options.environments)}
+    applications = {Application.load(f'app{i}') for i in range(options.applications)}
+
+    def deploy(jobs: int) -> int:
+      with redirect_stdout(io.StringIO()):
+        return DeployCommand(environments, applications, jobs, 0).execute()
+
+    targets = options.applications * options.environments
+    timed(f'{targets} targets, 1 job', lambda: deploy(1))
+    timed(f'{targets} targets, {options.jobs} jobs', lambda: deploy(options.jobs))
+    write_catalog(catalog, options.applications, options.environments, options.seconds, True)
+    Application.reload(f'app{i}' for i in range(options.applications))
+    timed(f'{targets} targets, chains of 5', lambda: deploy(options.jobs))
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  environment_hosts.py: Benchmark reading the hosts of large environments
+"""
+# -------------------------------------------------------------------
+# environment_hosts.py: Benchmark reading the hosts of large environments
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/environment_hosts.py [--hosts N ...] [--full]
+#
+# Writes an environment file of N hosts, for each N, in a temporary
+# directory, and prints the time taken and the peak memory traced
+# while iterating over its hosts, in separate runs. With --full, also
+# prints them for parsing the whole file at once, as the hosts were
+# read before they were streamed. Exits with 1 if the peak memory of streaming the
+# largest environment is more than twice that of the smallest.
+from functools import partial
+from typing import Callable
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import hosts_yaml, make_directories, write_file
+from dralithus.catalog import catalog_path, hosts_from, load_yaml
+from dralithus.environment import Environment
+
+
+def stream(environment: Environment) -> int:
+  """
+    Read the hosts of an environment one at a time.
+
+    :param environment: The environment
+    :return: The number of hosts
+  """
+  return sum(1 for _ in environment.hosts)
+
+
+def parse(path: str) -> int:
+  """
+    Read the hosts of an environment by parsing its whole file.
+
+    :param path: The path of the environment file
+    :return: The number of hosts
+  """
+  return len(hosts_from(load_yaml(path)))
+
+
+def traced(label: str, function: Callable[[], int]) -> int:
+  """
+    Time a function, trace the memory it uses, and print the results.
+
+    :param label: What is being measured
+    :param function: The function to measure, which returns the number
+      of hosts read
+    :return: The peak memory used, in bytes
+  """
+  start = time.perf_counter()
+  count = function()
+  elapsed = time.perf_counter() - start
+  # Tracing slows every allocation, so the time is taken without it.
+  tracemalloc.start()
+  function()
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  print(f'{label:24} {count:8} hosts {elapsed * 1000:10.1f} ms {peak / 1024:12.1f} KiB')
+  return peak
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(description='Benchmark reading the hosts of large environments')
+  parser.add_argument('--hosts', type=int, nargs='+', default=[10000, 50000, 100000],
+    help='The number of hosts of each environment')
+  parser.add_argument('--full', action='store_true',
+    help='Also parse each file whole, for comparison')
+  options = parser.parse_args()
+
+  peaks = []
+  with tempfile.TemporaryDirectory() as catalog:
+    os.environ['DRALITHUS_CATALOG'] = catalog
+    make_directories(catalog, ['environments'])
+    for hosts in options.hosts:
+      name = f'env{hosts}'
+      write_file(catalog, 'environments', name,
+                 f'description: {hosts} hosts\nlabels:\n  tier: prod\nhosts:\n{hosts_yaml(hosts)}')
+      environment = Environment.load(name)
+      peaks.append(traced(f'stream {name}', partial(stream, environment)))
+      if options.full:
+        path = catalog_path(catalog, 'environments', name)
+        traced(f'parse {name}', partial(parse, path))
+  return 1 if peaks[-1] > 2 * peaks[0] else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  fleet.py: Benchmark deploying to environments of many hosts
+"""
+# -------------------------------------------------------------------
+# fleet.py: Benchmark deploying to environments of many hosts
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/fleet.py [--hosts N] [--applications M] [--seconds S] [--processes P]
+#                               [--connect-seconds C]
+#
+# Creates a catalog of M applications and an environment of N hosts in
+# a temporary directory, and prints the time taken by drl deploy to run
+# the deploy command of every application on every host, through the
+# fake transport, each command taking S seconds, and through the local
+# transport, on P of the hosts, each running sleep S. The threads that
+# drl had running at the end of each are printed too: the commands on
+# the hosts run as coroutines, not as threads. The time taken to deploy
+# the same applications to the fake hosts again with --trust-cache,
+# when nothing has changed, is printed after the first.
+#
+# Then, with one command at a time on each host, and each connection
+# to a host taking C seconds to open, prints the time taken when the
+# connection to each host is shared by every application, against
+# when each command connects again.
+from typing import Callable
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import make_directories, write_file
+from dralithus.application import Application
+from dralithus.deploy_command import DeployCommand
+from dralithus.environment import Environment
+from dralithus.pool import IDLE_SECONDS, ConnectionPool
+from dralithus.transport import TRANSPORTS, FakeReply, FakeTransport, HostConnection
+
+
+def write_catalog(directory: str, hosts: int, applications: int, seconds: float) -> None:
+  """
+    Write a catalog of applications, and of an environment of hosts for
+    each transport.
+
+    :param directory: The catalog directory
+    :param hosts: The number of hosts
+    :param applications: The number of applications
+    :param seconds: How long the deploy command of each application takes
+  """
+  make_directories(directory, ('environments', 'applications'))
+  host_list = ''.join(f'  - host{i}\n' for i in range(hosts))
+  for name, transport in (('fake', 'fake'), ('local', 'local'), ('serial', 'fake')):
+    host_jobs = '  host_jobs: 1\n' if name == 'serial' else ''
+    write_file(directory, 'environments', name,
+               f'configuration:\n  transport: {transport}\n{host_jobs}hosts:\n{host_list}')
+  for i in range(applications):
+    write_file(directory, 'applications', f'app{i}',
+               f'configuration:\n  deploy: [sleep, "{seconds}"]\n')
+
+
+def timed(label: str, function: Callable[[], int]) -> None:
+  """
+    Time a function, and print the result.
+
+    :param label: What is being timed
+    :param function: The function to time
+  """
+  start = time.perf_counter()
+  result = function()
+  print(f'{label:32} {(time.perf_counter() - start) * 1000:10.1f} ms  exit code {result}'
+        f'  threads {threading.active_count()}')
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(description='Benchmark deploying to environments of many hosts')
+  parser.add_argument('--hosts', type=int, default=5000,
+    help='The number of hosts')
+  parser.add_argument('--applications', type=int, default=4,
+    help='The number of applications')
+  parser.add_argument('--seconds', type=float, default=0.5,
+    help='How long the deploy command of each application takes on each host')
+  parser.add_argument('--processes', type=int, default=500,
+    help='The number of hosts to deploy to through the local transport')
+  parser.add_argument('--connect-seconds', type=float, default=0.3,
+    help='How long a connection to a host takes to open')
+  options = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as catalog, tempfile.TemporaryDirectory() as cache:
+    os.environ['DRALITHUS_CATALOG'] = catalog
+    os.environ['DRALITHUS_CACHE_DIR'] = cache
+    TRANSPORTS['fake'] = lambda: FakeTransport(default=FakeReply(seconds=options.seconds))
+    write_catalog(catalog, options.hosts, options.applications, options.seconds)
+    applications = {Application.load(f'app{i}') for i in range(options.applications)}
+
+    def deploy(environment: str, force: bool = True) -> int:
+      with redirect_stdout(io.StringIO()):
+        return DeployCommand({Environment.load(environment)}, applications,
+                             options.applications, 0, force=force,
+                             trust_cache=True).execute()
+
+    commands = options.hosts * options.applications
+    timed(f'{commands} commands, fake', lambda: deploy('fake'))
+    timed(f'{commands} commands, unchanged', lambda: deploy('fake', False))
+    write_catalog(catalog, options.processes, options.applications, options.seconds)
+    Environment.reload(['fake', 'local'])
+    timed(f'{options.processes * options.applications} commands, local',
+          lambda: deploy('local'))
+    write_catalog(catalog, options.hosts, options.applications, options.seconds)
+    Environment.reload(['fake', 'local', 'serial'])
+
+    def connecting(idle_seconds: float) -> FakeTransport:
+      transport = FakeTransport(default=FakeReply(seconds=options.seconds),
+                                connect_seconds=options.connect_seconds)
+      transport.pool = ConnectionPool[HostConnection](transport.connect, idle_seconds=idle_seconds)
+      return transport
+
+    TRANSPORTS['fake'] = lambda: connecting(IDLE_SECONDS)
+    timed(f'{commands} commands, shared', lambda: deploy('serial'))
+    # Connections idle for no time at all are closed as soon as their
+    # command completes.
+    TRANSPORTS['fake'] = lambda: connecting(0.0)
+    timed(f'{commands} commands, reconnecting', lambda: deploy('serial'))
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  host_memory.py: Benchmark the memory used by the hosts of an environment
+"""
+# -------------------------------------------------------------------
+# host_memory.py: Benchmark the memory used by the hosts of an environment
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/host_memory.py [--hosts N] [--budget BYTES]
+#
+# Writes an environment file of N hosts, labelled with one of 500
+# racks and one of 3 roles, in a temporary directory. Prints the
+# memory traced while keeping all of its hosts in a list, and while
+# keeping as many environments and applications, per object. Exits
+# with 1 if a host uses more than BYTES.
+from typing import Callable
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import hosts_yaml, make_directories, write_file
+from dralithus.application import Application
+from dralithus.catalog import Details
+from dralithus.environment import Environment
+
+
+def bytes_each(label: str, count: int, function: Callable[[], object]) -> float:
+  """
+    Trace the memory held by what a function returns, and print it.
+
+    :param label: What is being measured
+    :param count: The number of objects the function returns
+    :param function: The function
+    :return: The memory held per object, in bytes
+  """
+  gc.collect()
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  kept = function()
+  gc.collect()
+  after = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del kept
+  each = (after - before) / count
+  print(f'{label:16} {count:8} {each:10.1f} bytes each')
+  return each
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(
+    description='Benchmark the memory used by the hosts of an environment')
+  parser.add_argument('--hosts', type=int, default=100000,
+    help='The number of hosts')
+  parser.add_argument('--budget', type=int, default=160,
+    help='The most memory a host may use, in bytes')
+  options = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as catalog:
+    os.environ['DRALITHUS_CATALOG'] = catalog
+    make_directories(catalog, ['environments'])
+    write_file(catalog, 'environments', 'big', f'hosts:\n{hosts_yaml(options.hosts)}')
+    environment = Environment.load('big')
+    host = bytes_each('hosts', options.hosts, lambda: list(environment.hosts))
+  details = Details('', {'tier': 'prod', 'region': 'eu'}, {})
+  bytes_each('environments', options.hosts,
+             lambda: [Environment(f'env{i}', details) for i in range(options.hosts)])
+  bytes_each('applications', options.hosts,
+             lambda: [Application(f'app{i}', details) for i in range(options.hosts)])
+  if host > options.budget:
+    print(f'A host uses {host:.1f} bytes, more than the budget of {options.budget}')
+    return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  inventory.py: Benchmark indexing a large catalog in SQLite
+"""
+# -------------------------------------------------------------------
+# inventory.py: Benchmark indexing a large catalog in SQLite
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/inventory.py [--environments N] [--applications M]
+#
+# Creates a catalog of N environments of 5 hosts each, M applications,
+# and a configuration file for each application in 2 environments, in
+# a temporary directory. Prints the time taken to index it (cold), to
+# bring the index up to date when nothing has changed (warm) and when
+# one file has changed, and to answer some queries.
+from typing import Callable
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import (
+    application_yaml, environment_yaml, hosts_yaml, make_directories, write_file)
+from dralithus.catalog import catalog_path
+from dralithus.inventory import Inventory
+
+
+def write_catalog(directory: str, environments: int, applications: int) -> None:
+  """
+    Write a catalog of environment, application and configuration files.
+
+    :param directory: The catalog directory
+    :param environments: The number of environments
+    :param applications: The number of applications
+  """
+  make_directories(directory, ('environments', 'applications', 'configuration'))
+  for i in range(environments):
+    write_file(directory, 'environments', f'env{i}',
+               environment_yaml(i) + f'hosts:\n{hosts_yaml(5, i * 5)}')
+  for i in range(applications):
+    write_file(directory, 'applications', f'app{i}', application_yaml(i))
+    for k in range(2):
+      write_file(directory, 'configuration', f'app{i}-env{(i * 2 + k) % environments}',
+                 'port: 8080\n')
+
+
+def timed(label: str, function: Callable[[], object]) -> None:
+  """
+    Time a function and print the result.
+
+    :param label: What is being timed
+    :param function: The function to time
+  """
+  start = time.perf_counter()
+  function()
+  print(f'{label:32} {(time.perf_counter() - start) * 1000:10.1f} ms')
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(description='Benchmark indexing a large catalog in SQLite')
+  parser.add_argument('--environments', type=int, default=10000,
+    help='The number of environment files')
+  parser.add_argument('--applications', type=int, default=10000,
+    help='The number of application files')
+  options = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as catalog, tempfile.TemporaryDirectory() as cache:
+    os.environ['DRALITHUS_CACHE_DIR'] = cache
+    write_catalog(catalog, options.environments, options.applications)
+    inventory = Inventory(catalog)
+    timed('index (cold)', inventory.refresh)
+    # Let the files age, so that they are not checked against their
+    # hashes as files modified just before the last refresh.
+    past_ns = time.time_ns() - 60 * 10**9
+    for kind in ('environments', 'applications', 'configuration'):
+      for entry in os.scandir(os.path.join(catalog, kind)):
+        os.utime(entry.path, ns=(past_ns, past_ns))
+      os.utime(os.path.join(catalog, kind), ns=(past_ns, past_ns))
+    inventory.refresh()
+    timed('index (warm)', inventory.refresh)
+    with open(catalog_path(catalog, 'environments', 'env0'), 'a', encoding='utf-8') as file:
+      file.write('# changed\n')
+    timed('index (one changed)', inventory.refresh)
+    timed('load one environment', lambda: inventory.entry('environments', 'env1'))
+    timed('label index of applications', lambda: inventory.label_index('applications'))
+    timed('hosts in rack r12', lambda: inventory.hosts(['rack=r12']))
+    timed('applications on rack r12', lambda: inventory.applications_on_hosts(['rack=r12']))
+    timed('applications on r12 db hosts',
+          lambda: inventory.applications_on_hosts(['rack=r12', 'role=db']))
+    inventory.close()
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  option_parsing.py: Benchmark the cost of parsing command line options
+"""
+# -------------------------------------------------------------------
+# option_parsing.py: Benchmark the cost of parsing command line
+# options
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/option_parsing.py
+#
+# Prints the mean cost, in nanoseconds, of turning one command line
+# token into an Option with Option.make(), for each kind of token,
+# and the cost per argument of parsing a long command line with
+# command_line.parse().
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from dralithus.command_line.command_line import parse
+from dralithus.command_line.option import Option
+
+
+def token_cases() -> list[tuple[str, str, str | None]]:
+  """
+    The tokens to benchmark.
+
+    :return: A list of (name, current_arg, next_arg) tuples
+  """
+  return [
+    ('terminator', '--', None),
+    ('short-help', '-h', 'parameter'),
+    ('long-help', '--help', 'parameter'),
+    ('short-verbosity', '-v', 'parameter'),
+    ('short-verbosity-value', '-v2', 'parameter'),
+    ('long-verbosity-value', '--verbosity=2', 'parameter'),
+    ('short-env-next-arg', '-e', 'local'),
+    ('long-env-value', '--environment=local,test', 'parameter'),
+    ('multi-option', '-vh', 'parameter'),
+    ('parameter', 'parameter', None),
+  ]
+
+
+def benchmark_tokens(number: int) -> None:
+  """
+    Benchmark Option.make() for each kind of token.
+
+    :param number: The number of times to parse each token
+  """
+  total = 0.0
+  for name, current_arg, next_arg in token_cases():
+    seconds = min(timeit.repeat(
+      lambda arg=current_arg, nxt=next_arg: Option.make(arg, nxt),  # type: ignore[misc]
+      number=number, repeat=5))
+    nanoseconds = seconds / number * 1e9
+    total += nanoseconds
+    print(f'{name:24} {nanoseconds:10.0f} ns/token')
+  print(f'{"mean":24} {total / len(token_cases()):10.0f} ns/token')
+
+
+def benchmark_command_line(size: int) -> None:
+  """
+    Benchmark command_line.parse() on a long command line.
+
+    :param size: The number of option groups on the command line
+  """
+  options: list[str] = []
+  for i in range(size):
+    options += ['-v', f'--env=env{i}', '-e', f'env{i},other{i}', '-vh']
+  args = ['drl'] + options + ['deploy'] + options + ['sample', 'echo']
+  seconds = min(timeit.repeat(lambda: parse(args), number=1, repeat=5))
+  print(f'{"command line":24} {seconds / len(args) * 1e9:10.0f} ns/arg ({len(args)} args)')
+
+
+if __name__ == '__main__':
+  benchmark_tokens(20000)
+  benchmark_command_line(2000)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+  sample_catalog.py: Write the catalogs that the benchmarks run on
+"""
+# -------------------------------------------------------------------
+# sample_catalog.py: Write the catalogs that the benchmarks run on
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Each benchmark writes a catalog of its own shape into a temporary
+# directory. The pieces they have in common are here, so that every
+# benchmark writes files the same way. Benchmarks are run as scripts,
+# so this module is found in the directory of the script.
+from typing import Iterable
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from dralithus.catalog import catalog_path
+
+# A host of an environment, as an item of the list of its hosts
+HOST = '''\
+  - name: host{i}
+    labels:
+      rack: r{rack}
+      role: {role}
+'''
+
+# The roles of the hosts, in turn
+ROLES = ('web', 'db', 'cache')
+
+
+def make_directories(directory: str, kinds: Iterable[str]) -> None:
+  """
+    Create the directories of kinds of file in a catalog.
+
+    :param directory: The catalog directory
+    :param kinds: The kinds of file: 'environments' etc.
+  """
+  for kind in kinds:
+    os.makedirs(os.path.join(directory, kind), exist_ok=True)
+
+
+def write_file(directory: str, kind: str, name: str, contents: str) -> None:
+  """
+    Write a file in a catalog.
+
+    :param directory: The catalog directory
+    :param kind: The kind of file: 'environments' etc.
+    :param name: The name of the file, without its extension
+    :param contents: The contents of the file
+  """
+  with open(catalog_path(directory, kind, name), 'w', encoding='utf-8') as file:
+    file.write(contents)
+
+
+def hosts_yaml(count: int, offset: int = 0) -> str:
+  """
+    The hosts of an environment, as the items of a YAML list. Each host
+    is labelled with a rack and a role.
+
+    :param count: The number of hosts
+    :param offset: Added to the number of each host to give its rack,
+      so that environments can have hosts in different racks
+    :return: The items
+  """
+  return ''.join(HOST.format(i=i, rack=(offset + i) % 500, role=ROLES[i % 3]) for i in range(count))
+
+
+def environment_yaml(i: int) -> str:
+  """
+    The description and labels of an environment, as YAML. Environments
+    are labelled with one of ten regions.
+
+    :param i: The number of the environment
+    :return: The YAML
+  """
+  return f'description: Environment {i}\nlabels:\n  region: region{i % 10}\n'
+
+
+def application_yaml(i: int) -> str:
+  """
+    The description and labels of an application, as YAML. Applications
+    are labelled with one of twenty teams.
+
+    :param i: The number of the application
+    :return: The YAML
+  """
+  return f'description: Application {i}\nlabels:\n  team: team{i % 20}\n'
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  startup.py: Benchmark the start up time of drl
+"""
+# -------------------------------------------------------------------
+# startup.py: Benchmark the start up time of drl
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/startup.py [--budget MILLISECONDS] [--runs N]
+#
+# Runs drl with python -X importtime for a few short commands, and
+# prints, for each, the median time spent importing modules, the part
+# of that spent importing dralithus modules, and the wall clock time
+# of the whole process. Exits with a non-zero status if the median
+# import time of any command exceeds the budget, so that it can be
+# used to catch start up regressions.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# The default import time budget, in milliseconds, for each command.
+# Commands that read the catalog import yaml, which alone takes about
+# 18ms.
+DEFAULT_BUDGET_MS = 80.0
+
+
+def commands() -> list[tuple[str, list[str]]]:
+  """
+    The commands to benchmark.
+
+    :return: A list of (name, arguments) tuples
+  """
+  return [
+    ('help', ['--help']),
+    ('deploy-help', ['deploy', '--help']),
+    ('deploy', ['-v', 'deploy', '--environment=local', 'sample']),
+  ]
+
+
+def import_times(stderr: str) -> tuple[float, float]:
+  """
+    Sum the import times reported by python -X importtime.
+
+    Each line of the report is of the form:
+      import time: <self us> | <cumulative us> | <indent><module>
+
+    :param stderr: The standard error of the process
+    :return: The total import time and the time spent importing
+      dralithus modules, both in milliseconds
+  """
+  total = 0
+  dralithus = 0
+  for line in stderr.splitlines():
+    if not line.startswith('import time:'):
+      continue
+    fields = line[len('import time:'):].split('|')
+    if not fields[0].strip().isdigit():
+      continue  # The header line
+    self_us = int(fields[0])
+    total += self_us
+    if fields[2].strip().startswith('dralithus'):
+      dralithus += self_us
+  return total / 1000, dralithus / 1000
+
+
+def benchmark(args: list[str], runs: int) -> tuple[float, float, float]:
+  """
+    Run drl several times and measure its start up time.
+
+    :param args: The arguments to pass to drl
+    :param runs: The number of times to run drl
+    :return: The median total import time, dralithus import time and
+      wall clock time, all in milliseconds
+  """
+  totals: list[float] = []
+  own: list[float] = []
+  walls: list[float] = []
+  for _ in range(runs):
+    start = time.perf_counter()
+    process = subprocess.run(
+      [sys.executable, '-X', 'importtime', os.path.join(ROOT, 'drl')] + args,
+      cwd=ROOT, capture_output=True, text=True, check=False)
+    walls.append((time.perf_counter() - start) * 1000)
+    total, dralithus = import_times(process.stderr)
+    totals.append(total)
+    own.append(dralithus)
+  return statistics.median(totals), statistics.median(own), statistics.median(walls)
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code. 1 if any command exceeds the budget.
+  """
+  parser = argparse.ArgumentParser(description='Benchmark the start up time of drl')
+  parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+    help='The import time budget for each command, in milliseconds')
+  parser.add_argument('--runs', type=int, default=20,
+    help='The number of times to run each command')
+  options = parser.parse_args()
+
+  exit_code = 0
+  print(f'{"command":12} {"imports":>10} {"dralithus":>10} {"wall":>10}')
+  for name, args in commands():
+    total, dralithus, wall = benchmark(args, options.runs)
+    over = total > options.budget
+    print(f'{name:12} {total:8.1f}ms {dralithus:8.1f}ms {wall:8.1f}ms'
+      + (f'  OVER BUDGET ({options.budget:.1f}ms)' if over else ''))
+    if over:
+      exit_code = 1
+  return exit_code
+
+
+if __name__ == '__main__':
+  sys.exit(main())
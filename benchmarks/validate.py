@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  validate.py: Benchmark validating a large catalog
+"""
+# -------------------------------------------------------------------
+# validate.py: Benchmark validating a large catalog
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/validate.py [--files N] [--jobs J]
+#
+# Creates a catalog of N files, a third each of environments of 20
+# hosts, applications and configuration files, in a temporary
+# directory. Prints the time taken by drl validate to check them all
+# in one process and in J processes, with nothing remembered from an
+# earlier run (cold), when nothing has changed (warm), and when one
+# file has changed.
+from typing import Callable
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import (
+    application_yaml, environment_yaml, hosts_yaml, make_directories, write_file)
+from dralithus.catalog import catalog_path
+from dralithus.validate_command import KINDS, ValidateCommand
+
+
+def write_catalog(directory: str, files: int) -> None:
+  """
+    Write a catalog of environment, application and configuration files.
+
+    :param directory: The catalog directory
+    :param files: The number of files
+  """
+  make_directories(directory, KINDS)
+  for i in range(files // 3):
+    write_file(directory, 'environments', f'env{i}',
+               environment_yaml(i) + f'hosts:\n{hosts_yaml(20, i)}')
+    write_file(directory, 'applications', f'app{i}',
+               application_yaml(i) +
+               'configuration:\n  port: 8080\n  build:\n    target: app\n')
+    write_file(directory, 'configuration', f'app{i}-env{i}',
+               'port: 8443\nbuild:\n  profile: debug\n  jobs: 8\n')
+
+
+def timed(label: str, function: Callable[[], object]) -> None:
+  """
+    Time a function, without what it prints, and print the result.
+
+    :param label: What is being timed
+    :param function: The function to time
+  """
+  start = time.perf_counter()
+  with redirect_stdout(io.StringIO()):
+    function()
+  print(f'{label:32} {(time.perf_counter() - start) * 1000:10.1f} ms')
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(description='Benchmark validating a large catalog')
+  parser.add_argument('--files', type=int, default=8000,
+    help='The number of catalog files')
+  parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+    help='The number of processes to validate with')
+  options = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as catalog, tempfile.TemporaryDirectory() as cache:
+    os.environ['DRALITHUS_CACHE_DIR'] = cache
+    write_catalog(catalog, options.files)
+    for jobs in sorted({1, options.jobs}):
+      command = ValidateCommand(catalog, [], jobs, 0)
+      shutil.rmtree(os.path.join(cache, 'validate'), ignore_errors=True)
+      timed(f'validate -j {jobs} (cold)', command.execute)
+      timed(f'validate -j {jobs} (warm)', command.execute)
+      with open(catalog_path(catalog, 'environments', 'env0'), 'a', encoding='utf-8') as file:
+        file.write(f'# changed {jobs}\n')
+      timed(f'validate -j {jobs} (one changed)', command.execute)
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
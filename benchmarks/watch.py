@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  watch.py: Benchmark keeping a loaded catalog up to date
+"""
+# -------------------------------------------------------------------
+# watch.py: Benchmark keeping a loaded catalog up to date
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Run from the root of the repository:
+#   python3 benchmarks/watch.py [--environments N] [--applications M]
+#
+# Creates a catalog of N environments and M applications in a
+# temporary directory, and loads it, as the daemon does when it
+# starts. Then prints the time taken to bring it up to date after one
+# environment and one application are edited, with inotify and by
+# polling, and when nothing has changed, against the time taken to load
+# it again from scratch.
+from typing import Callable
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from sample_catalog import application_yaml, environment_yaml, make_directories, write_file
+from dralithus.catalog import catalog_path
+from dralithus.watch import CatalogWatcher, load_catalog
+
+
+def write_catalog(directory: str, environments: int, applications: int) -> None:
+  """
+    Write a catalog of environments and applications.
+
+    :param directory: The catalog directory
+    :param environments: The number of environments
+    :param applications: The number of applications
+  """
+  make_directories(directory, ('environments', 'applications', 'configuration'))
+  for i in range(environments):
+    write_file(directory, 'environments', f'env{i}',
+               environment_yaml(i) + f'configuration:\n  region: region{i % 10}\n')
+  for i in range(applications):
+    write_file(directory, 'applications', f'app{i}',
+               application_yaml(i) +
+               f'configuration:\n  port: {8000 + i % 1000}\n')
+
+
+def edit(directory: str, run: int) -> None:
+  """
+    Edit one environment and one application.
+
+    :param directory: The catalog directory
+    :param run: A number that makes the edit different from the others
+  """
+  for kind, name in (('environments', 'env0'), ('applications', 'app0')):
+    with open(catalog_path(directory, kind, name), 'a', encoding='utf-8') as file:
+      file.write(f'# edit {run}\n  edited: {run}\n')
+
+
+def timed(label: str, function: Callable[[], object]) -> None:
+  """
+    Time a function, and print the result.
+
+    :param label: What is being timed
+    :param function: The function to time
+  """
+  start = time.perf_counter()
+  result = function()
+  print(f'{label:32} {(time.perf_counter() - start) * 1000:10.1f} ms {result!s:>8}')
+
+
+def main() -> int:
+  """
+    Run the benchmark.
+
+    :return: The exit code
+  """
+  parser = argparse.ArgumentParser(description='Benchmark keeping a loaded catalog up to date')
+  parser.add_argument('--environments', type=int, default=2000,
+    help='The number of environments')
+  parser.add_argument('--applications', type=int, default=5000,
+    help='The number of applications')
+  options = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as catalog, tempfile.TemporaryDirectory() as cache:
+    os.environ['DRALITHUS_CATALOG'] = catalog
+    os.environ['DRALITHUS_CACHE_DIR'] = cache
+    write_catalog(catalog, options.environments, options.applications)
+    # The files are made old enough that polling trusts their stat.
+    for kind in ('environments', 'applications'):
+      for name in os.listdir(os.path.join(catalog, kind)):
+        os.utime(os.path.join(catalog, kind, name), ns=(0, 0))
+    timed('load (cold)', load_catalog)
+    watchers = [('inotify', CatalogWatcher()), ('polled', CatalogWatcher(use_inotify=False))]
+    for run, (label, watcher) in enumerate(watchers):
+      if label == 'inotify' and not watcher.uses_inotify:
+        continue
+      watcher.changes()
+      edit(catalog, run)
+      timed(f'refresh {label} (one edit)', watcher.refresh)
+      timed(f'refresh {label} (no change)', watcher.refresh)
+      watcher.close()
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -21,7 +21,22 @@
 # <https://www.gnu.org/licenses/>.
 # -------------------------------------------------------------------
 from __future__ import annotations
+from functools import cache
+from typing import Any, Iterable, Mapping
+
+from dralithus.catalog import (
+  Details, catalog_directory, depends_from, details_from, document_from)
 from dralithus.errors import DralithusApplicationError
+from dralithus.inventory import inventory_enabled, open_inventory
+from dralithus.name_index import LabelIndex, NameIndex
+from dralithus.snapshot import Entry, documents, read_document
+
+# The directory of the catalog that holds application files.
+_KIND = 'applications'
+
+# The applications loaded from each catalog, by catalog directory and
+# name.
+_loaded: dict[tuple[str, str], Application] = {}
 
 
 class Application:
@@ -31,16 +46,27 @@ class Application:
   This class encapsulates the details of an application, such as its
   name, version, and any other relevant metadata.
   """
+  __slots__ = ('_name', '_description', '_labels', '_configuration', '_depends')
 
-  def __init__(self, name: str, description: str) -> None:
+  def __init__(
+      self,
+      name: str,
+      details: Details | None = None,
+      depends: Iterable[str] = ()) -> None:
     """
     Initialize the application with a name and version.
 
     :param name: The name of the application
-    :param description: A brief description of the application
+    :param details: The description of the application, its labels,
+      e.g. {'team': 'payments'}, and its configuration in every
+      environment. Defaults to none.
+    :param depends: The names of the applications that must be
+      deployed to an environment before this application is
     """
     self._name = name
-    self._description = description
+    self._description, self._labels, self._configuration = \
+      Details('', {}, {}) if details is None else details
+    self._depends = tuple(depends)
 
   def __hash__(self) -> int:
     """
@@ -79,24 +105,212 @@ class Application:
     """A brief description of the application."""
     return self._description
 
+  @property
+  def labels(self) -> dict[str, str]:
+    """The labels of the application."""
+    return self._labels
+
+  @property
+  def configuration(self) -> Mapping[str, Any]:
+    """The configuration layer of the application."""
+    return self._configuration
+
+  @property
+  def depends(self) -> tuple[str, ...]:
+    """The names of the applications this application depends on."""
+    return self._depends
+
   @classmethod
   def load(cls, name: str) -> Application:
     """
     Load an application by its name.
 
-    This function simulates loading an application from a data source.
-    In a real application, this might involve reading from a database
-    or configuration file.
+    The application is read from applications/<name>.yaml in the
+    catalog directory (see dralithus.catalog), by way of the snapshot
+    of the applications directory (see dralithus.snapshot). Later
+    loads of the same application return the same object.
 
     :param name: The name of the application to load
     :return: An Application instance representing the loaded application
+    :raises DralithusApplicationError: If the application does not
+      exist or its file is not valid
+    """
+    return _load(catalog_directory(), name)
+
+  @classmethod
+  def reload(cls, names: Iterable[str]) -> None:
+    """
+    Bring applications up to date with their files, after the files
+    have changed.
+
+    Only the files of these applications are parsed again, and the
+    snapshot of the applications directory in memory is updated with
+    them. An application that was loaded is then updated in place, so
+    that everything that holds it sees the change. One that was not is
+    loaded. One whose file was removed, or is no longer valid, is
+    forgotten, so that loading it again says why. The index is built
+    again the next time it is used.
+
+    :param names: The names of the applications whose files changed
+    """
+    directory = catalog_directory()
+    snapshot = None if inventory_enabled() else _documents(directory)
+    for name in names:
+      key = (directory, name)
+      if snapshot is not None:
+        entry = read_document(directory, _KIND, name)
+        if entry is None:
+          snapshot.pop(name, None)
+        else:
+          snapshot[name] = entry
+      try:
+        application = _read(directory, name)
+      except DralithusApplicationError:
+        _loaded.pop(key, None)
+        continue
+      # pylint: disable=protected-access
+      loaded = _loaded.setdefault(key, application)
+      loaded._description = application._description
+      loaded._labels = application._labels
+      loaded._configuration = application._configuration
+      loaded._depends = application._depends
+    _name_index.cache_clear()
+
+  @classmethod
+  def from_document(cls, name: str, document: Mapping[str, Any]) -> Application:
+    """
+    Create an application from the contents of its catalog file.
+
+    The file is a mapping, in which every key is optional:
+
+      description: A sample application
+      labels:
+        team: payments
+      configuration:
+        port: 8080
+      depends: [ledger]
+
+    :param name: The name of the application
+    :param document: The contents of the file
+    :return: The application
+    :raises ValueError: If the contents are not valid
+    """
+    return Application(name, details_from(document), depends_from(document))
+
+  @classmethod
+  def index(cls) -> NameIndex:
+    """
+    The index of the names of all known applications.
+
+    :return: The name index
+    """
+    return _name_index(catalog_directory())
+
+  @classmethod
+  def select(cls, selectors: Iterable[str]) -> set[Application]:
+    """
+    Load the applications that match a list of selectors.
+
+    Selectors are names, patterns or key=value labels, as described in
+    NameIndex.select(). E.g. team=payments selects every application
+    labelled with team=payments.
+
+    :param selectors: The selectors
+    :return: The selected applications
     """
-    # Simulate loading an application with a fixed description
     try:
-      applications = {
-        'dralithus': Application('dralithus', 'The Dralithus application deployment system'),
-        'sample': Application('sample', 'A sample application for demonstration purposes')
-      }
-      return applications[name]
+      return set(cls.load(name) for name in cls.index().select(selectors))
     except KeyError as ex:
-      raise DralithusApplicationError(f'Application \'{name}\' not found') from ex
+      raise DralithusApplicationError(f'Application \'{ex.args[0]}\' not found') from ex
+    except ValueError as ex:
+      raise DralithusApplicationError(f'Invalid application selector: {ex}') from ex
+
+
+@cache
+def _documents(directory: str) -> dict[str, Entry]:
+  """
+  The parsed contents of every application file in a catalog.
+
+  :param directory: The catalog directory
+  :return: The snapshot entry of each application file, by name
+  """
+  return documents(directory, _KIND)
+
+
+def _entry(directory: str, name: str) -> Entry | None:
+  """
+  What is known about an application file in a catalog.
+
+  The entry comes from the inventory if the catalog is indexed in one
+  (see dralithus.inventory), and from the snapshot otherwise.
+
+  :param directory: The catalog directory
+  :param name: The name of the application
+  :return: The entry, or None if there is no such application
+  """
+  if inventory_enabled():
+    return open_inventory(directory).entry(_KIND, name)
+  return _documents(directory).get(name)
+
+
+def _load(directory: str, name: str) -> Application:
+  """
+  Load an application from its file in a catalog.
+
+  The result is memoised, until it is reloaded. Errors are not
+  memoised.
+
+  :param directory: The catalog directory
+  :param name: The name of the application
+  :return: The application
+  :raises DralithusApplicationError: If the application does not exist
+    or its file is not valid
+  """
+  application = _loaded.get((directory, name))
+  if application is None:
+    application = _loaded.setdefault((directory, name), _read(directory, name))
+  return application
+
+
+def _read(directory: str, name: str) -> Application:
+  """
+  Create an application from its file in a catalog.
+
+  :param directory: The catalog directory
+  :param name: The name of the application
+  :return: The application
+  :raises DralithusApplicationError: If the application does not exist
+    or its file is not valid
+  """
+  entry = _entry(directory, name)
+  if entry is None:
+    raise DralithusApplicationError(f'Application \'{name}\' not found')
+  try:
+    if entry.error is not None:
+      raise ValueError(entry.error)
+    return Application.from_document(name, document_from(entry.document))
+  except ValueError as ex:
+    raise DralithusApplicationError(f'Invalid application {name}: {ex}') from ex
+
+
+@cache
+def _name_index(directory: str) -> NameIndex:
+  """
+  The index of the names and labels of the applications in a catalog.
+
+  It is built once, the first time it is needed. The label index is
+  only built the first time a label is used. If the catalog is indexed
+  in an inventory, the names and labels are read from the inventory.
+
+  :param directory: The catalog directory
+  :return: The name index
+  """
+  if inventory_enabled():
+    return open_inventory(directory).name_index(_KIND, DralithusApplicationError)
+
+  names = list(_documents(directory))
+
+  def labels() -> LabelIndex:
+    return LabelIndex({name: _load(directory, name).labels for name in names})
+
+  return NameIndex(names, labels)
@@ -0,0 +1,355 @@
+"""
+  batch_command.py: Define the BatchCommand class.
+"""
+# -------------------------------------------------------------------
+# batch_command.py: Define the BatchCommand class.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# drl batch runs many command lines in one process, so that tools
+# that would otherwise run drl once per application and environment
+# pay for interpreter start up, imports and catalog loading only once.
+#
+# The command lines are read one at a time, and each is made into a
+# command by dralithus.command.make(), just as drl itself would, and
+# executed on a pool of worker threads. Commands print their output,
+# so while a batch runs, sys.stdout and sys.stderr are replaced by
+# streams that send what each worker thread writes to a buffer of its
+# own. The output of each command is written out, in the order the
+# command lines were read, once the command completes.
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Generator, Iterator, NamedTuple, TextIO, override
+import io
+import os
+import shlex
+import sys
+import threading
+
+from dralithus.command import Command, make as make_command
+from dralithus.command_line.command_line import CommandLine
+from dralithus.errors import CommandLineError, DralithusError, ExitCode
+
+# The name of the file that stands for standard input.
+STDIN = '-'
+
+
+class BatchResult(NamedTuple):
+  """
+    The result of running one command line of a batch.
+  """
+  line: str # The command line, without the program name
+  exit_code: int # The exit code of the command
+  stdout: str # What the command wrote to standard output
+  stderr: str # What the command wrote to standard error
+
+
+class _ThreadStream(io.TextIOBase):
+  """
+    A text stream that each thread can redirect to a buffer of its own.
+
+    Text written by a thread that has not redirected the stream is
+    written to the underlying stream.
+  """
+  def __init__(self, stream: TextIO) -> None:
+    """
+      Initialize the stream.
+
+      :param stream: The stream to write to when a thread has not
+        redirected the stream
+    """
+    super().__init__()
+    self._stream = stream
+    self._local = threading.local()
+
+  @contextmanager
+  def redirect(self, buffer: io.StringIO) -> Generator[None, None, None]:
+    """
+      Redirect what the current thread writes to a buffer.
+
+      :param buffer: The buffer to write to
+    """
+    self._local.buffer = buffer
+    try:
+      yield
+    finally:
+      self._local.buffer = None
+
+  def writable(self) -> bool:
+    """
+      The stream is writable.
+
+      :return: True
+    """
+    return True
+
+  def write(self, text: str) -> int:
+    """
+      Write text to the current thread's buffer, or to the underlying
+      stream if the thread has not redirected the stream.
+
+      :param text: The text to write
+      :return: The number of characters written
+    """
+    buffer: io.StringIO | None = getattr(self._local, 'buffer', None)
+    if buffer is not None:
+      return buffer.write(text)
+    return self._stream.write(text)
+
+  def flush(self) -> None:
+    """
+      Flush the underlying stream.
+    """
+    self._stream.flush()
+
+
+class BatchCommand(Command):
+  """
+    Command to run many command lines in one process.
+  """
+  @override
+  def __init__(self, program: str, sources: list[str], jobs: int, verbosity: int) -> None:
+    """
+      Initialize the 'batch' command.
+
+      :param program: The name of the program, which is put in front
+        of every command line
+      :param sources: The files to read command lines from, in order.
+        '-' is standard input.
+      :param jobs: The number of commands to run at the same time
+      :param verbosity: The verbosity level of the command
+    """
+    super().__init__('batch', verbosity)
+    assert len(sources) > 0, 'Sources cannot be an empty list.'
+    assert jobs > 0, 'Jobs must be a positive number.'
+    self._program = program
+    self._sources = sources
+    self._jobs = jobs
+
+  def __eq__(self, other: object) -> bool:
+    """
+      Check if two batch commands are equal.
+
+      :param other: The other command to compare with
+      :return: True if the commands are equal, False otherwise
+    """
+    if not isinstance(other, BatchCommand):
+      return NotImplemented
+    return (super().__eq__(other)
+      and self.program == other.program
+      and self.sources == other.sources
+      and self.jobs == other.jobs)
+
+  def __str__(self) -> str:
+    """
+      Return a string representation of the batch command.
+
+      :return: A string representation of the batch command
+    """
+    return f'BatchCommand(program={self.program}, sources={self.sources}, ' \
+      + f'jobs={self.jobs}, verbosity={self.verbosity})'
+
+  @property
+  def program(self) -> str:
+    """
+      The name of the program, which is put in front of every command line.
+
+      :return: The name of the program
+    """
+    return self._program
+
+  @property
+  def sources(self) -> list[str]:
+    """
+      The files to read command lines from.
+
+      :return: The files, in the order they are read. '-' is standard input.
+    """
+    return self._sources
+
+  @property
+  def jobs(self) -> int:
+    """
+      The number of commands to run at the same time.
+
+      :return: The number of jobs
+    """
+    return self._jobs
+
+  def lines(self) -> Iterator[str]:
+    """
+      Read the command lines, one at a time.
+
+      Blank lines, and lines whose first non-blank character is '#',
+      are skipped.
+
+      :return: An iterator over the command lines
+      :raises CommandLineError: If a file cannot be read
+    """
+    for source in self.sources:
+      try:
+        if source == STDIN:
+          yield from _command_lines(sys.stdin)
+        else:
+          with open(source, encoding='utf-8') as file:
+            yield from _command_lines(file)
+      except (OSError, UnicodeDecodeError) as ex:
+        raise CommandLineError(self.program, self.name, self.verbosity,
+          f'Cannot read command lines from {source}: {ex}') from ex
+
+  def run_line(self, line: str) -> int:
+    """
+      Make and execute the command for one command line.
+
+      Errors are reported on standard error, as drl itself reports
+      them, and do not stop the batch.
+
+      :param line: The command line, without the program name
+      :return: The exit code of the command
+    """
+    # pylint: disable=import-outside-toplevel
+    from dralithus.help_command import HelpCommand
+    try:
+      args = [self.program] + shlex.split(line)
+      command = make_command(args)
+      if isinstance(command, BatchCommand):
+        raise CommandLineError(self.program, self.name, self.verbosity,
+          'A batch cannot run another batch')
+      exit_code = command.execute()
+      # A command line that is not valid becomes a help command that
+      # succeeds. In a batch, it must be reported as a failure.
+      if isinstance(command, HelpCommand) and command.error_message is not None:
+        return ExitCode.INVALID_COMMAND_LINE
+      return exit_code
+    except ValueError as ex:
+      # shlex could not split the line. E.g. it has an unclosed quote.
+      print(f'Invalid command line: {line}: {ex}', file=sys.stderr)
+      return ExitCode.INVALID_COMMAND_LINE
+    except DralithusError as ex:
+      print(ex, file=sys.stderr)
+      return ex.exit_code
+
+  def results(self) -> Iterator[BatchResult]:
+    """
+      Run every command line, and yield their results in order.
+
+      The commands run on a pool of worker threads. At most a few
+      commands more than there are workers are read ahead, so the
+      command lines are never all held in memory at once.
+
+      :return: An iterator over the results, in the order in which the
+        command lines were read
+      :raises CommandLineError: If a file cannot be read
+    """
+    with _captured_output() as (stdout, stderr), \
+        ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix='drl-batch') as pool:
+      def run(line: str) -> BatchResult:
+        stdout_buffer = io.StringIO()
+        stderr_buffer = io.StringIO()
+        with stdout.redirect(stdout_buffer), stderr.redirect(stderr_buffer):
+          exit_code = self.run_line(line)
+        return BatchResult(line, exit_code, stdout_buffer.getvalue(), stderr_buffer.getvalue())
+
+      pending: deque[Future[BatchResult]] = deque()
+      for line in self.lines():
+        pending.append(pool.submit(run, line))
+        if len(pending) > 2 * self.jobs:
+          yield pending.popleft().result()
+      while len(pending) > 0:
+        yield pending.popleft().result()
+
+  @override
+  def execute(self) -> int:
+    """
+      Execute the 'batch' command.
+
+      The output of each command is written as soon as it and every
+      command before it have completed. At verbosity 1 and above, the
+      output of each command is preceded by its command line and exit
+      code.
+
+      :return: The highest exit code of any command, or
+        ExitCode.SUCCESS if every command succeeded
+    """
+    total = 0
+    failed = 0
+    exit_code: int = ExitCode.SUCCESS
+    for result in self.results():
+      total += 1
+      if result.exit_code != ExitCode.SUCCESS:
+        failed += 1
+      exit_code = max(exit_code, result.exit_code)
+      if self.verbosity > 0:
+        print(f'==> {self.program} {result.line} (exit code {result.exit_code})')
+      sys.stdout.write(result.stdout)
+      sys.stderr.write(result.stderr)
+      sys.stdout.flush()
+    if failed > 0:
+      print(f'{failed} of {total} commands failed', file=sys.stderr)
+    return exit_code
+
+
+def _command_lines(file: TextIO) -> Iterator[str]:
+  """
+    Read the command lines in a file.
+
+    :param file: The file
+    :return: An iterator over the command lines that are not blank or
+      comments, with surrounding white space removed
+  """
+  for line in file:
+    line = line.strip()
+    if len(line) > 0 and not line.startswith('#'):
+      yield line
+
+
+@contextmanager
+def _captured_output() -> Generator[tuple[_ThreadStream, _ThreadStream], None, None]:
+  """
+    Replace sys.stdout and sys.stderr with streams that each thread can
+    redirect.
+
+    :return: The replacement standard output and standard error streams
+  """
+  stdout, stderr = sys.stdout, sys.stderr
+  thread_stdout, thread_stderr = _ThreadStream(stdout), _ThreadStream(stderr)
+  sys.stdout, sys.stderr = thread_stdout, thread_stderr
+  try:
+    yield thread_stdout, thread_stderr
+  finally:
+    sys.stdout, sys.stderr = stdout, stderr
+
+
+def make(cmdln: CommandLine) -> BatchCommand:
+  """
+    Create a batch command from the command line arguments.
+
+    The parameters are the files to read command lines from. If there
+    are none, command lines are read from standard input.
+
+    :param cmdln: The command line object containing the parsed arguments
+    :return: The batch command object
+  """
+  jobs = cmdln.command_options.get('jobs', cmdln.global_options.get('jobs', None))
+  if jobs is None:
+    jobs = os.cpu_count() or 1
+  assert isinstance(jobs, int)
+  sources = list(cmdln.iter_parameters())
+  return BatchCommand(
+    cmdln.program, sources if len(sources) > 0 else [STDIN], jobs, cmdln.verbosity)
@@ -0,0 +1,130 @@
+"""
+  cache.py: Where dralithus keeps what it caches between runs.
+"""
+# -------------------------------------------------------------------
+# cache.py: Where dralithus keeps what it caches between runs.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Every file that dralithus caches between runs (the plugin command
+# index, snapshots of the catalog, the dependency graph, the inventory,
+# the state of deployed targets and the files that passed validation)
+# is kept in one cache directory, in subdirectories private to the
+# user.
+#
+# Many runs of drl may read and write the same file at once. So a file
+# is always written under a temporary name, unique to the process and
+# thread, and then renamed over the old one. A reader sees either the
+# old file or the new one, never one partially written.
+#
+# Some of these files are pickles, and unpickling a file runs whatever
+# code whoever wrote it chose. So a file is only read back if it, and
+# its directory, belong to the user and no one else may write them.
+# Otherwise, it is ignored, as if it were not there, and computed
+# again.
+from __future__ import annotations
+import os
+import threading
+
+
+def cache_directory() -> str:
+  """
+    The directory in which dralithus caches data between runs.
+
+    This is $DRALITHUS_CACHE_DIR if it is set, otherwise the dralithus
+    directory in $XDG_CACHE_HOME, or in ~/.cache if that is not set.
+
+    :return: The path of the cache directory
+  """
+  directory = os.environ.get('DRALITHUS_CACHE_DIR')
+  if directory:
+    return directory
+  cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+  return os.path.join(cache_home, 'dralithus')
+
+
+def _is_private(status: os.stat_result) -> bool:
+  """
+    Check that a file belongs to the user, and that no one else may
+    write it.
+
+    :param status: The status of the file
+    :return: True if it does, and no one else may, False otherwise
+  """
+  return status.st_uid == os.getuid() and status.st_mode & 0o022 == 0
+
+
+def is_private(path: str) -> bool:
+  """
+    Check that a file in the cache directory, and its directory, are
+    private to the user (see _is_private).
+
+    :param path: The path of the file
+    :return: True if they are, False if they are not, or the file does
+      not exist
+  """
+  try:
+    return _is_private(os.stat(os.path.dirname(path))) and _is_private(os.stat(path))
+  except OSError:
+    return False
+
+
+def read_private(path: str) -> bytes | None:
+  """
+    Read a file in the cache directory, if it and its directory are
+    private to the user (see _is_private).
+
+    :param path: The path of the file
+    :return: What the file holds, or None if it cannot be read, or is
+      not private to the user
+  """
+  try:
+    if not _is_private(os.stat(os.path.dirname(path))):
+      return None
+    with open(path, 'rb') as file:
+      if not _is_private(os.fstat(file.fileno())):
+        return None
+      return file.read()
+  except OSError:
+    return None
+
+
+def write_atomically(path: str, data: bytes) -> None:
+  """
+    Write a file in the cache directory.
+
+    The file is written under a temporary name and then renamed, so
+    that a concurrent run never reads a partially written file. The
+    file, and its directory if it does not exist, are created private
+    to the user, whatever their umask.
+    What is cached can always be computed again, so failure to write
+    the file is ignored.
+
+    :param path: The path of the file
+    :param data: What to write to it
+  """
+  temporary_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+  try:
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    with open(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as file:
+      file.write(data)
+    os.replace(temporary_path, path)
+  except OSError:
+    try:
+      os.remove(temporary_path)
+    except OSError:
+      pass
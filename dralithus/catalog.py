@@ -0,0 +1,575 @@
+"""
+  catalog.py: Locate and read the YAML files that describe
+  environments, applications and their configuration.
+"""
+# -------------------------------------------------------------------
+# catalog.py: Locate and read the YAML files that describe
+# environments, applications and their configuration.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# The catalog is a directory laid out as described in the README:
+#
+#   environments/<environment>.yaml
+#   applications/<application>.yaml
+#   configuration/<application>-<environment>.yaml
+#
+# It is $DRALITHUS_CATALOG if that is set, and the current directory
+# otherwise. The name of each environment or application is the name
+# of its file, less the .yaml extension, so the names in a catalog can
+# be listed without opening any of its files.
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterator, Mapping, NamedTuple
+import os
+import sys
+import weakref
+
+if TYPE_CHECKING:
+  import yaml
+
+# The extension of catalog files.
+EXTENSION = '.yaml'
+
+
+class Host(NamedTuple):
+  """
+    A host of an environment.
+
+    An environment can have a hundred thousand hosts, so a host is a
+    tuple rather than an object with a __dict__, and hosts with the same
+    labels share one mapping of them (see shared_labels()).
+  """
+  name: str # The name of the host, e.g. web1
+  labels: Mapping[str, str] # The labels of the host, e.g. {'rack': 'r12'}
+
+
+class Details(NamedTuple):
+  """
+    What the catalog file of an environment or application says about
+    it, other than its hosts or the applications it depends on.
+  """
+  description: str # A brief description, e.g. Production in Europe
+  labels: dict[str, str] # Metadata as key=value labels, e.g. {'tier': 'prod'}
+  configuration: Mapping[str, Any] # Its layer of configuration. See dralithus.configuration.
+
+
+class _Labels(dict[str, str]):
+  """
+    Labels that can be shared by the hosts that have them.
+  """
+  __slots__ = ('__weakref__',)
+
+
+# The labels of the hosts that are in memory, by their items. An entry
+# is removed when the last host with those labels is.
+_shared_labels: weakref.WeakValueDictionary[tuple[tuple[str, str], ...], _Labels] = \
+  weakref.WeakValueDictionary()
+
+
+def catalog_directory() -> str:
+  """
+    The directory that contains the catalog.
+
+    :return: The absolute path of $DRALITHUS_CATALOG if it is set,
+      otherwise of the current directory
+  """
+  return os.path.abspath(os.environ.get('DRALITHUS_CATALOG') or os.curdir)
+
+
+def is_valid_name(name: str) -> bool:
+  """
+    Check if a name can be the name of a catalog file.
+
+    A name must not be empty, contain a path separator or start with
+    a '.', so that it always names a file directly inside its catalog
+    directory.
+
+    :param name: The name
+    :return: True if the name is valid
+  """
+  return len(name) > 0 and not name.startswith('.') \
+    and os.sep not in name and (os.altsep is None or os.altsep not in name)
+
+
+def catalog_path(directory: str, kind: str, name: str) -> str:
+  """
+    The path of a catalog file.
+
+    :param directory: The catalog directory
+    :param kind: The kind of file: 'environments', 'applications' or
+      'configuration'
+    :param name: The name of the file, without its extension
+    :return: The path of the file
+    :raises ValueError: If the name is not valid
+  """
+  if not is_valid_name(name):
+    raise ValueError(f'Invalid name: {name!r}')
+  return os.path.join(directory, kind, name + EXTENSION)
+
+
+def catalog_names(directory: str, kind: str) -> list[str]:
+  """
+    List the names of the files of one kind in a catalog.
+
+    The directory is listed, but none of the files is opened.
+
+    :param directory: The catalog directory
+    :param kind: The kind of file: 'environments', 'applications' or
+      'configuration'
+    :return: The names, without their extensions. If the catalog has
+      no files of this kind, the list is empty.
+  """
+  try:
+    with os.scandir(os.path.join(directory, kind)) as entries:
+      return [entry.name[:-len(EXTENSION)] for entry in entries
+              if entry.name.endswith(EXTENSION) and is_valid_name(entry.name)
+              and entry.is_file()]
+  except (FileNotFoundError, NotADirectoryError):
+    return []
+
+
+def catalog_files(directory: str, kind: str) -> dict[str, os.stat_result]:
+  """
+    Stat the files of one kind in a catalog.
+
+    :param directory: The catalog directory
+    :param kind: The kind of file: 'environments', 'applications' or
+      'configuration'
+    :return: The stat result of each file, by name (without its
+      extension). If the catalog has no files of this kind, there are
+      none.
+  """
+  files: dict[str, os.stat_result] = {}
+  try:
+    with os.scandir(os.path.join(directory, kind)) as entries:
+      for entry in entries:
+        if entry.name.endswith(EXTENSION) and is_valid_name(entry.name) and entry.is_file():
+          files[entry.name[:-len(EXTENSION)]] = entry.stat()
+  except (FileNotFoundError, NotADirectoryError):
+    pass
+  return files
+
+
+def load_yaml(path: str) -> Any:
+  """
+    Read a YAML file.
+
+    See parse_yaml().
+
+    :param path: The path of the file
+    :return: The data in the file, or None if the file is empty
+    :raises FileNotFoundError: If the file does not exist
+    :raises OSError: If the file cannot be read
+    :raises ValueError: If the file is not valid YAML
+  """
+  with open(path, 'rb') as file:
+    return parse_yaml(file.read(), path)
+
+
+def parse_yaml(data: bytes, path: str) -> Any:
+  """
+    Parse the contents of a YAML file.
+
+    The contents are parsed with the C parser from libyaml if PyYAML
+    was built with it, and the pure Python parser otherwise. Only
+    plain data (mappings, sequences and scalars) is allowed.
+
+    :param data: The contents of the file
+    :param path: The path of the file, for error messages
+    :return: The data in the file, or None if the file is empty
+    :raises ValueError: If the contents are not valid YAML
+  """
+  # yaml is imported here, so that commands that do not read the
+  # catalog do not pay to import it.
+  import yaml  # pylint: disable=import-outside-toplevel
+  loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+  try:
+    return yaml.load(data, Loader=loader)
+  except yaml.YAMLError as ex:
+    raise ValueError(f'{path}: {ex}') from ex
+
+
+def parse_yaml_except(data: bytes | BinaryIO, path: str, key: str) -> Any:
+  """
+    Parse the contents of a YAML file, except for the sequence under
+    one key of its top level mapping.
+
+    The items of the sequence are parsed, to find where it ends, but
+    not made into objects, so the memory used does not grow with the
+    length of the sequence. Use parse_yaml_items() to read them. Any
+    other value of the key is parsed like the rest of the file. As the
+    items are skipped, anchors in them cannot be used after them.
+
+    :param data: The contents of the file, or the file open for reading
+    :param path: The path of the file, for error messages
+    :param key: The key
+    :return: The data in the file, without the key if its value is a
+      sequence, or None if the file is empty
+    :raises ValueError: If the contents are not valid YAML
+  """
+  import yaml  # pylint: disable=import-outside-toplevel,redefined-outer-name
+  events = _Events(yaml, data, path)
+  try:
+    if events.start_document():
+      return None
+    if not events.loader.check_event(yaml.MappingStartEvent):
+      return events.value()
+    start = events.loader.get_event()
+    mapping = yaml.MappingNode(
+      events.tag(yaml.MappingNode, start), [], start.start_mark, None)
+    events.anchor(start, mapping)
+    while not events.loader.check_event(yaml.MappingEndEvent):
+      key_node = events.compose()
+      if events.is_key(key_node, key) and events.loader.check_event(yaml.SequenceStartEvent):
+        events.skip()
+      else:
+        mapping.value.append((key_node, events.compose()))
+    return events.loader.construct_document(mapping)
+  except yaml.YAMLError as ex:
+    raise ValueError(f'{path}: {ex}') from ex
+  finally:
+    events.loader.dispose()
+
+
+def parse_yaml_items(data: bytes | BinaryIO, path: str, key: str) -> Iterator[Any]:
+  """
+    Parse, one at a time, the items of the sequence under one key of
+    the top level mapping of a YAML file.
+
+    Each item is made into objects only when it is reached, so only
+    one item is held in memory at a time.
+
+    :param data: The contents of the file, or the file open for reading
+    :param path: The path of the file, for error messages
+    :param key: The key
+    :return: An iterator over the items. If the file is empty, is not a
+      mapping or does not have the key, or the value of the key is
+      null, there are none.
+    :raises ValueError: If the contents are not valid YAML, or the
+      value of the key is neither a sequence nor null
+  """
+  import yaml  # pylint: disable=import-outside-toplevel,redefined-outer-name
+  events = _Events(yaml, data, path)
+  try:
+    if events.start_document() or not events.loader.check_event(yaml.MappingStartEvent):
+      return
+    events.loader.get_event()
+    while not events.loader.check_event(yaml.MappingEndEvent):
+      if not events.is_key(events.compose(), key):
+        # The value is composed, but not made into objects, so that
+        # the items can refer to any anchors in it.
+        events.compose()
+      elif events.loader.check_event(yaml.SequenceStartEvent):
+        events.loader.get_event()
+        while not events.loader.check_event(yaml.SequenceEndEvent):
+          yield events.value()
+        return
+      elif events.value() is not None:
+        raise ValueError(f'{path}: {key} must be a list')
+      else:
+        return
+  except yaml.YAMLError as ex:
+    raise ValueError(f'{path}: {ex}') from ex
+  finally:
+    events.loader.dispose()
+
+
+class _Events:
+  """
+    The events of a YAML parser, composed into nodes only where needed.
+
+    This does what the composer of PyYAML does, except that a caller
+    can compose one part of a document at a time, and skip the parts
+    it does not need without composing them.
+  """
+  def __init__(self, yaml_module: Any, data: bytes | BinaryIO, path: str) -> None:
+    """
+      Start parsing.
+
+      :param yaml_module: The yaml module
+      :param data: The contents of the file, or the file open for reading
+      :param path: The path of the file, for error messages
+    """
+    self._yaml = yaml_module
+    self._path = path
+    self._anchors: dict[str, yaml.Node] = {}
+    loader = getattr(yaml_module, 'CSafeLoader', yaml_module.SafeLoader)
+    self.loader: yaml.SafeLoader = loader(data)
+
+  def start_document(self) -> bool:
+    """
+      Read up to the first node of the document.
+
+      :return: True if the file is empty
+    """
+    self.loader.get_event()  # StreamStartEvent
+    if self.loader.check_event(self._yaml.StreamEndEvent):
+      return True
+    self.loader.get_event()  # DocumentStartEvent
+    return False
+
+  def tag(self, kind: type[yaml.Node], event: yaml.Event) -> str:
+    """
+      The tag of the node that an event starts.
+
+      :param kind: The class of the node
+      :param event: The event
+      :return: The tag
+    """
+    tag: str | None = getattr(event, 'tag')
+    if tag is None or tag == '!':
+      value = getattr(event, 'value', None)
+      return self.loader.resolve(kind, value, getattr(event, 'implicit'))
+    return tag
+
+  def anchor(self, event: yaml.Event, node: yaml.Node) -> None:
+    """
+      Record the node that an event starts, if the event has an anchor.
+
+      :param event: The event
+      :param node: The node
+    """
+    anchor: str | None = getattr(event, 'anchor', None)
+    if anchor is not None:
+      self._anchors[anchor] = node
+
+  def compose(self) -> yaml.Node:
+    """
+      Compose the next node.
+
+      :return: The node
+      :raises ValueError: If the node is an alias to an unknown anchor
+    """
+    module = self._yaml
+    event = self.loader.get_event()
+    if isinstance(event, module.AliasEvent):
+      if event.anchor not in self._anchors:
+        raise ValueError(f'{self._path}: found undefined alias {event.anchor!r}')
+      return self._anchors[event.anchor]
+    node: yaml.Node
+    if isinstance(event, module.ScalarEvent):
+      node = module.ScalarNode(self.tag(module.ScalarNode, event), event.value,
+                               event.start_mark, event.end_mark, style=event.style)
+      self.anchor(event, node)
+    elif isinstance(event, module.SequenceStartEvent):
+      node = module.SequenceNode(self.tag(module.SequenceNode, event), [],
+                                 event.start_mark, None, flow_style=event.flow_style)
+      self.anchor(event, node)
+      while not self.loader.check_event(module.SequenceEndEvent):
+        node.value.append(self.compose())
+      node.end_mark = self.loader.get_event().end_mark
+    else:
+      node = module.MappingNode(self.tag(module.MappingNode, event), [], event.start_mark,
+                                None, flow_style=getattr(event, 'flow_style'))
+      self.anchor(event, node)
+      while not self.loader.check_event(module.MappingEndEvent):
+        key = self.compose()
+        node.value.append((key, self.compose()))
+      node.end_mark = self.loader.get_event().end_mark
+    return node
+
+  def value(self) -> Any:
+    """
+      Compose the next node, and make it into objects.
+
+      :return: The value of the node
+    """
+    return self.loader.construct_document(self.compose())
+
+  def skip(self) -> None:
+    """
+      Skip the next node, without composing it.
+    """
+    depth = 0
+    while True:
+      event = self.loader.get_event()
+      if isinstance(event, self._yaml.CollectionStartEvent):
+        depth += 1
+      elif isinstance(event, self._yaml.CollectionEndEvent):
+        depth -= 1
+      if depth == 0:
+        return
+
+  def is_key(self, node: yaml.Node, key: str) -> bool:
+    """
+      Check if a node is a key.
+
+      :param node: The node
+      :param key: The key
+      :return: True if the node is a scalar whose value is the key
+    """
+    return isinstance(node, self._yaml.ScalarNode) \
+      and node.tag == 'tag:yaml.org,2002:str' and node.value == key
+
+
+def labels_from(document: Mapping[str, Any]) -> dict[str, str]:
+  """
+    Get the labels from a catalog document.
+
+    Labels are a mapping of keys to values under the key 'labels'.
+    Values that YAML reads as numbers or booleans are converted back
+    to strings, so that 'version: 2' is the label version=2. Keys are
+    interned, as the same few are used over and over. Values are not,
+    as interned strings are never freed, and there can be as many of
+    them as there are hosts.
+
+    :param document: The document
+    :return: The labels
+    :raises ValueError: If the labels are not a mapping of scalars
+  """
+  labels = document.get('labels') or {}
+  if not isinstance(labels, Mapping):
+    raise ValueError('labels must be a mapping of keys to values')
+  result: dict[str, str] = {}
+  for key, value in labels.items():
+    if isinstance(value, (Mapping, list)) or value is None:
+      raise ValueError(f'The value of label {key} must be a string')
+    result[sys.intern(str(key))] = str(value).lower() if isinstance(value, bool) else str(value)
+  return result
+
+
+def description_from(document: Mapping[str, Any]) -> str:
+  """
+    Get the description from a catalog document.
+
+    :param document: The document
+    :return: The description, or '' if there is none
+    :raises ValueError: If the description is not a string
+  """
+  description = document.get('description') or ''
+  if not isinstance(description, str):
+    raise ValueError('description must be a string')
+  return description
+
+
+def configuration_from(document: Mapping[str, Any]) -> Mapping[str, Any]:
+  """
+    Get the configuration layer from a catalog document.
+
+    :param document: The document
+    :return: The mapping under the key 'configuration', or an empty
+      mapping if there is none
+    :raises ValueError: If the configuration is not a mapping
+  """
+  configuration = document.get('configuration') or {}
+  if not isinstance(configuration, Mapping):
+    raise ValueError('configuration must be a mapping')
+  return configuration
+
+
+def details_from(document: Mapping[str, Any]) -> Details:
+  """
+    Get the description, labels and configuration from a catalog
+    document.
+
+    :param document: The document
+    :return: The details
+    :raises ValueError: If any of them is not valid
+  """
+  return Details(description_from(document), labels_from(document), configuration_from(document))
+
+
+def depends_from(document: Mapping[str, Any]) -> tuple[str, ...]:
+  """
+    Get the names of the applications an application depends on from
+    its catalog document.
+
+    :param document: The document
+    :return: The names under the key 'depends', in order, or none if
+      there are none
+    :raises ValueError: If depends is not a list of application names
+  """
+  depends = document.get('depends') or []
+  if not (isinstance(depends, list)
+          and all(isinstance(name, str) and is_valid_name(name) for name in depends)):
+    raise ValueError('depends must be a list of application names')
+  return tuple(depends)
+
+
+def host_from(host: Any) -> Host:
+  """
+    Get a host from an item of the hosts of an environment document.
+
+    See hosts_from().
+
+    :param host: The item
+    :return: The name and labels of the host
+    :raises ValueError: If the item is not a valid host
+  """
+  if isinstance(host, str):
+    return Host(host, shared_labels({}))
+  if isinstance(host, Mapping) and isinstance(host.get('name'), str):
+    return Host(host['name'], shared_labels(labels_from(host)))
+  raise ValueError(f'A host must be a name, or a mapping with a name: {host!r}')
+
+
+def shared_labels(labels: Mapping[str, str]) -> Mapping[str, str]:
+  """
+    Get the one mapping of some labels that every host with the same
+    labels shares.
+
+    Most hosts have the labels of many others, e.g. the same rack and
+    role, so sharing them keeps the memory used by each host small. The
+    mapping must not be changed.
+
+    :param labels: The labels
+    :return: The shared mapping of the labels
+  """
+  key = tuple(labels.items())
+  shared = _shared_labels.get(key)
+  if shared is None:
+    shared = _Labels((sys.intern(name), value) for name, value in key)
+    _shared_labels[key] = shared
+  return shared
+
+
+def hosts_from(document: Mapping[str, Any]) -> list[Host]:
+  """
+    Get the hosts from an environment document.
+
+    Hosts are a list under the key 'hosts'. Each host is either its
+    name, or a mapping with a name and, optionally, labels:
+
+      hosts:
+        - name: web1
+          labels:
+            rack: r12
+        - db1
+
+    :param document: The document
+    :return: The name and labels of each host
+    :raises ValueError: If the hosts are not valid
+  """
+  hosts = document.get('hosts') or []
+  if not isinstance(hosts, list):
+    raise ValueError('hosts must be a list')
+  return [host_from(host) for host in hosts]
+
+
+def document_from(data: Any) -> Mapping[str, Any]:
+  """
+    Check that the data in a catalog file is a document.
+
+    :param data: The data returned by load_yaml()
+    :return: The document. An empty file is an empty document.
+    :raises ValueError: If the data is not a mapping
+  """
+  if data is None:
+    return {}
+  if not isinstance(data, Mapping):
+    raise ValueError('The file must contain a mapping')
+  return data
@@ -27,6 +27,20 @@ from dralithus.command_line.command_line import parse
 from dralithus.command_line.options import Options
 from dralithus.errors import CommandLineError
 
+# The module that implements each command, by command name. A command's
+# module is only imported when that command is run, so that running
+# one command does not pay to import all the others. Each module must
+# define a make(cmdln: CommandLine) function that creates the command.
+# Commands provided by other packages are found by dralithus.plugins.
+COMMANDS: dict[str, str] = {
+  'applications': 'dralithus.query_command',
+  'batch': 'dralithus.batch_command',
+  'deploy': 'dralithus.deploy_command',
+  'hosts': 'dralithus.query_command',
+  'plan': 'dralithus.plan_command',
+  'validate': 'dralithus.validate_command',
+}
+
 
 class Command(ABC):
   """
@@ -107,12 +121,10 @@ def make(args: list[str]) -> Command:
     :param args: The command line arguments
     :return: The command object
   """
-  # We import the command modules here to avoid circular imports.
+  # The command modules are imported here, rather than at the top of
+  # this module, both to avoid circular imports and so that only the
+  # module for the command being run is imported.
   # pylint: disable=import-outside-toplevel
-  from dralithus.help_command import (
-    make_from_command_line as make_help_from_command_line,
-    make_from_error as make_help_from_error)
-  from dralithus.deploy_command import make as make_deploy
 
   # The type ignore directives in the code below are to bypass
   # a bug in how mypy runs within IntelliJ IDEA. The error does
@@ -121,13 +133,31 @@ def make(args: list[str]) -> Command:
     cmdln = parse(args)
 
     if is_help_requested(cmdln.command_name, cmdln.global_options, cmdln.command_options):
+      from dralithus.help_command import make_from_command_line as make_help_from_command_line
       return make_help_from_command_line(cmdln)  # type  ignore[return-value]
 
-    if cmdln.command_name == 'deploy':
-      return make_deploy(cmdln)  # type: ignore[return-value]
+    command: Command
+    module_name = COMMANDS.get(cmdln.command_name) if cmdln.command_name is not None else None
+    if module_name is not None:
+      # __import__() is used rather than importlib.import_module() so
+      # that the import is reported by python -X importtime.
+      command = __import__(module_name, fromlist=['make']).make(cmdln)
+      return command
+
+    if cmdln.command_name is not None:
+      # Commands provided by other packages are only looked for if the
+      # command is not built in.
+      from dralithus.plugins import load, plugin_commands
+      entry_point = plugin_commands().get(cmdln.command_name)
+      if entry_point is not None:
+        command = load(entry_point)(cmdln)
+        assert isinstance(command, Command), \
+          f'Plugin {entry_point} for command \'{cmdln.command_name}\' did not return a Command'
+        return command
 
     message = 'No command specified' if cmdln.command_name is None \
       else f'Unknown command \'{cmdln.command_name}\' specified'
     raise CommandLineError(cmdln.program, cmdln.command_name, cmdln.verbosity, message)
   except CommandLineError as ex:
+    from dralithus.help_command import make_from_error as make_help_from_error
     return make_help_from_error(ex)  # type: ignore[return-value]
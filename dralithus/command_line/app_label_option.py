@@ -0,0 +1,168 @@
+"""
+  app_label_option.py: Define class AppLabelOption
+"""
+from __future__ import annotations
+from typing import override
+
+from dralithus.command_line.option import Option, ValueArity
+from dralithus.name_index import is_label
+
+
+class AppLabelOption(Option):
+  """
+    A class to represent an application label option.
+
+    The value is a comma separated list of key=value labels. Only
+    applications that carry every one of the labels are selected.
+    E.g. --app-label team=payments,tier=web
+  """
+  value_arity = ValueArity.REQUIRED
+
+  def __init__(self, flag: str, labels: set[str]) -> None:
+    """
+      Initialize the application label option with a set of labels.
+
+      :param flag: The flag string used to create the option
+      :param labels: The set of key=value labels
+    """
+    super().__init__()
+    self._flag = flag
+    self._labels = labels
+
+  @classmethod
+  def supported_short_flags(cls) -> list[str]:
+    """
+      The short flag for this option.
+
+      :return: This option does not have a short flag
+    """
+    return []
+
+  @classmethod
+  def supported_long_flags(cls) -> list[str]:
+    """
+      The long flags for this option.
+
+      :return: A list containing the long flags 'app-label' and 'application-label'
+    """
+    return ['app-label', 'application-label']
+
+  @override
+  def __eq__(self, other: object) -> bool:
+    """
+      Check if two options are equal.
+
+      :param other: The other option to compare to
+      :return: True if the options are equal, False otherwise
+    """
+    if not isinstance(other, AppLabelOption):
+      return False
+    return self._flag == other._flag and self._labels == other._labels
+
+  @override
+  @property
+  def flag(self) -> str:
+    """
+      The flag string which was used to create this option.
+
+      :return: The flag string used to create this option
+    """
+    return self._flag
+
+  @override
+  @property
+  def value(self) -> set[str]:
+    """
+      Get the value of the application label option.
+
+      :return: The set of key=value labels
+    """
+    return self._labels
+
+  @override
+  def add_to(self, dictionary: dict[str, None | bool | int | str | set[str]]) -> None:
+    """
+      Add the option to a dictionary.
+
+      The labels are added under the key 'application_labels', which
+      is only present if an application label option was given.
+
+      :param dictionary: The dictionary to add the option to
+    """
+    labels = dictionary.get('application_labels', None)
+    if labels is None:
+      dictionary['application_labels'] = set(self.value)
+    else:
+      assert isinstance(labels, set)
+      labels |= self.value
+
+  @classmethod
+  def is_option(cls, arg: str, next_arg: str | None) -> bool:
+    """
+      Check if the argument is an application label option.
+
+      :param arg: The argument string
+      :param next_arg: The next argument string
+      :return: True if the argument is an application label option
+    """
+    flag, str_value, _ = cls._extract_value(arg, next_arg)
+    if flag not in cls.supported_long_flags() or not arg.startswith('--'):
+      return False
+    if str_value is None:
+      return False
+    return all(is_label(label) for label in str_value.split(','))
+
+  @classmethod
+  def is_valid_value_type(cls, str_value: str) -> bool:
+    """
+      Check if the value is a comma separated list of labels.
+
+      :param str_value: The value to check
+      :return: True if every element of the list is a key=value label
+    """
+    return all(is_label(label) for label in str_value.split(','))
+
+  @classmethod
+  def _parse_value(cls, str_value: str) -> set[str]:
+    """
+      Convert a comma separated list of labels to a set.
+
+      Whitespace around keys and values is removed.
+
+      :param str_value: The comma separated list of labels
+      :return: The set of key=value labels
+      :raises ValueError: If any element of the list is not a label
+    """
+    labels: set[str] = set()
+    for label in str_value.split(','):
+      if not is_label(label):
+        raise ValueError(f'Invalid label: {label}. Labels must be of the form key=value')
+      key, _, value = label.partition('=')
+      labels.add(f'{key.strip()}={value.strip()}')
+    return labels
+
+  @classmethod
+  def _create(cls, flag: str, value: None | bool | int | str | set[str]) -> AppLabelOption:
+    """
+      Create an AppLabelOption object.
+
+      :param flag: The flag string used to create the option
+      :param value: The set of labels
+      :return: The AppLabelOption object
+    """
+    assert isinstance(value, set)
+    return AppLabelOption(flag, value)
+
+  @classmethod
+  def make(cls, current_arg: str, next_arg: str | None) -> tuple[AppLabelOption, bool]:
+    """
+      Create an AppLabelOption object from command line arguments.
+
+      :param current_arg: The current argument string
+      :param next_arg: The next argument string
+      :return: A tuple containing the AppLabelOption object and a boolean indicating
+        whether to skip the next argument
+    """
+    assert cls.is_option(current_arg, next_arg)
+    flag, str_value = cls._split_flag_value(current_arg)
+    return cls._make_from_parts(flag, str_value, next_arg)
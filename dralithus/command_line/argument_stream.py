@@ -0,0 +1,136 @@
+"""
+  argument_stream.py: Define class ArgumentStream
+"""
+from __future__ import annotations
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator
+
+
+def _read_response_file(path: str) -> Iterator[str]:
+  """
+    Read the arguments in a response file, one per line.
+
+    The file is read lazily, a line at a time, so that response files
+    with millions of arguments can be processed without holding them
+    all in memory. Line endings are stripped, and empty lines are
+    skipped. No other processing (quoting, comments, nested response
+    files) is done.
+
+    :param path: The path of the response file
+    :return: An iterator over the arguments in the file
+    :raises ValueError: If the file cannot be read
+  """
+  try:
+    with open(path, encoding='utf-8') as file:
+      for line in file:
+        arg = line.rstrip('\r\n')
+        if len(arg) > 0:
+          yield arg
+  except OSError as ex:
+    raise ValueError(f'Cannot read response file {path}: {ex.strerror}') from ex
+
+
+def is_response_file(arg: str) -> bool:
+  """
+    Check if an argument names a response file.
+
+    A response file argument is an '@' followed by the path of the
+    file. For example, @targets.txt.
+
+    :param arg: The argument string
+    :return: True if the argument names a response file
+  """
+  return len(arg) > 1 and arg.startswith('@')
+
+
+def _expand_response_files(args: Iterable[str]) -> Iterator[str]:
+  """
+    Replace each response file argument with the arguments it contains.
+
+    :param args: The command line arguments
+    :return: An iterator over the expanded arguments
+  """
+  for arg in args:
+    if is_response_file(arg):
+      yield from _read_response_file(arg[1:])
+    else:
+      yield arg
+
+
+class ArgumentStream:
+  """
+    A forward only stream of command line arguments.
+
+    The stream reads arguments from an iterable one at a time,
+    expanding any response files (@file) as it goes. Only as many
+    arguments as the parser needs to look ahead are ever buffered,
+    so the arguments that follow the options can be consumed as a
+    lazy iterator however many of them there are.
+  """
+  def __init__(self, args: Iterable[str], start: int = 0) -> None:
+    """
+      Initialize the stream.
+
+      :param args: The command line arguments
+      :param start: The number of arguments to skip before the stream
+        starts. The index of the stream starts at this value.
+    """
+    self._source: Iterator[str] = _expand_response_files(islice(args, start, None))
+    self._lookahead: deque[str] = deque()
+    self._index = start
+
+  @property
+  def index(self) -> int:
+    """
+      The number of arguments consumed from the stream so far.
+
+      This includes any arguments skipped by the start index.
+      Arguments read from a response file are counted individually.
+
+      :return: The index of the next argument in the stream
+    """
+    return self._index
+
+  def peek(self, offset: int = 0) -> str | None:
+    """
+      Look at an argument ahead in the stream without consuming it.
+
+      :param offset: How far ahead to look. 0 is the next argument.
+      :return: The argument, or None if the stream ends before it
+      :raises ValueError: If a response file cannot be read
+    """
+    while len(self._lookahead) <= offset:
+      arg = next(self._source, None)
+      if arg is None:
+        return None
+      self._lookahead.append(arg)
+    return self._lookahead[offset]
+
+  def advance(self, count: int = 1) -> None:
+    """
+      Consume arguments from the stream.
+
+      :param count: The number of arguments to consume
+      :raises ValueError: If a response file cannot be read
+    """
+    for _ in range(count):
+      if self._lookahead:
+        self._lookahead.popleft()
+      else:
+        next(self._source)
+      self._index += 1
+
+  def __iter__(self) -> Iterator[str]:
+    """
+      Consume the rest of the stream.
+
+      :return: An iterator over the remaining arguments
+      :raises ValueError: If a response file cannot be read
+    """
+    while self._lookahead:
+      self._index += 1
+      yield self._lookahead.popleft()
+    for arg in self._source:
+      self._index += 1
+      yield arg
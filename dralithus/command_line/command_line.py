@@ -20,7 +20,9 @@
 # along with this program.  If not, see
 # <https://www.gnu.org/licenses/>.
 # -------------------------------------------------------------------
+from typing import Iterable, Iterator
 
+from dralithus.command_line.argument_stream import ArgumentStream
 from dralithus.command_line.options import Options
 from dralithus.errors import CommandLineError
 
@@ -38,7 +40,7 @@ class CommandLine:
       command_name: str | None,
       global_options: Options,
       command_options: Options,
-      parameters: set[str]) -> None:
+      parameters: Iterable[str]) -> None:
     """
       Initialize the command line with arguments
 
@@ -46,13 +48,15 @@ class CommandLine:
       :param command_name: The name of the command
       :param global_options: Any global options specified before the command
       :param command_options: Any command specific options
-      :param parameters: Any parameters specified after the options
+      :param parameters: Any parameters specified after the options. This
+        may be a lazy iterable, in which case it is read at most once.
     """
     self._program = program
     self._command_name = command_name
     self._global_options = global_options
     self._command_options = command_options
     self._parameters = parameters
+    self._verbosity = _make_verbosity(global_options, command_options)
 
   def __eq__(self, other: object) -> bool:
     """
@@ -110,10 +114,47 @@ class CommandLine:
     """
       The parameters for the command line.
 
+      If the parameters have not been read yet, they are all read into
+      a set. Code that only needs to visit each parameter once should
+      use iter_parameters() instead.
+
       :return: The parameters
+      :raises: CommandLineError if the parameters cannot be read
     """
+    if not isinstance(self._parameters, set):
+      self._parameters = set(self._stream_parameters())
     return self._parameters
 
+  def iter_parameters(self) -> Iterator[str]:
+    """
+      Iterate over the parameters for the command line.
+
+      Unlike the parameters property, this does not build a set of the
+      parameters. If the parameters are still being read lazily (e.g.
+      from a response file) then they are streamed directly to the
+      caller, and can only be iterated over once.
+
+      :return: An iterator over the parameters
+      :raises: CommandLineError if the parameters cannot be read
+    """
+    if isinstance(self._parameters, set):
+      return iter(self._parameters)
+    return self._stream_parameters()
+
+  def _stream_parameters(self) -> Iterator[str]:
+    """
+      Stream the parameters that have not been read yet.
+
+      :return: An iterator over the parameters
+      :raises: CommandLineError if the parameters cannot be read
+    """
+    parameters, self._parameters = self._parameters, set()
+    try:
+      yield from parameters
+    except ValueError as ex:
+      raise CommandLineError(self.program, self.command_name, self.verbosity,
+        f'Invalid command line arguments: {ex}') from ex
+
   @property
   def verbosity(self) -> int:
     """
@@ -121,7 +162,7 @@ class CommandLine:
 
       :return: The verbosity level
     """
-    return _make_verbosity(self.global_options, self.command_options)
+    return self._verbosity
 
 def _parse_program(args: list[str]) -> tuple[str, int]:
   """
@@ -134,58 +175,60 @@ def _parse_program(args: list[str]) -> tuple[str, int]:
   assert len(args) > 0, "args must contain at least one argument (the name of the program)"
   return args[0], 1
 
-def _parse_global_options(args: list[str], index: int) -> tuple[Options, int, bool]:
+def _parse_global_options(args: ArgumentStream) -> tuple[Options, bool]:
   """
     Parse the global options from the command line arguments.
 
-    :param args: The command line arguments
-    :param index: The current index in the arguments list
-    :return: A tuple containing the global options and the next index,
-      and a boolean indicating if the last argument was a terminator
+    :param args: The command line arguments, positioned after the
+      program name
+    :return: A tuple containing the global options, and a boolean
+      indicating if the last argument was a terminator
     :raises: ValueError if the global options are invalid
   """
-  global_options = Options(args[index:])
-  return (
-    global_options,
-    index + global_options.end_index,
-    args[index + global_options.end_index - 1] == '--')
+  global_options = Options(args)
+  return global_options, global_options.terminated
 
 
-def _parse_command_name(args: list[str], index: int) -> tuple[str | None, int]:
+def _parse_command_name(args: ArgumentStream) -> str | None:
   """
     Parse the command name from the command line arguments.
 
-    :param args: The command line arguments
-    :param index: The current index in the arguments list
-    :return: A tuple containing the command name and the next index
+    :param args: The command line arguments, positioned after the
+      global options
+    :return: The command name or None if there are no more arguments
     :raises: ValueError if the command name is not found
   """
-  return (args[index], index + 1) if index < len(args) else (None, index)
+  command_name = args.peek()
+  if command_name is not None:
+    args.advance()
+  return command_name
 
 
-def _parse_command_options(args: list[str], index: int) -> tuple[Options, int]:
+def _parse_command_options(args: ArgumentStream) -> Options:
   """
     Parse the command options from the command line arguments.
 
-    :param args: The command line arguments
-    :param index: The current index in the arguments list
-    :return: A tuple containing the command options and the next index
+    :param args: The command line arguments, positioned after the
+      command name
+    :return: The command options
     :raises: ValueError if the command options are invalid
   """
-  command_options = Options(args[index:])
-  return command_options, index + command_options.end_index
+  return Options(args)
 
 
-def _parse_parameters(args: list[str], index: int) -> set[str]:
+def _parse_parameters(args: ArgumentStream) -> Iterator[str]:
   """
     Parse the parameters from the command line arguments.
 
-    :param args: The command line arguments
-    :param index: The current index in the arguments list
-    :return: A set containing the parameters
-    :raises: ValueError if the parameters are invalid
+    The parameters are not read here. They are returned as a lazy
+    iterator over the rest of the arguments, which may come from
+    a response file of any size.
+
+    :param args: The command line arguments, positioned after the
+      options
+    :return: An iterator over the parameters
   """
-  return set(args[index:]) if index < len(args) else set()
+  return iter(args)
 
 def _make_verbosity(global_options: Options | None, command_options: Options | None) -> int:
   """
@@ -207,6 +250,13 @@ def parse(args: list[str]) -> CommandLine:
   """
     Parse the command line arguments to create a CommandLine object.
 
+    The arguments are scanned once, from left to right. Each stage of
+    the parse starts where the previous one ended, and no part of the
+    argument list is copied. Any argument of the form @file is
+    replaced by the arguments in that file, one per line, which are
+    read only as the parse reaches them. The parameters are not read
+    at all until they are needed (see CommandLine.iter_parameters.)
+
     :param args: The command line arguments
     :return: A CommandLine object
     :raises: CommandLineError if the arguments are invalid
@@ -218,12 +268,12 @@ def parse(args: list[str]) -> CommandLine:
   command_options = None
   program, index = _parse_program(args)
   try:
-    global_options, index, found_terminator = _parse_global_options(args, index)
-    command_name, index \
-      = _parse_command_name(args, index) if not found_terminator else (None, index)
-    command_options, index \
-      = _parse_command_options(args, index) if not found_terminator else (Options([]), index)
-    parameters = _parse_parameters(args, index)
+    stream = ArgumentStream(args, index)
+    global_options, found_terminator = _parse_global_options(stream)
+    command_name = _parse_command_name(stream) if not found_terminator else None
+    command_options \
+      = _parse_command_options(stream) if not found_terminator else Options([])
+    parameters = _parse_parameters(stream)
     return CommandLine(program, command_name, global_options, command_options, parameters)
   except ValueError as ex:
     verbosity = _make_verbosity(global_options, command_options)
@@ -0,0 +1,35 @@
+"""
+  dry_run_option.py: Define class DryRunOption
+"""
+from __future__ import annotations
+from typing import ClassVar
+
+from dralithus.command_line.flag_option import FlagOption
+
+
+class DryRunOption(FlagOption):
+  """
+    A class to represent a dry run option.
+
+    A command given this option says what it would do, rather than
+    doing it. E.g. deploy --dry-run or -n
+  """
+  key: ClassVar[str] = 'dry_run'
+
+  @classmethod
+  def supported_short_flags(cls) -> list[str]:
+    """
+      The short flag for this option.
+
+      :return: A list containing the short flag '-n'
+    """
+    return ['n']
+
+  @classmethod
+  def supported_long_flags(cls) -> list[str]:
+    """
+      The long flags for this option.
+
+      :return: A list containing the long flag '--dry-run'
+    """
+    return ['dry-run']
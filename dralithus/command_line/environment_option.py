@@ -4,7 +4,7 @@
 from __future__ import annotations
 from typing import override
 
-from dralithus.command_line.option import Option
+from dralithus.command_line.option import Option, ValueArity
 
 def set_cast(value: str) -> set[str] | None:
   """
@@ -22,6 +22,8 @@ class EnvironmentOption(Option):
   """
     A class to represent an environment option.
   """
+  value_arity = ValueArity.REQUIRED
+
   def __init__(self, flag: str, environments: set[str]) -> None:
     """
       Initialize the environment option with a set of environment names.
@@ -89,13 +91,16 @@ class EnvironmentOption(Option):
 
       :param dictionary: The dictionary to add the option to
     """
+    # The environments are added in place, so that adding n options
+    # takes time proportional to the number of environments, not n
+    # times that. The first option's set is copied, so that the
+    # dictionary never shares a set with an option.
     environments = dictionary.get('environments', None)
     if environments is None:
-      environments = self.value
+      dictionary['environments'] = set(self.value)
     else:
-      assert isinstance(environments, set) and all(isinstance(env, str) for env in environments)
-      environments = environments | self.value
-    dictionary['environments'] = environments
+      assert isinstance(environments, set)
+      environments |= self.value
 
   @classmethod
   def is_option(cls, arg: str, next_arg: str | None) -> bool:
@@ -145,6 +150,33 @@ class EnvironmentOption(Option):
     # the deploy_command module (see deploy_command.make_environments.)
     return len(environment) > 0 and environment != '--'
 
+  @classmethod
+  def _parse_value(cls, str_value: str) -> set[str]:
+    """
+      Convert a comma separated list of environment names to a set.
+
+      :param str_value: The comma separated list of environment names
+      :return: The set of environment names
+      :raises ValueError: If any environment name is not valid
+    """
+    environments: set[str] = {env.strip() for env in str_value.split(',')}
+    for environment in environments:
+      if not cls.is_valid_environment(environment):
+        raise ValueError(f'Invalid environment name: {environment}')
+    return environments
+
+  @classmethod
+  def _create(cls, flag: str, value: None | bool | int | str | set[str]) -> EnvironmentOption:
+    """
+      Create an EnvironmentOption object.
+
+      :param flag: The flag string used to create the option
+      :param value: The set of environment names
+      :return: The EnvironmentOption object
+    """
+    assert isinstance(value, set)
+    return EnvironmentOption(flag, value)
+
   @classmethod
   def make(cls, current_arg: str, next_arg: str | None) -> tuple[EnvironmentOption, bool]:
     """
@@ -156,11 +188,5 @@ class EnvironmentOption(Option):
         whether to skip the next argument
     """
     assert cls.is_option(current_arg, next_arg)
-    flag, str_value, skip_next_arg = cls._extract_value(current_arg, next_arg)
-    if str_value is None:
-      raise ValueError(f'Missing value for environment option: {current_arg}')
-    environments: set[str] = {env.strip() for env in str_value.split(',')}
-    for environment in environments:
-      if not cls.is_valid_environment(environment):
-        raise ValueError(f'Invalid environment name: {environment}')
-    return EnvironmentOption(flag, environments), skip_next_arg
+    flag, str_value = cls._split_flag_value(current_arg)
+    return cls._make_from_parts(flag, str_value, next_arg)
@@ -0,0 +1,121 @@
+"""
+  flag_option.py: Define class FlagOption
+"""
+from __future__ import annotations
+from typing import ClassVar, Self, override
+
+from dralithus.command_line.option import Option
+
+
+class FlagOption(Option):  # pylint: disable=abstract-method
+  """
+    A base class for options that take no value, and are True when
+    given. E.g. --help, deploy --dry-run or deploy --force
+
+    Derived classes name their flags, and the key that they set in the
+    dictionary of options.
+  """
+  # The key the option sets to True in the dictionary of options
+  key: ClassVar[str]
+
+  def __init__(self, flag: str) -> None:
+    """
+      Initialize the option.
+
+      :param flag: The flag string used to create the option
+    """
+    self._flag = flag
+
+  @override
+  def __eq__(self, other: object) -> bool:
+    """
+      Check if two options are equal.
+
+      :param other: The other option to compare to
+      :return: True if the options are equal, False otherwise
+    """
+    if not isinstance(other, type(self)):
+      return False
+    return self._flag == other._flag
+
+  @override
+  @property
+  def flag(self) -> str:
+    """
+      The flag string which was used to create this option.
+
+      :return: The flag string used to create this option
+    """
+    return self._flag
+
+  @override
+  @property
+  def value(self) -> bool:
+    """
+      Get the value of the option. Is always True!
+
+      :return: The value of the option as a boolean
+    """
+    return True
+
+  @override
+  def add_to(self, dictionary: dict[str, None | bool | int | str | set[str]]) -> None:
+    """
+      Add the option to a dictionary.
+
+      :param dictionary: The dictionary to add the option to
+    """
+    dictionary[self.key] = True
+
+  @classmethod
+  def is_option(cls, arg: str, next_arg: str | None) -> bool:  # pylint: disable=unused-argument
+    """
+      Check if the argument is one of the flags of this option.
+
+      :param arg: The argument string
+      :param next_arg: The next argument string (unused)
+      :return: True if the argument is one of the flags of this option
+    """
+    for flag in cls.supported_short_flags():
+      if arg == '-' + flag:
+        return True
+    for flag in cls.supported_long_flags():
+      if arg == '--' + flag:
+        return True
+    return False
+
+  @classmethod
+  def is_valid_value_type(cls, str_value: str) -> bool:
+    """
+      Check if the value is a valid value for the option.
+
+      :param str_value: The value string (unused)
+      :return: False. No value is valid for a flag.
+    """
+    return False
+
+  @classmethod
+  def _create(cls, flag: str, value: None | bool | int | str | set[str]) -> Self:
+    """
+      Create an option of this class.
+
+      :param flag: The flag string used to create the option
+      :param value: Always None. A flag does not take a value.
+      :return: The option object
+    """
+    assert value is None
+    return cls(flag)
+
+  @classmethod
+  def make(cls, current_arg: str, next_arg: str | None) -> tuple[Self, bool]:
+    """
+      Create an option of this class from command line arguments.
+
+      :param current_arg: The current argument string
+      :param next_arg: The next argument string
+      :return: A tuple containing the option object and a boolean
+        indicating whether to skip the next argument
+    """
+    assert cls.is_option(current_arg, next_arg)
+    flag, value = cls._split_flag_value(current_arg)
+    return cls._make_from_parts(flag, value, next_arg)
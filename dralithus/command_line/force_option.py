@@ -0,0 +1,35 @@
+"""
+  force_option.py: Define class ForceOption
+"""
+from __future__ import annotations
+from typing import ClassVar
+
+from dralithus.command_line.flag_option import FlagOption
+
+
+class ForceOption(FlagOption):
+  """
+    A class to represent a force option.
+
+    A command given this option does all that it would do, rather than
+    only what has changed. E.g. deploy --force or -f
+  """
+  key: ClassVar[str] = 'force'
+
+  @classmethod
+  def supported_short_flags(cls) -> list[str]:
+    """
+      The short flag for this option.
+
+      :return: A list containing the short flag '-f'
+    """
+    return ['f']
+
+  @classmethod
+  def supported_long_flags(cls) -> list[str]:
+    """
+      The long flags for this option.
+
+      :return: A list containing the long flag '--force'
+    """
+    return ['force']
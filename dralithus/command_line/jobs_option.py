@@ -0,0 +1,159 @@
+"""
+  jobs_option.py: Define class JobsOption
+"""
+from __future__ import annotations
+from typing import override
+
+from dralithus.command_line.option import Option, ValueArity
+from dralithus.command_line.verbosity_option import int_cast
+
+
+class JobsOption(Option):
+  """
+    A class to represent a jobs option.
+
+    The value is the number of commands or targets that may run at
+    the same time. E.g. --jobs 8 or -j8
+  """
+  value_arity = ValueArity.REQUIRED
+
+  def __init__(self, flag: str, jobs: int) -> None:
+    """
+      Initialize the jobs option with a number of jobs.
+
+      :param flag: The flag string used to create the option
+      :param jobs: The number of jobs
+    """
+    super().__init__()
+    self._flag = flag
+    self._jobs = jobs
+
+  @classmethod
+  def supported_short_flags(cls) -> list[str]:
+    """
+      The short flag for this option.
+
+      :return: A list containing the short flag 'j'
+    """
+    return ['j']
+
+  @classmethod
+  def supported_long_flags(cls) -> list[str]:
+    """
+      The long flags for this option.
+
+      :return: A list containing the long flag 'jobs'
+    """
+    return ['jobs']
+
+  @override
+  def __eq__(self, other: object) -> bool:
+    """
+      Check if two options are equal.
+
+      :param other: The other option to compare to
+      :return: True if the options are equal, False otherwise
+    """
+    if not isinstance(other, JobsOption):
+      return False
+    return self._flag == other._flag and self._jobs == other._jobs
+
+  @override
+  @property
+  def flag(self) -> str:
+    """
+      The flag string which was used to create this option.
+
+      :return: The flag string used to create this option
+    """
+    return self._flag
+
+  @override
+  @property
+  def value(self) -> int:
+    """
+      Get the value of the jobs option.
+
+      :return: The number of jobs
+    """
+    return self._jobs
+
+  @override
+  def add_to(self, dictionary: dict[str, None | bool | int | str | set[str]]) -> None:
+    """
+      Add the option to a dictionary.
+
+      The number of jobs is added under the key 'jobs', which is only
+      present if a jobs option was given. If the option is given more
+      than once, the last one wins.
+
+      :param dictionary: The dictionary to add the option to
+    """
+    dictionary['jobs'] = self.value
+
+  @classmethod
+  def is_option(cls, arg: str, next_arg: str | None) -> bool:
+    """
+      Check if the argument is a jobs option.
+
+      :param arg: The argument string
+      :param next_arg: The next argument string
+      :return: True if the argument is a jobs option
+    """
+    flag, str_value, _ = cls._extract_value(arg, next_arg)
+    if flag not in cls.supported_short_flags() + cls.supported_long_flags():
+      return False
+    return str_value is not None and cls.is_valid_value_type(str_value)
+
+  @classmethod
+  def is_valid_value_type(cls, str_value: str) -> bool:
+    """
+      Check if the value is a number.
+
+      :param str_value: The value to check
+      :return: True if the value is an integer
+    """
+    return int_cast(str_value) is not None
+
+  @classmethod
+  def _parse_value(cls, str_value: str) -> int:
+    """
+      Convert a number of jobs to an integer.
+
+      :param str_value: The number of jobs
+      :return: The number of jobs
+      :raises ValueError: If the number of jobs is not a positive integer
+    """
+    value = int_cast(str_value)
+    if value is None:
+      raise ValueError(f'Jobs must be a number, not {str_value}')
+    if value < 1:
+      raise ValueError(f'Jobs must be a positive number, not {value}')
+    return value
+
+  @classmethod
+  def _create(cls, flag: str, value: None | bool | int | str | set[str]) -> JobsOption:
+    """
+      Create a JobsOption object.
+
+      :param flag: The flag string used to create the option
+      :param value: The number of jobs
+      :return: The JobsOption object
+    """
+    assert isinstance(value, int)
+    return JobsOption(flag, value)
+
+  @classmethod
+  def make(cls, current_arg: str, next_arg: str | None) -> tuple[JobsOption, bool]:
+    """
+      Create a JobsOption object from command line arguments.
+
+      :param current_arg: The current argument string
+      :param next_arg: The next argument string
+      :return: A tuple containing the JobsOption object and a boolean indicating
+        whether to skip the next argument
+      :raises ValueError: If the number of jobs is not a positive integer
+    """
+    assert cls.is_option(current_arg, next_arg)
+    flag, str_value = cls._split_flag_value(current_arg)
+    return cls._make_from_parts(flag, str_value, next_arg)
@@ -2,9 +2,10 @@
   multi_option.py: Define class MultiOption
 """
 from __future__ import annotations
+from functools import cache
 from typing import override, Any
 
-from dralithus.command_line.option import Option
+from dralithus.command_line.option import Option, ValueArity
 from dralithus.command_line.help_option import HelpOption
 from dralithus.command_line.verbosity_option import VerbosityOption
 
@@ -19,9 +20,47 @@ class MultiOption(Option):
     or more option letters. For example, -vh is a multi-option
     argument that specifies the -v and -h options. Multi options cannot
     have values. So, -hv=1 is not a valid multi-option argument.
+
+    Repeated flags are folded together. A flag that takes a value is
+    counted, so -vvvh is a single -v with a verbosity of 3 and a -h.
+    A flag that does not take a value is only added once.
   """
-  def __init__(self, options: list[Option]) -> None:
+  def __init__(self, options: list[Option], flags: str | None = None) -> None:
+    """
+      Initialize the multi-option argument.
+
+      :param options: The options in the multi-option argument
+      :param flags: The flags used to create the multi-option argument,
+        if they are not simply the flags of the options. E.g. 'vvh'
+        for the options -v (with value 2) and -h
+    """
     self._options = options
+    self._flags = flags
+
+  @staticmethod
+  @cache
+  def cluster_table() -> dict[str, type[Option]]:
+    """
+      The option class for each short flag that can be clustered.
+
+      The table is built once. Its keys are the single letter flags
+      that can appear in a multi-option argument.
+
+      :return: A dictionary mapping each flag to its option class
+    """
+    return {flag: option_class
+            for option_class in (HelpOption, VerbosityOption)
+            for flag in option_class.supported_short_flags()}
+
+  @staticmethod
+  @cache
+  def cluster_flags() -> frozenset[str]:
+    """
+      The short flags that can be clustered, as a frozenset.
+
+      :return: The set of single letter flags
+    """
+    return frozenset(MultiOption.cluster_table())
 
   @classmethod
   def supported_short_flags(cls) -> list[str]:
@@ -30,8 +69,7 @@ class MultiOption(Option):
 
       :return: A list containing the short flag '-h'
     """
-    return HelpOption.supported_short_flags() \
-      + VerbosityOption.supported_short_flags()
+    return list(MultiOption.cluster_table())
 
   @classmethod
   def supported_long_flags(cls) -> list[str]:
@@ -62,6 +100,8 @@ class MultiOption(Option):
 
       :return: The flag string used to create this option
     """
+    if self._flags is not None:
+      return self._flags
     return ''.join([option.flag for option in self._options])
 
   @override
@@ -107,8 +147,7 @@ class MultiOption(Option):
       :param next_arg: The next argument string (unused)
       :return: True if the argument is a multi-option argument, False otherwise
     """
-    short_flags = HelpOption.supported_short_flags() + VerbosityOption.supported_short_flags()
-    return arg.startswith('-') and len(arg) > 2 and all(c in short_flags for c in arg[1:])
+    return len(arg) > 2 and arg[0] == '-' and MultiOption.cluster_flags().issuperset(arg[1:])
 
   @classmethod
   def is_valid_value_type(cls, str_value: str) -> bool:
@@ -130,13 +169,18 @@ class MultiOption(Option):
       :return: A tuple containing the MultiOption object and a boolean
                indicating if the option was created successfully
     """
+    # pylint: disable=protected-access
     assert cls.is_option(current_arg, next_arg)
+    flags = current_arg[1:]
+    table = MultiOption.cluster_table()
     options: list[Option] = []
-    flags = list(current_arg[1:])
-    for flag in flags:
-      arg = '-' + flag
-      if HelpOption.is_option(arg, next_arg):
-        options.append(HelpOption.make(arg, next_arg)[0])
-      elif VerbosityOption.is_option(arg, next_arg):
-        options.append(VerbosityOption.make(arg, next_arg)[0])
-    return MultiOption(options), False
+    # Each distinct flag, in the order in which it first appears,
+    # becomes a single option. So a cluster of n flags takes O(n) time
+    # however many times a flag is repeated.
+    for flag in dict.fromkeys(flags):
+      option_class = table[flag]
+      if option_class.value_arity is ValueArity.NONE:
+        options.append(option_class._create(flag, None))
+      else:
+        options.append(option_class._create(flag, flags.count(flag)))
+    return MultiOption(options, flags), False
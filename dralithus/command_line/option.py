@@ -3,9 +3,21 @@
 """
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from enum import Enum
+from functools import cache
+from typing import ClassVar, Self
 import re
 
 
+class ValueArity(Enum):
+  """
+    Enumeration of the ways in which an option can take a value.
+  """
+  NONE = 0 # The option never takes a value. E.g. --help
+  OPTIONAL = 1 # The option may take a value. E.g. -v or -v2
+  REQUIRED = 2 # The option must have a value. E.g. -e local
+
+
 class Option(ABC):
   """
     A class to represent a command line option.
@@ -13,11 +25,51 @@ class Option(ABC):
     This is an abstract base class that defines the interface for
     all option objects.
   """
-  flag_with_value = re.compile(r'^-[a-zA-Z][0-9]*$')
-  flag_with_equal_value = re.compile(r'^-[a-zA-Z]=.+$')
-  multi_option = re.compile(r'^-[a-zA-Z]+$')
-  double_hyphen_option = re.compile(r'^--[a-zA-Z][a-zA-Z_-]+$')
-  double_hyphen_option_with_value = re.compile(r'^--[a-zA-Z][a-zA-Z_-]+=.*$')
+  # The syntax of every argument that could be an option, as a single
+  # regular expression. The alternatives are:
+  #   --                      the option terminator
+  #   --flag, --flag=value    a long option
+  #   -f, -f=value            a short option
+  #   -f2, -fvalue            a short option with an attached value,
+  #                           or a multi-option argument such as -vh
+  # The named groups split the argument into its flag and value, so
+  # the argument never has to be matched or split a second time.
+  syntax = re.compile(
+    r'^(?:(?P<terminator>--)'
+    r'|--(?P<long_flag>[a-zA-Z][a-zA-Z_-]+)(?:=(?P<long_value>.*))?'
+    r'|-(?P<short_flag>[a-zA-Z])(?:=(?P<short_value>.+)|(?P<attached_value>[a-zA-Z]+|[0-9]+))?'
+    r')$')
+
+  # The module and name of the option subclass for every flag, keyed
+  # by the flag as it appears on the command line. A subclass is only
+  # imported when one of its flags is seen, so that a short command
+  # does not pay to import every option. The flags here must agree
+  # with those reported by the subclasses themselves, which is checked
+  # by the unit tests.
+  registry: ClassVar[dict[str, tuple[str, str]]] = {
+    '--': ('dralithus.command_line.option_terminator', 'OptionTerminator'),
+    '-h': ('dralithus.command_line.help_option', 'HelpOption'),
+    '--help': ('dralithus.command_line.help_option', 'HelpOption'),
+    '-v': ('dralithus.command_line.verbosity_option', 'VerbosityOption'),
+    '--verbose': ('dralithus.command_line.verbosity_option', 'VerbosityOption'),
+    '--verbosity': ('dralithus.command_line.verbosity_option', 'VerbosityOption'),
+    '-e': ('dralithus.command_line.environment_option', 'EnvironmentOption'),
+    '--env': ('dralithus.command_line.environment_option', 'EnvironmentOption'),
+    '--environment': ('dralithus.command_line.environment_option', 'EnvironmentOption'),
+    '--app-label': ('dralithus.command_line.app_label_option', 'AppLabelOption'),
+    '--application-label': ('dralithus.command_line.app_label_option', 'AppLabelOption'),
+    '-j': ('dralithus.command_line.jobs_option', 'JobsOption'),
+    '--jobs': ('dralithus.command_line.jobs_option', 'JobsOption'),
+    '-n': ('dralithus.command_line.dry_run_option', 'DryRunOption'),
+    '--dry-run': ('dralithus.command_line.dry_run_option', 'DryRunOption'),
+    '-f': ('dralithus.command_line.force_option', 'ForceOption'),
+    '--force': ('dralithus.command_line.force_option', 'ForceOption'),
+    '--trust-cache': ('dralithus.command_line.trust_cache_option', 'TrustCacheOption'),
+  }
+
+  # How this option takes a value. Derived classes that accept a value
+  # must override this, and also implement _parse_value().
+  value_arity: ClassVar[ValueArity] = ValueArity.NONE
 
   @staticmethod
   def _split_flag_value(arg: str) -> tuple[str, str | None]:
@@ -187,12 +239,7 @@ class Option(ABC):
       :param next_arg: The next argument string
       :return: True if the argument can be represented by this class
     """
-    return arg == '--' \
-      or (cls.flag_with_value.match(arg) is not None) \
-      or (cls.flag_with_equal_value.match(arg) is not None) \
-      or (cls.multi_option.match(arg) is not None) \
-      or cls.double_hyphen_option.match(arg) is not None \
-      or cls.double_hyphen_option_with_value.match(arg) is not None
+    return Option.syntax.match(arg) is not None
 
   @classmethod
   def is_valid_value_type(cls, str_value: str) -> bool:
@@ -204,6 +251,67 @@ class Option(ABC):
     """
     raise NotImplementedError('Option.is_valid_value() is an abstract method')
 
+  @classmethod
+  def _parse_value(cls, str_value: str) -> bool | int | str | set[str]:
+    """
+      Convert the string value of an option to the type of its value.
+
+      Derived classes whose value_arity is not ValueArity.NONE must
+      implement this method.
+
+      :param str_value: The value string
+      :return: The value of the option
+      :raises ValueError: If the value is not valid for this option
+    """
+    raise NotImplementedError('Option._parse_value() is an abstract method')
+
+  @classmethod
+  def _create(cls, flag: str, value: None | bool | int | str | set[str]) -> Self:
+    """
+      Create an option of this class.
+
+      Derived classes must implement this method to call their
+      constructor with the flag and the (already validated) value.
+
+      :param flag: The flag string used to create the option
+      :param value: The value returned by _parse_value(), or None if
+        no value was specified
+      :return: The option object
+    """
+    raise NotImplementedError('Option._create() is an abstract method')
+
+  @classmethod
+  def _make_from_parts(
+      cls, flag: str, str_value: str | None, next_arg: str | None) -> tuple[Self, bool]:
+    """
+      Create an option of this class from an argument split into parts.
+
+      The value is validated and converted to its type in one step,
+      according to the value_arity that this class declares. If the
+      argument has no value of its own, the next argument is used as
+      the value when this class accepts a value and the next argument
+      is of the right type.
+
+      :param flag: The flag string, without leading hyphens
+      :param str_value: The value attached to the flag, or None
+      :param next_arg: The next argument string
+      :return: A tuple containing the option object and a boolean
+        indicating whether to skip the next argument
+      :raises ValueError: If the value is missing, or is not valid for
+        this option
+    """
+    skip_next_arg = False
+    if str_value is None and cls.value_arity is not ValueArity.NONE \
+        and next_arg is not None and cls.is_valid_value_type(next_arg):
+      str_value, skip_next_arg = next_arg, True
+    if str_value is None:
+      if cls.value_arity is ValueArity.REQUIRED:
+        raise ValueError(f'Missing value for option: {flag}')
+      return cls._create(flag, None), skip_next_arg
+    if cls.value_arity is ValueArity.NONE:
+      raise ValueError(f'Option {flag} does not accept a value')
+    return cls._create(flag, cls._parse_value(str_value)), skip_next_arg
+
   @staticmethod
   def supported_sub_types() -> list[type[Option]]:
     """
@@ -218,21 +326,111 @@ class Option(ABC):
     from dralithus.command_line.help_option import HelpOption
     from dralithus.command_line.verbosity_option import VerbosityOption
     from dralithus.command_line.environment_option import EnvironmentOption
+    from dralithus.command_line.app_label_option import AppLabelOption
+    from dralithus.command_line.jobs_option import JobsOption
+    from dralithus.command_line.dry_run_option import DryRunOption
+    from dralithus.command_line.force_option import ForceOption
+    from dralithus.command_line.trust_cache_option import TrustCacheOption
+    from dralithus.command_line.multi_option import MultiOption
+    return [
+      OptionTerminator, HelpOption, VerbosityOption, EnvironmentOption, AppLabelOption,
+      JobsOption, DryRunOption, ForceOption, TrustCacheOption, MultiOption]
+
+  @staticmethod
+  @cache
+  def option_type(key: str) -> type[Option] | None:
+    """
+      Get the option subclass for a flag, importing it if necessary.
+
+      The class is looked up in Option.registry, and its module is
+      imported the first time one of its flags is seen.
+
+      :param key: The flag as it appears on the command line, with its
+        leading hyphens: '-h', '--help', '--' etc.
+      :return: The option subclass, or None if the flag is unknown
+    """
+    entry = Option.registry.get(key)
+    if entry is None:
+      return None
+    module_name, class_name = entry
+    # __import__() is used rather than importlib.import_module() so
+    # that the import is reported by python -X importtime.
+    option_class: type[Option] = getattr(__import__(module_name, fromlist=[class_name]), class_name)
+    return option_class
+
+  @staticmethod
+  def dispatch_table() -> dict[str, type[Option]]:
+    """
+      Get the table that maps every flag to the option subclass for it.
+
+      The keys are flags as they appear on the command line, i.e. with
+      their leading hyphens: '-h', '--help', '--' etc. Building the
+      table imports every option subclass. The parser itself uses
+      Option.option_type(), which only imports the subclasses it needs.
+
+      MultiOption is deliberately absent from the table. A multi-option
+      argument such as -vh is a cluster of other short flags, not a flag
+      in its own right. See Option.type_of() for how it is handled.
+
+      :return: A dictionary mapping flags to option subclasses
+    """
+    table: dict[str, type[Option]] = {}
+    for key in Option.registry:
+      option_class = Option.option_type(key)
+      assert option_class is not None
+      table[key] = option_class
+    return table
+
+  @staticmethod
+  @cache
+  def _multi_option_type() -> type[Option]:
+    """
+      Get the option subclass that handles multi-option arguments.
+
+      :return: The MultiOption class
+    """
+    # pylint: disable=import-outside-toplevel
     from dralithus.command_line.multi_option import MultiOption
-    return [OptionTerminator, HelpOption, VerbosityOption, EnvironmentOption, MultiOption]
+    return MultiOption
+
+  @staticmethod
+  def _dispatch_key(arg: str) -> str:
+    """
+      Get the key under which an argument is looked up in the dispatch table.
+
+      For long options this is everything up to the first equal sign,
+      e.g. '--verbosity=2' becomes '--verbosity'. For short options it
+      is the hyphen and the first letter, e.g. '-v2' becomes '-v'. The
+      option terminator '--' is its own key.
+
+      :param arg: The argument string
+      :return: The dispatch table key for the argument
+    """
+    if arg.startswith('--'):
+      return arg.split('=', 1)[0]
+    return arg[:2]
 
   @staticmethod
   def type_of(arg: str, next_arg: str | None) -> type[Option] | None:
     """
       Determine the type of option based on the argument string.
 
+      The flag is looked up in the dispatch table, and only the
+      subclass found there is asked to validate the argument. Arguments
+      that are not valid for that subclass may still be a multi-option
+      argument, e.g. -vh, so that is checked last.
+
       :param arg: The argument string
       :param next_arg: The next argument string
       :return: The type of option or None if not found
     """
-    for cls in Option.supported_sub_types():
-      if cls.is_option(arg, next_arg):
-        return cls
+    cls = Option.option_type(Option._dispatch_key(arg))
+    if cls is not None and cls.is_option(arg, next_arg):
+      return cls
+    if len(arg) > 2 and not arg.startswith('--'):
+      multi_option = Option._multi_option_type()
+      if multi_option.is_option(arg, next_arg):
+        return multi_option
     return None
 
   @classmethod
@@ -277,22 +475,42 @@ class Option(ABC):
     # if the flag is not valid, then this function must raise a ValueError.
     # If the flag is valid, but the value is not valid, then this function
     # must also raise a ValueError.
-    if not cls.is_option(current_arg, next_arg):
+    # The argument is matched against Option.syntax exactly once. The
+    # match gives the flag, which is looked up in the dispatch table to
+    # find the subclass, and the value, which that subclass validates
+    # and converts in the same step as it creates the option.
+    match = Option.syntax.match(current_arg)
+    if match is None:
       if cls._maybe_is_parameter(current_arg):
         # This is a parameter, not an option.
         return None, False
       # This likely a mis-formed option. E.g. '-v='
       raise ValueError(f'Invalid option: {current_arg}')
 
-    actual_class: type[Option] | None = Option.type_of(current_arg, next_arg)
+    if match['terminator'] is not None:
+      key, flag, str_value = '--', '-', None
+    elif match['long_flag'] is not None:
+      flag, str_value = match['long_flag'], match['long_value']
+      key = '--' + flag
+    else:
+      flag, str_value = match['short_flag'], match['short_value'] or match['attached_value']
+      key = '-' + flag
+
+    if match['attached_value'] is not None:
+      multi_option = Option._multi_option_type()
+      if multi_option.is_option(current_arg, next_arg):
+        # The letters after the short flag are all flags that can be
+        # clustered. E.g. -vh is -v and -h, not -v with the value 'h'
+        return multi_option.make(current_arg, next_arg)
+
+    actual_class = Option.option_type(key)
     if actual_class is None:
-      flag = Option._extract_flag(current_arg)
-      if flag not in cls.supported_short_flags() and flag not in cls.supported_long_flags():
-        # This is an unknown option.
-        raise ValueError(f'Unknown option: {current_arg}')
+      # This is an unknown option.
+      raise ValueError(f'Unknown option: {current_arg}')
+    try:
+      return actual_class._make_from_parts(flag, str_value, next_arg)  # pylint: disable=protected-access
+    except ValueError as ex:
       # This is a valid flag, but the value is not valid for this
       # option. It is either not present, if present is of the wrong
       # type or an invalid value.
-      raise ValueError(f'Invalid option: {current_arg}')
-
-    return actual_class.make(current_arg, next_arg)
+      raise ValueError(f'Invalid option {current_arg}: {ex}') from ex
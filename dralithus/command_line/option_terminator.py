@@ -7,7 +7,7 @@ from typing import override
 from dralithus.command_line.option import Option
 
 
-class OptionTerminator(Option):
+class OptionTerminator(Option):  # pylint: disable=abstract-method
   """
     A class to represent an option terminator: --
   """
@@ -90,6 +90,18 @@ class OptionTerminator(Option):
     """
     return False
 
+  @classmethod
+  def _create(cls, flag: str, value: None | bool | int | str | set[str]) -> OptionTerminator:
+    """
+      Create an OptionTerminator object.
+
+      :param flag: The flag string. Always '-'
+      :param value: Always None. The option terminator does not take a value.
+      :return: The OptionTerminator object
+    """
+    assert value is None
+    return OptionTerminator()
+
   # Note: You cannot use @override here because, @override only works with
   # normal methods. Not with class methods.
   @classmethod
@@ -2,8 +2,9 @@
   options.py: Define class Options
 """
 from contextlib import contextmanager
-from typing import Generator, Iterator, Mapping, override
+from typing import Generator, Iterator, Mapping, Sequence, override
 
+from dralithus.command_line.argument_stream import ArgumentStream
 from dralithus.command_line.option import Option
 from dralithus.command_line.option_terminator import OptionTerminator
 
@@ -19,19 +20,21 @@ class Options(Mapping[str, None | bool | int | str | set[str]]):
       This method assumes that the arguments have been split into
       individual options (i.e. no multi-option arguments).
 
-      The index of the current argument, stored in self._i, is
-      incremented by 1 for each option and by 2 if the next argument
-      is a value for the option.
+      One argument is consumed from the stream for each option, and
+      two if the next argument is a value for the option.
 
       :return: The next option or None if there are no more options
     """
-    if self._end_index < len(self._args):
-      current_arg = self._args[self._end_index]
-      next_arg = self._args[self._end_index + 1] if self._end_index + 1 < len(self._args) else None
+    current_arg = self._args.peek()
+    if current_arg is not None:
+      next_arg = self._args.peek(1)
       option, skip_next_arg = Option.make(current_arg, next_arg)
-      if option is not None:  # Only increment the end_index if the current arg was processed
-        self._end_index += 2 if skip_next_arg else 1
-      return None if isinstance(option, OptionTerminator) else option
+      if option is not None:  # Only consume the current arg if it was processed
+        self._args.advance(2 if skip_next_arg else 1)
+      if isinstance(option, OptionTerminator):
+        self._terminated = True
+        return None
+      return option
     return None
 
   def _parse(self) -> list[Option]:
@@ -68,27 +71,43 @@ class Options(Mapping[str, None | bool | int | str | set[str]]):
     return dictionary
 
   @contextmanager
-  def _parser_state(self, args: list[str]) -> Generator[None, None, None]:
+  def _parser_state(self, args: ArgumentStream) -> Generator[None, None, None]:
     """
       A context manager to save and restore the parser state.
 
+      The arguments are not copied. The parser only reads from them,
+      and the reference is dropped as soon as parsing is complete.
+
+      :param args: The command line arguments
       :return: A generator that yields the parser state
     """
-    self._end_index: int  = 0
-    self._args: list[str] = args[:]  # Make a copy of the args list
+    self._args: ArgumentStream = args
     try:
       yield
     finally:
+      self._end_index = args.index
       del self._args
 
 
-  def __init__(self, args: list[str]) -> None:
+  def __init__(self, args: Sequence[str] | ArgumentStream, start: int = 0) -> None:
     """
       Initialize the option object with the command line arguments.
 
+      Parsing begins at args[start] and stops at the first argument
+      that is not an option, or just after an option terminator. This
+      allows several Options objects to be parsed, one after the
+      other, from a single argument list without slicing it.
+
+      If args is an ArgumentStream, parsing begins at the current
+      position of the stream (start is ignored), and the stream is
+      left positioned at the first argument after the options.
+
       :param args: The command line arguments
+      :param start: The index of the first argument to parse
     """
-    with self._parser_state(args):
+    self._terminated = False
+    stream = args if isinstance(args, ArgumentStream) else ArgumentStream(args, start)
+    with self._parser_state(stream):
       self._options = self._to_dict(self._parse())
 
   @override
@@ -128,6 +147,19 @@ class Options(Mapping[str, None | bool | int | str | set[str]]):
       are no parameters after the options, then the end
       index is the length of the arguments list.
 
+      The index is into the argument list passed to the
+      constructor, not relative to the start index. Arguments
+      read from a response file are counted individually.
+
       :return: The end index of the options
     """
     return self._end_index
+
+  @property
+  def terminated(self) -> bool:
+    """
+      Whether the options were ended by an option terminator (--).
+
+      :return: True if the last argument parsed was an option terminator
+    """
+    return self._terminated
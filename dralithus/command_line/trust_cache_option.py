@@ -0,0 +1,36 @@
+"""
+  trust_cache_option.py: Define class TrustCacheOption
+"""
+from __future__ import annotations
+from typing import ClassVar
+
+from dralithus.command_line.flag_option import FlagOption
+
+
+class TrustCacheOption(FlagOption):
+  """
+    A class to represent a trust cache option.
+
+    A command given this option takes what it remembers having done
+    for what was done, when it cannot ask the hosts. E.g. deploy
+    --trust-cache
+  """
+  key: ClassVar[str] = 'trust_cache'
+
+  @classmethod
+  def supported_short_flags(cls) -> list[str]:
+    """
+      The short flags for this option.
+
+      :return: An empty list. The option has no short flag.
+    """
+    return []
+
+  @classmethod
+  def supported_long_flags(cls) -> list[str]:
+    """
+      The long flags for this option.
+
+      :return: A list containing the long flag '--trust-cache'
+    """
+    return ['trust-cache']
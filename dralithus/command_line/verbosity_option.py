@@ -4,7 +4,7 @@
 from __future__ import annotations
 from typing import override
 
-from dralithus.command_line.option import Option
+from dralithus.command_line.option import Option, ValueArity
 
 
 def int_cast(value: str) -> int | None:
@@ -24,6 +24,8 @@ class VerbosityOption(Option):
   """
     A class to represent a verbosity option.
   """
+  value_arity = ValueArity.OPTIONAL
+
   def __init__(self, flag: str, verbosity: int) -> None:
     """
       Initialize the verbosity option with a verbosity level.
@@ -125,6 +127,34 @@ class VerbosityOption(Option):
     value = int_cast(str_value)
     return value is not None
 
+  @classmethod
+  def _parse_value(cls, str_value: str) -> int:
+    """
+      Convert a verbosity level string to an integer.
+
+      :param str_value: The verbosity level string
+      :return: The verbosity level
+      :raises ValueError: If the verbosity level is not a positive integer
+    """
+    value = int_cast(str_value)
+    if value is None:
+      raise ValueError(f'Verbosity must be a number, not {str_value}')
+    if value < 1:
+      raise ValueError(f'Verbosity must a positive number, not {value}')
+    return value
+
+  @classmethod
+  def _create(cls, flag: str, value: None | bool | int | str | set[str]) -> VerbosityOption:
+    """
+      Create a VerbosityOption object.
+
+      :param flag: The flag string used to create the option
+      :param value: The verbosity level, or None for the default of 1
+      :return: The VerbosityOption object
+    """
+    assert value is None or isinstance(value, int)
+    return VerbosityOption(flag, 1 if value is None else value)
+
   @classmethod
   def make(cls, current_arg: str, next_arg: str | None) -> tuple[VerbosityOption, bool]:
     """
@@ -138,8 +168,5 @@ class VerbosityOption(Option):
       :raises AssertionError: If the current argument is not a valid option
     """
     assert cls.is_option(current_arg, next_arg)
-    flag, str_value, skip_next_arg = cls._extract_value(current_arg, next_arg)
-    value: int = int(str_value) if str_value is not None else 1
-    if value < 1:
-      raise ValueError(f'Verbosity must a positive number, not {value}')
-    return VerbosityOption(flag, value), skip_next_arg
+    flag, str_value = cls._split_flag_value(current_arg)
+    return cls._make_from_parts(flag, str_value, next_arg)
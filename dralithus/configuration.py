@@ -0,0 +1,322 @@
+"""
+  configuration.py: Resolve the configuration of an application for
+  an environment.
+"""
+# -------------------------------------------------------------------
+# configuration.py: Resolve the configuration of an application for
+# an environment.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# The configuration of an application in an environment is made of
+# four layers, each of which overrides the ones below it:
+#
+#   configuration/<application>-<environment>.yaml
+#   the configuration: section of environments/<environment>.yaml
+#   the configuration: section of applications/<application>.yaml
+#   configuration/defaults.yaml
+#
+# Mappings are merged key by key, at every depth. Any other value,
+# including a list, replaces the value below it.
+#
+# The layers are never copied. A LayeredMapping looks a key up in
+# each of its layers in turn, and memoises every nested mapping of it,
+# so the defaults layer is shared by the configuration of every
+# application in every environment, and a deploy of many applications
+# to many environments merges each mapping at most once.
+#
+# resolved() merges the layers through the dependency graph (see
+# dralithus.dependency_graph), so that from one run to the next, only
+# the configurations merged from a file that has changed are merged
+# again. The layer of each file is an artifact of its own, which the
+# merged configurations of the graph share, in memory and in the file
+# the graph is saved to. So a change to an environment file that
+# leaves its configuration as it was, such as to its hosts, merges
+# nothing again.
+from __future__ import annotations
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any
+
+from dralithus.catalog import (
+  catalog_directory, catalog_path, configuration_from, document_from, parse_yaml,
+  parse_yaml_except)
+from dralithus.dependency_graph import DependencyGraph, open_graph, rule
+from dralithus.errors import (
+  DralithusApplicationError, DralithusConfigurationError, DralithusEnvironmentError)
+
+# The directory of the catalog that holds configuration files.
+_KIND = 'configuration'
+
+# The name of the file, in that directory, that holds the defaults for
+# every application in every environment.
+DEFAULTS = 'defaults'
+
+# The names of the rules of the dependency graph that read the
+# configuration layer of a file, and that merge the configuration of
+# an application in an environment.
+LAYER_RULE = 'configuration-layer'
+CONFIGURATION_RULE = 'configuration'
+
+
+class LayeredMapping(Mapping[str, Any]):
+  """
+    A read only mapping that merges several mappings without copying
+    them.
+
+    A key is looked up in each layer in turn, from the highest to the
+    lowest. If its value is a mapping, the value is itself a
+    LayeredMapping of the values of that key in the layers below, down
+    to the first layer in which the value is not a mapping.
+  """
+  __slots__ = ('_layers', '_keys', '_children')
+
+  def __init__(self, layers: Sequence[Mapping[str, Any]]) -> None:
+    """
+      Initialize the mapping.
+
+      :param layers: The layers, highest first. Empty layers are
+        ignored.
+    """
+    self._layers = tuple(layer for layer in layers if len(layer) > 0)
+    self._keys: tuple[str, ...] | None = None
+    self._children: dict[str, LayeredMapping] = {}
+
+  def __getitem__(self, key: str) -> Any:
+    """
+      Get the value of a key in the highest layer that has it.
+
+      :param key: The key
+      :return: The value. A mapping is returned as a LayeredMapping
+        of the mappings in that layer and the layers below it.
+      :raises KeyError: If no layer has the key
+    """
+    child = self._children.get(key)
+    if child is not None:
+      return child
+    mappings: list[Mapping[str, Any]] = []
+    for layer in self._layers:
+      if key not in layer:
+        continue
+      value = layer[key]
+      if not isinstance(value, Mapping):
+        if len(mappings) == 0:
+          return value
+        break
+      mappings.append(value)
+    if len(mappings) == 0:
+      raise KeyError(key)
+    child = LayeredMapping(mappings)
+    self._children[key] = child
+    return child
+
+  def __contains__(self, key: object) -> bool:
+    """
+      Check if any layer has a key.
+
+      :param key: The key
+      :return: True if a layer has the key
+    """
+    return any(key in layer for layer in self._layers)
+
+  def __iter__(self) -> Iterator[str]:
+    """
+      Iterate over the keys of every layer.
+
+      :return: An iterator over the keys. Keys are in the order of the
+        lowest layer that has them, so defaults come first.
+    """
+    return iter(self._merged_keys())
+
+  def __len__(self) -> int:
+    """
+      The number of keys in all the layers.
+
+      :return: The number of keys
+    """
+    return len(self._merged_keys())
+
+  def __repr__(self) -> str:
+    """
+      Return a string representation of the mapping.
+
+      :return: A string representation of the merged mapping
+    """
+    return f'LayeredMapping({self.to_dict()!r})'
+
+  def __reduce__(self) -> tuple[type[LayeredMapping], tuple[tuple[Mapping[str, Any], ...]]]:
+    """
+      Pickle the layers, without the keys and nested mappings memoised.
+
+      :return: The class, and the arguments to make the mapping again
+    """
+    return LayeredMapping, (self._layers,)
+
+  def _merged_keys(self) -> tuple[str, ...]:
+    """
+      The keys of every layer, computed the first time they are needed.
+
+      :return: The keys, without duplicates
+    """
+    if self._keys is None:
+      self._keys = tuple(dict.fromkeys(key for layer in reversed(self._layers) for key in layer))
+    return self._keys
+
+  @property
+  def layers(self) -> tuple[Mapping[str, Any], ...]:
+    """The layers that are not empty, highest first."""
+    return self._layers
+
+  def to_dict(self) -> dict[str, Any]:
+    """
+      Copy the merged mapping into plain dictionaries.
+
+      :return: The merged mapping, with every nested mapping a dict
+    """
+    return {key: value.to_dict() if isinstance(value, LayeredMapping) else value
+            for key, value in self.items()}
+
+
+def json_default(value: Any) -> Any:
+  """
+    Convert a value of a configuration that json cannot encode, for
+    json.dumps(default=json_default).
+
+    :param value: The value
+    :return: A mapping, such as a LayeredMapping, as a dict. Anything
+      else as a string.
+  """
+  return dict(value) if isinstance(value, Mapping) else str(value)
+
+
+def pair_name(application: str, environment: str) -> str:
+  """
+    The name of the configuration file for an application in an
+    environment.
+
+    The name is ambiguous if application or environment names contain
+    '-'. E.g. a-b-c is both application a in environment b-c, and
+    application a-b in environment c. Such names should be avoided.
+
+    :param application: The name of the application
+    :param environment: The name of the environment
+    :return: The name of the file, without its extension
+  """
+  return f'{application}-{environment}'
+
+
+def reload() -> None:
+  """
+    Forget every configuration merged, after files of the catalog have
+    changed, so that the configurations merged from those files are
+    merged again the next time they are needed.
+  """
+  open_graph.cache_clear()
+
+
+def resolved(
+    application: str,
+    environment: str,
+    graph: DependencyGraph | None = None) -> LayeredMapping:
+  """
+    The configuration of an application in an environment, merged only
+    if a file it is merged from has changed since it was last merged.
+
+    This does not load the application or the environment. Save the
+    graph to keep what was merged for the next run.
+
+    :param application: The name of the application
+    :param environment: The name of the environment
+    :param graph: The dependency graph. Defaults to the graph of the
+      catalog directory.
+    :return: The merged configuration, which shares the layers it is
+      merged from with every other configuration of the graph
+    :raises DralithusApplicationError: If the application does not
+      exist, or its file is not valid
+    :raises DralithusEnvironmentError: If the environment does not
+      exist, or its file is not valid
+    :raises DralithusConfigurationError: If a configuration file is not
+      valid
+  """
+  if graph is None:
+    graph = open_graph(catalog_directory())
+  value = graph.get(CONFIGURATION_RULE, application, environment)
+  assert isinstance(value, LayeredMapping)
+  return value
+
+
+@rule(CONFIGURATION_RULE)
+def _merge(graph: DependencyGraph, application: str, environment: str) -> LayeredMapping:
+  """
+    Merge the configuration of an application in an environment.
+
+    :param graph: The dependency graph
+    :param application: The name of the application
+    :param environment: The name of the environment
+    :return: The merged configuration
+  """
+  # The application and environment are read first, so that an
+  # unknown name is reported as such.
+  application_layer = graph.get(LAYER_RULE, 'applications', application)
+  environment_layer = graph.get(LAYER_RULE, 'environments', environment)
+  return LayeredMapping([
+    graph.get(LAYER_RULE, _KIND, pair_name(application, environment)),
+    environment_layer,
+    application_layer,
+    graph.get(LAYER_RULE, _KIND, DEFAULTS),
+  ])
+
+
+@rule(LAYER_RULE)
+def _layer(graph: DependencyGraph, kind: str, name: str) -> Mapping[str, Any]:
+  """
+    Read the configuration layer of a catalog file.
+
+    :param graph: The dependency graph
+    :param kind: The kind of the file: 'applications', 'environments'
+      or 'configuration'
+    :param name: The name of the file, without its extension
+    :return: The configuration: section of an application or
+      environment file, or the whole of a configuration file. A
+      configuration file that does not exist is empty.
+    :raises DralithusApplicationError: If an application does not
+      exist, or its file is not valid
+    :raises DralithusEnvironmentError: If an environment does not
+      exist, or its file is not valid
+    :raises DralithusConfigurationError: If a configuration file is not
+      valid
+  """
+  path = catalog_path(graph.directory, kind, name)
+  try:
+    data = graph.read(path)
+    if kind == _KIND:
+      return {} if data is None else document_from(parse_yaml(data, path))
+    if data is None:
+      raise FileNotFoundError(path)
+    # The hosts of an environment are skipped, rather than parsed.
+    document = parse_yaml_except(data, path, 'hosts') if kind == 'environments' \
+      else parse_yaml(data, path)
+    return configuration_from(document_from(document))
+  except FileNotFoundError as ex:
+    if kind == 'environments':
+      raise DralithusEnvironmentError(f'Environment not found: {name}') from ex
+    raise DralithusApplicationError(f'Application \'{name}\' not found') from ex
+  except (OSError, ValueError) as ex:
+    if kind == 'environments':
+      raise DralithusEnvironmentError(f'Invalid environment {name}: {ex}') from ex
+    if kind == 'applications':
+      raise DralithusApplicationError(f'Invalid application {name}: {ex}') from ex
+    raise DralithusConfigurationError(f'Invalid configuration {name}: {ex}') from ex
@@ -0,0 +1,522 @@
+"""
+  daemon.py: Run drl commands in a persistent server process.
+"""
+# -------------------------------------------------------------------
+# daemon.py: Run drl commands in a persistent server process.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# `drl --daemon` starts a server that listens on a Unix socket. The
+# server imports every command module and builds the option tables
+# and catalog indexes once, when it starts. It then forks a child for
+# each connection, which inherits all of that warm state, runs the
+# command in the working directory of the client, and exits. So a
+# command run by the daemon pays neither for interpreter start up nor
+# for loading catalogs, and cannot leave state behind that would
+# affect the next command.
+#
+# The server watches the catalog (see dralithus.watch). Whenever files
+# of the catalog change, it reloads only those files, while it waits
+# for connections, and again before it forks each child, so that every
+# command sees the catalog as it is.
+#
+# The client sends its arguments, working directory and environment,
+# and the server streams back the standard output and standard error
+# of the command, followed by its exit code. Every message is a frame:
+# a one byte kind, a four byte length and then that many bytes of
+# payload. The request is a list of NUL separated strings (which,
+# unlike JSON, needs no imports): the protocol version, the working
+# directory, the number of environment variables, each variable as
+# NAME=VALUE and then the arguments. No argument or variable can
+# contain a NUL.
+#
+# The child runs the command in the environment of the client, so
+# that it uses the client's catalog, PATH, ssh agent and so on. What
+# the server loaded is kept by catalog directory, so a client of
+# another catalog only loads that catalog itself. But the warm state
+# of the server also depends on where the cache directory is, and on
+# whether the catalog is indexed in an inventory. If the client's
+# environment says otherwise, the child asks the client to run the
+# command itself.
+#
+# Before the request, the client sends a single byte carrying its
+# standard input, as a file descriptor passed over the socket. The
+# child makes this its own standard input, so that commands that read
+# it (such as drl batch) read what was piped to the client.
+#
+# The child runs commands as the user who started the server, so only
+# that user may connect. The socket is in a directory that only the
+# user can enter, which the server creates if there is none, and both
+# ends check before they trust the other: the client that the
+# directory and the socket belong to the user, and each end that the
+# process at the other end runs as the user (by SO_PEERCRED, where
+# there is one). A client that finds otherwise runs the command
+# itself, and the server refuses to start or closes the connection.
+from __future__ import annotations
+import io
+import os
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+
+from dralithus.errors import DaemonError, ExitCode
+
+# The client runs on every invocation of drl, so this module imports
+# as little as possible. Modules that only the server needs are
+# imported where they are used. Even typing is only imported by type
+# checkers, which recognise TYPE_CHECKING by its name.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+  from typing import BinaryIO, Callable
+
+# The byte that carries the client's standard input
+STDIN = b'I'
+
+# The kinds of frame
+REQUEST = b'A' # The client's arguments and working directory
+STDOUT = b'O' # Text written by the command to standard output
+STDERR = b'E' # Text written by the command to standard error
+EXIT = b'X' # The exit code of the command
+FALLBACK = b'F' # The client must run the command itself
+
+_HEADER = struct.Struct('!cI')
+_EXIT_CODE = struct.Struct('!i')
+# The pid, uid and gid of the process at the other end of a socket
+_PEER_CREDENTIALS = struct.Struct('3i')
+
+# The version of the protocol. A client and server must use the same
+# version, so change this whenever the protocol changes.
+_PROTOCOL_VERSION = 3
+
+
+def socket_path() -> str:
+  """
+    The path of the Unix socket on which the daemon listens.
+
+    This is $DRALITHUS_SOCKET if it is set, otherwise dralithus.sock
+    in $XDG_RUNTIME_DIR, or in the directory dralithus-UID in $TMPDIR
+    (or /tmp) if that is not set either. Whichever it is, the directory
+    of the socket must belong to the user, and be private to them (see
+    _is_private). tempfile.gettempdir() is not used, as importing
+    tempfile would slow every run of drl.
+
+    :return: The path of the socket
+  """
+  path = os.environ.get('DRALITHUS_SOCKET')
+  if path:
+    return path
+  runtime_directory = os.environ.get('XDG_RUNTIME_DIR')
+  if runtime_directory:
+    return os.path.join(runtime_directory, 'dralithus.sock')
+  temporary_directory = os.environ.get('TMPDIR') or '/tmp'
+  return os.path.join(temporary_directory, f'dralithus-{os.getuid()}', 'dralithus.sock')
+
+
+def _is_private(path: str, kind: int) -> bool:
+  """
+    Check that a file is of a kind, and belongs to the user. A
+    directory must also be private to the user: only they may read,
+    write or enter it.
+
+    :param path: The path of the file. A symbolic link is not followed.
+    :param kind: The kind of file, stat.S_IFDIR or stat.S_IFSOCK
+    :return: True if it is, False if it is not, or does not exist
+  """
+  try:
+    status = os.lstat(path)
+  except OSError:
+    return False
+  if stat.S_IFMT(status.st_mode) != kind or status.st_uid != os.getuid():
+    return False
+  return kind != stat.S_IFDIR or status.st_mode & 0o077 == 0
+
+
+def _peer_uid(connection: socket.socket) -> int | None:
+  """
+    The user that the process at the other end of a connection runs as.
+
+    :param connection: A connected Unix socket
+    :return: The uid of the peer, or None if the platform cannot tell
+  """
+  try:
+    credentials = connection.getsockopt(
+      socket.SOL_SOCKET, socket.SO_PEERCRED, _PEER_CREDENTIALS.size)
+  except (AttributeError, OSError):
+    return None
+  uid: int = _PEER_CREDENTIALS.unpack(credentials)[1]
+  return uid
+
+
+def _is_trusted(connection: socket.socket) -> bool:
+  """
+    Check that the process at the other end of a connection runs as the
+    user.
+
+    :param connection: A connected Unix socket
+    :return: True if it does, or the platform cannot tell, in which case
+      only the private directory of the socket keeps others out
+  """
+  uid = _peer_uid(connection)
+  return uid is None or uid == os.getuid()
+
+
+def _send(connection: socket.socket, kind: bytes, payload: bytes) -> None:
+  """
+    Send a frame.
+
+    :param connection: The socket to send the frame on
+    :param kind: The kind of frame
+    :param payload: The payload of the frame
+  """
+  connection.sendall(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _receive(reader: BinaryIO) -> tuple[bytes, bytes] | None:
+  """
+    Receive a frame.
+
+    :param reader: A binary file reading from the socket
+    :return: The kind and payload of the frame, or None if the other
+      end closed the connection
+  """
+  header = reader.read(_HEADER.size)
+  if len(header) < _HEADER.size:
+    return None
+  kind, length = _HEADER.unpack(header)
+  payload = reader.read(length)
+  if len(payload) < length:
+    return None
+  return kind, payload
+
+
+class _FrameWriter(io.TextIOBase):
+  """
+    A text stream that sends everything written to it as frames.
+
+    The daemon replaces sys.stdout and sys.stderr with these while a
+    command runs, so that its output is streamed to the client as it
+    is written.
+  """
+  def __init__(self, connection: socket.socket, kind: bytes) -> None:
+    """
+      Initialize the stream.
+
+      :param connection: The socket to send the frames on
+      :param kind: The kind of frame to send
+    """
+    super().__init__()
+    self._connection = connection
+    self._kind = kind
+
+  def writable(self) -> bool:
+    """
+      The stream is writable.
+
+      :return: True
+    """
+    return True
+
+  def write(self, text: str) -> int:
+    """
+      Send text to the client.
+
+      :param text: The text to send
+      :return: The number of characters written
+    """
+    if len(text) > 0:
+      _send(self._connection, self._kind, text.encode('utf-8'))
+    return len(text)
+
+
+def connect(
+    args: list[str],
+    stdout: BinaryIO,
+    stderr: BinaryIO,
+    path: str | None = None) -> int | None:
+  """
+    Run a command in the daemon, if one is running.
+
+    :param args: The command line arguments, including the program name
+    :param stdout: The stream to copy the command's standard output to
+    :param stderr: The stream to copy the command's standard error to
+    :param path: The path of the daemon's socket. Defaults to socket_path()
+    :return: The exit code of the command, or None if no daemon is
+      running, the daemon cannot run the command in this environment, or
+      the socket, its directory or the daemon does not belong to the user
+    :raises DaemonError: If the daemon stopped before the command completed
+  """
+  path = socket_path() if path is None else path
+  if not (_is_private(os.path.dirname(os.path.abspath(path)), stat.S_IFDIR)
+          and _is_private(path, stat.S_IFSOCK)):
+    return None
+  client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    client.connect(path)
+  except (FileNotFoundError, ConnectionRefusedError):
+    client.close()
+    return None
+  if not _is_trusted(client):
+    client.close()
+    return None
+  with client, client.makefile('rb') as reader:
+    try:
+      socket.send_fds(client, [STDIN], [sys.stdin.fileno()])
+    except (OSError, AttributeError, ValueError):
+      # There is no standard input to pass on.
+      client.sendall(STDIN)
+    environ = [f'{name}={value}' for name, value in os.environ.items()]
+    request = [str(_PROTOCOL_VERSION), os.getcwd(), str(len(environ))] + environ + args
+    _send(client, REQUEST, '\0'.join(request).encode('utf-8', 'surrogateescape'))
+    while (frame := _receive(reader)) is not None:
+      kind, payload = frame
+      if kind == STDOUT:
+        stdout.write(payload)
+        stdout.flush()
+      elif kind == STDERR:
+        stderr.write(payload)
+        stderr.flush()
+      elif kind == EXIT:
+        exit_code: int = _EXIT_CODE.unpack(payload)[0]
+        return exit_code
+      elif kind == FALLBACK:
+        return None
+  raise DaemonError('The drl daemon stopped before the command completed')
+
+
+def _warm_up() -> None:
+  """
+    Do, once, the work that every command would otherwise repeat.
+
+    This imports every command module, builds the option tables, and
+    loads and indexes the catalog, so that the children forked to run
+    commands inherit them.
+  """
+  # pylint: disable=import-outside-toplevel
+  from dralithus.command import COMMANDS
+  from dralithus.command_line.option import Option
+  from dralithus.command_line.multi_option import MultiOption
+  from dralithus.watch import load_catalog
+  for module_name in list(COMMANDS.values()) + ['dralithus.help_command']:
+    __import__(module_name)
+  Option.dispatch_table()
+  MultiOption.cluster_table()
+  load_catalog()
+
+
+def _remove_stale_socket(path: str) -> None:
+  """
+    Remove a socket left behind by a daemon that is no longer running.
+
+    :param path: The path of the socket
+    :raises DaemonError: If a daemon is running on the socket
+  """
+  probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    probe.connect(path)
+  except FileNotFoundError:
+    return
+  except ConnectionRefusedError:
+    os.unlink(path)
+    return
+  finally:
+    probe.close()
+  raise DaemonError(f'A drl daemon is already running on {path}')
+
+
+def _make_private_directory(directory: str) -> None:
+  """
+    Create the directory of the socket, private to the user, if there is
+    none.
+
+    :param directory: The path of the directory
+    :raises DaemonError: If the directory does not belong to the user, or
+      others may use it
+  """
+  try:
+    os.mkdir(directory, 0o700)
+  except FileExistsError:
+    pass
+  except OSError as ex:
+    raise DaemonError(f'Cannot create {directory} for the drl daemon socket: '
+                      f'{ex.strerror}') from ex
+  if not _is_private(directory, stat.S_IFDIR):
+    raise DaemonError(f'{directory} must be a directory that belongs to you, and that only '
+                      'you may use, to hold the drl daemon socket')
+
+
+def _warm_settings() -> tuple[bool, str]:
+  """
+    The settings of the environment that what the server loaded
+    depends on, other than the catalog directory.
+
+    :return: Whether the catalog is indexed in an inventory, and the
+      cache directory
+  """
+  # pylint: disable=import-outside-toplevel
+  from dralithus.inventory import inventory_enabled
+  from dralithus.cache import cache_directory
+  return inventory_enabled(), cache_directory()
+
+
+def _install_environment(environ: list[str]) -> bool:
+  """
+    Replace the environment of the child with that of the client.
+
+    :param environ: Each variable of the client, as NAME=VALUE
+    :return: True if what the server loaded can be used in it
+  """
+  warm = _warm_settings()
+  os.environ.clear()
+  for variable in environ:
+    name, equals, value = variable.partition('=')
+    if equals:
+      os.environ[name] = value
+  return _warm_settings() == warm
+
+
+def _exit_code(ex: SystemExit) -> int:
+  """
+    The exit code of a command that raised SystemExit, as the
+    interpreter would exit with if the command were run directly. As
+    it would, a code that is neither None nor an int is printed to
+    standard error.
+
+    :param ex: The exception
+    :return: 0 if its code is None, the code if it is an int, and 1
+      otherwise
+  """
+  if ex.code is None:
+    return 0
+  if isinstance(ex.code, int):
+    return ex.code
+  print(ex.code, file=sys.stderr)
+  return 1
+
+
+def _run(connection: socket.socket, main: Callable[[list[str]], int]) -> None:
+  """
+    Run the command requested on a connection, in a forked child.
+
+    This never returns. The child exits once the command completes.
+
+    :param connection: The connection to the client
+    :param main: The function that runs a command line and returns its
+      exit code
+  """
+  exit_code: int = ExitCode.DAEMON_ERROR
+  try:
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _, fds, _, _ = socket.recv_fds(connection, len(STDIN), 1)
+    for fd in fds:
+      os.dup2(fd, 0)
+      os.close(fd)
+      if sys.stdin is None:
+        # The daemon was started without a standard input.
+        sys.stdin = open(0, encoding='utf-8', closefd=False)  # pylint: disable=consider-using-with
+    with connection.makefile('rb') as reader:
+      frame = _receive(reader)
+    if frame is None or frame[0] != REQUEST:
+      return
+    request = frame[1].decode('utf-8', 'surrogateescape').split('\0')
+    sys.stdout = _FrameWriter(connection, STDOUT)
+    sys.stderr = _FrameWriter(connection, STDERR)
+    if request[0] != str(_PROTOCOL_VERSION):
+      print('The drl daemon is a different version. Restart it.', file=sys.stderr)
+    else:
+      cwd, count = request[1], int(request[2])
+      if not _install_environment(request[3:3 + count]):
+        _send(connection, FALLBACK, b'')
+        return
+      argv = request[3 + count:]
+      os.chdir(cwd)
+      try:
+        exit_code = main(argv)
+      except SystemExit as ex:
+        exit_code = _exit_code(ex)
+      except Exception:  # pylint: disable=broad-exception-caught
+        # The command has a bug. Report it, as running it directly would.
+        import traceback  # pylint: disable=import-outside-toplevel
+        traceback.print_exc()
+        exit_code = 1
+    _send(connection, EXIT, _EXIT_CODE.pack(exit_code))
+  finally:
+    # Exit without running any clean up inherited from the server.
+    os._exit(0)  # pylint: disable=protected-access
+
+
+def serve(main: Callable[[list[str]], int], path: str | None = None) -> int:
+  """
+    Run the daemon until it is interrupted or terminated.
+
+    :param main: The function that runs a command line and returns its
+      exit code
+    :param path: The path of the socket to listen on. Defaults to
+      socket_path()
+    :return: The exit code of the daemon
+    :raises DaemonError: If a daemon is already running on the socket, or
+      the directory of the socket is not private to the user
+  """
+  from dralithus.watch import POLL_INTERVAL, CatalogWatcher  # pylint: disable=import-outside-toplevel
+  path = socket_path() if path is None else path
+  _make_private_directory(os.path.dirname(os.path.abspath(path)))
+  _remove_stale_socket(path)
+  # The catalog is watched from before it is loaded, so that no change
+  # is missed.
+  watcher = CatalogWatcher()
+  _warm_up()
+  server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  # Only the user who started the daemon may connect to it.
+  umask = os.umask(0o077)
+  try:
+    server.bind(path)
+  finally:
+    os.umask(umask)
+  server.listen(128)
+  # Children are reaped automatically, and SIGTERM stops the daemon
+  # cleanly, removing the socket.
+  signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+  signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(ExitCode.SUCCESS))
+  waitables: list[socket.socket | CatalogWatcher] = [server]
+  if watcher.uses_inotify:
+    waitables.append(watcher)
+  timeout = None if watcher.uses_inotify else POLL_INTERVAL
+  try:
+    while True:
+      ready, _, _ = select.select(waitables, [], [], timeout)
+      watcher.refresh()
+      if server not in ready:
+        continue
+      connection, _ = server.accept()
+      if not _is_trusted(connection):
+        connection.close()
+        continue
+      if os.fork() == 0:
+        server.close()
+        watcher.close()
+        _run(connection, main)
+      connection.close()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    watcher.close()
+    server.close()
+    os.unlink(path)
+  return ExitCode.SUCCESS
@@ -0,0 +1,365 @@
+"""
+  dependency_graph.py: Recompute only the artifacts whose inputs have
+  changed.
+"""
+# -------------------------------------------------------------------
+# dependency_graph.py: Recompute only the artifacts whose inputs have
+# changed.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Derived artifacts, such as the resolved configuration of an
+# application in an environment, are computed from the files of the
+# catalog and from each other. A DependencyGraph remembers, from one
+# run to the next, each artifact it has computed and what it was
+# computed from: the SHA-256 hash of every file that was read, and the
+# hash of every artifact that was used.
+#
+# An artifact is computed by a rule, a function registered with
+# @rule. A rule reads files with DependencyGraph.read() and uses other
+# artifacts with DependencyGraph.get(), which is how the graph learns
+# what the artifact depends on. When an artifact is asked for, its
+# inputs are checked in the order they were used: a file by hashing
+# its contents, and an artifact by bringing it up to date in turn. If
+# none has changed, the artifact is not computed again. Modification
+# times are never trusted, so neither a git checkout that touches
+# every file, nor two edits within the resolution of the modification
+# time, can mislead the graph.
+#
+# An artifact that is computed again, but comes out the same, keeps
+# its hash, so the artifacts computed from it are not computed again.
+# E.g. a change to the hosts of an environment, which leaves its
+# configuration as it was, recomputes the configuration of the
+# environment, but not the configuration of any application in it.
+#
+# Each file is hashed, and each artifact checked, at most once per
+# graph, so a graph assumes the catalog does not change while it is in
+# use.
+#
+# The graph is saved in a pickle in the cache directory, so it is only
+# read back if it is private to the user (see
+# dralithus.cache.read_private). It is only rewritten if an artifact
+# was computed.
+from __future__ import annotations
+from functools import cache
+from hashlib import sha1, sha256
+from typing import Any, Callable, NamedTuple
+import os
+import pickle
+import threading
+
+from dralithus.cache import cache_directory, read_private, write_atomically
+
+# The version of the format of the graph file. Change this whenever
+# the format, or any rule, changes, so that old graphs are ignored.
+_GRAPH_VERSION = 2
+
+# The hash of a file that does not exist, or cannot be read. It is
+# not the hash of any contents.
+MISSING = b''
+
+# An artifact is named by the name of its rule and the arguments the
+# rule is called with.
+Key = tuple[str, ...]
+
+# The rules that compute artifacts, by name.
+_RULES: dict[str, Callable[..., Any]] = {}
+
+
+class Node(NamedTuple):
+  """
+    An artifact, and what it was computed from.
+  """
+  value: Any # The artifact
+  digest: bytes # The SHA-256 hash of the pickled artifact
+  inputs: tuple[tuple[str | Key, bytes], ...] # The files and artifacts used, with their hashes
+
+
+def rule(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+  """
+    Register a function as the rule that computes the artifacts of a
+    kind.
+
+    The function is called with the graph, and the arguments of the
+    key of the artifact, and returns the artifact, which must be
+    picklable. It must read files, and use other artifacts, only
+    through the graph.
+
+    :param name: The name of the rule, the first element of the keys
+      of its artifacts
+    :return: A decorator that registers the function
+  """
+  def register(function: Callable[..., Any]) -> Callable[..., Any]:
+    assert name not in _RULES, f'Rule {name} is already registered'
+    _RULES[name] = function
+    return function
+  return register
+
+
+class DependencyGraph:  # pylint: disable=too-many-instance-attributes
+  """
+    The artifacts computed from a catalog, and what each was computed
+    from.
+  """
+  def __init__(self, directory: str, path: str | None = None) -> None:
+    """
+      Initialize the graph from the artifacts saved by the last run.
+
+      :param directory: The catalog directory
+      :param path: The path of the graph file. Defaults to a file in
+        the cache directory.
+    """
+    self._directory = directory
+    self._path = path if path is not None else graph_path(directory)
+    self._nodes = _read_graph(self._path)
+    # The hash of every file hashed, and every artifact checked or
+    # computed, by this graph.
+    self._digests: dict[str, bytes] = {}
+    self._current: dict[Key, Node] = {}
+    # The inputs of each artifact being computed, innermost last
+    self._recording: list[list[tuple[str | Key, bytes]]] = []
+    self._active: set[Key] = set()
+    self._changed = False
+    self._computed = 0
+    self._reused = 0
+    self._lock = threading.RLock()
+
+  @property
+  def directory(self) -> str:
+    """The catalog directory."""
+    return self._directory
+
+  @property
+  def path(self) -> str:
+    """The path of the graph file."""
+    return self._path
+
+  @property
+  def computed(self) -> int:
+    """The number of artifacts this graph has computed."""
+    return self._computed
+
+  @property
+  def reused(self) -> int:
+    """The number of artifacts this graph has found up to date."""
+    return self._reused
+
+  def read(self, path: str) -> bytes | None:
+    """
+      Read a file for the artifact being computed, which then depends
+      on its contents.
+
+      :param path: The path of the file
+      :return: The contents of the file, or None if it does not exist
+      :raises OSError: If the file exists, but cannot be read
+    """
+    try:
+      with open(path, 'rb') as file:
+        data: bytes | None = file.read()
+    except (FileNotFoundError, NotADirectoryError):
+      data = None
+    digest = MISSING if data is None else sha256(data).digest()
+    with self._lock:
+      self._digests[path] = digest
+      self._record(path, digest)
+    return data
+
+  def get(self, name: str, *args: str) -> Any:
+    """
+      Get an artifact, computing it only if what it was last computed
+      from has changed.
+
+      If an artifact is being computed, it then depends on this one.
+
+      :param name: The name of the rule that computes the artifact
+      :param args: The arguments of the rule
+      :return: The artifact. It must not be changed.
+    """
+    with self._lock:
+      key = (name, *args)
+      node = self._up_to_date(key)
+      self._record(key, node.digest)
+      return node.value
+
+  def save(self) -> None:
+    """
+      Save the graph for the next run, if an artifact was computed.
+
+      The graph is only a cache, so failure to save it is ignored.
+    """
+    with self._lock:
+      if self._changed:
+        _write_graph(self._path, self._nodes)
+        self._changed = False
+
+  def _record(self, dependency: str | Key, digest: bytes) -> None:
+    """
+      Record an input of the artifact being computed, if any.
+
+      :param dependency: The path of a file, or the key of an artifact
+      :param digest: Its hash
+    """
+    if len(self._recording) > 0:
+      self._recording[-1].append((dependency, digest))
+
+  def _up_to_date(self, key: Key) -> Node:
+    """
+      Bring an artifact up to date.
+
+      :param key: The key of the artifact
+      :return: Its node, as last computed if its inputs are unchanged,
+        and newly computed otherwise
+    """
+    node = self._current.get(key)
+    if node is not None:
+      return node
+    assert key not in self._active, f'The rules for {key} depend on themselves'
+    self._active.add(key)
+    try:
+      previous = self._nodes.get(key)
+      if previous is not None and self._unchanged(previous):
+        node = previous
+        self._reused += 1
+      else:
+        node = self._compute(key)
+        self._computed += 1
+        self._nodes[key] = node
+        self._changed = True
+    finally:
+      self._active.discard(key)
+    self._current[key] = node
+    return node
+
+  def _unchanged(self, node: Node) -> bool:
+    """
+      Check if the inputs of an artifact are as they were when it was
+      computed.
+
+      The inputs are checked in the order they were used, up to the
+      first that has changed, as the rule might not use the others
+      once it sees that change.
+
+      :param node: The node of the artifact
+      :return: True if no input has changed
+    """
+    for dependency, digest in node.inputs:
+      if isinstance(dependency, str):
+        current = self._file_digest(dependency)
+      elif dependency[0] in _RULES:
+        current = self._up_to_date(dependency).digest
+      else:
+        return False  # The rule no longer exists
+      if current != digest:
+        return False
+    return True
+
+  def _compute(self, key: Key) -> Node:
+    """
+      Compute an artifact with its rule, recording its inputs.
+
+      :param key: The key of the artifact
+      :return: Its node
+    """
+    function = _RULES.get(key[0])
+    assert function is not None, f'There is no rule named {key[0]}'
+    inputs: list[tuple[str | Key, bytes]] = []
+    self._recording.append(inputs)
+    try:
+      value = function(self, *key[1:])
+    finally:
+      self._recording.pop()
+    digest = sha256(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).digest()
+    return Node(value, digest, tuple(inputs))
+
+  def _file_digest(self, path: str) -> bytes:
+    """
+      Hash the contents of a file, once per graph.
+
+      :param path: The path of the file
+      :return: The SHA-256 hash of its contents, or MISSING if it does
+        not exist or cannot be read
+    """
+    digest = self._digests.get(path)
+    if digest is None:
+      try:
+        with open(path, 'rb') as file:
+          digest = sha256(file.read()).digest()
+      except OSError:
+        digest = MISSING
+      self._digests[path] = digest
+    return digest
+
+
+def graph_path(directory: str) -> str:
+  """
+    The path of the graph of the artifacts computed from a catalog.
+
+    :param directory: The catalog directory
+    :return: The path of the graph file in the cache directory
+  """
+  catalog = sha1(directory.encode('utf-8'), usedforsecurity=False).hexdigest()[:12]
+  return os.path.join(cache_directory(), 'graphs', f'{catalog}.pickle')
+
+
+def _read_graph(path: str) -> dict[Key, Node]:
+  """
+    Read a graph file.
+
+    :param path: The path of the graph file
+    :return: The node of each artifact, by key. If there is no graph,
+      or it cannot be used, there are none.
+  """
+  data = read_private(path)
+  if data is None:
+    return {}
+  try:
+    graph = pickle.loads(data)
+    if not isinstance(graph, dict) or graph.get('version') != _GRAPH_VERSION:
+      return {}
+    return {key: Node(*node) for key, node in graph['nodes'].items()}
+  except (EOFError, pickle.UnpicklingError, AttributeError, ImportError,
+          KeyError, TypeError, ValueError):
+    return {}
+
+
+def _write_graph(path: str, nodes: dict[Key, Node]) -> None:
+  """
+    Write a graph file.
+
+    The graph is only a cache, so failure to write it is ignored (see
+    dralithus.cache.write_atomically).
+
+    :param path: The path of the graph file
+    :param nodes: The node of each artifact, by key
+  """
+  graph = {
+    'version': _GRAPH_VERSION,
+    'nodes': {key: tuple(node) for key, node in nodes.items()},
+  }
+  write_atomically(path, pickle.dumps(graph, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+@cache
+def open_graph(directory: str) -> DependencyGraph:
+  """
+    The graph of the artifacts computed from a catalog, read once per
+    process.
+
+    :param directory: The catalog directory
+    :return: The graph
+  """
+  return DependencyGraph(directory)
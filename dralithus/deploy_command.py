@@ -20,15 +20,90 @@
 # along with this program.  If not, see
 # <https://www.gnu.org/licenses/>.
 # -------------------------------------------------------------------
+# drl deploy deploys every selected application to every selected
+# environment. Each of these targets is deployed by its deploy
+# command: the 'deploy' key of its resolved configuration, a command
+# line for the shell if it is a string, or a list of arguments. It is
+# run on every host of the environment, or once on localhost if the
+# environment has none, through the transport named by the
+# 'transport' key (see dralithus.transport): local, the default, runs
+# it in the catalog directory, and ssh on the host. The names of the
+# application, the environment and the host, and the configuration as
+# JSON, are set in its environment. A target without a deploy command
+# has nothing to run, and its names are printed instead.
+#
+# The 'host_jobs' key limits the number of commands that run on a host
+# at the same time, and 'deploy_timeout' the seconds each may take.
+# Both are best set in the configuration of the environment.
+#
+# The targets are deployed by the engine (see dralithus.engine), up to
+# --jobs at a time, in the order of a schedule (see dralithus.schedule)
+# that deploys the applications an application depends on to an
+# environment before it, and the commands on their hosts by an
+# executor (see dralithus.executor), all as coroutines on one event
+# loop. The configuration of each is resolved through the dependency
+# graph of the catalog, so that only those whose files have changed
+# are merged again. If no target has a deploy command, there is
+# nothing to run, and their names are printed in the order of the
+# schedule without an event loop. With --dry-run, the schedule is
+# printed, and nothing is deployed.
+#
+# Only the hosts whose configuration has changed since it was last
+# deployed to them are deployed to (see dralithus.plan), so that
+# deploying an environment that has not changed runs nothing. The
+# fingerprint of the configuration is set in the environment of the
+# deploy command, so that a host can remember it. If the configuration
+# has a 'state' key, a command like the deploy command, it is run on
+# each host to print the fingerprint the host has, and a host is
+# deployed to if the state command prints nothing, or fails. Without
+# one, drl cannot know what a host has, as it may have been rebuilt,
+# or changed by hand, and every host is deployed to, unless
+# --trust-cache asks for what drl remembers to be taken for what the
+# hosts have. With --force, every host is deployed to.
 from __future__ import annotations
-from typing_extensions import override
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Sequence, override
+import json
+import os
+import sys
 
+from dralithus.application import Application
+from dralithus.catalog import catalog_directory
 from dralithus.command import Command
 from dralithus.command_line.command_line import CommandLine
 from dralithus.command_line.options import Options
+from dralithus.configuration import json_default, resolved
+from dralithus.dependency_graph import DependencyGraph
 from dralithus.environment import Environment
-from dralithus.application import Application
-from dralithus.errors import ExitCode, CommandLineError
+from dralithus.errors import (
+  CommandLineError, DralithusApplicationError, DralithusConfigurationError, DralithusError,
+  DralithusDeployError, ExitCode)
+from dralithus.schedule import Schedule, Target
+
+# Deploying runs its commands as coroutines, and importing asyncio
+# alone takes longer than the rest of drl. The modules that use it are
+# only imported once something is to be run, so that drl --help, and
+# a deploy with nothing to run, do not pay for them.
+if TYPE_CHECKING:
+  from dralithus.executor import Executor
+  from dralithus.plan import Change, DeployState
+  from dralithus.transport import Transport, Write
+
+# The key of the deploy command in the configuration of a target.
+DEPLOY_KEY = 'deploy'
+
+# The key of the command that prints the fingerprint of the
+# configuration deployed to a host
+STATE_KEY = 'state'
+
+# The keys of the transport the deploy command is run through, the
+# most commands that run on a host at the same time, and the seconds
+# the command may take on each host.
+TRANSPORT_KEY = 'transport'
+HOST_JOBS_KEY = 'host_jobs'
+TIMEOUT_KEY = 'deploy_timeout'
+
+# The host the deploy command of an environment without hosts runs on
+LOCALHOST = 'localhost'
 
 
 class DeployCommand(Command):
@@ -36,22 +111,36 @@ class DeployCommand(Command):
     Command to deploy an application to a target environment.
   """
   @override
-  def __init__(
+  def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
       self, environments: set[Environment],
       applications: set[Application],
-      verbosity: int) -> None:
+      jobs: int,
+      verbosity: int,
+      dry_run: bool = False,
+      force: bool = False,
+      trust_cache: bool = False) -> None:
     """
       Initialize the 'deploy' command with a verbosity level.
 
       :param environments: The environments to deploy the application to
       :param applications: The applications to deploy
+      :param jobs: The number of targets to deploy at the same time
       :param verbosity: The verbosity level of the command
+      :param dry_run: Whether to print the schedule instead of deploying
+      :param force: Whether to deploy to hosts that are up to date
+      :param trust_cache: Whether to take what was last deployed to the
+        hosts of a target without a state command for what they have
     """
     super().__init__('deploy', verbosity)
     assert len(environments) > 0, 'Environments cannot be an empty set.'
     self._environments = environments
     assert len(applications) > 0, 'Applications cannot be an empty set.'
     self._applications = applications
+    assert jobs > 0, 'Jobs must be a positive number.'
+    self._jobs = jobs
+    self._dry_run = dry_run
+    self._force = force
+    self._trust_cache = trust_cache
 
   def __eq__(self, other: object) -> bool:
     """
@@ -64,7 +153,11 @@ class DeployCommand(Command):
       return NotImplemented
     return (super().__eq__(other)
       and self.environments == other.environments
-      and self.applications == other.applications)
+      and self.applications == other.applications
+      and self.jobs == other.jobs
+      and self.dry_run == other.dry_run
+      and self.force == other.force
+      and self.trust_cache == other.trust_cache)
 
   def __str__(self) -> str:
     """
@@ -75,7 +168,11 @@ class DeployCommand(Command):
     return 'DeployCommand(' \
       + f'environments={self.environments}, ' \
       + f'applications={self.applications}, '\
-      + f'verbosity={self.verbosity})'
+      + f'jobs={self.jobs}, '\
+      + f'verbosity={self.verbosity}, '\
+      + f'dry_run={self.dry_run}, '\
+      + f'force={self.force}, '\
+      + f'trust_cache={self.trust_cache})'
 
 
   @property
@@ -96,32 +193,506 @@ class DeployCommand(Command):
     """
     return self._applications
 
+  @property
+  def jobs(self) -> int:
+    """
+      The number of targets to deploy at the same time.
+
+      :return: The number of jobs
+    """
+    return self._jobs
+
+  @property
+  def dry_run(self) -> bool:
+    """
+      Whether to print the schedule instead of deploying.
+
+      :return: True if nothing is to be deployed
+    """
+    return self._dry_run
+
+  @property
+  def force(self) -> bool:
+    """
+      Whether to deploy to hosts that are up to date.
+
+      :return: True if every host is to be deployed to
+    """
+    return self._force
+
+  @property
+  def trust_cache(self) -> bool:
+    """
+      Whether to take what was last deployed to the hosts of a target
+      without a state command for what they have.
+
+      :return: True if up to date hosts are skipped without a state
+        command
+    """
+    return self._trust_cache
+
+  def schedule(self) -> Schedule:
+    """
+      The schedule of the targets to deploy: every application in every
+      environment.
+
+      :return: The schedule
+      :raises DralithusApplicationError: If applications depend on each
+        other
+    """
+    try:
+      return Schedule({app.name: app.depends for app in self.applications},
+                      (env.name for env in self.environments))
+    except ValueError as ex:
+      raise DralithusApplicationError(f'Applications depend on each other: {ex}') from ex
+
   @override
   def execute(self) -> int:
     """
       Execute the 'deploy' command.
 
-      :return: The program exit code
+      The output of each target is printed as it is written. If more
+      than one target is deployed, each line is preceded by the target
+      it is from. Why each target that failed did so is printed on
+      standard error. At verbosity 1 and above, the exit code of each
+      target, and how long it took, are printed as it completes, and a
+      target that is up to date says so.
+
+      :return: The highest exit code of any target, or
+        ExitCode.SUCCESS if every target was deployed
+      :raises DralithusApplicationError: If applications depend on each
+        other
+    """
+    schedule = self.schedule()
+    if self.dry_run:
+      self.print_plan(schedule)
+      return ExitCode.SUCCESS
+    graph = DependencyGraph(catalog_directory())
+    if not self._runs_anything(schedule, graph):
+      self.print_names(schedule)
+      graph.save()
+      return ExitCode.SUCCESS
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+    from dralithus.plan import DeployState
+    state = DeployState(catalog_directory())
+    try:
+      failed, exit_code = asyncio.run(self._deploy(schedule, graph, state))
+    finally:
+      graph.save()
+      state.save()
+    if failed > 0:
+      print(f'{failed} of {len(schedule)} targets failed', file=sys.stderr)
+    return exit_code
+
+  async def _deploy(  # pylint: disable=too-many-locals
+      self, schedule: Schedule,
+      graph: DependencyGraph,
+      state: DeployState) -> tuple[int, int]:
+    """
+      Deploy the targets of a schedule to the hosts that are not up to
+      date, and print their output and results as they are written.
+
+      :param schedule: The schedule of the targets
+      :param graph: The dependency graph to resolve their configuration
+        through
+      :param state: What was deployed to each host, which is updated
+      :return: The number of targets that failed, and the highest exit
+        code of any target
+    """
+    # pylint: disable=import-outside-toplevel
+    from dralithus.engine import run
+    from dralithus.executor import Executor
+    from dralithus.plan import REMOVE, fingerprint
+    tagged = len(schedule) > 1
+    environment_hosts = host_names(self.environments)
+    executor = Executor()
+
+    def write(target: Target, line: str, error: bool) -> None:
+      print(f'{target}: {line}' if tagged else line, file=sys.stderr if error else sys.stdout,
+            flush=True)
+
+    async def step(target: Target, write_line: Write) -> int:
+      hosts = environment_hosts[target.environment]
+      configuration = resolved(target.application, target.environment, graph)
+      if configuration.get(DEPLOY_KEY) is None:
+        return await deploy(target, configuration, hosts, executor, write_line)
+      pending = hosts
+      if not self.force:
+        planned = await plan(target, configuration, hosts, executor, state.deployed(target),
+                             self.trust_cache)
+        for change in planned:
+          if change.action == REMOVE:
+            state.record(target, change.host, None)
+        pending = [change.host for change in planned if change.deploys]
+      if len(pending) == 0:
+        if self.verbosity > 0:
+          write_line('Up to date')
+        return ExitCode.SUCCESS
+      errors = await _deploy_to(target, configuration, pending, executor, write_line,
+                                len(hosts) > 1)
+      desired = fingerprint(configuration)
+      for host, error in errors.items():
+        state.record(target, host, desired if error is None else None)
+      return _check(errors, len(hosts) > 1, write_line)
+
+    failed = 0
+    exit_code: int = ExitCode.SUCCESS
+    try:
+      async for result in run(schedule, step, self.jobs, write):
+        if result.error is not None:
+          print(f'{result.target}: {result.error}', file=sys.stderr)
+        if result.exit_code != ExitCode.SUCCESS:
+          failed += 1
+        exit_code = max(exit_code, result.exit_code)
+        if self.verbosity > 0:
+          print(f'==> {result.target} (exit code {result.exit_code}, '
+                f'{result.seconds:.1f}s)', flush=True)
+    finally:
+      await executor.close()
+    return failed, exit_code
+
+  def _runs_anything(self, schedule: Schedule, graph: DependencyGraph) -> bool:
+    """
+      Whether any target of a schedule has a deploy command to run.
+
+      :param schedule: The schedule of the targets
+      :param graph: The dependency graph to resolve their configuration
+        through
+      :return: True if any target has a deploy command, or its
+        configuration cannot be resolved, which deploying it reports
     """
-    # TODO: Implement this
-    application_names = ', '.join(app.name for app in self.applications)
-    environment_names = ', '.join(env.name for env in self.environments)
-    print(f'deploy ({application_names}) to ({environment_names}). verbosity={self.verbosity} ')
+    try:
+      return any(resolved(target.application, target.environment, graph).get(DEPLOY_KEY)
+                 is not None for _, target in schedule.plan(self.jobs))
+    except DralithusError:
+      return True
+
+  def print_names(self, schedule: Schedule) -> None:
+    """
+      Print the names of the targets of a schedule that has nothing to
+      run, as deploying them would, in the order of the schedule.
+
+      :param schedule: The schedule of the targets
+    """
+    for _, target in schedule.plan(self.jobs):
+      print(f'{target}: {_names(target)}' if len(schedule) > 1 else _names(target))
+      if self.verbosity > 0:
+        print(f'==> {target} (exit code {ExitCode.SUCCESS}, 0.0s)')
+
+  def print_plan(self, schedule: Schedule) -> None:
+    """
+      Print the order in which the targets would be started, one per
+      line, with the step in which each would be if every target took
+      the same time, and the targets it waits for. At verbosity 1 and
+      above, the length of the critical path of each is printed too.
+
+      :param schedule: The schedule of the targets
+    """
+    for step, target in schedule.plan(self.jobs):
+      line = f'{step:3} {target}'
+      if self.verbosity > 0:
+        line += f' (critical path {schedule.critical_path(target.application)})'
+      prerequisites = schedule.prerequisites(target)
+      if len(prerequisites) > 0:
+        line += ' after ' + ', '.join(str(prerequisite) for prerequisite in prerequisites)
+      print(line)
+
+
+def host_names(environments: Iterable[Environment]) -> dict[str, list[str]]:
+  """
+    The names of the hosts of each environment. An environment can have
+    a hundred thousand hosts, and every application deployed to it the
+    same ones, so they are listed once for all of its targets.
+
+    :param environments: The environments
+    :return: The names of the hosts of each environment, by its name,
+      or only LOCALHOST if it has none
+  """
+  return {environment.name: [host.name for host in environment.hosts] or [LOCALHOST]
+          for environment in environments}
+
+
+async def deploy(
+    target: Target,
+    configuration: Mapping[str, Any],
+    hosts: Sequence[str],
+    executor: Executor,
+    write: Write) -> int:
+  """
+    Deploy an application to an environment by running its deploy
+    command on every host of the environment, at the same time.
+
+    What the command writes to standard output and standard error is
+    written a line at a time, each line preceded by its host if there
+    is more than one. If there is no deploy command, the names of the
+    application and environment are written instead.
+
+    :param target: The application and environment
+    :param configuration: The resolved configuration of the target
+    :param hosts: The names of the hosts to run the command on
+    :param executor: Runs the command on each host
+    :param write: Writes a line of output
+    :return: ExitCode.SUCCESS if the command succeeded on every host
+    :raises DralithusConfigurationError: If the deploy command is
+      neither a string nor a list of strings, or the transport, host
+      jobs or timeout are not valid
+    :raises DralithusDeployError: If the command cannot be run, fails,
+      or times out on any host
+  """
+  if configuration.get(DEPLOY_KEY) is None:
+    write(_names(target))
     return ExitCode.SUCCESS
+  tagged = len(hosts) > 1
+  return _check(await _deploy_to(target, configuration, hosts, executor, write, tagged),
+                tagged, write)
+
+
+async def plan(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    target: Target,
+    configuration: Mapping[str, Any],
+    hosts: Sequence[str],
+    executor: Executor,
+    deployed: Mapping[str, str],
+    trust_cache: bool = False) -> list[Change]:
+  """
+    Work out what deploying a target has to change on each host.
+
+    If the target has a state command, it is run on every host, at the
+    same time, and the last line it writes to standard output is the
+    fingerprint deployed to the host. Otherwise, what each host has is
+    not known, and every host is to be deployed to, unless the cache is
+    trusted, when the fingerprint last deployed to each host is the one
+    remembered. The hosts remembered that are no longer in the
+    environment are to be forgotten either way.
+
+    :param target: The application and environment
+    :param configuration: The resolved configuration of the target
+    :param hosts: The names of the hosts of the environment
+    :param executor: Runs the state command on each host
+    :param deployed: The fingerprint last deployed to each host
+    :param trust_cache: Whether to take the fingerprint last deployed
+      to each host for what it has, if there is no state command
+    :return: The change to each host, and to each host deployed to that
+      is no longer in the environment
+    :raises DralithusConfigurationError: If the state command is
+      neither a string nor a list of strings, or the transport, host
+      jobs or timeout are not valid
+  """
+  # pylint: disable=import-outside-toplevel
+  import asyncio
+  from dralithus.plan import changes, fingerprint
+  from dralithus.transport import Job
+  desired = fingerprint(configuration)
+  command = _command(target, configuration, STATE_KEY)
+  actual: dict[str, str | None] = dict(deployed)
+  if command is None:
+    if not trust_cache:
+      actual.update(dict.fromkeys(hosts))
+    return changes(target, desired, hosts, actual)
+  transport, host_jobs, timeout = _settings(target, configuration, executor)
+  environ = _environ(target, configuration)
+
+  async def state_of(host: str) -> str | None:
+    lines: list[str] = []
+
+    def write_line(line: str, error: bool = False) -> None:
+      if not error and line.strip() != '':
+        lines.append(line.strip())
+
+    job = Job(host, command, dict(environ, DRALITHUS_HOST=host), timeout)
+    try:
+      exit_code = await executor.run(transport, job, write_line, host_jobs)
+    except (TimeoutError, OSError):
+      return None
+    return lines[-1] if exit_code == 0 and len(lines) > 0 else None
+
+  actual.update(zip(hosts, await asyncio.gather(*map(state_of, hosts))))
+  return changes(target, desired, hosts, actual)
+
+
+async def _deploy_to(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    target: Target,
+    configuration: Mapping[str, Any],
+    hosts: Sequence[str],
+    executor: Executor,
+    write: Write,
+    tagged: bool) -> dict[str, str | None]:
+  """
+    Run the deploy command of a target on some hosts, at the same time.
+
+    :param target: The application and environment
+    :param configuration: The resolved configuration of the target
+    :param hosts: The names of the hosts to run the command on
+    :param executor: Runs the command on each host
+    :param write: Writes a line of output
+    :param tagged: Whether each line is preceded by its host
+    :return: Why the command failed on each host, or None if it
+      succeeded
+    :raises DralithusConfigurationError: If the deploy command is
+      neither a string nor a list of strings, or the transport, host
+      jobs or timeout are not valid
+  """
+  # pylint: disable=import-outside-toplevel
+  import asyncio
+  from dralithus.transport import Job
+  command = _command(target, configuration, DEPLOY_KEY)
+  assert command is not None
+  transport, host_jobs, timeout = _settings(target, configuration, executor)
+  environ = _environ(target, configuration)
+
+  async def deploy_to(host: str) -> str | None:
+    def write_line(line: str, error: bool = False) -> None:
+      write(f'{host}: {line}' if tagged else line, error)
+
+    job = Job(host, command, dict(environ, DRALITHUS_HOST=host), timeout)
+    try:
+      exit_code = await executor.run(transport, job, write_line, host_jobs)
+    except TimeoutError:
+      return f'The {DEPLOY_KEY} command timed out after {timeout:g}s'
+    except OSError as ex:
+      return f'Cannot run the {DEPLOY_KEY} command: {ex.strerror or ex}'
+    return None if exit_code == 0 else f'The {DEPLOY_KEY} command exited with code {exit_code}'
+
+  return dict(zip(hosts, await asyncio.gather(*map(deploy_to, hosts))))
+
+
+def _names(target: Target) -> str:
+  """
+    The names of the application and environment of a target that has
+    no deploy command, as JSON.
+
+    :param target: The application and environment
+    :return: The names
+  """
+  return json.dumps({'application': target.application, 'environment': target.environment})
+
+
+def _check(errors: dict[str, str | None], tagged: bool, write: Write) -> int:
+  """
+    Check that the deploy command of a target succeeded on every host.
+
+    :param errors: Why the command failed on each host, or None
+    :param tagged: Whether the hosts are named in output
+    :param write: Writes a line of output
+    :return: ExitCode.SUCCESS if the command succeeded on every host
+    :raises DralithusDeployError: If it failed on any host
+  """
+  failed = [(host, error) for host, error in errors.items() if error is not None]
+  if len(failed) > 0 and not tagged:
+    raise DralithusDeployError(failed[0][1])
+  if len(failed) > 0:
+    for host, error in failed:
+      write(f'{host}: {error}', True)
+    raise DralithusDeployError(
+      f'The {DEPLOY_KEY} command failed on {len(failed)} of {len(errors)} hosts')
+  return ExitCode.SUCCESS
+
+
+def _command(target: Target, configuration: Mapping[str, Any], key: str) -> str | list[str] | None:
+  """
+    Get a command from the configuration of a target.
+
+    :param target: The application and environment
+    :param configuration: The resolved configuration of the target
+    :param key: The key of the command
+    :return: The command, or None if there is none
+    :raises DralithusConfigurationError: If the command is neither a
+      string nor a list of strings
+  """
+  command = configuration.get(key)
+  if command is None:
+    return None
+  if not (isinstance(command, str)
+          or (isinstance(command, list) and all(isinstance(arg, str) for arg in command))):
+    raise DralithusConfigurationError(
+      f'The {key} command of {target} must be a string or a list of strings')
+  return command
+
+
+def _environ(target: Target, configuration: Mapping[str, Any]) -> dict[str, str]:
+  """
+    The variables set in the environment of the commands of a target.
+
+    :param target: The application and environment
+    :param configuration: The resolved configuration of the target
+    :return: The variables, without the host
+  """
+  from dralithus.plan import fingerprint  # pylint: disable=import-outside-toplevel
+  return {
+    'DRALITHUS_APPLICATION': target.application,
+    'DRALITHUS_ENVIRONMENT': target.environment,
+    'DRALITHUS_CONFIGURATION': json.dumps(configuration, default=json_default),
+    'DRALITHUS_FINGERPRINT': fingerprint(configuration),
+  }
+
+
+def _settings(
+    target: Target,
+    configuration: Mapping[str, Any],
+    executor: Executor) -> tuple[Transport, int | None, float | None]:
+  """
+    Get how to run the deploy command of a target from its
+    configuration.
+
+    :param target: The application and environment
+    :param configuration: The resolved configuration of the target
+    :param executor: The executor the transport is shared through
+    :return: The transport, the host jobs and the timeout
+    :raises DralithusConfigurationError: If any of them is not valid
+  """
+  try:
+    transport = executor.transport(configuration.get(TRANSPORT_KEY, 'local'))
+  except ValueError as ex:
+    raise DralithusConfigurationError(f'The {TRANSPORT_KEY} of {target} is not valid: {ex}') from ex
+  return (transport, _positive(target, configuration, HOST_JOBS_KEY, True),
+          _positive(target, configuration, TIMEOUT_KEY, False))
+
+
+def _positive(
+    target: Target,
+    configuration: Mapping[str, Any],
+    key: str,
+    integer: bool) -> Any:
+  """
+    Get a positive number from the configuration of a target.
+
+    :param target: The application and environment
+    :param configuration: The resolved configuration of the target
+    :param key: The key of the number
+    :param integer: Whether the number must be an integer
+    :return: The number, or None if there is none
+    :raises DralithusConfigurationError: If the value is not a positive
+      number, or integer
+  """
+  value = configuration.get(key)
+  if value is None:
+    return None
+  valid = isinstance(value, int) if integer else isinstance(value, (int, float))
+  if isinstance(value, bool) or not valid or value <= 0:
+    kind = 'integer' if integer else 'number'
+    raise DralithusConfigurationError(f'The {key} of {target} must be a positive {kind}')
+  return value
 
 
 def make_environments(
     program: str,
     global_options: Options,
     command_options: Options,
-    verbosity: int) -> set[Environment]:
+    verbosity: int,
+    command: str = 'deploy') -> set[Environment]:
   """
     Create a set of environments from the global and command options.
 
+    Each environment named in the options is a selector, which may be
+    a glob pattern, a regular expression or an exclusion, as well as
+    an environment name. See Environment.select().
+
     :param program: The name of the program
     :param global_options: The global options for the command line
     :param command_options: The command options for the command line
     :param verbosity: The verbosity level of the command
+    :param command: The name of the command
     :return: A set of Environment objects
   """
   global_environment_names = global_options.get('environments', set())
@@ -130,33 +701,73 @@ def make_environments(
   command_environment_names = command_options.get('environments', set())
   assert (isinstance(command_environment_names, set)
     and all(isinstance(env, str) for env in command_environment_names))
-  environment_names = global_environment_names | command_environment_names
-  environments = set(Environment.load(name) for name in environment_names)
+  selectors = global_environment_names | command_environment_names
+  environments = Environment.select(selectors)
   if len(environments) == 0:
-    raise CommandLineError(program,'deploy',verbosity,
+    raise CommandLineError(program, command, verbosity,
       'No environments specified. Please specify at least one environment.')
   return environments
 
 
-def make_applications(parameters: set[str], verbosity: int) -> set[Application]:
+def make_applications(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    program: str,
+    parameters: Iterable[str],
+    global_options: Options,
+    command_options: Options,
+    verbosity: int,
+    command: str = 'deploy') -> set[Application]:
   """
-    Create a set of applications from the command line parameters.
+    Create a set of applications from the command line parameters and
+    application labels.
+
+    The parameters are consumed one at a time, so they can be streamed
+    straight from a response file without first being collected into
+    a set of names. If application labels are specified, they select
+    every application that carries all the labels, or if parameters
+    are also specified, only those named applications that do.
 
+    :param program: The name of the program
     :param parameters: The parameters for the command line
+    :param global_options: The global options for the command line
+    :param command_options: The command options for the command line
     :param verbosity: The verbosity level of the command
+    :param command: The name of the command
     :return: A set of Application objects
   """
+  global_labels = global_options.get('application_labels', set())
+  command_labels = command_options.get('application_labels', set())
+  assert isinstance(global_labels, set) and isinstance(command_labels, set)
+  labels = global_labels | command_labels
   applications = set(Application.load(name) for name in parameters)
-  assert len(applications) > 0
+  if len(labels) > 0:
+    labelled = Application.select(labels)
+    applications = applications & labelled if len(applications) > 0 else labelled
+  if len(applications) == 0:
+    raise CommandLineError(program, command, verbosity,
+      'No applications specified. Please specify at least one application.')
   return applications
 
 def make(cmdln: CommandLine) -> DeployCommand:
   """
-    Create a help command from the command line arguments.
+    Create a deploy command from the command line arguments.
 
     :param cmdln: The command line object containing the parsed arguments
-    :return: The help command object
+    :return: The deploy command object
   """
   environments = make_environments(cmdln.program, cmdln.global_options, cmdln.command_options, cmdln.verbosity)
-  applications = make_applications(cmdln.parameters, cmdln.verbosity)
-  return DeployCommand(environments, applications, cmdln.verbosity)
+  applications = make_applications(
+    cmdln.program, cmdln.iter_parameters(), cmdln.global_options, cmdln.command_options,
+    cmdln.verbosity)
+  jobs = cmdln.command_options.get('jobs', cmdln.global_options.get('jobs', None))
+  if jobs is None:
+    jobs = os.cpu_count() or 1
+  assert isinstance(jobs, int)
+  dry_run = cmdln.command_options.get('dry_run', cmdln.global_options.get('dry_run', False))
+  assert isinstance(dry_run, bool)
+  force = cmdln.command_options.get('force', cmdln.global_options.get('force', False))
+  assert isinstance(force, bool)
+  trust_cache = cmdln.command_options.get(
+    'trust_cache', cmdln.global_options.get('trust_cache', False))
+  assert isinstance(trust_cache, bool)
+  return DeployCommand(environments, applications, jobs, cmdln.verbosity, dry_run, force,
+                       trust_cache)
@@ -0,0 +1,132 @@
+"""
+  engine.py: Run a step for many targets on an event loop.
+"""
+# -------------------------------------------------------------------
+# engine.py: Run a step for many targets on an event loop.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# drl deploy deploys every target, an application in an environment,
+# with the same step. The engine runs the step for each target as a
+# task on an event loop, so that at most --jobs targets are deployed
+# at the same time, and the time a deploy takes is that of its slowest
+# targets rather than the sum of them all. A step spends its time
+# waiting on the commands it runs on hosts (see dralithus.executor),
+# so a coroutine for each, rather than a thread, lets one deploy wait
+# on thousands of hosts.
+#
+# What a step writes is streamed a line at a time, as it is written,
+# rather than held until its target completes, so that a long deploy
+# shows its progress. The event loop runs on the thread of the command
+# that deploys, so that what it writes stays with that command when
+# drl batch and the daemon redirect what each command's thread writes.
+#
+# The order in which targets are started is decided by a Schedule
+# (see dralithus.schedule), which only lets a target start once the
+# targets it depends on have been deployed.
+from __future__ import annotations
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple
+import asyncio
+import time
+
+from dralithus.errors import DralithusError, ExitCode
+from dralithus.schedule import Schedule, Target
+from dralithus.transport import Write
+
+
+class TargetResult(NamedTuple):
+  """
+    The result of running the step for one target.
+  """
+  target: Target # The target
+  exit_code: int # The exit code of the step
+  error: str | None # Why the step failed, if it raised a DralithusError
+  seconds: float # How long the step took
+
+
+# The step run for each target. It is given the target, and a function
+# that writes a line of its output, and returns its exit code.
+Step = Callable[[Target, Write], Awaitable[int]]
+
+
+async def run(
+    schedule: Schedule,
+    step: Step,
+    jobs: int,
+    write: Callable[[Target, str, bool], None]) -> AsyncIterator[TargetResult]:
+  """
+    Run a step for each target, as tasks on the running event loop.
+
+    The targets are started in the order the schedule gives them, at
+    most jobs at a time, and each is started as soon as a job is free
+    and it is ready, so a slow target holds up no other that does not
+    depend on it. Every line the steps write is passed to write, with
+    whether it was written to standard error, as soon as it is written.
+
+    A step that raises a DralithusError fails with the exit code of
+    the error. The targets that depend on a target that failed are
+    not started, and fail with ExitCode.DEPLOY_ERROR. Any other
+    exception is a bug, and is raised once the steps still running
+    have been cancelled.
+
+    :param schedule: The targets, and the order in which to start them
+    :param step: The step to run for each target
+    :param jobs: The number of steps to run at the same time
+    :param write: Writes a line that a step wrote for a target
+    :return: An iterator over the result of each target, in the order
+      in which they complete
+  """
+  assert jobs > 0, 'Jobs must be a positive number.'
+
+  async def work(target: Target) -> TargetResult:
+    def write_line(line: str, error: bool = False) -> None:
+      write(target, line, error)
+
+    started = time.perf_counter()
+    error: str | None = None
+    try:
+      exit_code = await step(target, write_line)
+    except DralithusError as ex:
+      exit_code, error = ex.exit_code, str(ex)
+    return TargetResult(target, exit_code, error, time.perf_counter() - started)
+
+  running: set[asyncio.Task[TargetResult]] = set()
+
+  def start() -> None:
+    while len(running) < jobs and (target := schedule.ready()) is not None:
+      running.add(asyncio.create_task(work(target)))
+
+  try:
+    start()
+    while len(running) > 0:
+      finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+      running.difference_update(finished)
+      results: list[TargetResult] = []
+      for task in sorted(finished, key=lambda task: task.result().target):
+        result = task.result()
+        results.append(result)
+        error = f'Not deployed, as {result.target} failed'
+        results.extend(
+          TargetResult(target, ExitCode.DEPLOY_ERROR, error, 0.0)
+          for target in schedule.done(result.target, result.exit_code == ExitCode.SUCCESS))
+      start()
+      for result in results:
+        yield result
+  finally:
+    for task in running:
+      task.cancel()
+    await asyncio.gather(*running, return_exceptions=True)
@@ -21,8 +21,53 @@
 # <https://www.gnu.org/licenses/>.
 # -------------------------------------------------------------------
 from __future__ import annotations
+from functools import cache
+from typing import Any, Callable, Iterable, Iterator, Mapping
 
+from dralithus.catalog import (
+  Details, Host, catalog_directory, catalog_names, catalog_path, details_from, document_from,
+  host_from, hosts_from, parse_yaml_except, parse_yaml_items)
 from dralithus.errors import DralithusEnvironmentError
+from dralithus.inventory import inventory_enabled, open_inventory
+from dralithus.name_index import LabelIndex, NameIndex, is_name
+
+# The directory of the catalog that holds environment files.
+_KIND = 'environments'
+
+# The key of the hosts in an environment file.
+_HOSTS = 'hosts'
+
+# The environments loaded from each catalog, by catalog directory and
+# name.
+_loaded: dict[tuple[str, str], Environment] = {}
+
+
+class Hosts(Iterable[Host]):  # pylint: disable=too-few-public-methods
+  """
+  The hosts of an environment, read each time they are iterated.
+
+  An environment can have tens of thousands of hosts. Rather than
+  hold them all in memory, they are read one at a time from where
+  they are kept: the file of the environment, or the inventory.
+  """
+  __slots__ = ('_read',)
+
+  def __init__(self, read: Callable[[], Iterator[Host]]) -> None:
+    """
+    Initialize the hosts.
+
+    :param read: The function that reads the hosts
+    """
+    self._read = read
+
+  def __iter__(self) -> Iterator[Host]:
+    """
+    Read the hosts.
+
+    :return: An iterator over the hosts
+    :raises DralithusEnvironmentError: If the hosts are not valid
+    """
+    return self._read()
 
 
 class Environment:
@@ -32,16 +77,27 @@ class Environment:
   This class encapsulates the details of a deployment environment,
   such as its name, description, and any other relevant metadata.
   """
+  __slots__ = ('_name', '_description', '_labels', '_configuration', '_hosts')
 
-  def __init__(self, name: str, description: str) -> None:
+  def __init__(
+      self,
+      name: str,
+      details: Details | None = None,
+      hosts: Iterable[Host] | None = None) -> None:
     """
     Initialize the environment with a name and an optional description.
 
     :param name: The name of the environment
-    :param description: A brief description of the environment
+    :param details: The description of the environment, its labels,
+      e.g. {'tier': 'prod', 'region': 'eu'}, and the configuration that
+      it gives every application deployed to it. Defaults to none.
+    :param hosts: The hosts of the environment, as a name and labels
+      for each. E.g. [('web1', {'rack': 'r12'})]
     """
     self._name = name
-    self._description = description
+    self._description, self._labels, self._configuration = \
+      Details('', {}, {}) if details is None else details
+    self._hosts: Iterable[Host] = () if hosts is None else hosts
 
   def __hash__(self) -> int:
     """
@@ -80,28 +136,242 @@ class Environment:
     """A brief description of the environment."""
     return self._description
 
+  @property
+  def labels(self) -> dict[str, str]:
+    """The labels of the environment."""
+    return self._labels
+
+  @property
+  def configuration(self) -> Mapping[str, Any]:
+    """The configuration layer of the environment."""
+    return self._configuration
+
+  @property
+  def hosts(self) -> Iterable[Host]:
+    """
+    The hosts of the environment.
+
+    The hosts of an environment that was loaded are a Hosts object,
+    which reads them each time it is iterated. Use list() to keep them.
+    """
+    return self._hosts
+
   @classmethod
   def load(cls, name: str) -> Environment:
     """
     Load an environment by its name.
 
-    This function simulates loading an environment from a data source.
-    In a real application, this might involve reading from a database
-    or configuration file.
+    The environment is read from environments/<name>.yaml in the
+    catalog directory (see dralithus.catalog) the first time it is
+    loaded. Later loads of the same environment return the same
+    object, without reading the file again.
 
     :param name: The name of the environment to load
     :return: An Environment object representing the loaded environment
+    :raises DralithusEnvironmentError: If the environment does not
+      exist or its file is not valid
+    """
+    return _load(catalog_directory(), name)
+
+  @classmethod
+  def reload(cls, names: Iterable[str]) -> None:
+    """
+    Bring environments up to date with their files, after the files
+    have changed.
+
+    An environment that was loaded is updated in place, so that
+    everything that holds it sees the change. One that was not is
+    loaded. One whose file was removed, or is no longer valid, is
+    forgotten, so that loading it again says why. The index is built
+    again the next time it is used.
+
+    :param names: The names of the environments whose files changed
+    """
+    directory = catalog_directory()
+    for name in names:
+      key = (directory, name)
+      try:
+        environment = _read(directory, name)
+      except DralithusEnvironmentError:
+        _loaded.pop(key, None)
+        continue
+      # pylint: disable=protected-access
+      loaded = _loaded.setdefault(key, environment)
+      loaded._description = environment._description
+      loaded._labels = environment._labels
+      loaded._configuration = environment._configuration
+      loaded._hosts = environment._hosts
+    _name_index.cache_clear()
+
+  @classmethod
+  def from_document(
+      cls,
+      name: str,
+      document: Mapping[str, Any],
+      hosts: Iterable[Host] | None = None) -> Environment:
+    """
+    Create an environment from the contents of its catalog file.
+
+    The file is a mapping, in which every key is optional:
+
+      description: Local development environment
+      labels:
+        tier: dev
+        region: local
+      configuration:
+        docker:
+          host: unix:///var/run/docker.sock
+      hosts:
+        - name: web1
+          labels:
+            rack: r12
+        - db1
+
+    :param name: The name of the environment
+    :param document: The contents of the file
+    :param hosts: The hosts, if they are read separately from the rest
+      of the file. Otherwise, they are taken from the document.
+    :return: The environment
+    :raises ValueError: If the contents are not valid
     """
+    if hosts is None or _HOSTS in document:
+      hosts = hosts_from(document)
+    return Environment(name, details_from(document), hosts)
+
+  @classmethod
+  def index(cls) -> NameIndex:
+    """
+    The index of the names of all known environments.
+
+    :return: The name index
+    """
+    return _name_index(catalog_directory())
+
+  @classmethod
+  def select(cls, selectors: Iterable[str]) -> set[Environment]:
+    """
+    Load the environments that match a list of selectors.
+
+    A selector is an environment name, a glob pattern (stage-*), a
+    regular expression enclosed in slashes (/eu-[0-9]+/), a label
+    (tier=prod), or any of these preceded by '!' to exclude the
+    environments it matches.
+    See NameIndex.select() for details.
+
+    If every selector is a name, the environments are loaded directly,
+    so only their own files are read. Otherwise, the environments
+    directory is listed to find the names that the selectors match.
+
+    :param selectors: The selectors
+    :return: The selected environments
+    """
+    selectors = list(selectors)
+    if all(is_name(selector) for selector in selectors):
+      return set(cls.load(name) for name in selectors)
     try:
-      # TODO: Implement actual loading logic from a data source.
-      # Simulated data for demonstration purposes
-      environments = {
-        'local': Environment('local', 'Local development environment'),
-        'development': Environment('development', 'Development environment'),
-        'test': Environment('test', 'Test environment'),
-        'staging': Environment('staging', 'Staging environment'),
-        'production': Environment('production', 'Production environment'),
-      }
-      return environments[name]
+      return set(cls.load(name) for name in cls.index().select(selectors))
     except KeyError as ex:
-      raise DralithusEnvironmentError(f'Environment not found: {name}') from ex
+      raise DralithusEnvironmentError(f'Environment not found: {ex.args[0]}') from ex
+    except ValueError as ex:
+      raise DralithusEnvironmentError(f'Invalid environment selector: {ex}') from ex
+
+
+def _load(directory: str, name: str) -> Environment:
+  """
+  Load an environment from its file in a catalog.
+
+  The result is memoised, so each file is read at most once, until
+  it is reloaded. Errors are not memoised.
+
+  :param directory: The catalog directory
+  :param name: The name of the environment
+  :return: The environment
+  :raises DralithusEnvironmentError: If the environment does not exist
+    or its file is not valid
+  """
+  environment = _loaded.get((directory, name))
+  if environment is None:
+    environment = _loaded.setdefault((directory, name), _read(directory, name))
+  return environment
+
+
+def _read(directory: str, name: str) -> Environment:
+  """
+  Read an environment from its file in a catalog.
+
+  If the catalog is indexed in an inventory (see dralithus.inventory),
+  the environment is read from the inventory.
+
+  The hosts are not read with the rest of the environment, but each
+  time they are iterated, one at a time, so that the memory used does
+  not grow with the number of hosts.
+
+  :param directory: The catalog directory
+  :param name: The name of the environment
+  :return: The environment
+  :raises DralithusEnvironmentError: If the environment does not exist
+    or its file is not valid
+  """
+  try:
+    if inventory_enabled():
+      inventory = open_inventory(directory)
+      entry = inventory.entry(_KIND, name)
+      if entry is None:
+        raise FileNotFoundError(name)
+      if entry.error is not None:
+        raise ValueError(entry.error)
+      data = entry.document
+      hosts = Hosts(lambda: inventory.environment_hosts(name))
+    else:
+      path = catalog_path(directory, _KIND, name)
+      with open(path, 'rb') as file:
+        data = parse_yaml_except(file, path, _HOSTS)
+      hosts = Hosts(lambda: _read_hosts(name, path))
+    return Environment.from_document(name, document_from(data), hosts)
+  except FileNotFoundError as ex:
+    raise DralithusEnvironmentError(f'Environment not found: {name}') from ex
+  except (OSError, ValueError) as ex:
+    raise DralithusEnvironmentError(f'Invalid environment {name}: {ex}') from ex
+
+
+def _read_hosts(name: str, path: str) -> Iterator[Host]:
+  """
+  Read the hosts of an environment from its file, one at a time.
+
+  :param name: The name of the environment
+  :param path: The path of the file
+  :return: An iterator over the hosts
+  :raises DralithusEnvironmentError: If the file cannot be read, or the
+    hosts are not valid
+  """
+  try:
+    with open(path, 'rb') as file:
+      for item in parse_yaml_items(file, path, _HOSTS):
+        yield host_from(item)
+  except (OSError, ValueError) as ex:
+    raise DralithusEnvironmentError(f'Invalid environment {name}: {ex}') from ex
+
+
+@cache
+def _name_index(directory: str) -> NameIndex:
+  """
+  The index of the names and labels of the environments in a catalog.
+
+  The names are found by listing the environments directory, without
+  reading any file. The labels are only read, by loading every
+  environment, the first time a label is used to select environments.
+  If the catalog is indexed in an inventory, the names and labels are
+  read from the inventory instead.
+
+  :param directory: The catalog directory
+  :return: The name index
+  """
+  if inventory_enabled():
+    return open_inventory(directory).name_index(_KIND, DralithusEnvironmentError)
+
+  names = catalog_names(directory, _KIND)
+
+  def labels() -> LabelIndex:
+    return LabelIndex({name: _load(directory, name).labels for name in names})
+
+  return NameIndex(names, labels)
@@ -38,6 +38,10 @@ class ExitCode(IntEnum):
   INVALID_COMMAND_LINE = 1 # Associated with CommandLineError
   ENVIRONMENT_ERROR = 2 # Associated with EnvironmentError
   APPLICATION_ERROR = 3 # Associated with ApplicationError
+  DAEMON_ERROR = 4 # Associated with DaemonError
+  CONFIGURATION_ERROR = 5 # Associated with DralithusConfigurationError
+  VALIDATION_ERROR = 6 # Associated with DralithusValidationError
+  DEPLOY_ERROR = 7 # Associated with DralithusDeployError
 
 
 class DralithusError(RuntimeError):
@@ -191,3 +195,80 @@ class DralithusApplicationError(DralithusError):
       :param message: The error message
     """
     super().__init__(message, exit_code=ExitCode.APPLICATION_ERROR)
+
+
+class DaemonError(DralithusError):
+  """
+    Exception raised for errors in communicating with the drl daemon.
+
+    This exception is used to indicate that the daemon could not be
+    started, or that it stopped before a command that it was running
+    completed.
+  """
+  def __init__(self, message: str) -> None:
+    """
+      Initialize the DaemonError with a message.
+
+      The exit code is set to ExitCode.DAEMON_ERROR.
+
+      :param message: The error message
+    """
+    super().__init__(message, exit_code=ExitCode.DAEMON_ERROR)
+
+
+class DralithusConfigurationError(DralithusError):
+  """
+    Exception raised for errors in the configuration of an application
+    for an environment.
+
+    This exception is used to indicate that a configuration file, or
+    the configuration in an application or environment file, is not
+    valid.
+  """
+  def __init__(self, message: str) -> None:
+    """
+      Initialize the DralithusConfigurationError with a message.
+
+      The exit code is set to ExitCode.CONFIGURATION_ERROR.
+
+      :param message: The error message
+    """
+    super().__init__(message, exit_code=ExitCode.CONFIGURATION_ERROR)
+
+
+class DralithusValidationError(DralithusError):
+  """
+    Exception raised when catalog files do not match their schemas.
+
+    This exception is used by drl validate, once it has reported what
+    is wrong with each file, to fail with a summary of how many files
+    are not valid.
+  """
+  def __init__(self, message: str) -> None:
+    """
+      Initialize the DralithusValidationError with a message.
+
+      The exit code is set to ExitCode.VALIDATION_ERROR.
+
+      :param message: The error message
+    """
+    super().__init__(message, exit_code=ExitCode.VALIDATION_ERROR)
+
+
+class DralithusDeployError(DralithusError):
+  """
+    Exception raised when an application cannot be deployed to an
+    environment.
+
+    This exception is used to indicate that the deploy command of an
+    application in an environment could not be run, or failed.
+  """
+  def __init__(self, message: str) -> None:
+    """
+      Initialize the DralithusDeployError with a message.
+
+      The exit code is set to ExitCode.DEPLOY_ERROR.
+
+      :param message: The error message
+    """
+    super().__init__(message, exit_code=ExitCode.DEPLOY_ERROR)
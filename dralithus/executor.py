@@ -0,0 +1,133 @@
+"""
+  executor.py: Run commands on many hosts at the same time.
+"""
+# -------------------------------------------------------------------
+# executor.py: Run commands on many hosts at the same time.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# A deploy runs its command on every host of an environment, and
+# drl deploy runs many deploys at once, so it may have a command
+# running on each of thousands of hosts. An Executor runs them all on
+# one event loop, through transports (see dralithus.transport), and
+# limits how many run:
+#
+#   on each host, so that the applications deployed to the same host
+#   do not all restart on it at once, if the host is given a limit;
+#   through each transport, if it has a limit, as those that run a
+#   local or ssh process for each command do, so that drl does not
+#   run out of processes or file descriptors.
+#
+# A command that waits for its host, or its transport, to be free does
+# not start its timeout until it starts to run.
+from __future__ import annotations
+from contextlib import AbstractAsyncContextManager, nullcontext
+import asyncio
+
+from dralithus.transport import TRANSPORTS, Job, Transport, Write
+
+
+class Executor:
+  """
+    Runs commands on hosts, within limits.
+  """
+  def __init__(self) -> None:
+    """
+      Initialize the executor.
+    """
+    self._slots: dict[Transport, asyncio.Semaphore] = {}
+    self._hosts: dict[str, asyncio.Semaphore] = {}
+    self._transports: dict[str, Transport] = {}
+
+  def transport(self, name: str) -> Transport:
+    """
+      Get a transport, which is created the first time it is used, and
+      then shared by every command run through it, so that those run on
+      the same host share its connections to it.
+
+      :param name: The name of the transport, e.g. ssh
+      :return: The transport
+      :raises ValueError: If there is no transport of that name
+    """
+    transport = self._transports.get(name)
+    if transport is None:
+      if name not in TRANSPORTS:
+        raise ValueError(f'Unknown transport {name}, expected one of {", ".join(TRANSPORTS)}')
+      transport = self._transports[name] = TRANSPORTS[name]()
+    return transport
+
+  async def close(self) -> None:
+    """
+      Close the transports, and whatever they keep open, such as their
+      connections to hosts. No command may be running.
+    """
+    transports = list(self._transports.values())
+    self._transports.clear()
+    await asyncio.gather(*(transport.close() for transport in transports))
+
+  async def run(
+      self, transport: Transport, job: Job, write: Write, host_jobs: int | None = None) -> int:
+    """
+      Run a command on a host, once the host and the transport are free.
+
+      :param transport: The transport to run it through
+      :param job: The host, the command to run on it, and its timeout
+      :param write: Writes each line the command writes, as it is
+        written
+      :param host_jobs: The most commands that run on the host at the
+        same time, or None if there is no limit. A host keeps the first
+        limit it is given.
+      :return: The exit code of the command
+      :raises TimeoutError: If the command did not complete within its
+        timeout, in which case it was stopped
+      :raises OSError: If the command cannot be run
+    """
+    async with self._host(job.host, host_jobs), self._transport(transport):
+      async with asyncio.timeout(job.timeout):
+        return await transport.run(job, write)
+
+  def _host(self, host: str, host_jobs: int | None) -> AbstractAsyncContextManager[object]:
+    """
+      Get what limits the commands that run on a host.
+
+      :param host: The name of the host
+      :param host_jobs: The most commands that run on the host at the
+        same time, or None
+      :return: The semaphore of the host, or a context that does not
+        limit it
+    """
+    semaphore = self._hosts.get(host)
+    if semaphore is None:
+      if host_jobs is None:
+        return nullcontext()
+      semaphore = self._hosts[host] = asyncio.Semaphore(host_jobs)
+    return semaphore
+
+  def _transport(self, transport: Transport) -> AbstractAsyncContextManager[object]:
+    """
+      Get what limits the commands that run through a transport.
+
+      :param transport: The transport
+      :return: The semaphore of the transport, or a context that does
+        not limit it if it has no concurrency
+    """
+    if transport.concurrency is None:
+      return nullcontext()
+    semaphore = self._slots.get(transport)
+    if semaphore is None:
+      semaphore = self._slots[transport] = asyncio.Semaphore(transport.concurrency)
+    return semaphore
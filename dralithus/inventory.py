@@ -0,0 +1,617 @@
+"""
+  inventory.py: Index a catalog in a SQLite database.
+"""
+# -------------------------------------------------------------------
+# inventory.py: Index a catalog in a SQLite database.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Catalogs of tens of thousands of environments and applications are
+# too large to list, or to hold in a snapshot that is read whole on
+# every run. If $DRALITHUS_INVENTORY is 'sqlite', the catalog is
+# indexed in a SQLite database in the cache directory instead, and
+# Environment.load(), Application.load() and selection by name or
+# label are answered by indexed queries.
+#
+# The database holds the parsed contents of every environment and
+# application file, their labels, the hosts of every environment and
+# their labels, and which applications have a configuration file for
+# which environment (configuration/<application>-<environment>.yaml).
+# The last is what 'deployed to' means in queries such as "every
+# application deployed to a host in rack r12".
+#
+# Like a snapshot, the database records the size, modification time
+# and SHA-256 hash of every file. It is brought up to date once per
+# process, by a stat pass over the catalog in which only files that
+# have changed are read, and only files whose contents have changed
+# are parsed and indexed again. A refresh that finds no change does
+# not write to the database.
+#
+# The database is only a cache. If it cannot be used, or was written
+# by another version of dralithus, it is rebuilt. The documents in it
+# are pickles, so it is also rebuilt if it is not private to the user
+# (see dralithus.cache.is_private).
+from __future__ import annotations
+from functools import cache
+from hashlib import sha1, sha256
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, NamedTuple
+import os
+import pickle
+import threading
+import time
+
+from dralithus.cache import cache_directory, is_private
+from dralithus.catalog import (
+  EXTENSION, Host, catalog_files, catalog_names, document_from, host_from, hosts_from,
+  labels_from, parse_yaml, parse_yaml_except, parse_yaml_items, shared_labels)
+from dralithus.name_index import LabelIndex, NameIndex
+from dralithus.snapshot import RACY_NS, Entry
+
+if TYPE_CHECKING:
+  import sqlite3
+
+# The kinds of file in a catalog. Environment and application files
+# are parsed and indexed. Only the names of configuration files are.
+ENVIRONMENTS = 'environments'
+APPLICATIONS = 'applications'
+CONFIGURATION = 'configuration'
+
+# The number of hosts read from the database at a time.
+_PAGE_SIZE = 1000
+
+# The version of the database schema. Change this whenever the schema,
+# or the way files are parsed, changes, so that old databases are
+# rebuilt.
+_SCHEMA_VERSION = 2
+
+_SCHEMA = f'''
+CREATE TABLE files (
+  kind TEXT NOT NULL, name TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+  digest BLOB, document BLOB, error TEXT, PRIMARY KEY (kind, name));
+CREATE TABLE labels (
+  kind TEXT NOT NULL, name TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,
+  PRIMARY KEY (kind, name, key));
+CREATE INDEX labels_by_value ON labels (kind, key, value);
+CREATE TABLE hosts (
+  environment TEXT NOT NULL, host TEXT NOT NULL, position INTEGER NOT NULL,
+  PRIMARY KEY (environment, host));
+CREATE INDEX hosts_by_position ON hosts (environment, position);
+CREATE TABLE host_labels (
+  environment TEXT NOT NULL, host TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,
+  PRIMARY KEY (environment, host, key));
+CREATE INDEX host_labels_by_value ON host_labels (key, value);
+CREATE TABLE pairs (
+  application TEXT NOT NULL, environment TEXT NOT NULL, PRIMARY KEY (environment, application));
+CREATE TABLE meta (key TEXT PRIMARY KEY, value);
+PRAGMA user_version = {_SCHEMA_VERSION};
+'''
+
+
+class _Read(NamedTuple):
+  """
+    A catalog file as it was read, to be indexed.
+  """
+  data: bytes # The contents of the file
+  stat: os.stat_result # The stat result of the file when it was listed
+
+
+def inventory_enabled() -> bool:
+  """
+    Check if catalogs are indexed in a SQLite database.
+
+    :return: True if $DRALITHUS_INVENTORY is 'sqlite'
+  """
+  return os.environ.get('DRALITHUS_INVENTORY') == 'sqlite'
+
+
+def inventory_path(directory: str) -> str:
+  """
+    The path of the database that indexes a catalog.
+
+    :param directory: The catalog directory
+    :return: The path of the database in the cache directory
+  """
+  catalog = sha1(directory.encode('utf-8'), usedforsecurity=False).hexdigest()[:12]
+  return os.path.join(cache_directory(), 'inventory', f'{catalog}.sqlite3')
+
+
+class Inventory:
+  """
+    The index of a catalog in a SQLite database.
+
+    An inventory may be used by several threads. A process that forks
+    opens the database again in the child, as SQLite requires.
+  """
+  def __init__(self, directory: str, path: str | None = None) -> None:
+    """
+      Initialize the inventory. The database is opened when it is
+      first used.
+
+      :param directory: The catalog directory
+      :param path: The path of the database. Defaults to
+        inventory_path(directory)
+    """
+    self._directory = directory
+    self._path = inventory_path(directory) if path is None else path
+    self._lock = threading.Lock()
+    self._connection: sqlite3.Connection | None = None
+    self._pid = 0
+
+  @property
+  def directory(self) -> str:
+    """The catalog directory."""
+    return self._directory
+
+  @property
+  def path(self) -> str:
+    """The path of the database."""
+    return self._path
+
+  def close(self) -> None:
+    """
+      Close the database.
+    """
+    with self._lock:
+      if self._connection is not None and self._pid == os.getpid():
+        self._connection.close()
+      self._connection = None
+
+  def _connect(self) -> sqlite3.Connection:
+    """
+      Open the database, creating it if it does not exist, and
+      rebuilding it if it cannot be used, or is not private to the
+      user.
+
+      The caller must hold the lock.
+
+      :return: The connection to the database
+    """
+    if self._connection is not None and self._pid == os.getpid():
+      return self._connection
+    # sqlite3 is imported here, so that commands that do not use the
+    # inventory do not pay to import it.
+    import sqlite3  # pylint: disable=import-outside-toplevel,redefined-outer-name
+    os.makedirs(os.path.dirname(self._path), mode=0o700, exist_ok=True)
+    files = [path for path in (self._path, f'{self._path}-wal', f'{self._path}-shm')
+             if os.path.lexists(path)]
+    if not all(is_private(path) for path in files):
+      for path in files:
+        os.remove(path)
+    connection = sqlite3.connect(self._path, check_same_thread=False)
+    try:
+      version = connection.execute('PRAGMA user_version').fetchone()[0]
+    except sqlite3.DatabaseError:
+      # The file is not a database.
+      connection.close()
+      os.remove(self._path)
+      connection = sqlite3.connect(self._path, check_same_thread=False)
+      version = 0
+    if version != _SCHEMA_VERSION:
+      with connection:
+        tables = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        for (table,) in tables.fetchall():
+          connection.execute(f'DROP TABLE IF EXISTS "{table}"')
+      connection.executescript(_SCHEMA)
+    # SQLite creates the journal files with the permissions of the
+    # database, so they are private to the user too.
+    os.chmod(self._path, 0o600)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    self._connection = connection
+    self._pid = os.getpid()
+    return connection
+
+  def refresh(self) -> int:
+    """
+      Bring the database up to date with the catalog.
+
+      :return: The number of files that were parsed and indexed again
+    """
+    with self._lock:
+      connection = self._connect()
+      refreshed_ns: int = _meta(connection, 'refreshed_ns') or 0
+      parsed = 0
+      with connection:
+        changed, names_changed = self._refresh_configuration(connection, refreshed_ns)
+        for kind in (ENVIRONMENTS, APPLICATIONS):
+          kind_parsed, kind_changed, kind_names_changed \
+            = self._refresh_kind(connection, kind, refreshed_ns)
+          parsed += kind_parsed
+          changed = changed or kind_changed
+          names_changed = names_changed or kind_names_changed
+        if names_changed:
+          self._index_pairs(connection)
+        if changed:
+          _set_meta(connection, 'refreshed_ns', time.time_ns())
+      return parsed
+
+  def _refresh_kind(
+      self,
+      connection: sqlite3.Connection,
+      kind: str,
+      refreshed_ns: int) -> tuple[int, bool, bool]:
+    """
+      Bring the environment or application files in the database up to
+      date.
+
+      :param connection: The connection to the database
+      :param kind: The kind of file
+      :param refreshed_ns: When the database was last brought up to date
+      :return: The number of files that were parsed again, whether any
+        file was checked, and whether any file was added or removed
+    """
+    indexed: dict[str, tuple[int, int]] = {
+      name: (size, mtime_ns) for name, size, mtime_ns in connection.execute(
+        'SELECT name, size, mtime_ns FROM files WHERE kind = ?', (kind,))}
+    files = catalog_files(self._directory, kind)
+    parsed = 0
+    changed = names_changed = len(indexed.keys() - files.keys()) > 0
+    for name in indexed.keys() - files.keys():
+      self._remove(connection, kind, name)
+    for name, stat in files.items():
+      row = indexed.get(name)
+      # A file modified shortly before the last refresh may have
+      # changed again since without changing its size or modification
+      # time. It is checked against its hash, as in dralithus.snapshot.
+      if row is not None and row[1] < refreshed_ns - RACY_NS \
+          and row == (stat.st_size, stat.st_mtime_ns):
+        continue
+      changed = True
+      names_changed = names_changed or row is None
+      try:
+        with open(os.path.join(self._directory, kind, name + EXTENSION), 'rb') as file:
+          data = file.read()
+      except OSError:
+        continue  # The file was removed, or cannot be read
+      digest = None if row is None else connection.execute(
+        'SELECT digest FROM files WHERE kind = ? AND name = ?', (kind, name)).fetchone()[0]
+      if digest == sha256(data).digest():
+        # Only the modification time changed.
+        connection.execute(
+          'UPDATE files SET size = ?, mtime_ns = ? WHERE kind = ? AND name = ?',
+          (stat.st_size, stat.st_mtime_ns, kind, name))
+      else:
+        self._index(connection, kind, name, _Read(data, stat))
+        parsed += 1
+    return parsed, changed, names_changed
+
+  def _refresh_configuration(
+      self, connection: sqlite3.Connection, refreshed_ns: int) -> tuple[bool, bool]:
+    """
+      Bring the names of the configuration files in the database up to
+      date.
+
+      Only their names are indexed, and names are only added or removed
+      when the modification time of their directory changes, so the
+      directory is only listed again when it does.
+
+      :param connection: The connection to the database
+      :param refreshed_ns: When the database was last brought up to date
+      :return: Whether the directory was listed, and whether any file
+        was added or removed
+    """
+    try:
+      mtime_ns = os.stat(os.path.join(self._directory, CONFIGURATION)).st_mtime_ns
+    except OSError:
+      mtime_ns = 0
+    if _meta(connection, 'configuration_mtime_ns') == mtime_ns \
+        and mtime_ns < refreshed_ns - RACY_NS:
+      return False, False
+    indexed = {name for (name,) in connection.execute(
+      'SELECT name FROM files WHERE kind = ?', (CONFIGURATION,))}
+    names = set(catalog_names(self._directory, CONFIGURATION))
+    connection.executemany(
+      'DELETE FROM files WHERE kind = ? AND name = ?',
+      ((CONFIGURATION, name) for name in indexed - names))
+    connection.executemany(
+      'INSERT INTO files (kind, name, size, mtime_ns) VALUES (?, ?, 0, 0)',
+      ((CONFIGURATION, name) for name in names - indexed))
+    _set_meta(connection, 'configuration_mtime_ns', mtime_ns)
+    return True, indexed != names
+
+  @staticmethod
+  def _remove(connection: sqlite3.Connection, kind: str, name: str) -> None:
+    """
+      Remove a file from the database.
+
+      :param connection: The connection to the database
+      :param kind: The kind of file
+      :param name: The name of the file
+    """
+    connection.execute('DELETE FROM files WHERE kind = ? AND name = ?', (kind, name))
+    connection.execute('DELETE FROM labels WHERE kind = ? AND name = ?', (kind, name))
+    if kind == ENVIRONMENTS:
+      connection.execute('DELETE FROM hosts WHERE environment = ?', (name,))
+      connection.execute('DELETE FROM host_labels WHERE environment = ?', (name,))
+
+  def _index(self, connection: sqlite3.Connection, kind: str, name: str, read: _Read) -> None:
+    """
+      Parse a file and index its contents.
+
+      A file that is not valid is recorded, with the reason, so that
+      loading it reports the error. It has no labels or hosts.
+
+      The hosts of an environment are indexed one at a time, as they
+      are parsed, and are not kept in its document.
+
+      :param connection: The connection to the database
+      :param kind: The kind of file
+      :param name: The name of the file
+      :param read: The contents and stat result of the file
+    """
+    data, stat = read
+    self._remove(connection, kind, name)
+    path = os.path.join(self._directory, kind, name + EXTENSION)
+    document: Any = None
+    error: str | None = None
+    labels: dict[str, str] = {}
+    try:
+      if kind == ENVIRONMENTS:
+        document = parse_yaml_except(data, path, 'hosts')
+        # Hosts that are not a list are left in the document.
+        hosts_from(document_from(document))
+        self._index_hosts(
+          connection, name, (host_from(item) for item in parse_yaml_items(data, path, 'hosts')))
+      else:
+        document = parse_yaml(data, path)
+      labels = labels_from(document_from(document))
+    except ValueError as ex:
+      self._remove(connection, kind, name)
+      error = str(ex)
+      labels = {}
+    connection.execute(
+      'INSERT INTO files (kind, name, size, mtime_ns, digest, document, error) '
+      'VALUES (?, ?, ?, ?, ?, ?, ?)',
+      (kind, name, stat.st_size, stat.st_mtime_ns, sha256(data).digest(),
+       pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL), error))
+    connection.executemany(
+      'INSERT INTO labels (kind, name, key, value) VALUES (?, ?, ?, ?)',
+      ((kind, name, key, value) for key, value in labels.items()))
+
+  @staticmethod
+  def _index_hosts(connection: sqlite3.Connection, environment: str, hosts: Iterable[Host]) -> None:
+    """
+      Index the hosts of an environment.
+
+      :param connection: The connection to the database
+      :param environment: The name of the environment
+      :param hosts: The hosts, in order. Only the first of several
+        hosts with the same name is indexed.
+    """
+    for position, (host, labels) in enumerate(hosts):
+      cursor = connection.execute(
+        'INSERT OR IGNORE INTO hosts (environment, host, position) VALUES (?, ?, ?)',
+        (environment, host, position))
+      if cursor.rowcount > 0:
+        connection.executemany(
+          'INSERT INTO host_labels (environment, host, key, value) VALUES (?, ?, ?, ?)',
+          ((environment, host, key, value) for key, value in labels.items()))
+
+  @staticmethod
+  def _index_pairs(connection: sqlite3.Connection) -> None:
+    """
+      Find the application and environment of every configuration file.
+
+      A configuration file <application>-<environment> is split at
+      every '-' in turn, and recorded for every split that names a
+      known application and environment.
+
+      :param connection: The connection to the database
+    """
+    def names(kind: str) -> set[str]:
+      return {name for (name,) in connection.execute(
+        'SELECT name FROM files WHERE kind = ?', (kind,))}
+    applications = names(APPLICATIONS)
+    environments = names(ENVIRONMENTS)
+    pairs = []
+    for name in names(CONFIGURATION):
+      for index, character in enumerate(name):
+        if character == '-' and name[:index] in applications \
+            and name[index + 1:] in environments:
+          pairs.append((name[:index], name[index + 1:]))
+    connection.execute('DELETE FROM pairs')
+    connection.executemany('INSERT INTO pairs (application, environment) VALUES (?, ?)', pairs)
+
+  def names(self, kind: str) -> list[str]:
+    """
+      The names of the files of one kind.
+
+      :param kind: The kind of file
+      :return: The names, in sorted order
+    """
+    with self._lock:
+      return [name for (name,) in self._connect().execute(
+        'SELECT name FROM files WHERE kind = ? ORDER BY name', (kind,))]
+
+  def entry(self, kind: str, name: str) -> Entry | None:
+    """
+      What is known about a file.
+
+      :param kind: The kind of file: 'environments' or 'applications'
+      :param name: The name of the file
+      :return: The entry for the file, as a snapshot would record it,
+        or None if there is no such file
+    """
+    with self._lock:
+      row = self._connect().execute(
+        'SELECT size, mtime_ns, digest, document, error FROM files WHERE kind = ? AND name = ?',
+        (kind, name)).fetchone()
+    if row is None:
+      return None
+    size, mtime_ns, digest, document, error = row
+    return Entry(size, mtime_ns, digest, pickle.loads(document), error)
+
+  def label_index(self, kind: str) -> LabelIndex:
+    """
+      The index of the labels of the files of one kind.
+
+      :param kind: The kind of file: 'environments' or 'applications'
+      :return: The label index
+      :raises ValueError: If a file is not valid, so that its labels
+        are not known
+    """
+    with self._lock:
+      connection = self._connect()
+      invalid = connection.execute(
+        'SELECT name, error FROM files WHERE kind = ? AND error IS NOT NULL LIMIT 1',
+        (kind,)).fetchone()
+      if invalid is not None:
+        raise ValueError(f'{invalid[0]}: {invalid[1]}')
+      labels: dict[str, dict[str, str]] = {}
+      for name, key, value in connection.execute(
+          'SELECT name, key, value FROM labels WHERE kind = ?', (kind,)):
+        labels.setdefault(name, {})[key] = value
+    return LabelIndex(labels)
+
+  def name_index(self, kind: str, error: Callable[[str], Exception]) -> NameIndex:
+    """
+      The index of the names and labels of the files of one kind. The
+      label index is only built the first time a label is used.
+
+      :param kind: The kind of file: 'environments' or 'applications'
+      :param error: The exception to raise, given its message, if a
+        file is not valid when a label is used
+      :return: The name index
+    """
+    def labels() -> LabelIndex:
+      try:
+        return self.label_index(kind)
+      except ValueError as ex:
+        raise error(f'Invalid {kind.removesuffix("s")} {ex}') from ex
+
+    return NameIndex(self.names(kind), labels)
+
+  def environment_hosts(self, environment: str) -> Iterator[Host]:
+    """
+      Read the hosts of an environment.
+
+      The hosts are read a page at a time, so that the memory used
+      does not grow with the number of hosts, and the database is not
+      locked while they are used.
+
+      :param environment: The name of the environment
+      :return: An iterator over the name and labels of each host, in
+        the order they are listed in the environment's file
+    """
+    position = -1
+    while True:
+      with self._lock:
+        connection = self._connect()
+        page = connection.execute(
+          'SELECT position, host FROM hosts WHERE environment = ? AND position > ? '
+          'ORDER BY position LIMIT ?', (environment, position, _PAGE_SIZE)).fetchall()
+        if len(page) == 0:
+          return
+        labels: dict[str, dict[str, str]] = {}
+        for host, key, value in connection.execute(
+            'SELECT host, key, value FROM host_labels WHERE environment = ? AND host IN '
+            '(SELECT host FROM hosts WHERE environment = ? AND position > ? AND position <= ?)',
+            (environment, environment, position, page[-1][0])):
+          labels.setdefault(host, {})[key] = value
+      for position, host in page:
+        yield Host(host, shared_labels(labels.get(host, {})))
+
+  def hosts(self, labels: Iterable[str] = ()) -> list[tuple[str, str]]:
+    """
+      Find the hosts that carry every one of a list of labels.
+
+      :param labels: The labels, each of the form key=value. If there
+        are none, every host is found.
+      :return: The environment and name of each host, in sorted order
+    """
+    query, parameters = _hosts_query(labels)
+    with self._lock:
+      return list(self._connect().execute(query + ' ORDER BY 1, 2', parameters))
+
+  def applications_on_hosts(self, labels: Iterable[str]) -> list[str]:
+    """
+      Find the applications deployed to the hosts that carry every one
+      of a list of labels.
+
+      An application is deployed to every host of each environment for
+      which it has a configuration file.
+
+      :param labels: The labels, each of the form key=value
+      :return: The names of the applications, in sorted order
+    """
+    query, parameters = _hosts_query(labels)
+    with self._lock:
+      return [name for (name,) in self._connect().execute(
+        'SELECT DISTINCT application FROM pairs WHERE environment IN '
+        f'(SELECT environment FROM ({query})) ORDER BY 1', parameters)]
+
+
+def _meta(connection: sqlite3.Connection, key: str) -> Any:
+  """
+    Get a value from the meta table.
+
+    :param connection: The connection to the database
+    :param key: The key of the value
+    :return: The value, or None if there is none
+  """
+  row = connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+  return None if row is None else row[0]
+
+
+def _set_meta(connection: sqlite3.Connection, key: str, value: Any) -> None:
+  """
+    Set a value in the meta table.
+
+    :param connection: The connection to the database
+    :param key: The key of the value
+    :param value: The value
+  """
+  connection.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+
+def _hosts_query(labels: Iterable[str]) -> tuple[str, list[str]]:
+  """
+    Build the query for the hosts that carry every one of a list of
+    labels.
+
+    The hosts that carry the first label are found by its index, and
+    each is checked for the other labels by its primary key.
+
+    :param labels: The labels, each of the form key=value
+    :return: The query, and its parameters
+  """
+  pairs = [tuple(part.strip() for part in label.partition('=')[::2]) for label in labels]
+  if len(pairs) == 0:
+    return 'SELECT environment, host FROM hosts', []
+  query = 'SELECT l0.environment, l0.host FROM host_labels l0'
+  parameters: list[str] = []
+  for index, (key, value) in enumerate(pairs[1:], 1):
+    query += f' JOIN host_labels l{index} ON l{index}.environment = l0.environment' \
+      + f' AND l{index}.host = l0.host AND l{index}.key = ? AND l{index}.value = ?'
+    parameters += [key, value]
+  query += ' WHERE l0.key = ? AND l0.value = ?'
+  parameters += list(pairs[0])
+  return query, parameters
+
+
+@cache
+def open_inventory(directory: str) -> Inventory:
+  """
+    The inventory of a catalog, brought up to date the first time it
+    is opened in a process.
+
+    :param directory: The catalog directory
+    :return: The inventory
+  """
+  inventory = Inventory(directory)
+  inventory.refresh()
+  return inventory
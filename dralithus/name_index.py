@@ -0,0 +1,345 @@
+"""
+  name_index.py: Define the NameIndex and LabelIndex classes and name
+  selectors.
+"""
+# -------------------------------------------------------------------
+# name_index.py: Define the NameIndex and LabelIndex classes and name
+# selectors.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+from __future__ import annotations
+from bisect import bisect_left
+from fnmatch import translate
+from functools import cache
+from typing import Callable, Collection, Iterable, Iterator, Mapping
+import re
+
+# The characters that make a selector a glob pattern rather than a name.
+_GLOB_CHARACTERS = frozenset('*?[')
+
+
+@cache
+def _compile_glob(pattern: str) -> re.Pattern[str]:
+  """
+    Compile a glob pattern into a regular expression.
+
+    :param pattern: The glob pattern
+    :return: The compiled regular expression
+  """
+  return re.compile(translate(pattern))
+
+
+def is_glob(selector: str) -> bool:
+  """
+    Check if a selector is a glob pattern.
+
+    :param selector: The selector string
+    :return: True if the selector contains any of the characters *, ? or [
+  """
+  return not _GLOB_CHARACTERS.isdisjoint(selector)
+
+
+def is_regex(selector: str) -> bool:
+  """
+    Check if a selector is a regular expression.
+
+    A regular expression selector is enclosed in slashes. For example,
+    /eu-(test|prod)[0-9]+/
+
+    :param selector: The selector string
+    :return: True if the selector is a regular expression
+  """
+  return len(selector) > 2 and selector.startswith('/') and selector.endswith('/')
+
+
+def is_exclusion(selector: str) -> bool:
+  """
+    Check if a selector excludes names rather than includes them.
+
+    An exclusion is a selector preceded by '!'. For example, !eu-test
+
+    :param selector: The selector string
+    :return: True if the selector is an exclusion
+  """
+  return len(selector) > 1 and selector.startswith('!')
+
+
+def is_label(selector: str) -> bool:
+  """
+    Check if a selector is a label.
+
+    A label selector is of the form key=value. For example, tier=prod
+
+    :param selector: The selector string
+    :return: True if the selector is a label
+  """
+  key, separator, _ = selector.partition('=')
+  return separator == '=' and len(key.strip()) > 0 and not is_regex(selector)
+
+
+def is_name(selector: str) -> bool:
+  """
+    Check if a selector is a plain name.
+
+    :param selector: The selector string
+    :return: True if the selector is not a glob pattern, regular
+      expression, label or exclusion
+  """
+  return not (is_glob(selector) or is_regex(selector) or is_label(selector)
+              or is_exclusion(selector))
+
+
+class LabelIndex:
+  """
+    An inverted index from labels to the names that carry them.
+
+    A label is a key=value pair. The index maps each label to the set
+    of names that carry it, so a name can be found by its labels
+    without examining the labels of every name. Selecting by several
+    labels intersects their sets, smallest first.
+  """
+  def __init__(self, labels: Mapping[str, Mapping[str, str]]) -> None:
+    """
+      Initialize the index.
+
+      :param labels: The labels of each name, as a dictionary of keys
+        to values
+    """
+    index: dict[str, set[str]] = {}
+    for name, name_labels in labels.items():
+      for key, value in name_labels.items():
+        index.setdefault(f'{key}={value}', set()).add(name)
+    self._index: dict[str, frozenset[str]] \
+      = {label: frozenset(names) for label, names in index.items()}
+
+  def match(self, label: str) -> frozenset[str]:
+    """
+      Find the names that carry a label.
+
+      :param label: The label, of the form key=value
+      :return: The names that carry the label
+    """
+    key, _, value = label.partition('=')
+    return self._index.get(f'{key.strip()}={value.strip()}', frozenset())
+
+  def select(self, labels: Iterable[str]) -> set[str]:
+    """
+      Find the names that carry every one of a list of labels.
+
+      :param labels: The labels, each of the form key=value
+      :return: The names that carry all the labels. If there are no
+        labels, no names are selected.
+    """
+    matches = sorted((self.match(label) for label in labels), key=len)
+    if len(matches) == 0:
+      return set()
+    selected = set(matches[0])
+    for names in matches[1:]:
+      if len(selected) == 0:
+        break
+      selected.intersection_update(names)
+    return selected
+
+
+class NameIndex:
+  """
+    A sorted index of names.
+
+    The index answers exact and prefix lookups by binary search, so a
+    glob pattern such as 'eu-*' only examines the names that start with
+    its literal prefix, 'eu-', rather than every name in the index.
+  """
+  def __init__(
+      self,
+      names: Iterable[str],
+      labels: LabelIndex | Callable[[], LabelIndex] | None = None) -> None:
+    """
+      Initialize the index.
+
+      :param names: The names to index. Duplicates are ignored.
+      :param labels: The index of the labels of the names, if the names
+        can be selected by label. If this is a function, it is only
+        called to build the label index the first time a label is
+        used, so that selecting by name never pays for it.
+    """
+    self._names: list[str] = sorted(set(names))
+    self._labels = labels
+
+  def __len__(self) -> int:
+    """
+      The number of names in the index.
+
+      :return: The number of names
+    """
+    return len(self._names)
+
+  def __iter__(self) -> Iterator[str]:
+    """
+      Iterate over the names in the index, in sorted order.
+
+      :return: An iterator over the names
+    """
+    return iter(self._names)
+
+  def __contains__(self, name: object) -> bool:
+    """
+      Check if a name is in the index.
+
+      :param name: The name to look for
+      :return: True if the name is in the index
+    """
+    if not isinstance(name, str):
+      return False
+    position = bisect_left(self._names, name)
+    return position < len(self._names) and self._names[position] == name
+
+  def with_prefix(self, prefix: str) -> list[str]:
+    """
+      Find the names that start with a prefix.
+
+      :param prefix: The prefix
+      :return: The names that start with the prefix, in sorted order
+    """
+    if len(prefix) == 0:
+      return list(self._names)
+    # Every name that starts with prefix sorts at or after prefix, and
+    # before the string formed by incrementing its last character.
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return self._names[bisect_left(self._names, prefix):bisect_left(self._names, upper)]
+
+  def glob(self, pattern: str) -> list[str]:
+    """
+      Find the names that match a glob pattern.
+
+      :param pattern: The glob pattern. E.g. stage-*
+      :return: The matching names, in sorted order
+    """
+    prefix_length = next(
+      (i for i, c in enumerate(pattern) if c in _GLOB_CHARACTERS), len(pattern))
+    regex = _compile_glob(pattern)
+    return [name for name in self.with_prefix(pattern[:prefix_length]) if regex.match(name)]
+
+  def search(self, pattern: str) -> list[str]:
+    """
+      Find the names that match a regular expression.
+
+      The whole name must match. Regular expressions cannot use the
+      index, so every name is examined.
+
+      :param pattern: The regular expression
+      :return: The matching names, in sorted order
+      :raises ValueError: If the regular expression is not valid
+    """
+    try:
+      regex = re.compile(pattern)
+    except re.error as ex:
+      raise ValueError(f'Invalid regular expression: {pattern}: {ex}') from ex
+    return [name for name in self._names if regex.fullmatch(name)]
+
+  def select(self, selectors: Iterable[str]) -> set[str]:
+    """
+      Select names from the index.
+
+      Each selector is one of:
+        name       the name itself, which must be in the index
+        glob       a glob pattern. E.g. stage-*
+        /regex/    a regular expression, which must match the whole name
+        key=value  a label
+        !selector  exclude the names the selector matches
+
+      The result is the names matched by any name, glob or regular
+      expression, less the names matched by any exclusion, wherever the
+      exclusion appears. So 'eu-*', '!eu-test' selects every name
+      starting with 'eu-' except 'eu-test'. If there are only
+      exclusions, they are taken from every name in the index. So
+      '!eu-test' selects every name except 'eu-test'.
+
+      Labels narrow the selection to the names that carry every label.
+      If there are only labels, they select all the names that carry
+      them. So 'tier=prod', 'region=eu' selects every name labelled
+      with both tier=prod and region=eu.
+
+      :param selectors: The selectors
+      :return: The selected names
+      :raises KeyError: If a name is not in the index
+      :raises ValueError: If a pattern does not match any name, a
+        regular expression is not valid or labels are used but the
+        index has no labels
+    """
+    included: set[str] = set()
+    excluded: set[str] = set()
+    labels: list[str] = []
+    has_exclusions = False
+    for selector in selectors:
+      if is_exclusion(selector):
+        has_exclusions = True
+        excluded.update(self._match(selector[1:]))
+      elif is_label(selector):
+        labels.append(selector)
+      else:
+        names = self._match(selector)
+        if len(names) == 0:
+          raise ValueError(f'No names match: {selector}')
+        included.update(names)
+    if len(labels) > 0:
+      labelled = self._label_index().select(labels)
+      has_names = len(included) > 0
+      included = included & labelled if has_names else labelled
+    elif len(included) == 0 and has_exclusions:
+      included = set(self._names)
+    return included - excluded
+
+  def index_labels(self) -> None:
+    """
+      Build the index of the labels of the names now, rather than the
+      first time a label is used.
+
+      :raises ValueError: If the names do not have labels
+    """
+    self._label_index()
+
+  def _label_index(self) -> LabelIndex:
+    """
+      The index of the labels of the names.
+
+      :return: The label index
+      :raises ValueError: If the names do not have labels
+    """
+    if self._labels is None:
+      raise ValueError('Labels are not supported')
+    if not isinstance(self._labels, LabelIndex):
+      self._labels = self._labels()
+    return self._labels
+
+  def _match(self, selector: str) -> Collection[str]:
+    """
+      Find the names that a selector (other than an exclusion) matches.
+
+      :param selector: The selector
+      :return: The matching names
+      :raises KeyError: If the selector is a name that is not in the index
+    """
+    if is_label(selector):
+      return self._label_index().match(selector)
+    if is_regex(selector):
+      return self.search(selector[1:-1])
+    if is_glob(selector):
+      return self.glob(selector)
+    if selector not in self:
+      raise KeyError(selector)
+    return [selector]
@@ -0,0 +1,272 @@
+"""
+  plan.py: Work out what a deploy has to change.
+"""
+# -------------------------------------------------------------------
+# plan.py: Work out what a deploy has to change.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# The desired state of a target on a host is its resolved
+# configuration, which includes its deploy command, and is summed up
+# by a fingerprint: the SHA-256 hash of the configuration as JSON,
+# with its keys sorted. The actual state of a host is the fingerprint
+# of the configuration that was last deployed to it, if any. Comparing
+# the two for every host of the environment gives the changes that a
+# deploy has to make:
+#
+#   + the target has never been deployed to the host
+#   ~ the target was deployed to the host with another configuration
+#   - the host was deployed to, but is no longer in the environment
+#   = the host is up to date, and nothing is to be done
+#
+# Only the hosts that are added or changed are deployed to. A host
+# that is removed is only forgotten, as dralithus does not know how
+# to undeploy an application.
+#
+# The actual state is read from the hosts themselves by the state
+# command of the target, if it has one (see dralithus.deploy_command).
+# Without one, the actual state of a host is not known, as it may have
+# been rebuilt, or changed by hand, and every host is deployed to,
+# unless deploy --trust-cache takes what DeployState remembers for it:
+# the fingerprint deployed to each host of each target, kept in the
+# cache directory, one file per catalog. What is remembered also names
+# the hosts to forget. A host that fails is forgotten, so that it is
+# deployed to again by the next run.
+#
+# Runs that deploy to different targets at the same time each write
+# only the hosts they deployed to, over the file as it is when they
+# save. Two runs that save at the same moment may lose each other's
+# hosts, which are then deployed to again by the next run: losing what
+# is remembered only ever makes a deploy do more.
+from __future__ import annotations
+from hashlib import sha1, sha256
+from typing import Any, Iterable, Mapping, NamedTuple
+import json
+import os
+
+from dralithus.cache import cache_directory, write_atomically
+from dralithus.configuration import json_default
+from dralithus.schedule import Target
+
+# The version of the format of the state file. Change this whenever
+# the format, or the fingerprint, changes, so that old states are
+# ignored, and every host is deployed to again.
+_STATE_VERSION = 1
+
+# What a deploy has to do to a host
+ADD = '+'
+CHANGE = '~'
+REMOVE = '-'
+KEEP = '='
+
+# The fingerprint deployed to each host, by environment, application
+# and host
+States = dict[str, dict[str, dict[str, str]]]
+
+
+class Change(NamedTuple):
+  """
+    What a deploy has to do to a target on a host.
+  """
+  target: Target # The application and environment
+  host: str # The name of the host
+  action: str # One of ADD, CHANGE, REMOVE or KEEP
+
+  def __str__(self) -> str:
+    """
+      The change as it is shown in output.
+
+      :return: ACTION APPLICATION@ENVIRONMENT HOST
+    """
+    return f'{self.action} {self.target} {self.host}'
+
+  @property
+  def deploys(self) -> bool:
+    """
+      Whether the target is to be deployed to the host.
+
+      :return: True if the host is added or changed
+    """
+    return self.action in (ADD, CHANGE)
+
+
+def fingerprint(configuration: Mapping[str, Any]) -> str:
+  """
+    The fingerprint of the desired state of a target.
+
+    :param configuration: The resolved configuration of the target
+    :return: The SHA-256 hash of the configuration, in hex
+  """
+  text = json.dumps(configuration, sort_keys=True, default=json_default)
+  return sha256(text.encode('utf-8')).hexdigest()
+
+
+def changes(
+    target: Target,
+    desired: str,
+    hosts: Iterable[str],
+    actual: Mapping[str, str | None]) -> list[Change]:
+  """
+    Compare the desired state of a target with its actual state on
+    each host.
+
+    :param target: The application and environment
+    :param desired: The fingerprint of the desired state
+    :param hosts: The names of the hosts of the environment
+    :param actual: The fingerprint of the actual state of each host the
+      target is known to be deployed to, or None if it is not known
+    :return: The change to each host of the environment, in order,
+      followed by the hosts that are no longer in it
+  """
+  planned: list[Change] = []
+  current: set[str] = set()
+  for host in hosts:
+    current.add(host)
+    deployed = actual.get(host)
+    action = ADD if deployed is None else KEEP if deployed == desired else CHANGE
+    planned.append(Change(target, host, action))
+  planned.extend(Change(target, host, REMOVE)
+                 for host in sorted(actual.keys() - current) if actual[host] is not None)
+  return planned
+
+
+class DeployState:
+  """
+    The fingerprint of the configuration last deployed to each host of
+    each target.
+  """
+  def __init__(self, directory: str, path: str | None = None) -> None:
+    """
+      Initialize the state from the file saved by the last run.
+
+      :param directory: The catalog directory
+      :param path: The path of the state file. Defaults to a file in
+        the cache directory.
+    """
+    self._path = path if path is not None else state_path(directory)
+    self._states = _read_state(self._path)
+    # What this run deployed to, or forgot, for each target and host
+    self._updates: dict[tuple[Target, str], str | None] = {}
+
+  @property
+  def path(self) -> str:
+    """
+      The path of the state file.
+
+      :return: The path
+    """
+    return self._path
+
+  def deployed(self, target: Target) -> dict[str, str]:
+    """
+      The fingerprint last deployed to each host of a target.
+
+      :param target: The application and environment
+      :return: The fingerprint of each host deployed to
+    """
+    return dict(self._states.get(target.environment, {}).get(target.application, {}))
+
+  def record(self, target: Target, host: str, deployed: str | None) -> None:
+    """
+      Remember what was deployed to a host, or forget it.
+
+      :param target: The application and environment
+      :param host: The name of the host
+      :param deployed: The fingerprint deployed, or None to forget the
+        host
+    """
+    self._updates[(target, host)] = deployed
+    _update(self._states, target, host, deployed)
+
+  def save(self) -> None:
+    """
+      Save what this run deployed, over the state file as it is now. It
+      is only rewritten if something was recorded.
+    """
+    if len(self._updates) == 0:
+      return
+    states = _read_state(self._path)
+    for (target, host), deployed in self._updates.items():
+      _update(states, target, host, deployed)
+    _write_state(self._path, states)
+    self._updates.clear()
+
+
+def _update(states: States, target: Target, host: str, deployed: str | None) -> None:
+  """
+    Set, or remove, the fingerprint of a host.
+
+    :param states: The fingerprints
+    :param target: The application and environment
+    :param host: The name of the host
+    :param deployed: The fingerprint, or None to remove it
+  """
+  applications = states.setdefault(target.environment, {})
+  hosts = applications.setdefault(target.application, {})
+  if deployed is not None:
+    hosts[host] = deployed
+    return
+  hosts.pop(host, None)
+  if len(hosts) == 0:
+    del applications[target.application]
+  if len(applications) == 0:
+    del states[target.environment]
+
+
+def state_path(directory: str) -> str:
+  """
+    The path of the state of the targets deployed from a catalog.
+
+    :param directory: The catalog directory
+    :return: The path of the state file in the cache directory
+  """
+  catalog = sha1(directory.encode('utf-8'), usedforsecurity=False).hexdigest()[:12]
+  return os.path.join(cache_directory(), 'states', f'{catalog}.json')
+
+
+def _read_state(path: str) -> States:
+  """
+    Read a state file.
+
+    :param path: The path of the state file
+    :return: The fingerprints. If there is no state, or it cannot be
+      used, there are none.
+  """
+  try:
+    with open(path, 'r', encoding='utf-8') as file:
+      state = json.load(file)
+    if not isinstance(state, dict) or state.get('version') != _STATE_VERSION:
+      return {}
+    states = state['states']
+    return states if isinstance(states, dict) else {}
+  except (OSError, ValueError, KeyError):
+    return {}
+
+
+def _write_state(path: str, states: States) -> None:
+  """
+    Write a state file.
+
+    Failure to write it is ignored (see
+    dralithus.cache.write_atomically), and only means that the next run
+    deploys to the same hosts again.
+
+    :param path: The path of the state file
+    :param states: The fingerprints
+  """
+  state = {'version': _STATE_VERSION, 'states': states}
+  write_atomically(path, json.dumps(state).encode('utf-8'))
@@ -0,0 +1,217 @@
+"""
+  plan_command.py: Define the PlanCommand class.
+"""
+# -------------------------------------------------------------------
+# plan_command.py: Define the PlanCommand class.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# drl plan prints the changes that drl deploy would make to the hosts
+# of every selected application in every selected environment, the
+# same way deploy works them out (see dralithus.plan): the state
+# command of each target is run on each of its hosts, all at once, and
+# nothing else is run. Targets without a deploy command have nothing
+# to plan. Given --trust-cache, as deploy would be, what was last
+# deployed to the hosts of a target without a state command is taken
+# for what they have.
+from __future__ import annotations
+from typing import override
+import asyncio
+import sys
+
+from dralithus.application import Application
+from dralithus.catalog import catalog_directory
+from dralithus.command import Command
+from dralithus.command_line.command_line import CommandLine
+from dralithus.configuration import resolved
+from dralithus.dependency_graph import DependencyGraph
+from dralithus.deploy_command import (
+  DEPLOY_KEY, host_names, make_applications, make_environments, plan)
+from dralithus.environment import Environment
+from dralithus.errors import DralithusError, ExitCode
+from dralithus.executor import Executor
+from dralithus.plan import ADD, CHANGE, KEEP, REMOVE, Change, DeployState
+from dralithus.schedule import Target
+
+
+class PlanCommand(Command):
+  """
+    Command to print what deploying applications to environments would
+    change.
+  """
+  @override
+  def __init__(
+      self, environments: set[Environment],
+      applications: set[Application],
+      verbosity: int,
+      trust_cache: bool = False) -> None:
+    """
+      Initialize the 'plan' command with a verbosity level.
+
+      :param environments: The environments to plan the deploy to
+      :param applications: The applications to plan the deploy of
+      :param verbosity: The verbosity level of the command
+      :param trust_cache: Whether to take what was last deployed to the
+        hosts of a target without a state command for what they have
+    """
+    super().__init__('plan', verbosity)
+    assert len(environments) > 0, 'Environments cannot be an empty set.'
+    self._environments = environments
+    assert len(applications) > 0, 'Applications cannot be an empty set.'
+    self._applications = applications
+    self._trust_cache = trust_cache
+
+  def __eq__(self, other: object) -> bool:
+    """
+      Check if two plan commands are equal.
+
+      :param other: The other command to compare with
+      :return: True if the commands are equal, False otherwise
+    """
+    if not isinstance(other, PlanCommand):
+      return NotImplemented
+    return (super().__eq__(other)
+      and self.environments == other.environments
+      and self.applications == other.applications
+      and self.trust_cache == other.trust_cache)
+
+  def __str__(self) -> str:
+    """
+      Return a string representation of the plan command.
+
+      :return: A string representation of the plan command
+    """
+    return f'PlanCommand(environments={self.environments}, ' \
+      + f'applications={self.applications}, verbosity={self.verbosity}, ' \
+      + f'trust_cache={self.trust_cache})'
+
+  @property
+  def environments(self) -> set[Environment]:
+    """
+      The environments to plan the deploy to.
+
+      :return: The environments
+    """
+    return self._environments
+
+  @property
+  def applications(self) -> set[Application]:
+    """
+      The applications to plan the deploy of.
+
+      :return: The applications
+    """
+    return self._applications
+
+  @property
+  def trust_cache(self) -> bool:
+    """
+      Whether to take what was last deployed to the hosts of a target
+      without a state command for what they have.
+
+      :return: True if the cache is trusted
+    """
+    return self._trust_cache
+
+  @override
+  def execute(self) -> int:
+    """
+      Execute the 'plan' command.
+
+      Each host that deploy would deploy to, or forget, is printed, one
+      line each, preceded by '+' if the target has not been deployed
+      to it, '~' if it was deployed with another configuration, and '-'
+      if it is no longer in the environment. At verbosity 1 and above,
+      the hosts that are up to date are printed too, preceded by '='.
+      The number of each is printed last. Why the changes to a target
+      cannot be worked out is printed on standard error.
+
+      :return: The highest exit code of any target, or
+        ExitCode.SUCCESS if the changes to every target were worked out
+    """
+    graph = DependencyGraph(catalog_directory())
+    state = DeployState(catalog_directory())
+    targets = sorted(Target(app.name, env.name)
+                     for env in self.environments for app in self.applications)
+    try:
+      planned = asyncio.run(self._plan(targets, graph, state))
+    finally:
+      graph.save()
+    exit_code: int = ExitCode.SUCCESS
+    counts = dict.fromkeys((ADD, CHANGE, REMOVE, KEEP), 0)
+    for target, result in zip(targets, planned):
+      if isinstance(result, DralithusError):
+        print(f'{target}: {result}', file=sys.stderr)
+        exit_code = max(exit_code, result.exit_code)
+        continue
+      for change in result:
+        counts[change.action] += 1
+        if change.action != KEEP or self.verbosity > 0:
+          print(change)
+    print(f'{counts[ADD]} to add, {counts[CHANGE]} to change, {counts[REMOVE]} to remove, '
+          f'{counts[KEEP]} up to date')
+    return exit_code
+
+  async def _plan(
+      self, targets: list[Target],
+      graph: DependencyGraph,
+      state: DeployState) -> list[list[Change] | DralithusError]:
+    """
+      Work out the changes to every target, at the same time.
+
+      :param targets: The targets
+      :param graph: The dependency graph to resolve their configuration
+        through
+      :param state: What was deployed to each host
+      :return: The changes to each target, or why they cannot be worked
+        out
+    """
+    environment_hosts = host_names(self.environments)
+    executor = Executor()
+
+    async def plan_target(target: Target) -> list[Change] | DralithusError:
+      hosts = environment_hosts[target.environment]
+      try:
+        configuration = resolved(target.application, target.environment, graph)
+        if configuration.get(DEPLOY_KEY) is None:
+          return []
+        return await plan(target, configuration, hosts, executor, state.deployed(target),
+                          self.trust_cache)
+      except DralithusError as ex:
+        return ex
+
+    try:
+      return await asyncio.gather(*map(plan_target, targets))
+    finally:
+      await executor.close()
+
+
+def make(cmdln: CommandLine) -> PlanCommand:
+  """
+    Create a plan command from the command line arguments.
+
+    :param cmdln: The command line object containing the parsed arguments
+    :return: The plan command object
+  """
+  environments = make_environments(cmdln.program, cmdln.global_options, cmdln.command_options,
+                                   cmdln.verbosity, 'plan')
+  applications = make_applications(cmdln.program, cmdln.iter_parameters(), cmdln.global_options,
+                                   cmdln.command_options, cmdln.verbosity, 'plan')
+  trust_cache = cmdln.command_options.get(
+    'trust_cache', cmdln.global_options.get('trust_cache', False))
+  assert isinstance(trust_cache, bool)
+  return PlanCommand(environments, applications, cmdln.verbosity, trust_cache)
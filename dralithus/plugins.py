@@ -0,0 +1,176 @@
+"""
+  plugins.py: Discover commands provided by other packages.
+"""
+# -------------------------------------------------------------------
+# plugins.py: Discover commands provided by other packages.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Other packages provide commands by registering an entry point in
+# the 'dralithus.commands' group. The name of the entry point is the
+# name of the command, and its value names a callable that takes a
+# CommandLine and returns a Command. For example, in pyproject.toml:
+#
+#   [project.entry-points."dralithus.commands"]
+#   hello = "dralithus_hello.command:make"
+#
+# Scanning the metadata of every installed package for entry points
+# is slow when many packages are installed. So the command table that
+# the scan produces is saved in an index file, along with the
+# modification times of the directories on sys.path. The table is
+# read back from the index file for as long as none of those
+# directories changes, which happens whenever a package is installed
+# or removed.
+from __future__ import annotations
+from hashlib import sha1
+from typing import Any, Callable
+import json
+import os
+import sys
+
+from dralithus.cache import cache_directory, write_atomically
+
+# The entry point group in which plugin commands are registered.
+ENTRY_POINT_GROUP = 'dralithus.commands'
+
+# The version of the format of the index file. Change this whenever
+# the format changes, so that old index files are ignored.
+_INDEX_VERSION = 1
+
+
+def index_path() -> str:
+  """
+    The path of the plugin command index file.
+
+    Each Python installation (identified by sys.prefix) has its own
+    index file, since each sees a different set of packages.
+
+    :return: The path of the index file
+  """
+  installation = sha1(sys.prefix.encode('utf-8'), usedforsecurity=False).hexdigest()[:12]
+  return os.path.join(cache_directory(), f'commands-{installation}.json')
+
+
+def _stamp() -> dict[str, int]:
+  """
+    The modification times of the directories that packages are found in.
+
+    These are the directories on sys.path. The current directory ('')
+    is left out, as it changes far more often than packages are
+    installed.
+
+    :return: A dictionary mapping each directory to its modification
+      time in nanoseconds
+  """
+  stamp: dict[str, int] = {}
+  for path in sys.path:
+    if len(path) == 0:
+      continue
+    try:
+      stamp[path] = os.stat(path).st_mtime_ns
+    except OSError:
+      continue
+  return stamp
+
+
+def _scan() -> dict[str, str]:
+  """
+    Scan the metadata of the installed packages for plugin commands.
+
+    :return: A dictionary mapping command names to entry point values
+  """
+  # pylint: disable=import-outside-toplevel
+  from importlib.metadata import entry_points
+  return {entry_point.name: entry_point.value
+          for entry_point in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+def _read_index(path: str, stamp: dict[str, int]) -> dict[str, str] | None:
+  """
+    Read the command table from the index file.
+
+    :param path: The path of the index file
+    :param stamp: The current modification times of the directories on
+      sys.path
+    :return: The command table, or None if there is no index file, or
+      it is out of date or unreadable
+  """
+  try:
+    with open(path, encoding='utf-8') as file:
+      index = json.load(file)
+  except (OSError, ValueError):
+    return None
+  if not isinstance(index, dict) \
+      or index.get('version') != _INDEX_VERSION or index.get('stamp') != stamp:
+    return None
+  commands = index.get('commands')
+  return commands if isinstance(commands, dict) else None
+
+
+def _write_index(path: str, stamp: dict[str, int], commands: dict[str, str]) -> None:
+  """
+    Write the command table to the index file.
+
+    The index is only a cache, so failure to write it is ignored (see
+    dralithus.cache.write_atomically).
+
+    :param path: The path of the index file
+    :param stamp: The modification times of the directories on sys.path
+    :param commands: The command table
+  """
+  index = {'version': _INDEX_VERSION, 'stamp': stamp, 'commands': commands}
+  write_atomically(path, json.dumps(index).encode('utf-8'))
+
+
+def plugin_commands() -> dict[str, str]:
+  """
+    Find the commands provided by other packages.
+
+    The command table is read from the index file if it is up to date.
+    Otherwise, the installed packages are scanned and the index file
+    is rewritten.
+
+    :return: A dictionary mapping command names to entry point values
+      (module:attribute)
+  """
+  path = index_path()
+  stamp = _stamp()
+  commands = _read_index(path, stamp)
+  if commands is None:
+    commands = _scan()
+    _write_index(path, stamp, commands)
+  return commands
+
+
+def load(value: str) -> Callable[..., Any]:
+  """
+    Load the object named by an entry point value.
+
+    This is equivalent to importlib.metadata.EntryPoint.load(), but
+    does not need the package metadata.
+
+    :param value: The entry point value. E.g. dralithus_hello.command:make
+    :return: The object
+  """
+  module_name, _, attributes = value.partition(':')
+  # Remove any extras. E.g. module:attribute [extra]
+  attributes = attributes.split('[', 1)[0].strip()
+  module_name = module_name.strip()
+  loaded: Any = __import__(module_name, fromlist=['__name__'])
+  for attribute in attributes.split('.') if len(attributes) > 0 else []:
+    loaded = getattr(loaded, attribute)
+  return loaded
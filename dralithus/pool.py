@@ -0,0 +1,237 @@
+"""
+  pool.py: Keep connections to hosts open, and share them.
+"""
+# -------------------------------------------------------------------
+# pool.py: Keep connections to hosts open, and share them.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Connecting to a host, and authenticating, can take longer than the
+# command run on it. A ConnectionPool keeps the connections to each
+# host open once they have been made, so that every application
+# deployed to the host in the same run shares them:
+#
+#   A connection carries several commands at once, up to its sessions,
+#   as an SSH connection multiplexes its channels. A command uses the
+#   connection to its host with the most commands on it that has room
+#   for one more, so that the commands to a host share as few
+#   connections as they can.
+#   Up to max_size connections are made to each host. A command that
+#   finds them all full waits for one of them to have room.
+#   A connection that no command has used for idle_seconds is closed.
+#   A connection that has been idle is checked before it is used
+#   again, and closed if it is no longer healthy, e.g. if the host was
+#   restarted by the command before.
+#
+# The pool is used from one event loop, and is closed, with every
+# connection in it, at the end of the run.
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Generic, TypeVar
+import asyncio
+import time
+
+# The most connections to a host, the commands each carries at once,
+# and the seconds a connection may be idle before it is closed
+MAX_SIZE = 2
+SESSIONS = 8
+IDLE_SECONDS = 30.0
+
+
+class Connection(ABC):
+  """
+    A connection to a host.
+  """
+  @abstractmethod
+  async def open(self) -> None:
+    """
+      Connect to the host.
+
+      :raises OSError: If the host cannot be connected to
+    """
+
+  @abstractmethod
+  async def healthy(self) -> bool:
+    """
+      Check that the connection can still be used.
+
+      :return: True if it can
+    """
+
+  @abstractmethod
+  async def close(self) -> None:
+    """
+      Close the connection. It is not an error to close a connection
+      that is already closed, or broken.
+    """
+
+
+C = TypeVar('C', bound=Connection)
+
+
+class _Pooled(Generic[C]):  # pylint: disable=too-few-public-methods
+  """
+    A connection in a pool.
+  """
+  __slots__ = ('connection', 'sessions', 'idle_since')
+
+  def __init__(self, connection: C) -> None:
+    """
+      Initialize the pooled connection, with the one command that it
+      was made for.
+
+      :param connection: The connection, which is open
+    """
+    self.connection = connection
+    self.sessions = 1 # The number of commands using the connection
+    self.idle_since = 0.0 # When the last command stopped using it
+
+
+class ConnectionPool(Generic[C]):  # pylint: disable=too-many-instance-attributes
+  """
+    The open connections to hosts, shared by the commands run on them.
+  """
+  def __init__(self, connect: Callable[[str], C], max_size: int = MAX_SIZE,
+               sessions: int = SESSIONS, idle_seconds: float = IDLE_SECONDS) -> None:
+    """
+      Initialize the pool.
+
+      :param connect: Makes a connection to a host, which is not yet open
+      :param max_size: The most connections to a host
+      :param sessions: The most commands that use a connection at once
+      :param idle_seconds: The seconds a connection may be idle before it
+        is closed
+    """
+    assert max_size > 0, 'Max size must be a positive number.'
+    assert sessions > 0, 'Sessions must be a positive number.'
+    self._connect = connect
+    self._max_size = max_size
+    self._sessions = sessions
+    self._idle_seconds = idle_seconds
+    self._hosts: dict[str, list[_Pooled[C]]] = {}
+    self._changed: dict[str, asyncio.Condition] = {}
+    # The connections no command is using, and their hosts, from the
+    # one idle the longest, so that they are evicted without looking
+    # at the connections of every host.
+    self._idle: dict[_Pooled[C], str] = {}
+    self._swept = time.monotonic()
+    self.opened = 0 # The number of connections made
+    self.evicted = 0 # The number of connections closed while idle, or unhealthy
+
+  def size(self, host: str) -> int:
+    """
+      The number of connections open to a host.
+
+      :param host: The name of the host
+      :return: The number of connections
+    """
+    return len(self._hosts.get(host, ()))
+
+  @asynccontextmanager
+  async def connection(self, host: str) -> AsyncIterator[C]:
+    """
+      Use a connection to a host, made if there is none with room.
+
+      :param host: The name of the host
+      :return: A context in which the connection is used
+      :raises OSError: If a connection was needed, and cannot be made
+    """
+    pooled = await self._acquire(host)
+    try:
+      yield pooled.connection
+    finally:
+      await self._release(host, pooled)
+
+  async def close(self) -> None:
+    """
+      Close every connection in the pool.
+    """
+    pooled = [pooled for connections in self._hosts.values() for pooled in connections]
+    self._hosts.clear()
+    self._idle.clear()
+    await asyncio.gather(*(each.connection.close() for each in pooled))
+
+  async def _acquire(self, host: str) -> _Pooled[C]:
+    """
+      Take a session of a connection to a host.
+
+      :param host: The name of the host
+      :return: The connection
+      :raises OSError: If a connection was needed, and cannot be made
+    """
+    changed = self._changed.setdefault(host, asyncio.Condition())
+    async with changed:
+      while True:
+        connections = self._hosts.setdefault(host, [])
+        available = [pooled for pooled in connections if pooled.sessions < self._sessions]
+        if len(available) > 0:
+          pooled = max(available, key=lambda pooled: pooled.sessions)
+          # The session is taken before the check, so that the
+          # connection is not evicted while it is checked.
+          pooled.sessions += 1
+          self._idle.pop(pooled, None)
+          if pooled.sessions == 1 and not await pooled.connection.healthy():
+            connections.remove(pooled)
+            self.evicted += 1
+            await pooled.connection.close()
+            continue
+          return pooled
+        if len(connections) < self._max_size:
+          connection = self._connect(host)
+          await connection.open()
+          self.opened += 1
+          pooled = _Pooled(connection)
+          connections.append(pooled)
+          return pooled
+        await changed.wait()
+
+  async def _release(self, host: str, pooled: _Pooled[C]) -> None:
+    """
+      Give back a session of a connection, and close the connections
+      that have been idle for too long.
+
+      :param host: The name of the host
+      :param pooled: The connection
+    """
+    now = time.monotonic()
+    pooled.sessions -= 1
+    if pooled.sessions == 0:
+      pooled.idle_since = now
+      self._idle[pooled] = host
+    changed = self._changed[host]
+    async with changed:
+      changed.notify()
+    if now - self._swept >= self._idle_seconds / 2:
+      self._swept = now
+      await self._evict(now)
+
+  async def _evict(self, now: float) -> None:
+    """
+      Close the connections that have been idle for too long.
+
+      :param now: The time
+    """
+    idle: list[_Pooled[C]] = []
+    for pooled in self._idle:
+      if now - pooled.idle_since < self._idle_seconds:
+        break
+      idle.append(pooled)
+    for pooled in idle:
+      self._hosts[self._idle.pop(pooled)].remove(pooled)
+    self.evicted += len(idle)
+    await asyncio.gather(*(pooled.connection.close() for pooled in idle))
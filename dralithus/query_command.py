@@ -0,0 +1,129 @@
+"""
+  query_command.py: Define the QueryCommand class.
+"""
+# -------------------------------------------------------------------
+# query_command.py: Define the QueryCommand class.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# drl hosts and drl applications answer questions about the hosts of
+# the catalog by their labels, such as "every host in rack r12", or
+# "every application deployed to a host in rack r12", from the
+# inventory (see dralithus.inventory). The hosts of every environment
+# are only indexed there, so these commands bring the inventory up to
+# date, and use it, even if $DRALITHUS_INVENTORY does not ask for it.
+from __future__ import annotations
+from typing import override
+
+from dralithus.catalog import catalog_directory
+from dralithus.command import Command
+from dralithus.command_line.command_line import CommandLine
+from dralithus.errors import CommandLineError, ExitCode
+from dralithus.inventory import open_inventory
+from dralithus.name_index import is_label
+
+# What each query finds
+HOSTS = 'hosts'
+APPLICATIONS = 'applications'
+
+
+class QueryCommand(Command):
+  """
+    Command to find the hosts, or the applications deployed to the
+    hosts, that carry a list of labels.
+  """
+  @override
+  def __init__(self, name: str, labels: list[str], verbosity: int) -> None:
+    """
+      Initialize the query command.
+
+      :param name: What the command finds: HOSTS or APPLICATIONS
+      :param labels: The labels, each of the form key=value
+      :param verbosity: The verbosity level of the command
+    """
+    super().__init__(name, verbosity)
+    assert name in (HOSTS, APPLICATIONS), f'Unknown query: {name}'
+    self._labels = labels
+
+  def __eq__(self, other: object) -> bool:
+    """
+      Check if two query commands are equal.
+
+      :param other: The other command to compare with
+      :return: True if the commands are equal, False otherwise
+    """
+    if not isinstance(other, QueryCommand):
+      return NotImplemented
+    return super().__eq__(other) and self.labels == other.labels
+
+  def __str__(self) -> str:
+    """
+      Return a string representation of the query command.
+
+      :return: A string representation of the query command
+    """
+    return f'QueryCommand(name={self.name}, labels={self.labels}, verbosity={self.verbosity})'
+
+  @property
+  def labels(self) -> list[str]:
+    """
+      The labels that the hosts must carry.
+
+      :return: The labels
+    """
+    return self._labels
+
+  @override
+  def execute(self) -> int:
+    """
+      Execute the query command.
+
+      drl hosts prints the environment and name of each host that
+      carries every label, and drl applications the name of each
+      application deployed to any of them, one line each, in sorted
+      order.
+
+      :return: ExitCode.SUCCESS
+    """
+    inventory = open_inventory(catalog_directory())
+    if self.name == HOSTS:
+      for environment, host in inventory.hosts(self.labels):
+        print(f'{environment} {host}')
+    else:
+      for application in inventory.applications_on_hosts(self.labels):
+        print(application)
+    return ExitCode.SUCCESS
+
+
+def make(cmdln: CommandLine) -> QueryCommand:
+  """
+    Create a query command from the command line arguments.
+
+    The parameters are the labels. If there are none, every host is
+    queried.
+
+    :param cmdln: The command line object containing the parsed arguments
+    :return: The query command object
+    :raises CommandLineError: If a parameter is not a label
+  """
+  assert cmdln.command_name is not None
+  labels = sorted(cmdln.iter_parameters())
+  for label in labels:
+    if not is_label(label):
+      raise CommandLineError(cmdln.program, cmdln.command_name, cmdln.verbosity,
+                             f'Invalid label: {label}. Labels are of the form KEY=VALUE')
+  return QueryCommand(cmdln.command_name, labels, cmdln.verbosity)
@@ -0,0 +1,244 @@
+"""
+  schedule.py: Define the Schedule class.
+"""
+# -------------------------------------------------------------------
+# schedule.py: Define the Schedule class.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# An application may depend on other applications: the database before
+# the API, and the API before the front end. A Schedule decides the
+# order in which the targets of a deploy, every application in every
+# environment, are started. An application is only deployed to an
+# environment once every application it depends on has been deployed
+# to that environment. Dependencies on applications that are not being
+# deployed are ignored, as those are already wherever they are.
+#
+# The dependencies form a directed acyclic graph (DAG), and the
+# applications in different branches of it, or in different
+# environments, are deployed at the same time. Of the targets that are
+# ready, the one with the longest chain of targets waiting on it, its
+# critical path, is started first, so that the longest chains, which
+# bound the time the whole deploy takes, start earliest.
+#
+# A target whose deploy fails, and every target that depends on it,
+# directly or not, in the same environment, is not deployed.
+from __future__ import annotations
+from typing import Iterable, Mapping, NamedTuple
+import heapq
+
+
+class Target(NamedTuple):
+  """
+    An application in an environment.
+  """
+  application: str # The name of the application
+  environment: str # The name of the environment
+
+  def __str__(self) -> str:
+    """
+      The target as it is shown in output.
+
+      :return: APPLICATION@ENVIRONMENT
+    """
+    return f'{self.application}@{self.environment}'
+
+
+class Schedule:  # pylint: disable=too-many-instance-attributes
+  """
+    The order in which to deploy applications to environments.
+  """
+  def __init__(self, depends: Mapping[str, Iterable[str]], environments: Iterable[str]) -> None:
+    """
+      Initialize the schedule.
+
+      :param depends: The names of the applications to deploy, and the
+        names of the applications each depends on
+      :param environments: The names of the environments to deploy to
+      :raises ValueError: If applications depend on each other. The
+        message is the cycle, e.g. 'web -> api -> web'
+    """
+    self._depends = {application: tuple(sorted(set(names) & depends.keys()))
+                     for application, names in depends.items()}
+    self._environments = tuple(sorted(set(environments)))
+    self._dependents: dict[str, list[str]] = {application: [] for application in self._depends}
+    for application, names in self._depends.items():
+      for name in names:
+        self._dependents[name].append(application)
+    self._critical_path = _critical_paths(self._depends, self._dependents)
+    # The number of applications each target is still waiting for
+    self._waiting = {Target(application, environment): len(names)
+                     for application, names in self._depends.items()
+                     for environment in self._environments}
+    self._ready = [self._key(target) for target, waiting in self._waiting.items() if waiting == 0]
+    heapq.heapify(self._ready)
+    self._finished: set[Target] = set()
+
+  def __len__(self) -> int:
+    """
+      The number of targets.
+
+      :return: The number of targets
+    """
+    return len(self._waiting)
+
+  def critical_path(self, application: str) -> int:
+    """
+      The length of the longest chain of applications that depend on
+      an application, including itself.
+
+      :param application: The name of the application
+      :return: The length of the chain
+    """
+    return self._critical_path[application]
+
+  def prerequisites(self, target: Target) -> list[Target]:
+    """
+      The targets that must be deployed before a target.
+
+      :param target: The target
+      :return: The targets, in order of application
+    """
+    return [Target(name, target.environment) for name in self._depends[target.application]]
+
+  def ready(self) -> Target | None:
+    """
+      Take the next target to deploy.
+
+      :return: The target on the longest critical path of those whose
+        prerequisites have all been deployed, or None if there is none
+    """
+    if len(self._ready) == 0:
+      return None
+    _, application, environment = heapq.heappop(self._ready)
+    return Target(application, environment)
+
+  def done(self, target: Target, deployed: bool) -> list[Target]:
+    """
+      Record that a target has been deployed, or has failed.
+
+      :param target: The target
+      :param deployed: Whether the target was deployed
+      :return: The targets that will not be deployed because the target
+        failed, in order
+    """
+    self._finished.add(target)
+    if deployed:
+      for application in self._dependents[target.application]:
+        dependent = Target(application, target.environment)
+        self._waiting[dependent] -= 1
+        if self._waiting[dependent] == 0:
+          heapq.heappush(self._ready, self._key(dependent))
+      return []
+    skipped: list[Target] = []
+    pending = [target.application]
+    while len(pending) > 0:
+      for application in self._dependents[pending.pop()]:
+        dependent = Target(application, target.environment)
+        if dependent not in self._finished:
+          self._finished.add(dependent)
+          skipped.append(dependent)
+          pending.append(application)
+    return sorted(skipped)
+
+  def plan(self, jobs: int) -> list[tuple[int, Target]]:
+    """
+      The order in which the targets would be started, if every one
+      were deployed and took the same time.
+
+      :param jobs: The number of targets deployed at the same time
+      :return: Each target, in the order it would be started, with the
+        step, counting from 1, in which it would be
+    """
+    assert jobs > 0, 'Jobs must be a positive number.'
+    schedule = Schedule(self._depends, self._environments)
+    plan: list[tuple[int, Target]] = []
+    step = 0
+    while len(plan) < len(schedule):
+      step += 1
+      started: list[Target] = []
+      while len(started) < jobs and (target := schedule.ready()) is not None:
+        started.append(target)
+      assert len(started) > 0
+      plan.extend((step, target) for target in started)
+      for target in started:
+        schedule.done(target, True)
+    return plan
+
+  def _key(self, target: Target) -> tuple[int, str, str]:
+    """
+      The key that orders the targets that are ready.
+
+      :param target: The target
+      :return: The key: the longest critical path first, and then in
+        order of application and environment
+    """
+    return -self._critical_path[target.application], target.application, target.environment
+
+
+def _critical_paths(
+    depends: Mapping[str, tuple[str, ...]], dependents: Mapping[str, list[str]]) -> dict[str, int]:
+  """
+    The length of the critical path of every application.
+
+    :param depends: The applications each application depends on
+    :param dependents: The applications that depend on each application
+    :return: The length of the longest chain of applications that
+      depend on each application, including itself
+    :raises ValueError: If applications depend on each other
+  """
+  # Kahn's algorithm, from the applications nothing depends on back to
+  # those that depend on nothing, so each application is visited after
+  # everything that depends on it.
+  remaining = {application: len(names) for application, names in dependents.items()}
+  pending = sorted(application for application, count in remaining.items() if count == 0)
+  lengths: dict[str, int] = {}
+  while len(pending) > 0:
+    application = pending.pop()
+    lengths[application] = 1 + max((lengths[name] for name in dependents[application]), default=0)
+    for name in depends[application]:
+      remaining[name] -= 1
+      if remaining[name] == 0:
+        pending.append(name)
+  if len(lengths) < len(depends):
+    raise ValueError(' -> '.join(_cycle(dependents, set(depends) - lengths.keys())))
+  return lengths
+
+
+def _cycle(dependents: Mapping[str, list[str]], applications: set[str]) -> list[str]:
+  """
+    Find a cycle of dependencies.
+
+    :param dependents: The applications that depend on each application
+    :param applications: The applications that are in a cycle, or that
+      an application in a cycle depends on
+    :return: The applications of a cycle, each depending on the next,
+      starting and ending with the same application
+  """
+  # Another application here depends on every application here, so
+  # following the first of those from any of them must come back to
+  # an application already seen.
+  path: list[str] = []
+  seen: dict[str, int] = {}
+  application = min(applications)
+  while application not in seen:
+    seen[application] = len(path)
+    path.append(application)
+    application = next(name for name in dependents[application] if name in applications)
+  cycle = path[seen[application]:] + [application]
+  cycle.reverse()
+  return cycle
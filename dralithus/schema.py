@@ -0,0 +1,401 @@
+"""
+  schema.py: Check catalog files against the schema of their kind.
+"""
+# -------------------------------------------------------------------
+# schema.py: Check catalog files against the schema of their kind.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# The schemas are written in a small subset of JSON Schema: the
+# keywords type, properties, required, additionalProperties, items and
+# anyOf. The types are those of JSON Schema, and 'scalar', which is
+# any string, number or boolean.
+#
+# A schema is not interpreted each time a file is checked. It is
+# compiled, once per process, into a tree of functions that each check
+# one part of a document, with everything they need to look up in the
+# schema already looked up. There are two such trees: one that only
+# tests whether a document is valid, as fast as it can, and one that
+# says what is wrong with it, which is only used when it is not.
+#
+# A file chooses the version of the schema of its kind with a top level
+# 'schema' key. Files without one use version 1.
+from __future__ import annotations
+from functools import cache
+from hashlib import sha256
+from typing import Any, Callable, Iterator, Mapping, NamedTuple
+import json
+
+from dralithus.catalog import parse_yaml
+
+# Checks a value, and yields what is wrong with it. The second
+# argument is where the value is in the document, e.g. hosts[3].name
+Check = Callable[[Any, str], Iterator[str]]
+
+# Tests whether a value is valid, without saying what is wrong with it.
+Test = Callable[[Any], bool]
+
+# The kind of the VM configuration files, such as network.yaml, in the
+# top directory of the catalog.
+VM = 'vm'
+
+_LABELS: dict[str, Any] = {
+  'type': ['object', 'null'],
+  'additionalProperties': {'type': 'scalar'},
+}
+
+_HOST: dict[str, Any] = {
+  'anyOf': [
+    {'type': 'string'},
+    {
+      'type': 'object',
+      'properties': {'name': {'type': 'string'}, 'labels': _LABELS},
+      'required': ['name'],
+      'additionalProperties': False,
+    },
+  ],
+}
+
+_COMMON: dict[str, Any] = {
+  'schema': {'type': 'integer'},
+  'description': {'type': ['string', 'null']},
+  'labels': _LABELS,
+  'configuration': {'type': ['object', 'null']},
+}
+
+# The schema of each kind of catalog file, by version.
+SCHEMAS: dict[str, dict[int, dict[str, Any]]] = {
+  'environments': {
+    1: {
+      'type': ['object', 'null'],
+      'properties': {**_COMMON, 'hosts': {'type': ['array', 'null'], 'items': _HOST}},
+      'additionalProperties': False,
+    },
+  },
+  'applications': {
+    1: {
+      'type': ['object', 'null'],
+      'properties': {
+        **_COMMON,
+        'depends': {'type': ['array', 'null'], 'items': {'type': 'string'}},
+      },
+      'additionalProperties': False,
+    },
+  },
+  'configuration': {
+    1: {'type': ['object', 'null']},
+  },
+  VM: {
+    1: {
+      'type': ['object', 'null'],
+      'properties': {
+        'schema': {'type': 'integer'},
+        'meta': {
+          'type': 'object',
+          'properties': {'description': {'type': 'string'}},
+        },
+      },
+    },
+  },
+}
+
+# The Python classes of the values of each type. Though bool is a
+# subclass of int, a boolean is not an integer or a number.
+_CLASSES: dict[str, tuple[type, ...]] = {
+  'null': (type(None),),
+  'boolean': (bool,),
+  'integer': (int,),
+  'number': (int, float),
+  'string': (str,),
+  'array': (list,),
+  'object': (dict,),
+  'scalar': (str, int, float, bool),
+}
+
+
+class Validator(NamedTuple):
+  """
+    A compiled schema.
+  """
+  test: Test # Whether a value is valid. Most files are only tested.
+  check: Check # What is wrong with a value that is not valid
+
+
+@cache
+def validator(kind: str, version: int) -> Validator:
+  """
+    Get the compiled schema of one version of a kind of catalog file.
+
+    Each schema is compiled once per process.
+
+    :param kind: The kind of file: 'environments', 'applications',
+      'configuration' or VM
+    :param version: The version of the schema
+    :return: The compiled schema
+    :raises KeyError: If there is no such schema
+  """
+  return _compile(SCHEMAS[kind][version])
+
+
+@cache
+def fingerprint(kind: str) -> bytes:
+  """
+    Get the fingerprint of the schemas of a kind of catalog file.
+
+    The fingerprint changes whenever any version of the schema of the
+    kind does, so that whether a file passed can be remembered by the
+    hash of its contents and the fingerprint.
+
+    :param kind: The kind of file
+    :return: The fingerprint
+  """
+  return sha256(json.dumps([kind, SCHEMAS[kind]], sort_keys=True).encode('utf-8')).digest()
+
+
+def validate(kind: str, data: bytes, path: str) -> list[str]:
+  """
+    Check the contents of a catalog file against the schema of its kind.
+
+    :param kind: The kind of file
+    :param data: The contents of the file
+    :param path: The path of the file, for error messages
+    :return: What is wrong with the file, if anything, one message each
+  """
+  try:
+    document = parse_yaml(data, path)
+  except ValueError as ex:
+    return [str(ex)]
+  version = document.get('schema', 1) if isinstance(document, dict) else 1
+  try:
+    compiled = validator(kind, version)
+  except (KeyError, TypeError):
+    return [f'{path}: schema: Unknown version of the schema of {kind}: {version!r}']
+  if compiled.test(document):
+    return []
+  return [f'{path}: {message}' for message in compiled.check(document, '')]
+
+
+def _compile(schema: Mapping[str, Any]) -> Validator:
+  """
+    Compile a schema.
+
+    :param schema: The schema
+    :return: The compiled schema
+  """
+  parts: list[Validator] = []
+  if 'anyOf' in schema:
+    parts.append(_compile_any_of(schema['anyOf']))
+  if any(keyword in schema for keyword in ('properties', 'required', 'additionalProperties')):
+    parts.append(_compile_object(schema))
+  if 'items' in schema:
+    parts.append(_compile_items(schema['items']))
+  if 'type' not in schema:
+    if len(parts) == 1:
+      return parts[0]
+    return _compile_all(parts)
+  type_ = _compile_type(schema['type'])
+  if len(parts) == 0:
+    return type_
+  rest = _compile_all(parts)
+
+  def test(value: Any) -> bool:
+    return type_.test(value) and rest.test(value)
+
+  def check(value: Any, where: str) -> Iterator[str]:
+    if not type_.test(value):
+      # A value of the wrong type is not checked any further.
+      yield from type_.check(value, where)
+    else:
+      yield from rest.check(value, where)
+  return Validator(test, check)
+
+
+def _compile_all(parts: list[Validator]) -> Validator:
+  """
+    Compile the parts of a schema that a value must all pass.
+
+    :param parts: The compiled parts
+    :return: The compiled schema
+  """
+  tests = tuple(part.test for part in parts)
+  checks = tuple(part.check for part in parts)
+
+  def test(value: Any) -> bool:
+    for part in tests:
+      if not part(value):
+        return False
+    return True
+
+  def check(value: Any, where: str) -> Iterator[str]:
+    for part in checks:
+      yield from part(value, where)
+  return Validator(test, check)
+
+
+def _compile_type(types: str | list[str]) -> Validator:
+  """
+    Compile the type keyword of a schema.
+
+    :param types: The type, or a list of types any of which will do
+    :return: The compiled keyword
+  """
+  names = [types] if isinstance(types, str) else types
+  classes = tuple({cls: None for name in names for cls in _CLASSES[name]})
+  expected = ' or '.join(names)
+
+  if bool in classes or int not in classes:
+    def test(value: Any) -> bool:
+      return isinstance(value, classes)
+  else:
+    def test(value: Any) -> bool:
+      return isinstance(value, classes) and value.__class__ is not bool
+
+  def check(value: Any, where: str) -> Iterator[str]:
+    if not test(value):
+      yield f'{where or "The document"} must be {expected}, not {_type_name(value)}'
+  return Validator(test, check)
+
+
+def _compile_any_of(schemas: list[Mapping[str, Any]]) -> Validator:
+  """
+    Compile the anyOf keyword of a schema.
+
+    If the value is not valid, what is wrong with it is reported as if
+    the first schema whose type it has were the only one. If it has the
+    type of none of them, the types they allow are reported.
+
+    :param schemas: The schemas, any of which will do
+    :return: The compiled keyword
+  """
+  names: list[str] = []
+  for schema in schemas:
+    types = schema.get('type', list(_CLASSES))
+    names.extend(name for name in ([types] if isinstance(types, str) else types)
+                 if name not in names)
+  type_ = _compile_type(names)
+  alternatives = tuple((_compile_type(schema.get('type', list(_CLASSES))).test, _compile(schema))
+                       for schema in schemas)
+  tests = tuple(alternative.test for _, alternative in alternatives)
+
+  def test(value: Any) -> bool:
+    for alternative in tests:
+      if alternative(value):
+        return True
+    return False
+
+  def check(value: Any, where: str) -> Iterator[str]:
+    for type_test, alternative in alternatives:
+      if type_test(value):
+        yield from alternative.check(value, where)
+        return
+    yield from type_.check(value, where)
+  return Validator(test, check)
+
+
+def _compile_object(schema: Mapping[str, Any]) -> Validator:
+  """
+    Compile the properties, required and additionalProperties keywords
+    of a schema.
+
+    :param schema: The schema
+    :return: The compiled keywords, which only check mappings
+  """
+  properties = {key: _compile(value) for key, value in schema.get('properties', {}).items()}
+  tests = {key: value.test for key, value in properties.items()}
+  required = tuple(schema.get('required', ()))
+  additional = schema.get('additionalProperties', True)
+  other = _compile(additional) if isinstance(additional, Mapping) else None
+  other_test = None if other is None else other.test
+
+  def test(value: Any) -> bool:
+    if not isinstance(value, dict):
+      return True
+    for key in required:
+      if key not in value:
+        return False
+    for key, item in value.items():
+      part = tests.get(key, other_test)
+      if part is None:
+        if additional is False:
+          return False
+      elif not part(item):
+        return False
+    return True
+
+  def check(value: Any, where: str) -> Iterator[str]:
+    if not isinstance(value, dict):
+      return
+    for key in required:
+      if key not in value:
+        yield f'{_join(where, key)} is required'
+    for key, item in value.items():
+      part = properties.get(key, other)
+      if part is not None:
+        yield from part.check(item, _join(where, key))
+      elif additional is False:
+        yield f'{_join(where, key)} is not allowed'
+  return Validator(test, check)
+
+
+def _compile_items(schema: Mapping[str, Any]) -> Validator:
+  """
+    Compile the items keyword of a schema.
+
+    :param schema: The schema of every item
+    :return: The compiled keyword, which only checks lists
+  """
+  item = _compile(schema)
+  item_test = item.test
+
+  def test(value: Any) -> bool:
+    if not isinstance(value, list):
+      return True
+    for element in value:
+      if not item_test(element):
+        return False
+    return True
+
+  def check(value: Any, where: str) -> Iterator[str]:
+    if not isinstance(value, list):
+      return
+    for index, element in enumerate(value):
+      yield from item.check(element, f'{where}[{index}]')
+  return Validator(test, check)
+
+
+def _join(where: str, key: Any) -> str:
+  """
+    Where the value of a key of a mapping is in a document.
+
+    :param where: Where the mapping is
+    :param key: The key
+    :return: Where its value is
+  """
+  return f'{where}.{key}' if where else str(key)
+
+
+def _type_name(value: Any) -> str:
+  """
+    The name of the type of a value, as a schema would name it.
+
+    :param value: The value
+    :return: The name
+  """
+  for name in ('null', 'boolean', 'integer', 'number', 'string', 'array', 'object'):
+    if isinstance(value, _CLASSES[name]):
+      return name
+  return type(value).__name__
@@ -0,0 +1,217 @@
+"""
+  snapshot.py: Cache the parsed contents of a directory of catalog
+  files between runs.
+"""
+# -------------------------------------------------------------------
+# snapshot.py: Cache the parsed contents of a directory of catalog
+# files between runs.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# Parsing YAML is slow, so the parsed contents of every file in a
+# directory of the catalog (e.g. applications/) are saved in a
+# snapshot file in the cache directory. Each file's entry in the
+# snapshot records the size, modification time and SHA-256 hash of the
+# file, along with what parsing it produced.
+#
+# Reading the directory then takes one pass over the directory, to
+# stat its files, and one read of the snapshot. A file is only read
+# again if its size or modification time has changed, and only parsed
+# again if its content hash has changed too. So a file that is merely
+# touched, e.g. by a git checkout, is not parsed again. The snapshot
+# is rewritten only if something changed.
+#
+# A file can change twice within the resolution of its modification
+# time, and keep its size. If that happens just before the snapshot is
+# written, the snapshot records the first version with the time of
+# the second. So files modified shortly before the snapshot was written
+# are always checked against their hash, as git does for its index.
+#
+# The snapshot is a pickle, so it is only read back if it is private
+# to the user (see dralithus.cache.read_private).
+from __future__ import annotations
+from hashlib import sha1, sha256
+from typing import Any, NamedTuple
+import os
+import pickle
+import time
+
+from dralithus.cache import cache_directory, read_private, write_atomically
+from dralithus.catalog import EXTENSION, catalog_files, parse_yaml
+
+# The version of the format of the snapshot file. Change this whenever
+# the format, or the way files are parsed, changes, so that old
+# snapshots are ignored.
+_SNAPSHOT_VERSION = 1
+
+# Files modified this long (in nanoseconds) before the snapshot was
+# written are checked against their hash when the snapshot is read.
+# This is larger than the resolution of the modification times of any
+# common file system.
+RACY_NS = 2 * 10**9
+
+
+class Entry(NamedTuple):
+  """
+    What is known about a file in a snapshot.
+  """
+  size: int # The size of the file in bytes
+  mtime_ns: int # The modification time of the file in nanoseconds
+  digest: bytes # The SHA-256 hash of the contents of the file
+  document: Any # What parsing the file produced, if it was valid YAML
+  error: str | None # Why the file could not be parsed, if it was not
+
+
+def snapshot_path(directory: str, kind: str) -> str:
+  """
+    The path of the snapshot of a directory of catalog files.
+
+    Each catalog directory has its own snapshot file in the cache
+    directory.
+
+    :param directory: The catalog directory
+    :param kind: The kind of files: 'applications' etc.
+    :return: The path of the snapshot file
+  """
+  catalog = sha1(directory.encode('utf-8'), usedforsecurity=False).hexdigest()[:12]
+  return os.path.join(cache_directory(), 'snapshots', f'{kind}-{catalog}.pickle')
+
+
+def _read_snapshot(path: str) -> tuple[dict[str, Entry], int]:
+  """
+    Read a snapshot file.
+
+    :param path: The path of the snapshot file
+    :return: The entries in the snapshot by name, and the time at
+      which it was written. If there is no snapshot, or it cannot be
+      used, there are no entries.
+  """
+  data = read_private(path)
+  if data is None:
+    return {}, 0
+  try:
+    snapshot = pickle.loads(data)
+    if not isinstance(snapshot, dict) or snapshot.get('version') != _SNAPSHOT_VERSION:
+      return {}, 0
+    return {name: Entry(*entry) for name, entry in snapshot['entries'].items()}, \
+      snapshot['written_ns']
+  except (EOFError, pickle.UnpicklingError, AttributeError, ImportError,
+          KeyError, TypeError, ValueError):
+    return {}, 0
+
+
+def _write_snapshot(path: str, entries: dict[str, Entry]) -> None:
+  """
+    Write a snapshot file.
+
+    The snapshot is only a cache, so failure to write it is ignored
+    (see dralithus.cache.write_atomically).
+
+    :param path: The path of the snapshot file
+    :param entries: The entries, by name
+  """
+  snapshot = {
+    'version': _SNAPSHOT_VERSION,
+    'written_ns': time.time_ns(),
+    'entries': {name: tuple(entry) for name, entry in entries.items()},
+  }
+  write_atomically(path, pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _parse(path: str, data: bytes, stat: os.stat_result) -> Entry:
+  """
+    Parse a catalog file into a snapshot entry.
+
+    :param path: The path of the file
+    :param data: The contents of the file
+    :param stat: The stat result of the file
+    :return: The entry
+  """
+  digest = sha256(data).digest()
+  try:
+    return Entry(stat.st_size, stat.st_mtime_ns, digest, parse_yaml(data, path), None)
+  except ValueError as ex:
+    return Entry(stat.st_size, stat.st_mtime_ns, digest, None, str(ex))
+
+
+def documents(directory: str, kind: str) -> dict[str, Entry]:
+  """
+    Get the parsed contents of every catalog file of one kind.
+
+    The contents come from the snapshot for every file that has not
+    changed since the snapshot was written. The other files are read
+    and, if their contents have changed, parsed, and the snapshot is
+    rewritten.
+
+    :param directory: The catalog directory
+    :param kind: The kind of files: 'applications' etc.
+    :return: The entry for each file, by name
+  """
+  path = snapshot_path(directory, kind)
+  cached, written_ns = _read_snapshot(path)
+  files_path = os.path.join(directory, kind)
+  entries: dict[str, Entry] = {}
+  changed = False
+  for name, stat in catalog_files(directory, kind).items():
+    entry = cached.get(name)
+    racy = entry is not None and entry.mtime_ns >= written_ns - RACY_NS
+    if entry is not None and not racy \
+        and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+      entries[name] = entry
+      continue
+    file_path = os.path.join(files_path, name + EXTENSION)
+    try:
+      with open(file_path, 'rb') as file:
+        data = file.read()
+    except OSError:
+      continue  # The file was removed, or cannot be read
+    if entry is not None and entry.digest == sha256(data).digest():
+      # Only the modification time changed.
+      entries[name] = entry._replace(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    else:
+      entries[name] = _parse(file_path, data, stat)
+    # A racy entry is written again, so that once its file is old
+    # enough, it is no longer racy.
+    changed = changed or racy or entries[name] != entry
+  changed = changed or cached.keys() != entries.keys()
+  if changed:
+    _write_snapshot(path, entries)
+  return entries
+
+
+def read_document(directory: str, kind: str, name: str) -> Entry | None:
+  """
+    Read and parse one catalog file, without the snapshot.
+
+    This is for a process that keeps the entries of a snapshot up to
+    date as files change (see dralithus.watch). The snapshot file is
+    not rewritten; the next call of documents() finds the change.
+
+    :param directory: The catalog directory
+    :param kind: The kind of file: 'applications' etc.
+    :param name: The name of the file
+    :return: The entry, or None if the file does not exist or cannot
+      be read
+  """
+  path = os.path.join(directory, kind, name + EXTENSION)
+  try:
+    with open(path, 'rb') as file:
+      stat = os.fstat(file.fileno())
+      data = file.read()
+  except OSError:
+    return None
+  return _parse(path, data, stat)
@@ -23,7 +23,15 @@ dralithus/test/__init__.py: Helper classes and functions for unit tests
 # You should have received a copy of the GNU General Public License
 # along with dralithus-core. If not, see <https://www.gnu.org/licenses/>.
 # -------------------------------------------------------------------
-from typing import Any, Callable, Protocol
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Any, Callable, ClassVar, Mapping, Protocol
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dralithus.command import Command
 
 class CaseData:
   """
@@ -150,3 +158,64 @@ class CaseExecutor2(RequiresAsserts):
       assert case.error is not None
       with self.assertRaises(case.error):
         function(case.args)
+
+
+class CatalogTestCase(unittest.TestCase):
+  """
+    A test case that runs against a catalog, and a private cache
+    directory, in temporary directories. $DRALITHUS_CATALOG and
+    $DRALITHUS_CACHE_DIR name them while each test runs.
+  """
+  # The contents of the files of the catalog, by their paths relative
+  # to it
+  catalog_files: ClassVar[Mapping[str, str]] = {}
+
+  def setUp(self) -> None:
+    """
+      Create the catalog, and the cache directory.
+    """
+    # pylint: disable=consider-using-with
+    self._catalog = tempfile.TemporaryDirectory()
+    self._cache = tempfile.TemporaryDirectory()
+    for path, contents in self.catalog_files.items():
+      self.write(path, contents)
+    self._environ = mock.patch.dict(os.environ, {
+      'DRALITHUS_CATALOG': self._catalog.name, 'DRALITHUS_CACHE_DIR': self._cache.name})
+    self._environ.start()
+
+  def tearDown(self) -> None:
+    """
+      Remove the catalog and cache directories.
+    """
+    self._environ.stop()
+    self._catalog.cleanup()
+    self._cache.cleanup()
+
+  def write(self, path: str, contents: str) -> str:
+    """
+      Write a file in the catalog.
+
+      :param path: The path of the file, relative to the catalog
+      :param contents: The contents of the file
+      :return: The full path of the file
+    """
+    path = os.path.join(self._catalog.name, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+      file.write(contents)
+    return path
+
+
+def execute_command(command: Command) -> tuple[int, str, str]:
+  """
+    Execute a command, and capture what it prints.
+
+    :param command: The command
+    :return: The exit code, and what the command printed on standard
+      output and standard error
+  """
+  stdout = io.StringIO()
+  stderr = io.StringIO()
+  with redirect_stdout(stdout), redirect_stderr(stderr):
+    exit_code = command.execute()
+  return exit_code, stdout.getvalue(), stderr.getvalue()
@@ -0,0 +1,108 @@
+"""
+  test_app_label_option.py: Unit tests for class AppLabelOption
+"""
+import copy
+import unittest
+from typing import Any
+
+from parameterized import parameterized
+
+from dralithus.command_line.app_label_option import AppLabelOption
+from dralithus.test import CaseData, CaseExecutor2
+
+
+def is_option_cases() -> list[tuple[str, CaseData]]:
+  """
+    Generate test cases for the is_option method of AppLabelOption class.
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('long_no_value', CaseData(args=['--app-label', None], expected=False, error=None)),
+    ('long_value_equal', CaseData(args=['--app-label=team=payments', None], expected=True, error=None)),
+    ('long2_value_equal', CaseData(args=['--application-label=team=payments', None], expected=True, error=None)),
+    ('long_multi_value_equal', CaseData(args=['--app-label=team=payments,tier=web', None], expected=True, error=None)),
+    ('long_next_arg_value', CaseData(args=['--app-label', 'team=payments'], expected=True, error=None)),
+    ('long_next_arg_not_label', CaseData(args=['--app-label', 'sample'], expected=False, error=None)),
+    ('long_value_not_label', CaseData(args=['--app-label=payments', None], expected=False, error=None)),
+    ('long_value_empty_key', CaseData(args=['--app-label==payments', None], expected=False, error=None)),
+    ('single_hyphen', CaseData(args=['-app-label=team=payments', None], expected=False, error=None)),
+    ('wrong_long_option_value', CaseData(args=['--environment=team=payments', None], expected=False, error=None)),
+    ('not_option', CaseData(args=['parameter', None], expected=False, error=None)),
+  ]
+
+
+def add_to_cases() -> list[tuple[str, CaseData]]:
+  """
+    Generate test cases for the add_to method of AppLabelOption class.
+
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('add_label_to_empty_dict', CaseData(args=[AppLabelOption('app-label', {'team=payments'}), {}], expected={'application_labels': {'team=payments'}}, error=None)),
+    ('add_label_to_non_empty_dict', CaseData(args=[AppLabelOption('app-label', {'team=payments'}), {'application_labels': {'tier=web'}}], expected={'application_labels': {'tier=web', 'team=payments'}}, error=None)),
+  ]
+
+
+def make_cases() -> list[tuple[str, CaseData]]:
+  """
+    Generate test cases for the AppLabelOption class.
+
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('long_equal_value', CaseData(args=['--app-label=team=payments', 'parameter'], expected=(AppLabelOption('app-label', {'team=payments'}), False), error=None)),
+    ('long_equal_multi_value', CaseData(args=['--app-label=team=payments, tier = web', None], expected=(AppLabelOption('app-label', {'team=payments', 'tier=web'}), False), error=None)),
+    ('long_next_arg_value', CaseData(args=['--app-label', 'team=payments'], expected=(AppLabelOption('app-label', {'team=payments'}), True), error=None)),
+    ('long2_next_arg_value', CaseData(args=['--application-label', 'team=payments'], expected=(AppLabelOption('application-label', {'team=payments'}), True), error=None)),
+    ('long_no_value', CaseData(args=['--app-label', 'sample'], expected=None, error=AssertionError)),
+    ('wrong_long_option_value', CaseData(args=['--env=team=payments', None], expected=None, error=AssertionError)),
+  ]
+
+
+class TestAppLabelOption(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for class AppLabelOption
+  """
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(is_option_cases())
+  def test_is_option(self, name: str, case: CaseData) -> None:
+    """
+      Test the is_option method with parameterized inputs.
+      :param name: The name of the test case
+      :param case: The test case
+    """
+    self.execute(
+      lambda params: AppLabelOption.is_option(params[0], params[1]), case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(add_to_cases())
+  def test_add_to(self, name: str, case: CaseData) -> None:
+    """
+      Test the add_to method with parameterized inputs.
+      :param name: The name of the test case
+      :param case: The test case
+    """
+    def wrapper(params: list[Any]) -> dict[str, None | bool | int | str | set[str]]:
+      """
+        Wrapper function around AppLabelOption.add_to() method
+        to match its signature with that which the execute method
+        is expecting.
+      """
+      dct = copy.deepcopy(params[1])
+      params[0].add_to(dct)
+      return dct
+    self.execute(wrapper, case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(make_cases())
+  def test_make(self, name: str, case: CaseData) -> None:
+    """
+      Test the make method with parameterized inputs
+    """
+    self.execute(lambda params: AppLabelOption.make(params[0], params[1]), case)
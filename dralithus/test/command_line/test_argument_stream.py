@@ -0,0 +1,110 @@
+"""
+  test_argument_stream.py: Unit tests for class ArgumentStream
+"""
+import os
+import tempfile
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.command_line.argument_stream import ArgumentStream, is_response_file
+from dralithus.test import CaseData, CaseExecutor2
+
+
+def is_response_file_cases() -> list[tuple[str, CaseData]]:
+  """
+    Generate test cases for the is_response_file function.
+
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('response_file', CaseData(args='@targets.txt', expected=True, error=None)),
+    ('response_file_path', CaseData(args='@/tmp/targets.txt', expected=True, error=None)),
+    ('at_sign_only', CaseData(args='@', expected=False, error=None)),
+    ('parameter', CaseData(args='sample', expected=False, error=None)),
+    ('option', CaseData(args='-e=@local', expected=False, error=None)),
+  ]
+
+
+class TestArgumentStream(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for class ArgumentStream
+  """
+  def setUp(self) -> None:
+    """
+      Create a directory for response files.
+    """
+    self._directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+
+  def tearDown(self) -> None:
+    """
+      Remove the directory for response files.
+    """
+    self._directory.cleanup()
+
+  def _response_file(self, name: str, content: str) -> str:
+    """
+      Create a response file.
+
+      :param name: The name of the file
+      :param content: The content of the file
+      :return: The path of the file
+    """
+    path = os.path.join(self._directory.name, name)
+    with open(path, 'w', encoding='utf-8') as file:
+      file.write(content)
+    return path
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(is_response_file_cases())
+  def test_is_response_file(self, name: str, case: CaseData) -> None:
+    """
+      Test the is_response_file function with parameterized inputs.
+    """
+    self.execute(is_response_file, case)
+
+  def test_peek_and_advance(self) -> None:
+    """
+      Test that peek does not consume arguments and advance does.
+    """
+    stream = ArgumentStream(['drl', '-v', 'deploy'], 1)
+    self.assertEqual(1, stream.index)
+    self.assertEqual('-v', stream.peek())
+    self.assertEqual('deploy', stream.peek(1))
+    self.assertIsNone(stream.peek(2))
+    self.assertEqual(1, stream.index)
+    stream.advance()
+    self.assertEqual('deploy', stream.peek())
+    self.assertEqual(2, stream.index)
+    self.assertEqual(['deploy'], list(stream))
+    self.assertEqual(3, stream.index)
+    self.assertIsNone(stream.peek())
+
+  def test_response_file(self) -> None:
+    """
+      Test that response files are expanded in place.
+    """
+    path = self._response_file('targets.txt', 'sample\r\n\ndralithus\n')
+    stream = ArgumentStream(['-v', f'@{path}', 'echo'])
+    self.assertEqual(['-v', 'sample', 'dralithus', 'echo'], list(stream))
+    self.assertEqual(4, stream.index)
+
+  def test_response_file_is_lazy(self) -> None:
+    """
+      Test that a response file is not opened until it is reached.
+    """
+    missing = os.path.join(self._directory.name, 'missing.txt')
+    stream = ArgumentStream(['deploy', f'@{missing}'])
+    self.assertEqual('deploy', stream.peek())
+    stream.advance()
+    with self.assertRaises(ValueError):
+      stream.peek()
+
+  def test_response_file_is_not_nested(self) -> None:
+    """
+      Test that arguments in a response file are not expanded again.
+    """
+    path = self._response_file('nested.txt', '@other.txt\n')
+    self.assertEqual(['@other.txt'], list(ArgumentStream([f'@{path}'])))
@@ -21,11 +21,14 @@
 # <https://www.gnu.org/licenses/>.
 # -------------------------------------------------------------------
 
+import os
+import tempfile
 import unittest
 from parameterized import parameterized
 
 from dralithus.command_line.command_line import parse, CommandLine
 from dralithus.command_line.options import Options
+from dralithus.errors import CommandLineError
 
 from dralithus.test import CaseData, CaseExecutor2
 
@@ -130,3 +133,27 @@ class TestCommandLine(unittest.TestCase, CaseExecutor2):
       Test the constructor of the CommandLine class
     """
     self.execute(parse, case)
+
+  def test_parse_response_file(self) -> None:
+    """
+      Test that response files are expanded into options and parameters
+    """
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, 'targets.txt')
+      with open(path, 'w', encoding='utf-8') as file:
+        file.write('-e\nlocal\nsample\necho\n')
+      expected = CommandLine('drl', 'deploy', Options([]), Options(['-e', 'local']),
+                             {'sample', 'echo'})
+      self.assertEqual(expected, parse(['drl', 'deploy', f'@{path}']))
+
+  def test_parse_missing_response_file(self) -> None:
+    """
+      Test that a missing response file is reported as a command line error
+    """
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, 'missing.txt')
+      with self.assertRaises(CommandLineError):
+        parse(['drl', 'deploy', f'@{path}'])
+      cmdln = parse(['drl', 'deploy', '-e', 'local', 'sample', 'echo', f'@{path}'])
+      with self.assertRaises(CommandLineError):
+        list(cmdln.iter_parameters())
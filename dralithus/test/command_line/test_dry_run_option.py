@@ -0,0 +1,63 @@
+"""
+  test_dry_run_option.py: Unit tests for the DryRunOption class.
+"""
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.command_line.dry_run_option import DryRunOption
+
+
+class TestDryRunOption(unittest.TestCase):
+  """
+    Unit tests for class DryRunOption
+  """
+
+  def test_value(self) -> None:
+    """
+      Test the value of the dry run option.
+    """
+    dry_run_option = DryRunOption('n')
+    self.assertTrue(dry_run_option.value)
+
+  def test_add_to(self) -> None:
+    """
+      Test the add_to method.
+    """
+    dry_run_option = DryRunOption('n')
+    dictionary: dict[str, None | bool | int | str | set[str]] = {}
+    dry_run_option.add_to(dictionary)
+    self.assertTrue(dictionary['dry_run'])
+
+    dictionary = {'dry_run': False}
+    dry_run_option.add_to(dictionary)
+    self.assertTrue(dictionary['dry_run'])
+
+  # noinspection PyUnusedLocal
+  @parameterized.expand([
+    ('short-dry-run', '-n', None, True),
+    ('long-dry-run', '--dry-run', None, True),
+    ('short-dry-run-with-value', '-n=True', None, False),
+    ('short-dry-run-with-value2', '-n1', None, False),
+    ('long-dry-run-with-value', '--dry-run=True', None, False),
+    ('long-dry-run-prefix', '--dry', None, False),
+    ('not-dry-run', '-v', None, False),
+    ('not-dry-run-parameter', 'parameter', None, False),
+  ])
+  def test_is_option(self,
+    name: str,  # pylint: disable=unused-argument
+    arg: str, next_arg: str | None,
+    expected_value: bool) -> None:
+    """
+      Test the is_option method.
+    """
+    self.assertEqual(expected_value, DryRunOption.is_option(arg, next_arg))
+
+  def test_make(self) -> None:
+    """
+      Test the make method.
+    """
+    dry_run_option, skip_next = DryRunOption.make('--dry-run', None)
+    self.assertEqual(DryRunOption('dry-run'), dry_run_option)
+    self.assertTrue(dry_run_option.value)
+    self.assertFalse(skip_next)
@@ -0,0 +1,63 @@
+"""
+  test_force_option.py: Unit tests for the ForceOption class.
+"""
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.command_line.force_option import ForceOption
+
+
+class TestForceOption(unittest.TestCase):
+  """
+    Unit tests for class ForceOption
+  """
+
+  def test_value(self) -> None:
+    """
+      Test the value of the force option.
+    """
+    force_option = ForceOption('f')
+    self.assertTrue(force_option.value)
+
+  def test_add_to(self) -> None:
+    """
+      Test the add_to method.
+    """
+    force_option = ForceOption('f')
+    dictionary: dict[str, None | bool | int | str | set[str]] = {}
+    force_option.add_to(dictionary)
+    self.assertTrue(dictionary['force'])
+
+    dictionary = {'force': False}
+    force_option.add_to(dictionary)
+    self.assertTrue(dictionary['force'])
+
+  # noinspection PyUnusedLocal
+  @parameterized.expand([
+    ('short-force', '-f', None, True),
+    ('long-force', '--force', None, True),
+    ('short-force-with-value', '-f=True', None, False),
+    ('short-force-with-value2', '-f1', None, False),
+    ('long-force-with-value', '--force=True', None, False),
+    ('long-force-prefix', '--for', None, False),
+    ('not-force', '-v', None, False),
+    ('not-force-parameter', 'parameter', None, False),
+  ])
+  def test_is_option(self,
+    name: str,  # pylint: disable=unused-argument
+    arg: str, next_arg: str | None,
+    expected_value: bool) -> None:
+    """
+      Test the is_option method.
+    """
+    self.assertEqual(expected_value, ForceOption.is_option(arg, next_arg))
+
+  def test_make(self) -> None:
+    """
+      Test the make method.
+    """
+    force_option, skip_next = ForceOption.make('--force', None)
+    self.assertEqual(ForceOption('force'), force_option)
+    self.assertTrue(force_option.value)
+    self.assertFalse(skip_next)
@@ -0,0 +1,107 @@
+"""
+  test_jobs_option.py: Unit tests for class JobsOption
+"""
+import copy
+import unittest
+from typing import Any
+
+from parameterized import parameterized
+
+from dralithus.command_line.jobs_option import JobsOption
+from dralithus.test import CaseData, CaseExecutor2
+
+
+def is_option_cases() -> list[tuple[str, CaseData]]:
+  """
+    Generate test cases for the is_option method of JobsOption class.
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('short_no_value', CaseData(args=['-j', None], expected=False, error=None)),
+    ('short_attached_value', CaseData(args=['-j4', None], expected=True, error=None)),
+    ('short_value_equal', CaseData(args=['-j=4', None], expected=True, error=None)),
+    ('short_next_arg_value', CaseData(args=['-j', '4'], expected=True, error=None)),
+    ('short_next_arg_not_number', CaseData(args=['-j', 'sample'], expected=False, error=None)),
+    ('long_value_equal', CaseData(args=['--jobs=16', None], expected=True, error=None)),
+    ('long_next_arg_value', CaseData(args=['--jobs', '16'], expected=True, error=None)),
+    ('long_value_not_number', CaseData(args=['--jobs=many', None], expected=False, error=None)),
+    ('wrong_option', CaseData(args=['--verbosity=2', None], expected=False, error=None)),
+    ('not_option', CaseData(args=['parameter', None], expected=False, error=None)),
+  ]
+
+
+def add_to_cases() -> list[tuple[str, CaseData]]:
+  """
+    Generate test cases for the add_to method of JobsOption class.
+
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('add_jobs_to_empty_dict', CaseData(args=[JobsOption('j', 4), {}], expected={'jobs': 4}, error=None)),
+    ('add_jobs_to_non_empty_dict', CaseData(args=[JobsOption('jobs', 2), {'jobs': 4}], expected={'jobs': 2}, error=None)),
+  ]
+
+
+def make_cases() -> list[tuple[str, CaseData]]:
+  """
+    Generate test cases for the JobsOption class.
+
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('short_attached_value', CaseData(args=['-j4', 'parameter'], expected=(JobsOption('j', 4), False), error=None)),
+    ('short_next_arg_value', CaseData(args=['-j', '4'], expected=(JobsOption('j', 4), True), error=None)),
+    ('long_equal_value', CaseData(args=['--jobs=16', None], expected=(JobsOption('jobs', 16), False), error=None)),
+    ('long_next_arg_value', CaseData(args=['--jobs', '16'], expected=(JobsOption('jobs', 16), True), error=None)),
+    ('long_zero', CaseData(args=['--jobs=0', None], expected=None, error=ValueError)),
+    ('long_negative', CaseData(args=['--jobs=-1', None], expected=None, error=ValueError)),
+    ('long_no_value', CaseData(args=['--jobs', 'sample'], expected=None, error=AssertionError)),
+  ]
+
+
+class TestJobsOption(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for class JobsOption
+  """
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(is_option_cases())
+  def test_is_option(self, name: str, case: CaseData) -> None:
+    """
+      Test the is_option method with parameterized inputs.
+      :param name: The name of the test case
+      :param case: The test case
+    """
+    self.execute(lambda params: JobsOption.is_option(params[0], params[1]), case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(add_to_cases())
+  def test_add_to(self, name: str, case: CaseData) -> None:
+    """
+      Test the add_to method with parameterized inputs.
+      :param name: The name of the test case
+      :param case: The test case
+    """
+    def wrapper(params: list[Any]) -> dict[str, None | bool | int | str | set[str]]:
+      """
+        Wrapper function around JobsOption.add_to() method
+        to match its signature with that which the execute method
+        is expecting.
+      """
+      dct = copy.deepcopy(params[1])
+      params[0].add_to(dct)
+      return dct
+    self.execute(wrapper, case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(make_cases())
+  def test_make(self, name: str, case: CaseData) -> None:
+    """
+      Test the make method with parameterized inputs
+    """
+    self.execute(lambda params: JobsOption.make(params[0], params[1]), case)
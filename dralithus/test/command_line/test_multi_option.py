@@ -22,9 +22,10 @@ def make_correct_cases() \
   return [
     ('multi-option1', '-hv', None, [HelpOption('h'), VerbosityOption('v', 1)]),
     ('multi-option2', '-vh', None, [VerbosityOption('v', 1), HelpOption('h')]),
-    ('multi-option3', '-vv', None, [VerbosityOption('v', 1), VerbosityOption('v', 1)]),
-    ('multi-option4', '-vhv', None, [VerbosityOption('v', 1), HelpOption('h'), VerbosityOption('v', 1)]),
-    ('multi-option5', '-hvh', None, [HelpOption('h'), VerbosityOption('v', 1), HelpOption('h')])]
+    ('multi-option3', '-vv', None, [VerbosityOption('v', 2)]),
+    ('multi-option4', '-vhv', None, [VerbosityOption('v', 2), HelpOption('h')]),
+    ('multi-option5', '-hvh', None, [HelpOption('h'), VerbosityOption('v', 1)]),
+    ('multi-option6', '-' + 'v' * 1000 + 'h', None, [VerbosityOption('v', 1000), HelpOption('h')])]
 
 def make_incorrect_cases():
   """
@@ -132,10 +133,8 @@ class TestMultiOption(unittest.TestCase):
     """
     multi_option, skip_next_arg = MultiOption.make(current_arg, next_arg)
     self.assertIsInstance(multi_option, MultiOption)
-    # self.assertEqual(expected_options, multi_option.options)
-    for expected_option, actual_option in zip(expected_options, multi_option.options):
-      is_equal = expected_option == actual_option
-      self.assertTrue(is_equal)
+    self.assertEqual(expected_options, multi_option.options)
+    self.assertEqual(current_arg[1:], multi_option.flag)
     self.assertFalse(skip_next_arg)
 
   # noinspection PyUnusedLocal
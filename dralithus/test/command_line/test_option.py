@@ -13,6 +13,11 @@ from dralithus.command_line.help_option import HelpOption
 from dralithus.command_line.verbosity_option import VerbosityOption
 from dralithus.command_line.environment_option import EnvironmentOption
 from dralithus.command_line.multi_option import MultiOption
+from dralithus.command_line.app_label_option import AppLabelOption
+from dralithus.command_line.jobs_option import JobsOption
+from dralithus.command_line.dry_run_option import DryRunOption
+from dralithus.command_line.force_option import ForceOption
+from dralithus.command_line.trust_cache_option import TrustCacheOption
 
 from dralithus.test import CaseData, CaseExecutor2
 
@@ -117,6 +122,43 @@ def type_of_cases() -> list[tuple[str, CaseData]]:
     ('long2-env-bad_value', CaseData(args=['--environment=bad_value', None], expected=EnvironmentOption, error=None)),
     ('long2-env-bad_multi-value', CaseData(args=['--environment=bad_value,local', None], expected=EnvironmentOption, error=None)),
     ('long2-env-bad-multi-value2', CaseData(args=['--environment=local,bad_value', None], expected=EnvironmentOption, error=None)),
+    ('multi-option', CaseData(args=['-hv', None], expected=MultiOption, error=None)),
+    ('multi-option2', CaseData(args=['-vvh', None], expected=MultiOption, error=None)),
+    ('bad-multi-option', CaseData(args=['-vhe', None], expected=[None], error=None)),
+    ('unknown-short-option', CaseData(args=['-x', None], expected=[None], error=None)),
+    ('unknown-long-option', CaseData(args=['--xtra', None], expected=[None], error=None)),
+    ('non-option', CaseData(args=['---', None], expected=[None], error=None)),
+    ('parameter', CaseData(args=['parameter', None], expected=[None], error=None)),
+  ]
+
+
+def dispatch_table_cases() -> list[tuple[str, CaseData]]:
+  """
+    Test cases for the Option.dispatch_table() method.
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('option-terminator', CaseData(args='--', expected=OptionTerminator, error=None)),
+    ('short-help', CaseData(args='-h', expected=HelpOption, error=None)),
+    ('long-help', CaseData(args='--help', expected=HelpOption, error=None)),
+    ('short-verbosity', CaseData(args='-v', expected=VerbosityOption, error=None)),
+    ('long-verbosity', CaseData(args='--verbosity', expected=VerbosityOption, error=None)),
+    ('long2-verbosity', CaseData(args='--verbose', expected=VerbosityOption, error=None)),
+    ('short-env', CaseData(args='-e', expected=EnvironmentOption, error=None)),
+    ('long-env', CaseData(args='--env', expected=EnvironmentOption, error=None)),
+    ('long2-env', CaseData(args='--environment', expected=EnvironmentOption, error=None)),
+    ('long-app-label', CaseData(args='--app-label', expected=AppLabelOption, error=None)),
+    ('long2-app-label', CaseData(args='--application-label', expected=AppLabelOption, error=None)),
+    ('short-jobs', CaseData(args='-j', expected=JobsOption, error=None)),
+    ('long-jobs', CaseData(args='--jobs', expected=JobsOption, error=None)),
+    ('short-dry-run', CaseData(args='-n', expected=DryRunOption, error=None)),
+    ('long-dry-run', CaseData(args='--dry-run', expected=DryRunOption, error=None)),
+    ('short-force', CaseData(args='-f', expected=ForceOption, error=None)),
+    ('long-force', CaseData(args='--force', expected=ForceOption, error=None)),
+    ('long-trust-cache', CaseData(args='--trust-cache', expected=TrustCacheOption, error=None)),
+    ('unknown-short-option', CaseData(args='-x', expected=None, error=KeyError)),
+    ('unknown-long-option', CaseData(args='--xtra', expected=None, error=KeyError)),
   ]
 
 
@@ -157,6 +199,14 @@ def make_cases() -> list[tuple[str, CaseData]]:
     ('long2-verbosity-next-arg-option', CaseData(args=['--verbose', '-h'], expected=(VerbosityOption('verbose', 1), False), error=None)),
     ('long2-verbosity-next-arg-verbosity', CaseData(args=['--verbose', '-v'], expected=(VerbosityOption('verbose', 1), False), error=None)),
     ('long2-verbosity-next-arg-parameter', CaseData(args=['--verbose', 'parameter'], expected=(VerbosityOption('verbose', 1), False), error=None)),
+    ('short-jobs-attached', CaseData(args=['-j4', None], expected=(JobsOption('j', 4), False), error=None)),
+    ('long-jobs-next-arg', CaseData(args=['--jobs', '8'], expected=(JobsOption('jobs', 8), True), error=None)),
+    ('long-jobs-zero', CaseData(args=['--jobs=0', None], expected=None, error=ValueError)),
+    ('short-dry-run', CaseData(args=['-n', 'sample'], expected=(DryRunOption('n'), False), error=None)),
+    ('long-dry-run-value', CaseData(args=['--dry-run=yes', None], expected=None, error=ValueError)),
+    ('short-force', CaseData(args=['-f', 'sample'], expected=(ForceOption('f'), False), error=None)),
+    ('long-force-value', CaseData(args=['--force=yes', None], expected=None, error=ValueError)),
+    ('long-trust-cache', CaseData(args=['--trust-cache', 'sample'], expected=(TrustCacheOption('trust-cache'), False), error=None)),
     ('short-env', CaseData(args=['-e=local', None], expected=(EnvironmentOption('e', {'local'}), False), error=None)),
     ('short-env-multi-value', CaseData(args=['-e=local,test', None], expected=(EnvironmentOption('e', {'local', 'test'}), False), error=None)),
     ('short-env-next-arg', CaseData(args=['-e', 'local'], expected=(EnvironmentOption('e', {'local'}), True), error=None)),
@@ -260,6 +310,32 @@ class TestOption(unittest.TestCase, CaseExecutor2):
     """
     self.execute(lambda parameters: Option.type_of(parameters[0], parameters[1]), case)
 
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(dispatch_table_cases())
+  def test_dispatch_table(self, name: str, case: CaseData):
+    """
+      Test the dispatch_table method of the Option class.
+      :return: None
+    """
+    self.execute(lambda flag: Option.dispatch_table()[flag], case)
+
+  def test_registry(self) -> None:
+    """
+      Test that the registry agrees with the flags of the option subclasses.
+      :return: None
+    """
+    expected: dict[str, type[Option]] = {}
+    for cls in Option.supported_sub_types():
+      if cls is MultiOption:
+        continue
+      for flag in cls.supported_short_flags():
+        expected['-' + flag] = cls
+      for flag in cls.supported_long_flags():
+        expected['--' + flag] = cls
+    self.assertEqual(expected, Option.dispatch_table())
+    self.assertIsNone(Option.option_type('-x'))
+
   # noinspection PyUnusedLocal
   # pylint: disable=unused-argument
   @parameterized.expand(make_cases())
@@ -279,7 +355,7 @@ class TestOptionSubclassing(unittest.TestCase):
     """
       Test that Option is an abstract class can be subclassed.
     """
-    class DummyOption(Option):
+    class DummyOption(Option):  # pylint: disable=abstract-method
       """
         A dummy subclass of Option for testing purposes.
       """
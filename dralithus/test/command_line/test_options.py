@@ -257,6 +257,26 @@ def incorrect_cases() -> list[tuple[str, CaseData]]:
     ('error-terminator-before-environment-value', CaseData(args=['--environment', '--', 'local,test'], expected=None, error=ValueError))
   ]
 
+def start_index_cases() -> list[tuple[str, CaseData]]:
+  """
+    Generate test cases for parsing options that start part way
+    through the argument list.
+
+    The args for each case are the argument list and the start index.
+    The expected value is the options dictionary, the end index and
+    whether the options ended with a terminator.
+
+    :return: A list of test cases
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('start-at-end', CaseData(args=(['drl'], 1), expected=({'requires_help': False, 'verbosity': 0, 'environments': set()}, 1, False), error=None)),
+    ('start-after-program', CaseData(args=(['drl', '-v', 'deploy'], 1), expected=({'requires_help': False, 'verbosity': 1, 'environments': set()}, 2, False), error=None)),
+    ('start-after-command', CaseData(args=(['drl', '-v', 'deploy', '-e', 'local', 'sample'], 3), expected=({'requires_help': False, 'verbosity': 0, 'environments': {'local'}}, 5, False), error=None)),
+    ('start-with-terminator', CaseData(args=(['drl', '-h', '--', '-v'], 1), expected=({'requires_help': True, 'verbosity': 0, 'environments': set()}, 3, True), error=None)),
+  ]
+
+
 def all_cases() -> list[tuple[str, CaseData]]:
   """
     Generate all test cases for the Options class.
@@ -292,3 +312,20 @@ class TestOptions(unittest.TestCase, CaseExecutor2):
       return dict(opt), opt.end_index
 
     self.execute(wrapper, case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(start_index_cases())
+  def test_constructor_with_start(self, name: str, case: CaseData) -> None:
+    """
+      Test the constructor of the Options class with a start index.
+    """
+    def wrapper(params: tuple[list[str], int]) \
+        -> tuple[dict[str, None | bool | int | str | set[str]], int, bool]:
+      """
+        Wrapper function to call the Options constructor and check the result.
+      """
+      opt = Options(params[0], params[1])
+      return dict(opt), opt.end_index, opt.terminated
+
+    self.execute(wrapper, case)
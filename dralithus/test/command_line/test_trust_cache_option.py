@@ -0,0 +1,61 @@
+"""
+  test_trust_cache_option.py: Unit tests for the TrustCacheOption class.
+"""
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.command_line.trust_cache_option import TrustCacheOption
+
+
+class TestTrustCacheOption(unittest.TestCase):
+  """
+    Unit tests for class TrustCacheOption
+  """
+
+  def test_value(self) -> None:
+    """
+      Test the value of the trust cache option.
+    """
+    trust_cache_option = TrustCacheOption('trust-cache')
+    self.assertTrue(trust_cache_option.value)
+
+  def test_add_to(self) -> None:
+    """
+      Test the add_to method.
+    """
+    trust_cache_option = TrustCacheOption('trust-cache')
+    dictionary: dict[str, None | bool | int | str | set[str]] = {}
+    trust_cache_option.add_to(dictionary)
+    self.assertTrue(dictionary['trust_cache'])
+
+    dictionary = {'trust_cache': False}
+    trust_cache_option.add_to(dictionary)
+    self.assertTrue(dictionary['trust_cache'])
+
+  # noinspection PyUnusedLocal
+  @parameterized.expand([
+    ('long-trust-cache', '--trust-cache', None, True),
+    ('long-trust-cache-with-value', '--trust-cache=True', None, False),
+    ('long-trust-cache-prefix', '--trust', None, False),
+    ('short-t', '-t', None, False),
+    ('not-trust-cache', '-f', None, False),
+    ('not-trust-cache-parameter', 'parameter', None, False),
+  ])
+  def test_is_option(self,
+    name: str,  # pylint: disable=unused-argument
+    arg: str, next_arg: str | None,
+    expected_value: bool) -> None:
+    """
+      Test the is_option method.
+    """
+    self.assertEqual(expected_value, TrustCacheOption.is_option(arg, next_arg))
+
+  def test_make(self) -> None:
+    """
+      Test the make method.
+    """
+    trust_cache_option, skip_next = TrustCacheOption.make('--trust-cache', 'sample')
+    self.assertEqual(TrustCacheOption('trust-cache'), trust_cache_option)
+    self.assertTrue(trust_cache_option.value)
+    self.assertFalse(skip_next)
@@ -0,0 +1,83 @@
+"""
+  test_application.py: Unit tests for the dralithus.application module
+"""
+# -------------------------------------------------------------------
+# test_application.py: Unit tests for the dralithus.application module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+from parameterized import parameterized
+
+from dralithus.application import Application
+from dralithus.errors import DralithusApplicationError
+from dralithus.test import CaseData, CaseExecutor2, CatalogTestCase
+
+APPLICATIONS = {
+  'billing': 'description: Billing\nlabels:\n  team: payments\n',
+  'ledger': 'description: Ledger\nlabels:\n  team: payments\n  tier: core\ndepends: [billing]\n',
+  'portal': 'description: Portal\nlabels:\n  team: web\n',
+  'broken': 'description: [unclosed\n',
+}
+
+
+def select_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for Application.select
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('name', CaseData(args=['portal'], expected={'portal'}, error=None)),
+    ('glob', CaseData(args=['*l*', '!broken'], expected={'billing', 'ledger', 'portal'}, error=None)),
+    ('unknown_name', CaseData(args=['payroll'], expected=None, error=DralithusApplicationError)),
+    ('invalid_file', CaseData(args=['broken'], expected=None, error=DralithusApplicationError)),
+  ]
+
+
+class TestApplication(CatalogTestCase, CaseExecutor2):
+  """
+    Unit tests for the Application class.
+  """
+  catalog_files = {f'applications/{name}.yaml': contents for name, contents in APPLICATIONS.items()}
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(select_cases())
+  def test_select(self, name: str, case: CaseData) -> None:
+    """
+      Test selecting applications from a catalog.
+    """
+    self.execute(lambda selectors: {app.name for app in Application.select(selectors)}, case)
+
+  def test_load(self) -> None:
+    """
+      Test that an application is read from its file, and memoised.
+    """
+    app = Application.load('ledger')
+    self.assertEqual('Ledger', app.description)
+    self.assertEqual({'team': 'payments', 'tier': 'core'}, app.labels)
+    self.assertEqual(('billing',), app.depends)
+    self.assertEqual((), Application.load('billing').depends)
+    self.assertIs(app, Application.load('ledger'))
+    self.assertFalse(hasattr(app, '__dict__'))
+
+  def test_select_labels_with_invalid_file(self) -> None:
+    """
+      Test that an application whose file is not valid cannot be
+      selected by label.
+    """
+    with self.assertRaises(DralithusApplicationError):
+      Application.select(['team=payments'])
@@ -0,0 +1,173 @@
+"""
+  test_batch_command.py: Unit tests for the dralithus.batch_command module
+"""
+# -------------------------------------------------------------------
+# test_batch_command.py: Unit tests for the dralithus.batch_command module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import mock
+
+from parameterized import parameterized
+
+from dralithus.batch_command import BatchCommand, BatchResult
+from dralithus.command import make
+from dralithus.errors import CommandLineError, ExitCode
+from dralithus.test import CaseData, CaseExecutor2
+
+
+def make_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for making a BatchCommand
+  """
+  # pylint: disable=line-too-long
+  with mock.patch('os.cpu_count', return_value=4):
+    return [
+      ('batch_stdin', CaseData(args=['drl', 'batch'], expected=BatchCommand('drl', ['-'], os.cpu_count() or 1, 0), error=None)),
+      ('batch_file', CaseData(args=['drl', 'batch', 'a.txt'], expected=BatchCommand('drl', ['a.txt'], os.cpu_count() or 1, 0), error=None)),
+      ('batch_files_jobs', CaseData(args=['drl', 'batch', '-j', '3', 'a.txt', '-'], expected=BatchCommand('drl', ['a.txt', '-'], 3, 0), error=None)),
+      ('batch_global_jobs_verbosity', CaseData(args=['drl', '-v', '--jobs=2', 'batch', 'a.txt'], expected=BatchCommand('drl', ['a.txt'], 2, 1), error=None)),
+      ('batch_command_jobs_overrides_global', CaseData(args=['drl', '--jobs=2', 'batch', '-j5', 'a.txt'], expected=BatchCommand('drl', ['a.txt'], 5, 0), error=None)),
+    ]
+
+
+def run_line_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for BatchCommand.run_line
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('deploy', CaseData(args='deploy -e local sample', expected=BatchResult('deploy -e local sample', ExitCode.SUCCESS, '{"application": "sample", "environment": "local"}\n', ''), error=None)),
+    ('deploy_quoted', CaseData(args="deploy -e 'local' \"sample\"", expected=BatchResult("deploy -e 'local' \"sample\"", ExitCode.SUCCESS, '{"application": "sample", "environment": "local"}\n', ''), error=None)),
+    ('unknown_environment', CaseData(args='deploy -e nowhere sample', expected=BatchResult('deploy -e nowhere sample', ExitCode.ENVIRONMENT_ERROR, '', 'Environment not found: nowhere\n'), error=None)),
+    ('unclosed_quote', CaseData(args='deploy -e "local sample', expected=BatchResult('deploy -e "local sample', ExitCode.INVALID_COMMAND_LINE, '', 'Invalid command line: deploy -e "local sample: No closing quotation\n'), error=None)),
+    ('nested_batch', CaseData(args='batch', expected=BatchResult('batch', ExitCode.INVALID_COMMAND_LINE, '', 'A batch cannot run another batch\n'), error=None)),
+  ]
+
+
+class TestBatchCommand(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the BatchCommand class.
+  """
+  def setUp(self) -> None:
+    """
+      Create a file of command lines.
+    """
+    # pylint: disable=consider-using-with
+    self._directory = tempfile.TemporaryDirectory()
+    self._path = os.path.join(self._directory.name, 'commands.txt')
+
+  def tearDown(self) -> None:
+    """
+      Remove the file of command lines.
+    """
+    self._directory.cleanup()
+
+  def write_commands(self, lines: list[str]) -> str:
+    """
+      Write command lines to the file.
+
+      :param lines: The command lines
+      :return: The path of the file
+    """
+    with open(self._path, 'w', encoding='utf-8') as file:
+      file.write('\n'.join(lines) + '\n')
+    return self._path
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(make_cases())
+  def test_make(self, name: str, case: CaseData) -> None:
+    """
+      Test that command.make creates a batch command.
+    """
+    with mock.patch('os.cpu_count', return_value=4):
+      self.execute(make, case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(run_line_cases())
+  def test_results(self, name: str, case: CaseData) -> None:
+    """
+      Test running a single command line.
+    """
+    def run(line: str) -> BatchResult:
+      return next(BatchCommand('drl', [self.write_commands([line])], 1, 0).results())
+    self.execute(run, case)
+
+  def test_execute(self) -> None:
+    """
+      Test that the output of every command is written in order, and
+      the highest exit code is returned.
+    """
+    path = self.write_commands([
+      '# A comment',
+      'deploy -e local sample',
+      '',
+      'deploy -e nowhere sample',
+      'deploy -e development dralithus',
+    ] + ['deploy -e test sample'] * 20)
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+      exit_code = BatchCommand('drl', [path], 4, 0).execute()
+    self.assertEqual(ExitCode.ENVIRONMENT_ERROR, exit_code)
+    self.assertEqual(
+      '{"application": "sample", "environment": "local"}\n'
+      '{"application": "dralithus", "environment": "development"}\n'
+      + '{"application": "sample", "environment": "test"}\n' * 20,
+      stdout.getvalue())
+    self.assertEqual('Environment not found: nowhere\n1 of 23 commands failed\n', stderr.getvalue())
+
+  def test_execute_verbose(self) -> None:
+    """
+      Test that each command's output is preceded by its command line
+      at verbosity 1.
+    """
+    path = self.write_commands(['deploy -e local sample'])
+    stdout = io.StringIO()
+    with redirect_stdout(stdout):
+      exit_code = BatchCommand('drl', [path], 2, 1).execute()
+    self.assertEqual(ExitCode.SUCCESS, exit_code)
+    self.assertEqual(
+      '==> drl deploy -e local sample (exit code 0)\n'
+      '{"application": "sample", "environment": "local"}\n',
+      stdout.getvalue())
+
+  def test_execute_stdin(self) -> None:
+    """
+      Test reading command lines from standard input.
+    """
+    stdout = io.StringIO()
+    with mock.patch('sys.stdin', io.StringIO('deploy -e local sample\n')), redirect_stdout(stdout):
+      exit_code = BatchCommand('drl', ['-'], 2, 0).execute()
+    self.assertEqual(ExitCode.SUCCESS, exit_code)
+    self.assertEqual('{"application": "sample", "environment": "local"}\n', stdout.getvalue())
+
+  def test_execute_missing_file(self) -> None:
+    """
+      Test that a file that cannot be read is reported as a command
+      line error.
+    """
+    command = make(['drl', 'batch', os.path.join(self._directory.name, 'missing.txt')])
+    with self.assertRaises(CommandLineError):
+      command.execute()
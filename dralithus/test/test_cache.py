@@ -0,0 +1,102 @@
+"""
+  test_cache.py: Unit tests for the dralithus.cache module
+"""
+# -------------------------------------------------------------------
+# test_cache.py: Unit tests for the dralithus.cache module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from dralithus.cache import cache_directory, is_private, read_private, write_atomically
+
+
+class TestCache(unittest.TestCase):
+  """
+    Unit tests for the dralithus.cache module
+  """
+  def setUp(self) -> None:
+    """
+      Create a temporary directory to write files in.
+    """
+    # pylint: disable=consider-using-with
+    self._directory = tempfile.TemporaryDirectory()
+
+  def tearDown(self) -> None:
+    """
+      Remove the temporary directory.
+    """
+    self._directory.cleanup()
+
+  def test_cache_directory(self) -> None:
+    """
+      Test that $DRALITHUS_CACHE_DIR is used if it is set, and the
+      dralithus directory in $XDG_CACHE_HOME otherwise.
+    """
+    with mock.patch.dict(os.environ, {'DRALITHUS_CACHE_DIR': '/cache', 'XDG_CACHE_HOME': '/xdg'}):
+      self.assertEqual('/cache', cache_directory())
+    with mock.patch.dict(os.environ, {'DRALITHUS_CACHE_DIR': '', 'XDG_CACHE_HOME': '/xdg'}):
+      self.assertEqual('/xdg/dralithus', cache_directory())
+
+  def test_write_atomically(self) -> None:
+    """
+      Test that a file is written in a directory private to the user,
+      which is created if need be, and that no temporary file is left
+      behind.
+    """
+    directory = os.path.join(self._directory.name, 'graphs')
+    path = os.path.join(directory, 'catalog.pickle')
+    write_atomically(path, b'first')
+    write_atomically(path, b'second')
+    with open(path, 'rb') as file:
+      self.assertEqual(b'second', file.read())
+    self.assertEqual(['catalog.pickle'], os.listdir(directory))
+    self.assertEqual(0, stat.S_IMODE(os.stat(directory).st_mode) & 0o077)
+    self.assertEqual(0, stat.S_IMODE(os.stat(path).st_mode) & 0o077)
+
+  def test_write_fails(self) -> None:
+    """
+      Test that failure to write a file is ignored, and leaves no
+      temporary file behind.
+    """
+    path = os.path.join(self._directory.name, 'catalog.pickle')
+    with mock.patch('os.replace', side_effect=OSError('No space left on device')):
+      write_atomically(path, b'data')
+    self.assertEqual([], os.listdir(self._directory.name))
+
+  def test_read_private(self) -> None:
+    """
+      Test that a file is only read if neither it, nor its directory,
+      may be written by anyone but the user.
+    """
+    directory = os.path.join(self._directory.name, 'graphs')
+    path = os.path.join(directory, 'catalog.pickle')
+    self.assertEqual((False, None), (is_private(path), read_private(path)))
+    write_atomically(path, b'data')
+    self.assertEqual((True, b'data'), (is_private(path), read_private(path)))
+    os.chmod(path, 0o620)
+    self.assertEqual((False, None), (is_private(path), read_private(path)))
+    os.chmod(path, 0o600)
+    os.chmod(directory, 0o707)
+    self.assertEqual((False, None), (is_private(path), read_private(path)))
+    os.chmod(directory, 0o700)
+    with mock.patch('os.getuid', return_value=os.getuid() + 1):
+      self.assertEqual((False, None), (is_private(path), read_private(path)))
@@ -0,0 +1,172 @@
+"""
+  test_catalog.py: Unit tests for the dralithus.catalog module
+"""
+# -------------------------------------------------------------------
+# test_catalog.py: Unit tests for the dralithus.catalog module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.catalog import (
+  depends_from, host_from, parse_yaml, parse_yaml_except, parse_yaml_items)
+from dralithus.test import CaseData, CaseExecutor2
+
+ANCHORS = b'''\
+rack: &rack
+  rack: r12
+description: Anchors
+hosts:
+  - name: web1
+    labels: *rack
+  - name: db1
+    labels:
+      <<: *rack
+      role: db
+labels:
+  tier: prod
+'''
+
+
+def parse_yaml_except_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for parse_yaml_except
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('empty', CaseData(args=b'', expected=[None], error=None)),
+    ('no_key', CaseData(args=b'a: 1\nb: [2]\n', expected={'a': 1, 'b': [2]}, error=None)),
+    ('sequence', CaseData(args=b'a: 1\nhosts: [x, y]\nb: 2\n', expected={'a': 1, 'b': 2}, error=None)),
+    ('block_sequence', CaseData(args=b'hosts:\n  - name: x\n    labels: {a: b}\n  - y\n', expected={}, error=None)),
+    ('null', CaseData(args=b'hosts:\n', expected={'hosts': None}, error=None)),
+    ('scalar', CaseData(args=b'hosts: x\n', expected={'hosts': 'x'}, error=None)),
+    ('not_a_mapping', CaseData(args=b'- hosts\n', expected=['hosts'], error=None)),
+    ('nested_key', CaseData(args=b'a:\n  hosts: [x]\n', expected={'a': {'hosts': ['x']}}, error=None)),
+    ('anchors', CaseData(args=ANCHORS, expected={'rack': {'rack': 'r12'}, 'description': 'Anchors', 'labels': {'tier': 'prod'}}, error=None)),
+    ('invalid', CaseData(args=b'hosts: [x\n', expected=None, error=ValueError)),
+  ]
+
+
+def parse_yaml_items_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for parse_yaml_items
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('empty', CaseData(args=b'', expected=[], error=None)),
+    ('no_key', CaseData(args=b'a: 1\n', expected=[], error=None)),
+    ('sequence', CaseData(args=b'a: {b: c}\nhosts: [x, 2, {name: y}]\n', expected=['x', 2, {'name': 'y'}], error=None)),
+    ('null', CaseData(args=b'hosts:\n', expected=[], error=None)),
+    ('scalar', CaseData(args=b'hosts: x\n', expected=None, error=ValueError)),
+    ('not_a_mapping', CaseData(args=b'- hosts\n', expected=[], error=None)),
+    ('anchors', CaseData(args=ANCHORS, expected=[{'name': 'web1', 'labels': {'rack': 'r12'}}, {'name': 'db1', 'labels': {'rack': 'r12', 'role': 'db'}}], error=None)),
+    ('invalid', CaseData(args=b'hosts: [x, {\n', expected=None, error=ValueError)),
+  ]
+
+
+def host_from_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for host_from
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('name', CaseData(args='web1', expected=('web1', {}), error=None)),
+    ('mapping', CaseData(args={'name': 'web1', 'labels': {'rack': 12}}, expected=('web1', {'rack': '12'}), error=None)),
+    ('no_name', CaseData(args={'labels': {'rack': 'r12'}}, expected=None, error=ValueError)),
+    ('list', CaseData(args=['web1'], expected=None, error=ValueError)),
+  ]
+
+
+def depends_from_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for depends_from
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('none', CaseData(args={}, expected=(), error=None)),
+    ('null', CaseData(args={'depends': None}, expected=(), error=None)),
+    ('names', CaseData(args={'depends': ['db', 'cache']}, expected=('db', 'cache'), error=None)),
+    ('name', CaseData(args={'depends': 'db'}, expected=None, error=ValueError)),
+    ('not_a_name', CaseData(args={'depends': ['../db']}, expected=None, error=ValueError)),
+    ('number', CaseData(args={'depends': [5]}, expected=None, error=ValueError)),
+  ]
+
+
+class TestCatalog(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the dralithus.catalog module
+  """
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(parse_yaml_except_cases())
+  def test_parse_yaml_except(self, name: str, case: CaseData) -> None:
+    """
+      Test parsing a YAML file except for the sequence under a key.
+    """
+    self.execute(lambda data: parse_yaml_except(data, 'test.yaml', 'hosts'), case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(parse_yaml_items_cases())
+  def test_parse_yaml_items(self, name: str, case: CaseData) -> None:
+    """
+      Test parsing the items of the sequence under a key one at a time.
+    """
+    self.execute(lambda data: list(parse_yaml_items(data, 'test.yaml', 'hosts')), case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(host_from_cases())
+  def test_host_from(self, name: str, case: CaseData) -> None:
+    """
+      Test getting a host from an item of the hosts of an environment.
+    """
+    self.execute(host_from, case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(depends_from_cases())
+  def test_depends_from(self, name: str, case: CaseData) -> None:
+    """
+      Test getting the dependencies of an application.
+    """
+    self.execute(depends_from, case)
+
+  def test_streaming_matches_parse_yaml(self) -> None:
+    """
+      Test that a file parsed in parts gives what parsing it whole does.
+    """
+    document = parse_yaml(ANCHORS, 'test.yaml')
+    hosts = document.pop('hosts')
+    self.assertEqual(document, parse_yaml_except(ANCHORS, 'test.yaml', 'hosts'))
+    self.assertEqual(hosts, list(parse_yaml_items(ANCHORS, 'test.yaml', 'hosts')))
+
+  def test_hosts_are_compact(self) -> None:
+    """
+      Test that hosts have no __dict__, and that hosts with the same
+      labels share them.
+    """
+    web1 = host_from({'name': 'web1', 'labels': {'rack': 'r12', 'role': 'web'}})
+    web2 = host_from({'name': 'web2', 'labels': {'rack': 'r12', 'role': 'web'}})
+    db1 = host_from({'name': 'db1', 'labels': {'rack': 'r12', 'role': 'db'}})
+    self.assertFalse(hasattr(web1, '__dict__'))
+    self.assertIs(web1.labels, web2.labels)
+    self.assertIsNot(web1.labels, db1.labels)
+    self.assertIs(host_from('cache1').labels, host_from('cache2').labels)
+    self.assertIs(next(iter(web1.labels)), next(iter(db1.labels)))
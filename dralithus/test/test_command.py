@@ -21,6 +21,9 @@
 # <https://www.gnu.org/licenses/>.
 # -------------------------------------------------------------------
 
+import os
+import subprocess
+import sys
 import unittest
 
 from parameterized import parameterized
@@ -30,6 +33,26 @@ from dralithus.help_command import HelpCommand
 from dralithus.test import CaseData, CaseExecutor2
 
 
+def imported_modules(args: list[str]) -> set[str]:
+  """
+    Find the dralithus modules imported to make a command.
+
+    The command is made in a new interpreter, so that modules imported
+    by other tests do not interfere.
+
+    :param args: The command line arguments
+    :return: The names of the dralithus modules imported
+  """
+  root = os.path.join(os.path.dirname(__file__), '..', '..')
+  script = ('import sys\n'
+    'from dralithus.command import make\n'
+    f'make({args!r})\n'
+    'print("\\n".join(m for m in sys.modules if m.startswith("dralithus")))\n')
+  result = subprocess.run(
+    [sys.executable, '-c', script], cwd=root, capture_output=True, text=True, check=True)
+  return set(result.stdout.split())
+
+
 def command_make_cases() -> list[tuple[str, CaseData]]:
   """
     Test cases for the make method of the Command class
@@ -65,3 +88,29 @@ class TestCommand(unittest.TestCase, CaseExecutor2):
       :param case: The test case
     """
     self.execute(make, case)
+
+  def test_make_imports_only_help(self) -> None:
+    """
+      Test that making the help command imports neither the modules of
+      other commands nor options that were not used.
+    """
+    modules = imported_modules(['drl', '--help'])
+    self.assertIn('dralithus.help_command', modules)
+    self.assertIn('dralithus.command_line.help_option', modules)
+    self.assertNotIn('dralithus.deploy_command', modules)
+    self.assertNotIn('dralithus.environment', modules)
+    self.assertNotIn('dralithus.command_line.verbosity_option', modules)
+    self.assertNotIn('dralithus.command_line.environment_option', modules)
+
+  def test_make_imports_only_deploy(self) -> None:
+    """
+      Test that making the deploy command imports neither the help
+      command nor options that were not used.
+    """
+    modules = imported_modules(['drl', 'deploy', '--environment=local', 'sample'])
+    self.assertIn('dralithus.deploy_command', modules)
+    self.assertIn('dralithus.command_line.environment_option', modules)
+    self.assertNotIn('dralithus.help_command', modules)
+    self.assertNotIn('dralithus.command_line.help_option', modules)
+    self.assertNotIn('dralithus.command_line.app_label_option', modules)
+    self.assertNotIn('dralithus.command_line.multi_option', modules)
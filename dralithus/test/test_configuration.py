@@ -0,0 +1,169 @@
+"""
+  test_configuration.py: Unit tests for the dralithus.configuration module
+"""
+# -------------------------------------------------------------------
+# test_configuration.py: Unit tests for the dralithus.configuration module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import json
+
+from parameterized import parameterized
+
+from dralithus.configuration import LayeredMapping, json_default, resolved
+from dralithus.dependency_graph import DependencyGraph
+from dralithus.errors import (
+  DralithusApplicationError, DralithusConfigurationError, DralithusEnvironmentError)
+from dralithus.test import CaseData, CaseExecutor2, CatalogTestCase
+
+CATALOG = {
+  'applications/web.yaml': 'configuration:\n  port: 8080\n  build:\n    target: web\n',
+  'applications/api.yaml': 'description: API\n',
+  'environments/dev.yaml': 'configuration:\n  build:\n    profile: debug\n',
+  'environments/prod.yaml': 'description: Production\n',
+  'configuration/defaults.yaml': 'build:\n  profile: release\n  jobs: 4\nport: 80\n',
+  'configuration/web-prod.yaml': 'port: 443\nbuild:\n  jobs: 16\n',
+  'configuration/api-dev.yaml': '- not a mapping\n',
+}
+
+
+def merge_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for LayeredMapping
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('no_layers', CaseData(args=[], expected={}, error=None)),
+    ('one_layer', CaseData(args=[{'a': 1}], expected={'a': 1}, error=None)),
+    ('override', CaseData(args=[{'a': 1}, {'a': 2, 'b': 3}], expected={'a': 1, 'b': 3}, error=None)),
+    ('empty_layers', CaseData(args=[{}, {'a': 1}, {}], expected={'a': 1}, error=None)),
+    ('nested', CaseData(args=[{'a': {'x': 1}}, {'a': {'x': 2, 'y': 3}}], expected={'a': {'x': 1, 'y': 3}}, error=None)),
+    ('list_replaces', CaseData(args=[{'a': [1]}, {'a': [2, 3]}], expected={'a': [1]}, error=None)),
+    ('scalar_hides_mapping', CaseData(args=[{'a': 1}, {'a': {'x': 2}}], expected={'a': 1}, error=None)),
+    ('mapping_hides_scalar', CaseData(args=[{'a': {'x': 1}}, {'a': 2}, {'a': {'y': 3}}], expected={'a': {'x': 1}}, error=None)),
+    ('three_layers', CaseData(args=[{'a': {'x': 1}}, {'b': 2}, {'a': {'y': 3}, 'b': 4}], expected={'a': {'x': 1, 'y': 3}, 'b': 2}, error=None)),
+  ]
+
+
+def resolved_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for resolved
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('all_layers', CaseData(args=('web', 'dev'), expected={'build': {'profile': 'debug', 'jobs': 4, 'target': 'web'}, 'port': 8080}, error=None)),
+    ('pair_file', CaseData(args=('web', 'prod'), expected={'build': {'profile': 'release', 'jobs': 16, 'target': 'web'}, 'port': 443}, error=None)),
+    ('defaults_only', CaseData(args=('api', 'prod'), expected={'build': {'profile': 'release', 'jobs': 4}, 'port': 80}, error=None)),
+    ('invalid_pair_file', CaseData(args=('api', 'dev'), expected=None, error=DralithusConfigurationError)),
+    ('unknown_application', CaseData(args=('db', 'dev'), expected=None, error=DralithusApplicationError)),
+    ('unknown_environment', CaseData(args=('web', 'test'), expected=None, error=DralithusEnvironmentError)),
+  ]
+
+
+class TestConfiguration(CatalogTestCase, CaseExecutor2):
+  """
+    Unit tests for the dralithus.configuration module
+  """
+  catalog_files = CATALOG
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(merge_cases())
+  def test_layered_mapping(self, name: str, case: CaseData) -> None:
+    """
+      Test merging layers of mappings.
+    """
+    self.execute(lambda layers: LayeredMapping(layers).to_dict(), case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(resolved_cases())
+  def test_resolved(self, name: str, case: CaseData) -> None:
+    """
+      Test merging the configuration of an application in an
+      environment through the dependency graph.
+    """
+    graph = DependencyGraph(self._catalog.name)
+    self.execute(lambda args: resolved(args[0], args[1], graph), case)
+
+  def test_resolved_incrementally(self) -> None:
+    """
+      Test that only the configurations merged from a file whose
+      configuration has changed are merged again by the next run.
+    """
+    pairs = [(application, environment)
+             for application in ('web', 'api') for environment in ('dev', 'prod')
+             if (application, environment) != ('api', 'dev')]
+    graph = DependencyGraph(self._catalog.name)
+    expected = [resolved(*pair, graph) for pair in pairs]
+    graph.save()
+    self.assertEqual(11, graph.computed)  # 3 configurations and 8 layers
+
+    self.write('environments/prod.yaml', 'description: Production\nhosts: [web1, web2]\n')
+    graph = DependencyGraph(self._catalog.name)
+    self.assertEqual(expected, [resolved(*pair, graph) for pair in pairs])
+    graph.save()
+    self.assertEqual(1, graph.computed)  # The layer of prod, which has not changed
+
+    self.write('applications/api.yaml', 'configuration:\n  port: 9090\n')
+    graph = DependencyGraph(self._catalog.name)
+    self.assertEqual(9090, resolved('api', 'prod', graph)['port'])
+    self.assertEqual(expected[:2], [resolved(*pair, graph) for pair in pairs[:2]])
+    self.assertEqual(2, graph.computed)
+
+  def test_layered_mapping_is_read_only_view(self) -> None:
+    """
+      Test that the layers are not copied, and that nested mappings
+      are memoised.
+    """
+    lower = {'a': {'x': 1}, 'b': 2}
+    mapping = LayeredMapping([{'a': {'y': 3}}, lower])
+    self.assertEqual(['a', 'b'], list(mapping))
+    self.assertEqual(2, len(mapping))
+    self.assertIn('b', mapping)
+    self.assertNotIn('c', mapping)
+    self.assertIs(lower, mapping.layers[1])
+    self.assertIs(mapping['a'], mapping['a'])
+    self.assertEqual({'x': 1, 'y': 3}, mapping['a'])
+
+  def test_resolved_shares_layers(self) -> None:
+    """
+      Test that the layers of an application, and the defaults, are
+      shared by its configuration in every environment, both as merged
+      and as read from the saved graph.
+    """
+    graph = DependencyGraph(self._catalog.name)
+    for saved in (False, True):
+      dev, prod = resolved('web', 'dev', graph), resolved('web', 'prod', graph)
+      self.assertIsInstance(dev, LayeredMapping)
+      self.assertIs(dev, resolved('web', 'dev', graph))
+      self.assertIs(dev.layers[-1], prod.layers[-1])
+      self.assertIs(dev.layers[-2], prod.layers[-2])
+      self.assertIs(dev.layers[-1], resolved('api', 'prod', graph).layers[-1])
+      self.assertEqual(saved, graph.computed == 0)
+      graph.save()
+      graph = DependencyGraph(self._catalog.name)
+
+  def test_json_default(self) -> None:
+    """
+      Test that a merged configuration is encoded as JSON as its plain
+      dicts would be.
+    """
+    graph = DependencyGraph(self._catalog.name)
+    self.assertEqual(json.dumps(resolved('web', 'dev', graph).to_dict(), sort_keys=True),
+                     json.dumps(resolved('web', 'dev', graph), sort_keys=True,
+                                default=json_default))
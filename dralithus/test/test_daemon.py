@@ -0,0 +1,306 @@
+"""
+  test_daemon.py: Unit tests for the dralithus.daemon module
+"""
+# -------------------------------------------------------------------
+# test_daemon.py: Unit tests for the dralithus.daemon module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+from contextlib import redirect_stderr
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from dralithus.daemon import _exit_code, _peer_uid, connect, serve, socket_path
+from dralithus.errors import DaemonError
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+
+def start_daemon(path: str, catalog: str) -> subprocess.Popen[bytes]:
+  """
+    Start a daemon, and wait for it to listen on its socket.
+
+    :param path: The path of the socket
+    :param catalog: The catalog directory
+    :return: The daemon process
+  """
+  # pylint: disable=consider-using-with
+  daemon = subprocess.Popen(
+    [sys.executable, os.path.join(ROOT, 'drl'), '--daemon'], cwd=ROOT,
+    env=dict(os.environ, DRALITHUS_SOCKET=path, DRALITHUS_CATALOG=catalog))
+  deadline = time.monotonic() + 30
+  while not os.path.exists(path):
+    if daemon.poll() is not None or time.monotonic() > deadline:
+      raise RuntimeError('The drl daemon did not start')
+    time.sleep(0.05)
+  return daemon
+
+
+class TestDaemon(unittest.TestCase):
+  """
+    Unit tests for the dralithus.daemon module
+  """
+  _directory: tempfile.TemporaryDirectory[str]
+  _socket: str
+  _daemon: subprocess.Popen[bytes]
+  _environ: mock._patch_dict
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    """
+      Start a daemon listening on a socket in a temporary directory, on
+      the catalog that the commands sent to it use.
+    """
+    # pylint: disable=consider-using-with
+    cls._directory = tempfile.TemporaryDirectory()
+    cls._socket = os.path.join(cls._directory.name, 'dralithus.sock')
+    cls._environ = mock.patch.dict(os.environ, {'DRALITHUS_CATALOG': os.path.abspath(ROOT)})
+    cls._environ.start()
+    cls._daemon = start_daemon(cls._socket, os.path.abspath(ROOT))
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    """
+      Stop the daemon, and check that it removed its socket.
+    """
+    cls._environ.stop()
+    cls._daemon.terminate()
+    cls._daemon.wait(timeout=30)
+    socket_removed = not os.path.exists(cls._socket)
+    cls._directory.cleanup()
+    assert socket_removed, 'The drl daemon did not remove its socket'
+
+  def run_in_daemon(self, args: list[str]) -> tuple[int | None, str, str]:
+    """
+      Run a command in the daemon.
+
+      :param args: The command line arguments
+      :return: The exit code, standard output and standard error of the
+        command
+    """
+    stdout = io.BytesIO()
+    stderr = io.BytesIO()
+    exit_code = connect(args, stdout, stderr, self._socket)
+    return exit_code, stdout.getvalue().decode('utf-8'), stderr.getvalue().decode('utf-8')
+
+  def test_deploy(self) -> None:
+    """
+      Test running a command in the daemon.
+    """
+    exit_code, stdout, stderr = self.run_in_daemon(['drl', 'deploy', '-e', 'local', 'sample'])
+    self.assertEqual(0, exit_code)
+    self.assertEqual('{"application": "sample", "environment": "local"}\n', stdout)
+    self.assertEqual('', stderr)
+
+  def test_error(self) -> None:
+    """
+      Test that the daemon returns the exit code and message of an error.
+    """
+    exit_code, stdout, stderr = self.run_in_daemon(['drl', 'deploy', '-e', 'nowhere', 'sample'])
+    self.assertEqual(2, exit_code)
+    self.assertEqual('', stdout)
+    self.assertIn('nowhere', stderr)
+
+  def test_working_directory(self) -> None:
+    """
+      Test that the command runs in the working directory of the client.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+      with open(os.path.join(directory, 'targets.txt'), 'w', encoding='utf-8') as file:
+        file.write('sample\n')
+      cwd = os.getcwd()
+      os.chdir(directory)
+      try:
+        exit_code, stdout, _ = self.run_in_daemon(['drl', 'deploy', '-e', 'local', '@targets.txt'])
+      finally:
+        os.chdir(cwd)
+    self.assertEqual(0, exit_code)
+    self.assertEqual('{"application": "sample", "environment": "local"}\n', stdout)
+
+  def test_standard_input(self) -> None:
+    """
+      Test that a command run by the daemon reads the client's standard
+      input.
+    """
+    result = subprocess.run(
+      [sys.executable, os.path.join(ROOT, 'drl'), 'batch'], cwd=ROOT,
+      env=dict(os.environ, DRALITHUS_SOCKET=self._socket),
+      input='deploy -e local sample\n', capture_output=True, text=True, check=False)
+    self.assertEqual(0, result.returncode)
+    self.assertEqual('{"application": "sample", "environment": "local"}\n', result.stdout)
+
+  def test_environment(self) -> None:
+    """
+      Test that a command run by the daemon uses the environment of the
+      client, and so the client's catalog.
+    """
+    with tempfile.TemporaryDirectory() as catalog:
+      for path in ('environments/f.yaml', 'applications/b.yaml'):
+        os.makedirs(os.path.join(catalog, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(catalog, path), 'w', encoding='utf-8') as file:
+          file.write('description: Only in this catalog\n')
+      with mock.patch.dict(os.environ, {'DRALITHUS_CATALOG': catalog}):
+        self.assertEqual((0, '  1 b@f\n', ''),
+                         self.run_in_daemon(['drl', 'deploy', '-n', '-e', 'f', 'b']))
+
+  def test_fallback(self) -> None:
+    """
+      Test that the daemon asks the client to run a command itself if
+      the client uses another cache directory.
+    """
+    with tempfile.TemporaryDirectory() as cache:
+      with mock.patch.dict(os.environ, {'DRALITHUS_CACHE_DIR': cache}):
+        self.assertIsNone(self.run_in_daemon(['drl', '--help'])[0])
+
+  def test_no_daemon(self) -> None:
+    """
+      Test that connect returns None if no daemon is running.
+    """
+    path = os.path.join(self._directory.name, 'none.sock')
+    self.assertIsNone(connect(['drl', '--help'], io.BytesIO(), io.BytesIO(), path))
+
+  def test_already_running(self) -> None:
+    """
+      Test that a second daemon cannot be started on the same socket.
+    """
+    with self.assertRaises(DaemonError):
+      serve(lambda args: 0, self._socket)
+
+
+class TestDaemonSocket(unittest.TestCase):
+  """
+    Unit tests for who may use the daemon socket.
+  """
+  def test_socket_path(self) -> None:
+    """
+      Test that, without a runtime directory, the socket is in a
+      directory of its own for the user.
+    """
+    with mock.patch.dict(os.environ, {'DRALITHUS_SOCKET': '', 'XDG_RUNTIME_DIR': '',
+                                      'TMPDIR': '/scratch'}):
+      self.assertEqual(f'/scratch/dralithus-{os.getuid()}/dralithus.sock', socket_path())
+
+  def test_peer_uid(self) -> None:
+    """
+      Test that the user at the other end of a connection is known.
+    """
+    first, second = socket.socketpair(socket.AF_UNIX)
+    with first, second:
+      self.assertIn(_peer_uid(first), (os.getuid(), None))
+
+  def test_exit_code(self) -> None:
+    """
+      Test that a command that exits with SystemExit gives the exit
+      code that running it directly would, and prints a message that
+      it exits with.
+    """
+    stderr = io.StringIO()
+    with redirect_stderr(stderr):
+      self.assertEqual(
+        [0, 0, 3, 1], [_exit_code(SystemExit(code)) for code in (None, 0, 3, 'No catalog')])
+    self.assertEqual('No catalog\n', stderr.getvalue())
+
+  def test_not_private(self) -> None:
+    """
+      Test that a directory others may use is created private, and one
+      that is already there is refused by both the daemon and the
+      client.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, 'daemon', 'dralithus.sock')
+      with mock.patch('dralithus.daemon._warm_up'), mock.patch('signal.signal'), \
+           mock.patch('select.select', side_effect=KeyboardInterrupt):
+        serve(lambda args: 0, path)
+      self.assertEqual(0o700, os.stat(os.path.dirname(path)).st_mode & 0o777)
+      os.chmod(os.path.dirname(path), 0o755)
+      with self.assertRaises(DaemonError):
+        serve(lambda args: 0, path)
+      server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      with server:
+        server.bind(path)
+        server.listen(1)
+        self.assertIsNone(connect(['drl', '--help'], io.BytesIO(), io.BytesIO(), path))
+
+
+class TestDaemonWatch(unittest.TestCase):
+  """
+    Unit tests for a daemon whose catalog is edited while it runs.
+  """
+  def setUp(self) -> None:
+    """
+      Start a daemon on a catalog in a temporary directory.
+    """
+    # pylint: disable=consider-using-with
+    self._directory = tempfile.TemporaryDirectory()
+    self._catalog = os.path.join(self._directory.name, 'catalog')
+    self.write('environments/dev.yaml', 'labels: {tier: dev}\n')
+    self.write('applications/web.yaml', '')
+    self._socket = os.path.join(self._directory.name, 'dralithus.sock')
+    self._daemon = start_daemon(self._socket, self._catalog)
+
+  def tearDown(self) -> None:
+    """
+      Stop the daemon.
+    """
+    self._daemon.terminate()
+    self._daemon.wait(timeout=30)
+    self._directory.cleanup()
+
+  def write(self, path: str, contents: str) -> None:
+    """
+      Write a file in the catalog.
+
+      :param path: The path of the file, relative to the catalog
+      :param contents: The contents of the file
+    """
+    path = os.path.join(self._catalog, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+      file.write(contents)
+
+  def deploy(self, environments: str) -> tuple[int | None, str]:
+    """
+      Deploy web in the daemon.
+
+      :param environments: The environment selectors
+      :return: The exit code and standard output of the command
+    """
+    stdout = io.BytesIO()
+    with mock.patch.dict(os.environ, {'DRALITHUS_CATALOG': self._catalog}):
+      exit_code = connect(['drl', 'deploy', '-e', environments, 'web'], stdout, io.BytesIO(),
+                          self._socket)
+    return exit_code, stdout.getvalue().decode('utf-8')
+
+  def test_catalog_edited(self) -> None:
+    """
+      Test that each command sees the catalog as it is, without the
+      daemon being restarted.
+    """
+    self.assertEqual(2, self.deploy('prod')[0])
+    self.write('environments/prod.yaml', 'labels: {tier: prod}\n')
+    self.assertEqual((0, '{"application": "web", "environment": "prod"}\n'), self.deploy('prod'))
+    self.write('environments/dev.yaml', 'labels: {tier: prod}\n')
+    exit_code, stdout = self.deploy('tier=prod')
+    self.assertEqual(0, exit_code)
+    self.assertIn('dev', stdout)
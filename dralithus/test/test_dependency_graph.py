@@ -0,0 +1,235 @@
+"""
+  test_dependency_graph.py: Unit tests for the dralithus.dependency_graph module
+"""
+# -------------------------------------------------------------------
+# test_dependency_graph.py: Unit tests for the dralithus.dependency_graph module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dralithus import dependency_graph
+from dralithus.dependency_graph import DependencyGraph, graph_path, open_graph, rule
+
+# The keys of the artifacts computed by the rules below, in order
+COMPUTED: list[tuple[str, ...]] = []
+
+
+@rule('test-words')
+def words(graph: DependencyGraph, name: str) -> list[str]:
+  """
+    The words of a file, or none if it does not exist.
+  """
+  COMPUTED.append(('test-words', name))
+  data = graph.read(os.path.join(graph.directory, name))
+  return [] if data is None else data.decode('utf-8').split()
+
+
+@rule('test-count')
+def count(graph: DependencyGraph, name: str) -> int:
+  """
+    The number of words in a file.
+  """
+  COMPUTED.append(('test-count', name))
+  return len(graph.get('test-words', name))
+
+
+@rule('test-total')
+def total(graph: DependencyGraph, *names: str) -> int:
+  """
+    The number of words in some files.
+  """
+  COMPUTED.append(('test-total', *names))
+  return sum(graph.get('test-count', name) for name in names)
+
+
+@rule('test-cycle')
+def cycle(graph: DependencyGraph, name: str) -> int:
+  """
+    An artifact that depends on itself.
+  """
+  return graph.get('test-cycle', name)
+
+
+class TestDependencyGraph(unittest.TestCase):
+  """
+    Unit tests for the DependencyGraph class.
+  """
+  def setUp(self) -> None:
+    """
+      Create a catalog, and a private cache directory, in temporary
+      directories.
+    """
+    # pylint: disable=consider-using-with
+    self._catalog = tempfile.TemporaryDirectory()
+    self._cache = tempfile.TemporaryDirectory()
+    self.write('a', 'one two')
+    self.write('b', 'three')
+    self._environ = mock.patch.dict(os.environ, {'DRALITHUS_CACHE_DIR': self._cache.name})
+    self._environ.start()
+    COMPUTED.clear()
+
+  def tearDown(self) -> None:
+    """
+      Remove the catalog and cache directories.
+    """
+    self._environ.stop()
+    self._catalog.cleanup()
+    self._cache.cleanup()
+
+  def write(self, name: str, contents: str) -> None:
+    """
+      Write a file in the catalog.
+
+      :param name: The name of the file
+      :param contents: The contents of the file
+    """
+    with open(os.path.join(self._catalog.name, name), 'w', encoding='utf-8') as file:
+      file.write(contents)
+
+  def run_graph(self) -> tuple[int, DependencyGraph]:
+    """
+      Get the total number of words in a and b from a new graph, as
+      a new run would, and save the graph.
+
+      :return: The total, and the graph
+    """
+    COMPUTED.clear()
+    graph = DependencyGraph(self._catalog.name)
+    result = graph.get('test-total', 'a', 'b')
+    graph.save()
+    return result, graph
+
+  def test_computed_once(self) -> None:
+    """
+      Test that an artifact is computed once by a graph, and not at all
+      by the next run if nothing has changed.
+    """
+    result, graph = self.run_graph()
+    self.assertEqual(3, result)
+    self.assertEqual(2, graph.get('test-count', 'a'))
+    self.assertEqual(5, len(COMPUTED))
+    self.assertEqual(5, graph.computed)
+    self.assertEqual((3, []), (self.run_graph()[0], COMPUTED))
+
+  def test_changed_file(self) -> None:
+    """
+      Test that only the artifacts downstream of a changed file are
+      computed again.
+    """
+    self.run_graph()
+    self.write('b', 'three four')
+    result, graph = self.run_graph()
+    self.assertEqual(4, result)
+    self.assertEqual(
+      [('test-words', 'b'), ('test-count', 'b'), ('test-total', 'a', 'b')], COMPUTED)
+    self.assertEqual(3, graph.computed)
+    self.assertEqual(2, graph.reused)  # a's words and count
+
+  def test_unchanged_artifact(self) -> None:
+    """
+      Test that an artifact that is computed again, but comes out the
+      same, does not cause those downstream of it to be computed again.
+    """
+    self.run_graph()
+    self.write('b', 'four')
+    self.assertEqual(3, self.run_graph()[0])
+    self.assertEqual([('test-words', 'b'), ('test-count', 'b')], COMPUTED)
+
+  def test_touched_file(self) -> None:
+    """
+      Test that a file whose modification time, but not contents, has
+      changed computes nothing again.
+    """
+    self.run_graph()
+    os.utime(os.path.join(self._catalog.name, 'a'), ns=(0, 0))
+    self.run_graph()
+    self.assertEqual([], COMPUTED)
+
+  def test_missing_file(self) -> None:
+    """
+      Test that an artifact that read a file that did not exist is
+      computed again when the file is created.
+    """
+    os.remove(os.path.join(self._catalog.name, 'b'))
+    self.assertEqual(2, self.run_graph()[0])
+    self.assertEqual(2, self.run_graph()[0])
+    self.assertEqual([], COMPUTED)
+    self.write('b', 'three')
+    self.assertEqual(3, self.run_graph()[0])
+
+  def test_saved_only_if_changed(self) -> None:
+    """
+      Test that the graph is rewritten only if an artifact was computed.
+    """
+    # pylint: disable=protected-access
+    with mock.patch.object(dependency_graph, '_write_graph',
+                           wraps=dependency_graph._write_graph) as write_graph:
+      self.run_graph()
+      self.run_graph()
+    write_graph.assert_called_once()
+    self.assertTrue(os.path.exists(graph_path(self._catalog.name)))
+
+  def test_not_private(self) -> None:
+    """
+      Test that a graph file that others may write is not read, and
+      every artifact is computed again.
+    """
+    self.run_graph()
+    os.chmod(os.path.dirname(graph_path(self._catalog.name)), 0o777)
+    self.assertEqual(3, self.run_graph()[0])
+    self.assertEqual(5, len(COMPUTED))
+
+  def test_unusable_graph(self) -> None:
+    """
+      Test that a graph file that cannot be read is ignored.
+    """
+    path = graph_path(self._catalog.name)
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as file:
+      file.write(b'not a pickle')
+    self.assertEqual(3, self.run_graph()[0])
+    self.assertEqual(3, self.run_graph()[0])
+    self.assertEqual([], COMPUTED)
+
+  def test_errors_not_remembered(self) -> None:
+    """
+      Test that an artifact whose rule fails is computed again.
+    """
+    graph = DependencyGraph(self._catalog.name)
+    with mock.patch.object(graph, 'read', side_effect=PermissionError('a')):
+      with self.assertRaises(PermissionError):
+        graph.get('test-total', 'a', 'b')
+    self.assertEqual(3, graph.get('test-total', 'a', 'b'))
+
+  def test_cycle(self) -> None:
+    """
+      Test that a rule that depends on itself is detected.
+    """
+    with self.assertRaises(AssertionError):
+      DependencyGraph(self._catalog.name).get('test-cycle', 'a')
+
+  def test_open_graph(self) -> None:
+    """
+      Test that a catalog's graph is opened once per process.
+    """
+    open_graph.cache_clear()
+    self.assertIs(open_graph(self._catalog.name), open_graph(self._catalog.name))
+    open_graph.cache_clear()
@@ -22,8 +22,12 @@
 # along with this program.  If not, see
 # <https://www.gnu.org/licenses/>.
 # -------------------------------------------------------------------
-
+import time
+import json
+import os
+import sys
 import unittest
+from unittest import mock
 
 from parameterized import parameterized
 
@@ -32,8 +36,10 @@ from dralithus.deploy_command import DeployCommand, make
 from dralithus.environment import Environment
 from dralithus.application import Application
 from dralithus.command_line.options import Options
-from dralithus.errors import CommandLineError, DralithusEnvironmentError, DralithusApplicationError
-from dralithus.test import CaseData, CaseExecutor2
+from dralithus.errors import (
+  CommandLineError, DralithusEnvironmentError, DralithusApplicationError, ExitCode)
+from dralithus.test import CaseData, CaseExecutor2, CatalogTestCase, execute_command
+from dralithus.transport import TRANSPORTS, FakeReply, FakeTransport
 
 
 def make_cases() -> list[tuple[str, CaseData]]:
@@ -55,12 +61,25 @@ def make_cases() -> list[tuple[str, CaseData]]:
     ('deploy_command_invalid_environment2_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=invalid']), command_options=Options([]), parameters={'sample'}), expected=None, error=DralithusEnvironmentError)),
     ('deploy_command_invalid_environment3_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=local,invalid']), command_options=Options([]), parameters={'sample'}), expected=None, error=DralithusEnvironmentError)),
     ('deploy_command_invalid_environment4_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=invalid,local']), command_options=Options([]), parameters={'sample'}), expected=None, error=DralithusEnvironmentError)),
-    ('deploy_command_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=local']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, verbosity=0), error=None)),
-    ('deploy_command_valid_environment2_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=local']), command_options=Options([]), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, verbosity=0), error=None)),
-    ('deploy_command_valid_environment3_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=local,development']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local'), Environment.load('development')}, applications={Application.load('sample')}, verbosity=0), error=None)),
-    ('deploy_command_valid_environment4_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=local,development']), command_options=Options([]), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local'), Environment.load('development')}, applications={Application.load('sample')}, verbosity=0), error=None)),
-    ('deploy_command_valid_environment4_valid_application2', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=local,development']), command_options=Options([]), parameters={'sample', 'dralithus'}), expected=DeployCommand(environments={Environment.load('local'), Environment.load('development')}, applications={Application.load('sample'), Application.load('dralithus')}, verbosity=0), error=None)),
-    ('deploy_command_verbosity_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['-v']), command_options=Options(['--environment=local']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, verbosity=1), error=None)),
+    ('deploy_command_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=local']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_valid_environment2_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=local']), command_options=Options([]), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_valid_environment3_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=local,development']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local'), Environment.load('development')}, applications={Application.load('sample')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_valid_environment4_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=local,development']), command_options=Options([]), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local'), Environment.load('development')}, applications={Application.load('sample')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_valid_environment4_valid_application2', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--environment=local,development']), command_options=Options([]), parameters={'sample', 'dralithus'}), expected=DeployCommand(environments={Environment.load('local'), Environment.load('development')}, applications={Application.load('sample'), Application.load('dralithus')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_glob_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=*t,!test']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('development')}, applications={Application.load('sample')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_regex_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['-e', '/(local|staging)/']), command_options=Options([]), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local'), Environment.load('staging')}, applications={Application.load('sample')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_unmatched_glob_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=eu-*']), parameters={'sample'}), expected=None, error=DralithusEnvironmentError)),
+    ('deploy_command_excluded_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=local,!local']), parameters={'sample'}), expected=None, error=CommandLineError)),
+    ('deploy_command_label_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['-e', 'tier=dev,region=eu']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('development')}, applications={Application.load('sample')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_valid_environment_label_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['-e', 'local', '--app-label', 'team=payments']), parameters=set()), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_valid_environment_label_filters_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--app-label=team=platform']), command_options=Options(['-e', 'local']), parameters={'sample', 'dralithus'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('dralithus')}, jobs=4, verbosity=0), error=None)),
+    ('deploy_command_valid_environment_unmatched_label_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['-e', 'local', '--app-label', 'team=unknown']), parameters=set()), expected=None, error=CommandLineError)),
+    ('deploy_command_jobs_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=local', '-j', '8']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=8, verbosity=0), error=None)),
+    ('deploy_command_global_jobs_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--jobs=2']), command_options=Options(['--environment=local']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=2, verbosity=0), error=None)),
+    ('deploy_command_dry_run_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=local', '-n']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=4, verbosity=0, dry_run=True), error=None)),
+    ('deploy_command_force_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options([]), command_options=Options(['--environment=local', '--force']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=4, verbosity=0, force=True), error=None)),
+    ('deploy_command_trust_cache_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['--trust-cache']), command_options=Options(['--environment=local']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=4, verbosity=0, trust_cache=True), error=None)),
+    ('deploy_command_verbosity_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='deploy', global_options=Options(['-v']), command_options=Options(['--environment=local']), parameters={'sample'}), expected=DeployCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, jobs=4, verbosity=1), error=None)),
   ]
 
 
@@ -75,4 +94,319 @@ class TestDeployCommand(unittest.TestCase, CaseExecutor2):
     """
     Test the make method of the deploy_command module.
     """
-    self.execute(make, case)
+    with mock.patch('os.cpu_count', return_value=4):
+      self.execute(make, case)
+
+
+# A catalog of applications with deploy commands that succeed, fail,
+# are not valid, or are missing.
+CATALOG = {
+  'environments/dev.yaml': 'configuration: {region: local}\n',
+  'environments/prod.yaml': 'configuration: {region: eu}\n',
+  'environments/pair.yaml': 'hosts: [a, b]\n',
+  'environments/fleet.yaml':
+    'hosts: [h1, h2, h3]\nconfiguration: {transport: fake, host_jobs: 1}\n',
+  'applications/web.yaml':
+    'configuration:\n'
+    '  deploy: echo deploying $DRALITHUS_APPLICATION to $DRALITHUS_ENVIRONMENT; echo done >&2\n',
+  'applications/api.yaml':
+    'configuration:\n'
+    f'  deploy: [{sys.executable}, -c, "import sys; print(\'starting\'); sys.exit(3)"]\n',
+  'applications/docs.yaml': 'description: No deploy command\n',
+  'applications/bad.yaml': 'configuration: {deploy: 5}\n',
+  'applications/env.yaml':
+    'configuration:\n'
+    '  deploy: echo "$DRALITHUS_CONFIGURATION"\n',
+  'applications/db.yaml': 'configuration: {deploy: echo db}\n',
+  'applications/site.yaml': 'depends: [db, api]\nconfiguration: {deploy: echo site}\n',
+  'applications/shop.yaml': 'depends: [db]\nconfiguration: {deploy: echo shop}\n',
+  'applications/host.yaml': 'configuration: {deploy: echo on $DRALITHUS_HOST}\n',
+  'applications/slow.yaml': 'configuration: {deploy: sleep 10, deploy_timeout: 0.2}\n',
+  'applications/pigeon.yaml': 'configuration: {deploy: echo, transport: pigeon}\n',
+  'applications/zero.yaml': 'configuration: {deploy: echo, host_jobs: 0}\n',
+  'applications/never.yaml': 'configuration: {deploy: echo, deploy_timeout: never}\n',
+  'applications/stateful.yaml':
+    'configuration:\n'
+    '  deploy: echo $DRALITHUS_FINGERPRINT > $DRALITHUS_HOST.deployed; echo deployed\n'
+    '  state: cat $DRALITHUS_HOST.deployed\n',
+  'applications/loop1.yaml': 'depends: [loop2]\n',
+  'applications/loop2.yaml': 'depends: [loop1]\n',
+}
+
+
+class TestDeployExecute(CatalogTestCase):
+  """
+    Unit tests for deploying with DeployCommand.execute.
+  """
+  catalog_files = CATALOG
+
+  # pylint: disable=too-many-arguments,too-many-positional-arguments
+  def deploy(self, applications: list[str], environments: list[str], jobs: int = 1,
+             verbosity: int = 0, dry_run: bool = False,
+             force: bool = False, trust_cache: bool = False) -> tuple[int, str, str]:
+    """
+      Deploy applications to environments.
+
+      :param applications: The names of the applications
+      :param environments: The names of the environments
+      :param jobs: The number of targets to deploy at the same time
+      :param verbosity: The verbosity level of the command
+      :param dry_run: Whether to print the schedule instead of deploying
+      :param force: Whether to deploy to hosts that are up to date
+      :param trust_cache: Whether to skip the hosts that were last
+        deployed the same configuration
+      :return: The exit code, and what the command printed on standard
+        output and standard error
+    """
+    command = DeployCommand({Environment.load(name) for name in environments},
+                            {Application.load(name) for name in applications}, jobs, verbosity,
+                            dry_run, force, trust_cache)
+    return execute_command(command)
+
+  def test_single_target(self) -> None:
+    """
+      Test that the output of a single target is not tagged with it,
+      and that standard error is streamed to standard error.
+    """
+    self.assertEqual((ExitCode.SUCCESS, 'deploying web to dev\n', 'done\n'),
+                     self.deploy(['web'], ['dev']))
+
+  def test_no_deploy_command(self) -> None:
+    """
+      Test that a target without a deploy command prints its names, and
+      that targets none of which has one are printed in order, each
+      followed by its exit code at verbosity 1.
+    """
+    self.assertEqual(
+      (ExitCode.SUCCESS, '{"application": "docs", "environment": "dev"}\n', ''),
+      self.deploy(['docs'], ['dev']))
+    self.assertEqual((ExitCode.SUCCESS,
+      'docs@dev: {"application": "docs", "environment": "dev"}\n'
+      '==> docs@dev (exit code 0, 0.0s)\n'
+      'docs@prod: {"application": "docs", "environment": "prod"}\n'
+      '==> docs@prod (exit code 0, 0.0s)\n', ''),
+      self.deploy(['docs'], ['prod', 'dev'], verbosity=1))
+
+  def test_many_targets(self) -> None:
+    """
+      Test that every application is deployed to every environment,
+      that each line is tagged with its target, and that the highest
+      exit code is returned when some targets fail.
+    """
+    for jobs in (1, 4):
+      with self.subTest(jobs=jobs):
+        exit_code, stdout, stderr = self.deploy(['web', 'api', 'bad'], ['dev', 'prod'], jobs,
+                                                force=True)
+        self.assertEqual(ExitCode.DEPLOY_ERROR, exit_code)
+        self.assertEqual(sorted([
+          'api@dev: starting', 'api@prod: starting',
+          'web@dev: deploying web to dev', 'web@prod: deploying web to prod',
+        ]), sorted(stdout.splitlines()))
+        self.assertEqual(sorted([
+          'web@dev: done', 'web@prod: done',
+          'api@dev: The deploy command exited with code 3',
+          'api@prod: The deploy command exited with code 3',
+          'bad@dev: The deploy command of bad@dev must be a string or a list of strings',
+          'bad@prod: The deploy command of bad@prod must be a string or a list of strings',
+          '4 of 6 targets failed',
+        ]), sorted(stderr.splitlines()))
+
+  def test_ordered_with_one_job(self) -> None:
+    """
+      Test that with one job, the targets are deployed in order, and
+      that at verbosity 1 each is followed by its exit code.
+    """
+    exit_code, stdout, _ = self.deploy(['web', 'docs'], ['prod', 'dev'], verbosity=1)
+    self.assertEqual(ExitCode.SUCCESS, exit_code)
+    self.assertEqual([
+      'docs@dev: {"application": "docs", "environment": "dev"}', '==> docs@dev (exit code 0',
+      'docs@prod: {"application": "docs", "environment": "prod"}', '==> docs@prod (exit code 0',
+      'web@dev: deploying web to dev', '==> web@dev (exit code 0',
+      'web@prod: deploying web to prod', '==> web@prod (exit code 0',
+    ], [line.split(',')[0] if line.startswith('==>') else line for line in stdout.splitlines()])
+
+  def test_configuration(self) -> None:
+    """
+      Test that the deploy command is given the resolved configuration.
+    """
+    _, stdout, _ = self.deploy(['env'], ['prod'])
+    self.assertEqual('eu', json.loads(stdout)['region'])
+
+  def test_dependencies(self) -> None:
+    """
+      Test that an application is deployed after those it depends on,
+      and not at all if one of them fails.
+    """
+    exit_code, stdout, stderr = self.deploy(['site', 'shop', 'db', 'api'], ['dev'], 2)
+    self.assertEqual(ExitCode.DEPLOY_ERROR, exit_code)
+    lines = stdout.splitlines()
+    self.assertEqual(['api@dev: starting', 'db@dev: db', 'shop@dev: shop'], sorted(lines))
+    self.assertLess(lines.index('db@dev: db'), lines.index('shop@dev: shop'))
+    self.assertEqual(sorted([
+      'api@dev: The deploy command exited with code 3',
+      'site@dev: Not deployed, as api@dev failed',
+      '2 of 4 targets failed',
+    ]), sorted(stderr.splitlines()))
+
+  def test_dry_run(self) -> None:
+    """
+      Test that a dry run prints the schedule, and deploys nothing.
+    """
+    self.assertEqual((ExitCode.SUCCESS, (
+      '  1 db@dev\n'
+      '  1 db@prod\n'
+      '  2 docs@dev\n'
+      '  2 docs@prod\n'
+      '  3 shop@dev after db@dev\n'
+      '  3 shop@prod after db@prod\n'), ''),
+      self.deploy(['shop', 'db', 'docs'], ['dev', 'prod'], 2, dry_run=True))
+    self.assertEqual('  1 db@dev (critical path 2)\n  2 shop@dev (critical path 1) after db@dev\n',
+                     self.deploy(['shop', 'db'], ['dev'], verbosity=1, dry_run=True)[1])
+
+  def test_cycle(self) -> None:
+    """
+      Test that applications that depend on each other are not
+      deployed.
+    """
+    for dry_run in (False, True):
+      with self.subTest(dry_run=dry_run):
+        with self.assertRaises(DralithusApplicationError) as context:
+          self.deploy(['loop1', 'loop2', 'db'], ['dev'], dry_run=dry_run)
+        self.assertEqual('Applications depend on each other: loop1 -> loop2 -> loop1',
+                         str(context.exception))
+
+  def test_hosts(self) -> None:
+    """
+      Test that the deploy command is run on every host of the
+      environment, with the host in its environment, and that each
+      line is tagged with the host it is from.
+    """
+    exit_code, stdout, _ = self.deploy(['host'], ['pair'])
+    self.assertEqual(ExitCode.SUCCESS, exit_code)
+    self.assertEqual(['a: on a', 'b: on b'], sorted(stdout.splitlines()))
+
+  def test_fake_hosts(self) -> None:
+    """
+      Test that the deploy command is run through the transport of the
+      environment, no more at once on each host than its host jobs,
+      over one connection to each host that every application shares,
+      and that the target fails if it fails on any host.
+    """
+    fake = FakeTransport({'h2': FakeReply(('h2 up',), ('disk full',), 2)},
+                         FakeReply(('up',), seconds=0.01))
+    with mock.patch.dict(TRANSPORTS, {'fake': lambda: fake}):
+      exit_code, stdout, stderr = self.deploy(['web', 'db'], ['fleet'], 2)
+    self.assertEqual(ExitCode.DEPLOY_ERROR, exit_code)
+    self.assertEqual(sorted(f'{app}@fleet: {host}: {line}'
+                            for app in ('web', 'db')
+                            for host, line in (('h1', 'up'), ('h2', 'h2 up'), ('h3', 'up'))),
+                     sorted(stdout.splitlines()))
+    self.assertEqual(sorted(['2 of 2 targets failed', *(line for app in ('web', 'db') for line in (
+      f'{app}@fleet: h2: disk full',
+      f'{app}@fleet: h2: The deploy command exited with code 2',
+      f'{app}@fleet: The deploy command failed on 1 of 3 hosts'))]),
+                     sorted(stderr.splitlines()))
+    self.assertEqual({'h1': 1, 'h2': 1, 'h3': 1}, fake.most)
+    self.assertEqual(3, fake.pool.opened)
+    self.assertEqual(0, fake.pool.size('h1'))
+    self.assertEqual(['h1', 'h1', 'h2', 'h2', 'h3', 'h3'],
+                     sorted(job.environ['DRALITHUS_HOST'] for job in fake.jobs))
+
+  def test_timeout(self) -> None:
+    """
+      Test that a deploy command that takes longer than its timeout is
+      stopped, and fails, and that one whose output cannot be read fails
+      on its host, rather than failing the deploy.
+    """
+    started = time.perf_counter()
+    self.assertEqual((ExitCode.DEPLOY_ERROR, '',
+                      'slow@dev: The deploy command timed out after 0.2s\n1 of 1 targets failed\n'),
+                     self.deploy(['slow'], ['dev']))
+    self.assertLess(time.perf_counter() - started, 5)
+    with mock.patch('asyncio.StreamReader.read', side_effect=ValueError('Separator is not found')):
+      self.assertEqual((ExitCode.DEPLOY_ERROR, '',
+                        'db@dev: Cannot run the deploy command: Cannot read the output of the '
+                        'command: Separator is not found\n1 of 1 targets failed\n'),
+                       self.deploy(['db'], ['dev']))
+
+  def test_invalid_settings(self) -> None:
+    """
+      Test that a transport, host jobs or timeout that is not valid is
+      a configuration error.
+    """
+    for application, error in (
+        ('pigeon', 'The transport of pigeon@dev is not valid: Unknown transport pigeon, '
+                   'expected one of local, ssh, fake'),
+        ('zero', 'The host_jobs of zero@dev must be a positive integer'),
+        ('never', 'The deploy_timeout of never@dev must be a positive number')):
+      with self.subTest(application=application):
+        self.assertEqual((ExitCode.CONFIGURATION_ERROR, '',
+                          f'{application}@dev: {error}\n1 of 1 targets failed\n'),
+                         self.deploy([application], ['dev']))
+
+  def test_up_to_date(self) -> None:
+    """
+      Test that without a state command every host is deployed to
+      again, that with --trust-cache deploying again runs nothing, that
+      at verbosity 1 the targets say they are up to date, and that a
+      target whose configuration changes, and only that target, is
+      deployed again.
+    """
+    self.assertEqual(ExitCode.SUCCESS, self.deploy(['web', 'db'], ['dev'])[0])
+    self.assertEqual((ExitCode.SUCCESS, 'db@dev: db\nweb@dev: deploying web to dev\n',
+                      'web@dev: done\n'), self.deploy(['web', 'db'], ['dev']))
+    self.assertEqual((ExitCode.SUCCESS, '', ''),
+                     self.deploy(['web', 'db'], ['dev'], trust_cache=True))
+    self.assertEqual(['db@dev: Up to date', 'web@dev: Up to date'],
+                     sorted(line for line in self.deploy(['web', 'db'], ['dev'], verbosity=1,
+                                                         trust_cache=True)[1]
+                            .splitlines() if not line.startswith('==>')))
+    self.write('applications/db.yaml', 'configuration: {deploy: echo db again}\n')
+    self.assertEqual((ExitCode.SUCCESS, 'db@dev: db again\n', ''),
+                     self.deploy(['web', 'db'], ['dev'], trust_cache=True))
+    self.assertEqual((ExitCode.SUCCESS, 'db@dev: db again\nweb@dev: deploying web to dev\n',
+                      'web@dev: done\n'), self.deploy(['web', 'db'], ['dev'], force=True))
+
+  def test_new_hosts(self) -> None:
+    """
+      Test that with --trust-cache only the hosts added to an
+      environment are deployed to, tagged with the host as long as the
+      environment has more than one.
+    """
+    self.deploy(['host'], ['pair'])
+    self.write('environments/pair.yaml', 'hosts: [b, c]\n')
+    self.assertEqual((ExitCode.SUCCESS, 'c: on c\n', ''),
+                     self.deploy(['host'], ['pair'], trust_cache=True))
+    self.write('environments/pair.yaml', 'hosts: [a, b, c]\n')
+    self.assertEqual((ExitCode.SUCCESS, 'a: on a\n', ''),
+                     self.deploy(['host'], ['pair'], trust_cache=True))
+
+  def test_failed_hosts(self) -> None:
+    """
+      Test that with --trust-cache the hosts a target failed on, and
+      only those, are deployed to again.
+    """
+    fake = FakeTransport({'h2': FakeReply(exit_code=2)}, FakeReply(('up',)))
+    with mock.patch.dict(TRANSPORTS, {'fake': lambda: fake}):
+      self.assertEqual(ExitCode.DEPLOY_ERROR, self.deploy(['web'], ['fleet'])[0])
+      fake.replies.clear()
+      self.assertEqual((ExitCode.SUCCESS, 'h2: up\n', ''),
+                       self.deploy(['web'], ['fleet'], trust_cache=True))
+      self.assertEqual((ExitCode.SUCCESS, '', ''),
+                       self.deploy(['web'], ['fleet'], trust_cache=True))
+    self.assertEqual(['h1', 'h2', 'h2', 'h3'],
+                     sorted(job.environ['DRALITHUS_HOST'] for job in fake.jobs))
+
+  def test_state_command(self) -> None:
+    """
+      Test that the state command of a target is trusted over what was
+      remembered, and that a host whose state command fails is
+      deployed to.
+    """
+    exit_code, stdout, _ = self.deploy(['stateful'], ['pair'])
+    self.assertEqual(ExitCode.SUCCESS, exit_code)
+    self.assertEqual(['a: deployed', 'b: deployed'], sorted(stdout.splitlines()))
+    self.assertEqual((ExitCode.SUCCESS, '', ''), self.deploy(['stateful'], ['pair']))
+    os.remove(os.path.join(self._catalog.name, 'b.deployed'))
+    self.assertEqual((ExitCode.SUCCESS, 'b: deployed\n', ''),
+                     self.deploy(['stateful'], ['pair']))
@@ -0,0 +1,179 @@
+"""
+  test_engine.py: Unit tests for the dralithus.engine module
+"""
+# -------------------------------------------------------------------
+# test_engine.py: Unit tests for the dralithus.engine module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+from typing import Callable
+import asyncio
+import threading
+import unittest
+
+from dralithus.engine import Step, TargetResult, Write, run
+from dralithus.errors import DralithusDeployError, ExitCode
+from dralithus.schedule import Schedule, Target
+
+TARGETS = [Target(f'app{i}', env) for i in range(4) for env in ('dev', 'prod')]
+
+
+def schedule(applications: int = 4, environments: tuple[str, ...] = ('dev', 'prod')) -> Schedule:
+  """
+    A schedule of independent applications.
+
+    :param applications: The number of applications
+    :param environments: The names of the environments
+    :return: The schedule of app0, app1 ... in every environment
+  """
+  return Schedule({f'app{i}': () for i in range(applications)}, environments)
+
+
+def results(
+    targets: Schedule, step: Step, jobs: int,
+    write: Callable[[Target, str, bool], None] = print) -> list[TargetResult]:
+  """
+    Run a step for each target, on an event loop of its own.
+
+    :param targets: The schedule of the targets
+    :param step: The step
+    :param jobs: The number of steps to run at the same time
+    :param write: Writes a line that a step wrote for a target
+    :return: The result of each target, in the order they completed
+  """
+  async def collect() -> list[TargetResult]:
+    return [result async for result in run(targets, step, jobs, write)]
+  return asyncio.run(collect())
+
+
+# pylint: disable=unused-argument
+class TestEngine(unittest.TestCase):
+  """
+    Unit tests for the engine's run function.
+  """
+  def test_results(self) -> None:
+    """
+      Test that the step is run once for each target, and that its
+      exit code, or the error it raised, is its result.
+    """
+    async def step(target: Target, write: Write) -> int:
+      if target.application == 'app1':
+        raise DralithusDeployError(f'Cannot deploy {target}')
+      write(f'deployed {target}')
+      write(f'warning {target}', True)
+      return ExitCode.SUCCESS
+
+    lines: list[tuple[Target, str, bool]] = []
+    completed = results(schedule(), step, 3, lambda *line: lines.append(line))
+    self.assertEqual(TARGETS, sorted(result.target for result in completed))
+    self.assertEqual(sorted(line for target in TARGETS if target.application != 'app1'
+                            for line in ((target, f'deployed {target}', False),
+                                         (target, f'warning {target}', True))),
+                     sorted(lines))
+    failed = {(result.target, result.exit_code, result.error)
+              for result in completed if result.error is not None}
+    self.assertEqual({(Target('app1', env), ExitCode.DEPLOY_ERROR, f'Cannot deploy app1@{env}')
+                      for env in ('dev', 'prod')}, failed)
+
+  def test_jobs(self) -> None:
+    """
+      Test that no more than jobs steps run at the same time, and that
+      as many as that do.
+    """
+    running = [0]
+    most = [0]
+
+    async def step(target: Target, write: Write) -> int:
+      running[0] += 1
+      most[0] = max(most[0], running[0])
+      await asyncio.sleep(0.01)
+      running[0] -= 1
+      return ExitCode.SUCCESS
+
+    self.assertEqual(6, len(results(schedule(3), step, 3)))
+    self.assertEqual(3, most[0])
+
+  def test_streamed(self) -> None:
+    """
+      Test that the lines of a step are written, on the calling thread,
+      while the step is still running.
+    """
+    written: list[asyncio.Event] = []
+    threads: set[threading.Thread] = set()
+
+    async def step(target: Target, write: Write) -> int:
+      written.append(asyncio.Event())
+      write('started')
+      await asyncio.wait_for(written[0].wait(), 10)
+      return ExitCode.SUCCESS
+
+    def write(target: Target, line: str, error: bool) -> None:
+      threads.add(threading.current_thread())
+      written[0].set()
+
+    self.assertEqual([TargetResult(TARGETS[0], ExitCode.SUCCESS, None, 0.0)],
+                     [result._replace(seconds=0.0)
+                      for result in results(schedule(1, ('dev',)), step, 2, write)])
+    self.assertEqual({threading.current_thread()}, threads)
+
+  def test_dependencies(self) -> None:
+    """
+      Test that a target is only started once the targets it depends
+      on have been deployed, and is not deployed if one of them fails.
+    """
+    deployed: list[Target] = []
+
+    async def step(target: Target, write: Write) -> int:
+      if target == Target('db', 'prod'):
+        raise DralithusDeployError('No database')
+      prerequisites = {'web': ['api'], 'api': ['db']}.get(target.application, [])
+      for name in prerequisites:
+        self.assertIn(Target(name, target.environment), deployed)
+      await asyncio.sleep(0)
+      deployed.append(target)
+      return ExitCode.SUCCESS
+
+    depends = {'web': ['api'], 'api': ['db'], 'db': [], 'docs': []}
+    completed = {result.target: result
+                 for result in results(Schedule(depends, ['dev', 'prod']), step, 4)}
+    self.assertEqual(8, len(completed))
+    self.assertEqual({Target('db', 'dev'), Target('api', 'dev'), Target('web', 'dev'),
+                      Target('docs', 'dev'), Target('docs', 'prod')}, set(deployed))
+    self.assertEqual(
+      (ExitCode.DEPLOY_ERROR, 'Not deployed, as db@prod failed'),
+      (completed[Target('web', 'prod')].exit_code, completed[Target('web', 'prod')].error))
+
+  def test_bug(self) -> None:
+    """
+      Test that an exception that is not a DralithusError is raised,
+      and that the steps still running are cancelled.
+    """
+    cancelled: list[Target] = []
+
+    async def step(target: Target, write: Write) -> int:
+      if target.application == 'app0':
+        raise KeyError(target.application)
+      try:
+        await asyncio.sleep(10)
+      except asyncio.CancelledError:
+        cancelled.append(target)
+        raise
+      return ExitCode.SUCCESS
+
+    with self.assertRaises(KeyError):
+      results(schedule(2), step, 4)
+    self.assertEqual([Target('app1', 'dev'), Target('app1', 'prod')], sorted(cancelled))
@@ -0,0 +1,214 @@
+"""
+  test_environment.py: Unit tests for the dralithus.environment module
+"""
+# -------------------------------------------------------------------
+# test_environment.py: Unit tests for the dralithus.environment module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from dralithus import environment
+from dralithus.environment import Environment
+from dralithus.errors import DralithusEnvironmentError
+from dralithus.test import CaseData, CaseExecutor2
+
+ENVIRONMENTS = {
+  'eu-test': 'description: EU test\nlabels:\n  tier: test\n  region: eu\n',
+  'eu-prod': 'description: EU production\nlabels:\n  tier: prod\n  region: eu\n',
+  'us-prod': 'description: US production\nlabels:\n  tier: prod\n  region: us\n  version: 2\n',
+  'empty': '',
+  'racks': '''\
+rack: &rack
+  rack: r12
+hosts:
+  - name: web1
+    labels: *rack
+  - db1
+labels:
+  tier: dev
+''',
+  'bad-host': 'hosts:\n  - web1\n  - labels: {rack: r12}\n',
+}
+
+INVALID_ENVIRONMENTS = {
+  'broken': 'description: [unclosed\n',
+  'list': '- not\n- a mapping\n',
+  'labels': 'labels: [tier, prod]\n',
+  'hosts': 'hosts: web1\n',
+}
+
+
+def select_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for Environment.select
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('names', CaseData(args=['eu-test', 'us-prod'], expected={'eu-test', 'us-prod'}, error=None)),
+    ('glob', CaseData(args=['eu-*'], expected={'eu-test', 'eu-prod'}, error=None)),
+    ('labels', CaseData(args=['tier=prod'], expected={'eu-prod', 'us-prod'}, error=None)),
+    ('numeric_label', CaseData(args=['version=2'], expected={'us-prod'}, error=None)),
+    ('glob_exclusion', CaseData(args=['*-prod', '!us-*'], expected={'eu-prod'}, error=None)),
+    ('unknown_name', CaseData(args=['eu-stage'], expected=None, error=DralithusEnvironmentError)),
+    ('path_name', CaseData(args=['../eu-test'], expected=None, error=DralithusEnvironmentError)),
+  ]
+
+
+class TestEnvironment(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the Environment class.
+  """
+  def setUp(self) -> None:
+    """
+      Create a catalog of environments in a temporary directory.
+    """
+    # pylint: disable=consider-using-with
+    self._directory = tempfile.TemporaryDirectory()
+    os.mkdir(os.path.join(self._directory.name, 'environments'))
+    self.write_environments(ENVIRONMENTS)
+    self._environ = mock.patch.dict(os.environ, {'DRALITHUS_CATALOG': self._directory.name})
+    self._environ.start()
+
+  def tearDown(self) -> None:
+    """
+      Remove the catalog.
+    """
+    self._environ.stop()
+    self._directory.cleanup()
+
+  def write_environments(self, environments: dict[str, str]) -> None:
+    """
+      Write environment files to the catalog.
+
+      :param environments: The contents of each file, by environment name
+    """
+    for name, contents in environments.items():
+      path = os.path.join(self._directory.name, 'environments', f'{name}.yaml')
+      with open(path, 'w', encoding='utf-8') as file:
+        file.write(contents)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(select_cases())
+  def test_select(self, name: str, case: CaseData) -> None:
+    """
+      Test selecting environments from a catalog.
+    """
+    self.execute(lambda selectors: {env.name for env in Environment.select(selectors)}, case)
+
+  def test_load(self) -> None:
+    """
+      Test that an environment is read from its file.
+    """
+    env = Environment.load('us-prod')
+    self.assertEqual('us-prod', env.name)
+    self.assertEqual('US production', env.description)
+    self.assertEqual({'tier': 'prod', 'region': 'us', 'version': '2'}, env.labels)
+    self.assertEqual('', Environment.load('empty').description)
+    self.assertFalse(hasattr(env, '__dict__'))
+
+  def test_load_memoised(self) -> None:
+    """
+      Test that an environment file is read only once.
+    """
+    with mock.patch.object(
+        environment, 'parse_yaml_except', wraps=environment.parse_yaml_except) as parse_yaml:
+      first = Environment.load('eu-test')
+      second = Environment.load('eu-test')
+    self.assertIs(first, second)
+    parse_yaml.assert_called_once()
+
+  def test_select_names_reads_only_their_files(self) -> None:
+    """
+      Test that selecting by name and by glob reads only the files of
+      the selected environments.
+    """
+    with mock.patch.object(
+        environment, 'parse_yaml_except', wraps=environment.parse_yaml_except) as parse_yaml:
+      Environment.select(['eu-test'])
+      Environment.select(['eu-*'])
+    self.assertEqual(
+      [os.path.join(self._directory.name, 'environments', f'{name}.yaml')
+       for name in ['eu-test', 'eu-prod']],
+      [call.args[1] for call in parse_yaml.call_args_list])
+
+  def test_index(self) -> None:
+    """
+      Test that the index lists every environment file.
+    """
+    self.assertEqual(sorted(ENVIRONMENTS), list(Environment.index()))
+
+  def test_invalid_files(self) -> None:
+    """
+      Test that an environment whose file is not valid cannot be
+      loaded, or selected by label.
+    """
+    self.write_environments(INVALID_ENVIRONMENTS)
+    for name in INVALID_ENVIRONMENTS:
+      with self.assertRaises(DralithusEnvironmentError):
+        Environment.load(name)
+    with self.assertRaises(DralithusEnvironmentError):
+      Environment.select(['tier=prod'])
+
+  def test_hosts(self) -> None:
+    """
+      Test that the hosts of an environment are read each time they
+      are iterated, and not with the rest of the file.
+    """
+    with mock.patch.object(
+        environment, 'parse_yaml_items', wraps=environment.parse_yaml_items) as parse_yaml:
+      env = Environment.load('racks')
+      parse_yaml.assert_not_called()
+      self.assertEqual([('web1', {'rack': 'r12'}), ('db1', {})], list(env.hosts))
+      self.assertEqual(['web1', 'db1'], [name for name, _ in env.hosts])
+    self.assertEqual(2, parse_yaml.call_count)
+    self.assertEqual({'tier': 'dev'}, env.labels)
+    self.assertEqual([], list(Environment.load('eu-test').hosts))
+
+  def test_invalid_host(self) -> None:
+    """
+      Test that a host that is not valid raises an error when the hosts
+      are iterated, after the hosts before it.
+    """
+    hosts = iter(Environment.load('bad-host').hosts)
+    self.assertEqual(('web1', {}), next(hosts))
+    with self.assertRaises(DralithusEnvironmentError):
+      next(hosts)
+
+  def test_hosts_memory(self) -> None:
+    """
+      Test that the memory used to read the hosts of an environment does
+      not grow with the number of hosts.
+    """
+    host = '  - name: host{0}\n    labels:\n      rack: r{0}\n'
+    peaks = []
+    for count in (200, 2000):
+      name = f'hosts{count}'
+      self.write_environments({name: 'hosts:\n' + ''.join(host.format(i) for i in range(count))})
+      env = Environment.load(name)
+      tracemalloc.start()
+      self.assertEqual(count, sum(1 for _ in env.hosts))
+      peaks.append(tracemalloc.get_traced_memory()[1])
+      tracemalloc.stop()
+    self.assertLess(peaks[1], peaks[0] * 2)
@@ -0,0 +1,114 @@
+"""
+  test_executor.py: Unit tests for the dralithus.executor module
+"""
+# -------------------------------------------------------------------
+# test_executor.py: Unit tests for the dralithus.executor module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import asyncio
+import unittest
+
+from dralithus.executor import Executor
+from dralithus.test.test_transport import discard
+from dralithus.transport import FakeReply, FakeTransport, Job, LocalTransport, Write
+
+
+class _CountingTransport(FakeTransport):  # pylint: disable=too-few-public-methods
+  """
+    A fake transport, limited to 3 jobs at once, that counts the most
+    jobs that ran at once on all hosts.
+  """
+  concurrency = 3
+
+  def __init__(self) -> None:
+    super().__init__(default=FakeReply(seconds=0.01))
+    self.total = 0
+    self.most_total = 0
+
+  async def run(self, job: Job, write: Write) -> int:
+    self.total += 1
+    self.most_total = max(self.most_total, self.total)
+    try:
+      return await super().run(job, write)
+    finally:
+      self.total -= 1
+
+
+class TestExecutor(unittest.TestCase):
+  """
+    Unit tests for the Executor class.
+  """
+  def test_transport(self) -> None:
+    """
+      Test that each transport is created once, and that an unknown one
+      raises ValueError.
+    """
+    executor = Executor()
+    self.assertIsInstance(executor.transport('local'), LocalTransport)
+    self.assertIs(executor.transport('fake'), executor.transport('fake'))
+    with self.assertRaises(ValueError):
+      executor.transport('pigeon')
+
+  def test_host_jobs(self) -> None:
+    """
+      Test that no more commands run on a host at once than its limit,
+      and that a host without one is not limited.
+    """
+    transport = FakeTransport(default=FakeReply(seconds=0.01))
+
+    async def deploy() -> list[int]:
+      executor = Executor()
+      return await asyncio.gather(
+        *(executor.run(transport, Job('web1', 'start', {}), discard, 2) for _ in range(6)),
+        *(executor.run(transport, Job('web2', 'start', {}), discard) for _ in range(6)))
+
+    self.assertEqual([0] * 12, asyncio.run(deploy()))
+    self.assertEqual({'web1': 2, 'web2': 6}, transport.most)
+
+  def test_concurrency(self) -> None:
+    """
+      Test that no more commands run at once, on all hosts, than the
+      concurrency of their transport.
+    """
+    transport = _CountingTransport()
+
+    async def deploy() -> None:
+      executor = Executor()
+      await asyncio.gather(*(executor.run(transport, Job(f'web{i}', 'start', {}), discard)
+                             for i in range(10)))
+
+    asyncio.run(deploy())
+    self.assertEqual(3, transport.most_total)
+    self.assertEqual(10, len(transport.jobs))
+
+  def test_timeout(self) -> None:
+    """
+      Test that a command that runs for longer than its timeout raises
+      TimeoutError, and that the time a command waits for its host does
+      not count against it.
+    """
+    transport = FakeTransport({'slow': FakeReply(seconds=10)}, FakeReply(seconds=0.1))
+
+    async def deploy(host: str, count: int) -> list[int]:
+      executor = Executor()
+      return await asyncio.gather(*(executor.run(transport, Job(host, 'start', {}, 0.5), discard, 1)
+                                    for _ in range(count)))
+
+    with self.assertRaises(TimeoutError):
+      asyncio.run(deploy('slow', 1))
+    self.assertEqual([0] * 8, asyncio.run(deploy('web1', 8)))
@@ -0,0 +1,233 @@
+"""
+  test_inventory.py: Unit tests for the dralithus.inventory module
+"""
+# -------------------------------------------------------------------
+# test_inventory.py: Unit tests for the dralithus.inventory module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+from unittest import mock
+
+from parameterized import parameterized
+
+from dralithus.application import Application
+from dralithus.environment import Environment
+from dralithus.errors import DralithusEnvironmentError
+from dralithus.inventory import Inventory
+from dralithus.test import CaseData, CaseExecutor2, CatalogTestCase
+
+CATALOG = {
+  'environments/east.yaml': '''\
+labels:
+  tier: prod
+hosts:
+  - name: web1
+    labels:
+      rack: r12
+      role: web
+  - name: db1
+    labels:
+      rack: r13
+      role: db
+''',
+  'environments/west.yaml': '''\
+labels:
+  tier: prod
+hosts:
+  - name: web2
+    labels:
+      rack: r12
+  - cache1
+''',
+  'environments/dev.yaml': 'description: Development\nlabels:\n  tier: dev\n',
+  'applications/web.yaml': 'labels:\n  team: web\n',
+  'applications/api.yaml': 'labels:\n  team: core\n',
+  'applications/db.yaml': 'description: Database\nlabels:\n  team: core\n',
+  'configuration/defaults.yaml': '',
+  'configuration/web-east.yaml': '',
+  'configuration/web-west.yaml': '',
+  'configuration/api-east.yaml': '',
+  'configuration/db-dev.yaml': '',
+  'configuration/web-north.yaml': '',
+}
+
+
+def hosts_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for Inventory.hosts
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('all', CaseData(args=[], expected=[('east', 'db1'), ('east', 'web1'), ('west', 'cache1'), ('west', 'web2')], error=None)),
+    ('one_label', CaseData(args=['rack=r12'], expected=[('east', 'web1'), ('west', 'web2')], error=None)),
+    ('two_labels', CaseData(args=['rack=r12', 'role=web'], expected=[('east', 'web1')], error=None)),
+    ('no_match', CaseData(args=['rack=r99'], expected=[], error=None)),
+  ]
+
+
+def applications_on_hosts_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for Inventory.applications_on_hosts
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('rack', CaseData(args=['rack=r12'], expected=['api', 'web'], error=None)),
+    ('one_environment', CaseData(args=['rack=r12', 'role=db'], expected=[], error=None)),
+    ('role', CaseData(args=['role=db'], expected=['api', 'web'], error=None)),
+    ('no_match', CaseData(args=['rack=r99'], expected=[], error=None)),
+  ]
+
+
+class TestInventory(CatalogTestCase, CaseExecutor2):
+  """
+    Unit tests for the Inventory class.
+  """
+  catalog_files = CATALOG
+
+  def setUp(self) -> None:
+    """
+      Create the catalog, and an inventory of it in the cache
+      directory.
+    """
+    super().setUp()
+    self._inventory_environ = mock.patch.dict(os.environ, {'DRALITHUS_INVENTORY': 'sqlite'})
+    self._inventory_environ.start()
+    self._inventory = Inventory(self._catalog.name)
+
+  def tearDown(self) -> None:
+    """
+      Close the inventory, and remove the catalog and cache directories.
+    """
+    self._inventory.close()
+    self._inventory_environ.stop()
+    super().tearDown()
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(hosts_cases())
+  def test_hosts(self, name: str, case: CaseData) -> None:
+    """
+      Test finding hosts by their labels.
+    """
+    self._inventory.refresh()
+    self.execute(self._inventory.hosts, case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(applications_on_hosts_cases())
+  def test_applications_on_hosts(self, name: str, case: CaseData) -> None:
+    """
+      Test finding the applications deployed to hosts by their labels.
+    """
+    self._inventory.refresh()
+    self.execute(self._inventory.applications_on_hosts, case)
+
+  def test_refresh_is_incremental(self) -> None:
+    """
+      Test that only files whose contents changed are parsed again.
+    """
+    self.assertEqual(6, self._inventory.refresh())
+    self.assertEqual(0, self._inventory.refresh())
+    self.write('applications/api.yaml', 'labels:\n  team: payments\n')
+    self.assertEqual(1, self._inventory.refresh())
+    self.assertEqual({'api'}, self._inventory.label_index('applications').match('team=payments'))
+    # Touching a file does not parse it again.
+    os.utime(os.path.join(self._catalog.name, 'applications', 'db.yaml'), ns=(0, 0))
+    self.assertEqual(0, self._inventory.refresh())
+
+  def test_refresh_removed_files(self) -> None:
+    """
+      Test that removed files are removed from the index.
+    """
+    self._inventory.refresh()
+    os.remove(os.path.join(self._catalog.name, 'environments', 'west.yaml'))
+    os.remove(os.path.join(self._catalog.name, 'configuration', 'api-east.yaml'))
+    self._inventory.refresh()
+    self.assertEqual(['dev', 'east'], self._inventory.names('environments'))
+    self.assertEqual({'east'}, {environment for environment, _ in self._inventory.hosts()})
+    self.assertEqual(['web'], self._inventory.applications_on_hosts(['rack=r12']))
+    self.assertIsNone(self._inventory.entry('environments', 'west'))
+
+  def test_invalid_file(self) -> None:
+    """
+      Test that a file that is not valid is recorded with its error.
+    """
+    self.write('environments/broken.yaml', 'hosts: [unclosed\n')
+    self._inventory.refresh()
+    entry = self._inventory.entry('environments', 'broken')
+    assert entry is not None
+    self.assertIsNotNone(entry.error)
+    with self.assertRaises(ValueError):
+      self._inventory.label_index('environments')
+    # The names are known, but selecting by label raises the given error.
+    index = self._inventory.name_index('environments', DralithusEnvironmentError)
+    self.assertIn('broken', index)
+    with self.assertRaisesRegex(DralithusEnvironmentError, '^Invalid environment broken: '):
+      index.select(['region=east'])
+
+  def test_database_rebuilt(self) -> None:
+    """
+      Test that a database that cannot be used is rebuilt.
+    """
+    os.makedirs(os.path.dirname(self._inventory.path))
+    with open(self._inventory.path, 'wb') as file:
+      file.write(b'not a database' * 100)
+    self.assertEqual(6, self._inventory.refresh())
+    self.assertEqual(['api', 'db', 'web'], self._inventory.names('applications'))
+
+  def test_not_private(self) -> None:
+    """
+      Test that a database that others may write is rebuilt.
+    """
+    self._inventory.refresh()
+    self._inventory.close()
+    os.chmod(self._inventory.path, 0o666)
+    self.assertEqual(6, self._inventory.refresh())
+    self._inventory.close()
+    self.assertEqual(0o600, os.stat(self._inventory.path).st_mode & 0o777)
+    self.assertEqual(0, self._inventory.refresh())
+
+  def test_load(self) -> None:
+    """
+      Test that environments and applications are loaded and selected
+      from the inventory.
+    """
+    self.assertEqual('Development', Environment.load('dev').description)
+    self.assertEqual('Database', Application.load('db').description)
+    self.assertEqual({'east', 'west'}, {env.name for env in Environment.select(['tier=prod'])})
+    self.assertEqual({'api', 'db'}, {app.name for app in Application.select(['team=core'])})
+    with self.assertRaises(DralithusEnvironmentError):
+      Environment.load('north')
+
+  def test_environment_hosts(self) -> None:
+    """
+      Test that the hosts of an environment are read in the order of
+      its file, a page at a time.
+    """
+    self.write('environments/big.yaml', 'hosts:\n' + ''.join(
+      f'  - name: host{i}\n    labels: {{rack: r{i % 3}}}\n' for i in range(25, 0, -1)))
+    self._inventory.refresh()
+    self.assertEqual(
+      [('web2', {'rack': 'r12'}), ('cache1', {})], list(self._inventory.environment_hosts('west')))
+    self.assertEqual([], list(self._inventory.environment_hosts('dev')))
+    with mock.patch('dralithus.inventory._PAGE_SIZE', 10):
+      hosts = list(self._inventory.environment_hosts('big'))
+    self.assertEqual([(f'host{i}', {'rack': f'r{i % 3}'}) for i in range(25, 0, -1)], hosts)
+    self.assertEqual(
+      [('web1', {'rack': 'r12', 'role': 'web'}), ('db1', {'rack': 'r13', 'role': 'db'})],
+      list(Environment.load('east').hosts))
@@ -0,0 +1,143 @@
+"""
+  test_name_index.py: Unit tests for the dralithus.name_index module
+"""
+# -------------------------------------------------------------------
+# test_name_index.py: Unit tests for the dralithus.name_index module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.name_index import LabelIndex, NameIndex, is_name
+from dralithus.test import CaseData, CaseExecutor2
+
+NAMES = ['eu-prod', 'eu-stage', 'eu-test', 'eu1', 'local', 'us-prod', 'us-test']
+LABELS = {
+  'eu-prod': {'tier': 'prod', 'region': 'eu'},
+  'eu-stage': {'tier': 'stage', 'region': 'eu'},
+  'eu-test': {'tier': 'test', 'region': 'eu'},
+  'eu1': {'region': 'eu'},
+  'local': {'tier': 'dev'},
+  'us-prod': {'tier': 'prod', 'region': 'us'},
+  'us-test': {'tier': 'test', 'region': 'us'},
+}
+
+
+def select_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for NameIndex.select
+    :return:
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('name', CaseData(args=['local'], expected={'local'}, error=None)),
+    ('names', CaseData(args=['local', 'eu-test'], expected={'local', 'eu-test'}, error=None)),
+    ('unknown_name', CaseData(args=['remote'], expected=None, error=KeyError)),
+    ('glob_prefix', CaseData(args=['eu-*'], expected={'eu-prod', 'eu-stage', 'eu-test'}, error=None)),
+    ('glob_suffix', CaseData(args=['*-prod'], expected={'eu-prod', 'us-prod'}, error=None)),
+    ('glob_character', CaseData(args=['eu?'], expected={'eu1'}, error=None)),
+    ('glob_range', CaseData(args=['[lu]*'], expected={'local', 'us-prod', 'us-test'}, error=None)),
+    ('glob_no_match', CaseData(args=['ap-*'], expected=None, error=ValueError)),
+    ('exclusion', CaseData(args=['eu-*', '!eu-test'], expected={'eu-prod', 'eu-stage'}, error=None)),
+    ('exclusion_first', CaseData(args=['!eu-test', 'eu-*'], expected={'eu-prod', 'eu-stage'}, error=None)),
+    ('exclusion_glob', CaseData(args=['*', '!*-test', '!eu*'], expected={'local', 'us-prod'}, error=None)),
+    ('exclusion_only', CaseData(args=['!eu-test'], expected={'eu-prod', 'eu-stage', 'eu1', 'local', 'us-prod', 'us-test'}, error=None)),
+    ('exclusions_only', CaseData(args=['!eu*', '!/.*-test/'], expected={'local', 'us-prod'}, error=None)),
+    ('exclude_everything', CaseData(args=['!*'], expected=set(), error=None)),
+    ('regex', CaseData(args=['/(eu|us)-prod/'], expected={'eu-prod', 'us-prod'}, error=None)),
+    ('regex_whole_name', CaseData(args=['/prod/'], expected=None, error=ValueError)),
+    ('regex_exclusion', CaseData(args=['eu-*', '!/.*-(test|stage)/'], expected={'eu-prod'}, error=None)),
+    ('invalid_regex', CaseData(args=['/eu-(/'], expected=None, error=ValueError)),
+    ('label', CaseData(args=['tier=prod'], expected={'eu-prod', 'us-prod'}, error=None)),
+    ('labels', CaseData(args=['tier=prod', 'region=eu'], expected={'eu-prod'}, error=None)),
+    ('label_spaces', CaseData(args=[' tier = prod ', 'region=eu'], expected={'eu-prod'}, error=None)),
+    ('label_no_match', CaseData(args=['tier=prod', 'region=ap'], expected=set(), error=None)),
+    ('label_narrows_glob', CaseData(args=['us-*', 'local', 'tier=test'], expected={'us-test'}, error=None)),
+    ('label_exclusion', CaseData(args=['region=eu', '!tier=test'], expected={'eu-prod', 'eu-stage', 'eu1'}, error=None)),
+  ]
+
+
+class TestNameIndex(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the NameIndex class.
+  """
+  def test_contains(self) -> None:
+    """
+      Test that exact lookups find only the indexed names.
+    """
+    index = NameIndex(NAMES)
+    self.assertEqual(len(NAMES), len(index))
+    for name in NAMES:
+      self.assertIn(name, index)
+    self.assertNotIn('eu', index)
+    self.assertNotIn('zz', index)
+
+  def test_with_prefix(self) -> None:
+    """
+      Test prefix lookups.
+    """
+    index = NameIndex(NAMES)
+    self.assertEqual(['eu-prod', 'eu-stage', 'eu-test'], index.with_prefix('eu-'))
+    self.assertEqual(['eu-prod', 'eu-stage', 'eu-test', 'eu1'], index.with_prefix('eu'))
+    self.assertEqual([], index.with_prefix('ap'))
+    self.assertEqual(sorted(NAMES), index.with_prefix(''))
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(select_cases())
+  def test_select(self, name: str, case: CaseData) -> None:
+    """
+      Test NameIndex.select with parameterized inputs.
+    """
+    self.execute(NameIndex(NAMES, LabelIndex(LABELS)).select, case)
+
+  def test_select_labels_without_label_index(self) -> None:
+    """
+      Test that labels cannot be used if the names have no labels.
+    """
+    with self.assertRaises(ValueError):
+      NameIndex(NAMES).select(['tier=prod'])
+
+  def test_select_lazy_label_index(self) -> None:
+    """
+      Test that a label index given as a function is only built when a
+      label is used, and only once.
+    """
+    built: list[LabelIndex] = []
+
+    def labels() -> LabelIndex:
+      built.append(LabelIndex(LABELS))
+      return built[-1]
+
+    index = NameIndex(NAMES, labels)
+    self.assertEqual({'eu-prod', 'us-prod'}, index.select(['*-prod']))
+    self.assertEqual(0, len(built))
+    self.assertEqual({'eu-prod'}, index.select(['tier=prod', 'region=eu']))
+    self.assertEqual({'us-test'}, index.select(['tier=test', 'region=us']))
+    self.assertEqual(1, len(built))
+
+  def test_is_name(self) -> None:
+    """
+      Test telling plain names from other selectors.
+    """
+    for selector in ['local', 'eu-prod', 'a.b']:
+      self.assertTrue(is_name(selector), selector)
+    for selector in ['eu-*', '/eu/', 'tier=prod', '!local']:
+      self.assertFalse(is_name(selector), selector)
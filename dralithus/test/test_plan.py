@@ -0,0 +1,150 @@
+"""
+  test_plan.py: Unit tests for the dralithus.plan module
+"""
+# -------------------------------------------------------------------
+# test_plan.py: Unit tests for the dralithus.plan module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+import tempfile
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.plan import DeployState, changes, fingerprint
+from dralithus.schedule import Target
+from dralithus.test import CaseData, CaseExecutor2
+
+WEB = Target('web', 'prod')
+
+
+def changes_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for changes
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('never_deployed', CaseData(args=(['a', 'b'], {}), expected=['+ web@prod a', '+ web@prod b'], error=None)),
+    ('up_to_date', CaseData(args=(['a', 'b'], {'a': 'new', 'b': 'new'}), expected=['= web@prod a', '= web@prod b'], error=None)),
+    ('changed', CaseData(args=(['a', 'b'], {'a': 'old', 'b': 'new'}), expected=['~ web@prod a', '= web@prod b'], error=None)),
+    ('unknown', CaseData(args=(['a'], {'a': None}), expected=['+ web@prod a'], error=None)),
+    ('removed', CaseData(args=(['b'], {'c': 'new', 'a': 'old', 'b': 'new'}), expected=['= web@prod b', '- web@prod a', '- web@prod c'], error=None)),
+    ('no_hosts', CaseData(args=([], {'a': 'new'}), expected=['- web@prod a'], error=None)),
+  ]
+
+
+class TestPlan(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the plan module.
+  """
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(changes_cases())
+  def test_changes(self, name: str, case: CaseData) -> None:
+    """
+      Test the changes between the desired state of a target, 'new',
+      and its actual state on each host.
+    """
+    def planned(args: tuple[list[str], dict[str, str | None]]) -> list[str]:
+      return [str(change) for change in changes(WEB, 'new', args[0], args[1])]
+    self.execute(planned, case)
+
+  def test_fingerprint(self) -> None:
+    """
+      Test that the fingerprint of a configuration does not depend on
+      the order of its keys, but does on their values.
+    """
+    self.assertEqual(fingerprint({'deploy': 'echo', 'port': 80}),
+                     fingerprint({'port': 80, 'deploy': 'echo'}))
+    self.assertNotEqual(fingerprint({'deploy': 'echo', 'port': 80}),
+                        fingerprint({'deploy': 'echo', 'port': 81}))
+    self.assertNotEqual(fingerprint({'hosts': {'port': 80}}),
+                        fingerprint({'hosts': {'port': '80'}}))
+
+
+class TestDeployState(unittest.TestCase):
+  """
+    Unit tests for the DeployState class.
+  """
+  def setUp(self) -> None:
+    """
+      Create a temporary directory for the state file.
+    """
+    self._directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    self._path = os.path.join(self._directory.name, 'states', 'catalog.json')
+
+  def tearDown(self) -> None:
+    """
+      Remove the temporary directory.
+    """
+    self._directory.cleanup()
+
+  def state(self) -> DeployState:
+    """
+      The state, as it was last saved.
+
+      :return: The state
+    """
+    return DeployState('/catalog', self._path)
+
+  def test_saved(self) -> None:
+    """
+      Test that what is recorded is remembered by the next run, and
+      that a host that is forgotten is not.
+    """
+    state = self.state()
+    state.record(WEB, 'a', 'one')
+    state.record(WEB, 'b', 'one')
+    self.assertEqual({'a': 'one', 'b': 'one'}, state.deployed(WEB))
+    state.save()
+    state = self.state()
+    self.assertEqual({'a': 'one', 'b': 'one'}, state.deployed(WEB))
+    state.record(WEB, 'a', None)
+    state.record(WEB, 'b', 'two')
+    state.save()
+    self.assertEqual({'b': 'two'}, self.state().deployed(WEB))
+    self.assertEqual({}, self.state().deployed(Target('web', 'dev')))
+
+  def test_merged(self) -> None:
+    """
+      Test that runs at the same time each save only what they
+      recorded, over what the others saved.
+    """
+    first = self.state()
+    second = self.state()
+    first.record(WEB, 'a', 'one')
+    second.record(Target('db', 'prod'), 'a', 'two')
+    first.save()
+    second.save()
+    state = self.state()
+    self.assertEqual(({'a': 'one'}, {'a': 'two'}),
+                     (state.deployed(WEB), state.deployed(Target('db', 'prod'))))
+
+  def test_not_saved(self) -> None:
+    """
+      Test that the state file is not written if nothing was recorded,
+      and that one that cannot be read is ignored.
+    """
+    self.state().save()
+    self.assertFalse(os.path.exists(self._path))
+    os.makedirs(os.path.dirname(self._path))
+    for contents in ('not json', '{"version": 0, "states": {}}', '[]'):
+      with self.subTest(contents=contents):
+        with open(self._path, 'w', encoding='utf-8') as file:
+          file.write(contents)
+        self.assertEqual({}, self.state().deployed(WEB))
@@ -0,0 +1,166 @@
+"""
+  test_plan_command.py: Unit tests for the dralithus.plan_command
+  module
+"""
+# -------------------------------------------------------------------
+# test_plan_command.py: Unit tests for the dralithus.plan_command
+# module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.application import Application
+from dralithus.command_line.command_line import CommandLine
+from dralithus.command_line.options import Options
+from dralithus.deploy_command import DeployCommand
+from dralithus.environment import Environment
+from dralithus.errors import CommandLineError, ExitCode
+from dralithus.plan_command import PlanCommand, make
+from dralithus.test import CaseData, CaseExecutor2, CatalogTestCase, execute_command
+
+# A catalog of applications with deploy commands, with and without a
+# state command, and without a deploy command.
+CATALOG = {
+  'environments/pair.yaml': 'hosts: [a, b]\n',
+  'environments/dev.yaml': 'description: No hosts\n',
+  'applications/web.yaml': 'configuration: {deploy: echo web, port: 80}\n',
+  'applications/docs.yaml': 'description: No deploy command\n',
+  'applications/stateful.yaml':
+    'configuration:\n'
+    '  deploy: echo $DRALITHUS_FINGERPRINT > $DRALITHUS_HOST.deployed\n'
+    '  state: cat $DRALITHUS_HOST.deployed\n',
+  'applications/bad.yaml': 'configuration: {deploy: echo, state: 5}\n',
+}
+
+
+def make_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for making a PlanCommand
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('plan_command_no_args', CaseData(args=CommandLine(program='drl', command_name='plan', global_options=Options([]), command_options=Options([]), parameters=set()), expected=None, error=CommandLineError)),
+    ('plan_command_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='plan', global_options=Options(['-v']), command_options=Options(['--environment=local']), parameters={'sample'}), expected=PlanCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, verbosity=1), error=None)),
+    ('plan_command_trust_cache_valid_environment_valid_application', CaseData(args=CommandLine(program='drl', command_name='plan', global_options=Options([]), command_options=Options(['--environment=local', '--trust-cache']), parameters={'sample'}), expected=PlanCommand(environments={Environment.load('local')}, applications={Application.load('sample')}, verbosity=0, trust_cache=True), error=None)),
+  ]
+
+
+class TestPlanCommand(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the PlanCommand class.
+  """
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(make_cases())
+  def test_make(self, name: str, case: CaseData) -> None:
+    """
+      Test the make method of the plan_command module.
+    """
+    self.execute(make, case)
+
+  def test_make_error(self) -> None:
+    """
+      Test that a command line that selects nothing is an error of the
+      plan command.
+    """
+    with self.assertRaises(CommandLineError) as context:
+      make(CommandLine(program='drl', command_name='plan', global_options=Options([]),
+                       command_options=Options(['--environment=local']), parameters=set()))
+    self.assertEqual('plan', context.exception.command)
+
+
+class TestPlanExecute(CatalogTestCase):
+  """
+    Unit tests for planning with PlanCommand.execute.
+  """
+  catalog_files = CATALOG
+
+  def plan(self, applications: list[str], environments: list[str],
+           verbosity: int = 0, trust_cache: bool = False) -> tuple[int, str, str]:
+    """
+      Plan the deploy of applications to environments.
+
+      :param applications: The names of the applications
+      :param environments: The names of the environments
+      :param verbosity: The verbosity level of the command
+      :param trust_cache: Whether to trust what was last deployed
+      :return: The exit code, and what the command printed on standard
+        output and standard error
+    """
+    command = PlanCommand({Environment.load(name) for name in environments},
+                          {Application.load(name) for name in applications}, verbosity,
+                          trust_cache)
+    return execute_command(command)
+
+  def deploy(self, applications: list[str], environments: list[str]) -> None:
+    """
+      Deploy applications to environments.
+
+      :param applications: The names of the applications
+      :param environments: The names of the environments
+    """
+    command = DeployCommand({Environment.load(name) for name in environments},
+                            {Application.load(name) for name in applications}, 1, 0)
+    self.assertEqual(ExitCode.SUCCESS, execute_command(command)[0])
+
+  def test_plan(self) -> None:
+    """
+      Test that the hosts that have not been deployed to are added, that
+      without a state command every host is added unless the cache is
+      trusted, when the hosts deployed to are up to date until the
+      configuration changes, and that hosts no longer in the
+      environment are removed.
+    """
+    added = (ExitCode.SUCCESS, (
+      '+ web@dev localhost\n'
+      '+ web@pair a\n'
+      '+ web@pair b\n'
+      '3 to add, 0 to change, 0 to remove, 0 up to date\n'), '')
+    self.assertEqual(added, self.plan(['web', 'docs'], ['pair', 'dev'], trust_cache=True))
+    self.deploy(['web'], ['pair', 'dev'])
+    self.assertEqual(added, self.plan(['web'], ['pair', 'dev']))
+    self.assertEqual((ExitCode.SUCCESS, '0 to add, 0 to change, 0 to remove, 3 up to date\n', ''),
+                     self.plan(['web'], ['pair', 'dev'], trust_cache=True))
+    self.assertEqual('= web@dev localhost\n',
+                     self.plan(['web'], ['dev'], 1, True)[1].splitlines(True)[0])
+    self.write('applications/web.yaml', 'configuration: {deploy: echo web, port: 81}\n')
+    self.write('environments/pair.yaml', 'hosts: [b, c]\n')
+    self.assertEqual((ExitCode.SUCCESS, (
+      '~ web@pair b\n'
+      '+ web@pair c\n'
+      '- web@pair a\n'
+      '1 to add, 1 to change, 1 to remove, 0 up to date\n'), ''),
+      self.plan(['web'], ['pair'], trust_cache=True))
+
+  def test_state_command(self) -> None:
+    """
+      Test that the state command of a target is run on every host, and
+      that a state command that is not valid is a configuration error.
+    """
+    self.deploy(['stateful'], ['pair'])
+    os.remove(os.path.join(self._catalog.name, 'a.deployed'))
+    self.assertEqual((ExitCode.SUCCESS,
+                      '+ stateful@pair a\n1 to add, 0 to change, 0 to remove, 1 up to date\n', ''),
+                     self.plan(['stateful'], ['pair']))
+    self.assertEqual((ExitCode.CONFIGURATION_ERROR,
+                      '0 to add, 0 to change, 0 to remove, 0 up to date\n',
+                      'bad@pair: The state command of bad@pair must be a string or a list '
+                      'of strings\n'), self.plan(['bad'], ['pair']))
@@ -0,0 +1,136 @@
+"""
+  test_plugins.py: Unit tests for the dralithus.plugins module
+"""
+# -------------------------------------------------------------------
+# test_plugins.py: Unit tests for the dralithus.plugins module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from dralithus.command import make
+from dralithus.help_command import HelpCommand
+from dralithus.plugins import index_path, load, plugin_commands
+
+PLUGIN_MODULE = '''
+from dralithus.command import Command
+
+
+class HelloCommand(Command):
+  def __init__(self, verbosity):
+    super().__init__('hello', verbosity)
+
+  def execute(self):
+    return 0
+
+
+def make(cmdln):
+  return HelloCommand(cmdln.verbosity)
+'''
+
+
+class TestPlugins(unittest.TestCase):
+  """
+    Unit tests for the dralithus.plugins module
+  """
+  def setUp(self) -> None:
+    """
+      Install a plugin package in a directory on sys.path, and use a
+      private cache directory for the index file.
+    """
+    # pylint: disable=consider-using-with
+    self._site = tempfile.TemporaryDirectory()
+    self._cache = tempfile.TemporaryDirectory()
+    dist_info = os.path.join(self._site.name, 'dralithus_hello-1.0.dist-info')
+    os.mkdir(dist_info)
+    with open(os.path.join(dist_info, 'METADATA'), 'w', encoding='utf-8') as file:
+      file.write('Metadata-Version: 2.1\nName: dralithus-hello\nVersion: 1.0\n')
+    with open(os.path.join(dist_info, 'entry_points.txt'), 'w', encoding='utf-8') as file:
+      file.write('[dralithus.commands]\nhello = dralithus_hello:make\n')
+    with open(os.path.join(self._site.name, 'dralithus_hello.py'), 'w', encoding='utf-8') as file:
+      file.write(PLUGIN_MODULE)
+    sys.path.insert(0, self._site.name)
+    self._environ = mock.patch.dict(os.environ, {'DRALITHUS_CACHE_DIR': self._cache.name})
+    self._environ.start()
+
+  def tearDown(self) -> None:
+    """
+      Remove the plugin package and the cache directory.
+    """
+    self._environ.stop()
+    sys.path.remove(self._site.name)
+    sys.modules.pop('dralithus_hello', None)
+    self._site.cleanup()
+    self._cache.cleanup()
+
+  def test_plugin_commands(self) -> None:
+    """
+      Test that plugin commands are found and the index file is written.
+    """
+    self.assertFalse(os.path.exists(index_path()))
+    self.assertEqual('dralithus_hello:make', plugin_commands().get('hello'))
+    self.assertTrue(os.path.exists(index_path()))
+
+  def test_plugin_commands_uses_index(self) -> None:
+    """
+      Test that the packages are not scanned again while the index is
+      up to date.
+    """
+    plugin_commands()
+    with mock.patch('importlib.metadata.entry_points', side_effect=AssertionError('scanned')):
+      self.assertEqual('dralithus_hello:make', plugin_commands().get('hello'))
+
+  def test_plugin_commands_index_invalidated(self) -> None:
+    """
+      Test that the packages are scanned again when a directory on
+      sys.path changes.
+    """
+    plugin_commands()
+    mtime = os.stat(self._site.name).st_mtime_ns
+    os.utime(self._site.name, ns=(mtime + 10**9, mtime + 10**9))
+    with mock.patch('importlib.metadata.entry_points', return_value=[]) as entry_points:
+      self.assertNotIn('hello', plugin_commands())
+      entry_points.assert_called_once()
+
+  def test_load(self) -> None:
+    """
+      Test loading an object named by an entry point value.
+    """
+    self.assertIs(os.path.join, load('os.path:join'))
+    self.assertIs(os.path, load('os:path'))
+    self.assertIs(os.path.join, load('os: path.join [extra]'))
+
+  def test_make_plugin_command(self) -> None:
+    """
+      Test that command.make dispatches to a plugin command.
+    """
+    command = make(['drl', '-v', 'hello'])
+    self.assertEqual('hello', command.name)
+    self.assertEqual(1, command.verbosity)
+    self.assertEqual(0, command.execute())
+
+  def test_make_unknown_command(self) -> None:
+    """
+      Test that a command that is neither built in nor a plugin is
+      reported as unknown.
+    """
+    expected = HelpCommand('drl', 'goodbye', 'Unknown command \'goodbye\' specified', 0)
+    self.assertEqual(expected, make(['drl', 'goodbye']))
@@ -0,0 +1,183 @@
+"""
+  test_pool.py: Unit tests for the dralithus.pool module
+"""
+# -------------------------------------------------------------------
+# test_pool.py: Unit tests for the dralithus.pool module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+from typing import Any, Callable, Coroutine
+import asyncio
+import unittest
+
+from dralithus.pool import ConnectionPool
+from dralithus.test.test_transport import discard
+from dralithus.transport import FakeConnection, FakeReply, FakeTransport, Job
+
+
+def pool(transport: FakeTransport, max_size: int = 2, sessions: int = 2,
+         idle_seconds: float = 30.0) -> ConnectionPool[FakeConnection]:
+  """
+    A pool of connections to fake hosts.
+
+    :param transport: The fake transport the connections are to
+    :param max_size: The most connections to a host
+    :param sessions: The most commands that use a connection at once
+    :param idle_seconds: The seconds a connection may be idle
+    :return: The pool
+  """
+  return ConnectionPool(transport.connect, max_size, sessions, idle_seconds)
+
+
+async def deploy(connections: ConnectionPool[FakeConnection], *hosts: str) -> list[int]:
+  """
+    Run a command on each of some hosts, at the same time.
+
+    :param connections: The pool of connections to the hosts
+    :param hosts: The name of each host to run a command on
+    :return: The exit code of each command
+  """
+  async def run(host: str) -> int:
+    async with connections.connection(host) as connection:
+      return await connection.run(Job(host, 'start', {}), discard)
+  return list(await asyncio.gather(*(run(host) for host in hosts)))
+
+
+class TestConnectionPool(unittest.TestCase):
+  """
+    Unit tests for the ConnectionPool class.
+  """
+  def run_in_loop(self, test: Callable[[], Coroutine[Any, Any, None]]) -> None:
+    """
+      Run a test on an event loop of its own.
+
+      :param test: The test
+    """
+    asyncio.run(test())
+
+  def test_reused(self) -> None:
+    """
+      Test that the commands run on a host one after another share one
+      connection, and that each host has its own.
+    """
+    transport = FakeTransport()
+    connections = pool(transport)
+
+    async def test() -> None:
+      for _ in range(3):
+        await deploy(connections, 'web1', 'web2')
+      self.assertEqual(2, connections.opened)
+      self.assertEqual((1, 1), (connections.size('web1'), connections.size('web2')))
+
+    self.run_in_loop(test)
+    self.assertEqual(6, len(transport.jobs))
+
+  def test_multiplexed(self) -> None:
+    """
+      Test that a connection carries up to its sessions at once, that
+      no more than max size connections are made to a host, and that
+      the commands that find them all full wait for room.
+    """
+    transport = FakeTransport(default=FakeReply(seconds=0.01))
+    connections = pool(transport, max_size=2, sessions=3)
+
+    async def test() -> None:
+      self.assertEqual([0] * 10, await deploy(connections, *['web1'] * 10))
+      self.assertEqual(2, connections.opened)
+
+    self.run_in_loop(test)
+    self.assertEqual(6, transport.most['web1'])
+    self.assertEqual(10, len(transport.jobs))
+
+  def test_unhealthy(self) -> None:
+    """
+      Test that an idle connection that fails its health check is
+      closed, and replaced.
+    """
+    transport = FakeTransport()
+    connections = pool(transport)
+
+    async def test() -> None:
+      await deploy(connections, 'web1')
+      transport.unhealthy.add('web1')
+      await deploy(connections, 'web1')
+      self.assertEqual((2, 1, 1), (connections.opened, connections.evicted,
+                                   connections.size('web1')))
+
+    self.run_in_loop(test)
+
+  def test_idle(self) -> None:
+    """
+      Test that connections that have been idle for idle seconds are
+      closed.
+    """
+    transport = FakeTransport()
+    connections = pool(transport, idle_seconds=0.1)
+
+    async def test() -> None:
+      await deploy(connections, 'web1')
+      await asyncio.sleep(0.15)
+      await deploy(connections, 'web2')
+      self.assertEqual((0, 1, 1), (connections.size('web1'), connections.size('web2'),
+                                   connections.evicted))
+
+    self.run_in_loop(test)
+
+  def test_close(self) -> None:
+    """
+      Test that closing the pool closes every connection in it.
+    """
+    transport = FakeTransport()
+    connections = pool(transport)
+    opened: list[FakeConnection] = []
+
+    async def test() -> None:
+      for host in ('web1', 'web2'):
+        async with connections.connection(host) as connection:
+          opened.append(connection)
+      await connections.close()
+      self.assertEqual(0, connections.size('web1'))
+
+    self.run_in_loop(test)
+    self.assertEqual([True, True], [connection.closed for connection in opened])
+
+  def test_open_fails(self) -> None:
+    """
+      Test that a connection that cannot be opened raises, and takes no
+      room in the pool.
+    """
+    failures = [ConnectionError('Cannot connect to web1')]
+
+    class Flaky(FakeConnection):  # pylint: disable=too-few-public-methods
+      """
+        A fake connection that fails to open the first time.
+      """
+      async def open(self) -> None:
+        if len(failures) > 0:
+          raise failures.pop()
+
+    transport = FakeTransport()
+    connections: ConnectionPool[FakeConnection] = ConnectionPool(
+      lambda host: Flaky(transport, host), 1, 1)
+
+    async def test() -> None:
+      with self.assertRaises(ConnectionError):
+        await deploy(connections, 'web1')
+      self.assertEqual(0, connections.size('web1'))
+      self.assertEqual([0], await deploy(connections, 'web1'))
+
+    self.run_in_loop(test)
@@ -0,0 +1,120 @@
+"""
+  test_query_command.py: Unit tests for the dralithus.query_command
+  module
+"""
+# -------------------------------------------------------------------
+# test_query_command.py: Unit tests for the dralithus.query_command
+# module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+from contextlib import redirect_stdout
+import io
+
+from parameterized import parameterized
+
+from dralithus.command_line.command_line import CommandLine
+from dralithus.command_line.options import Options
+from dralithus.errors import CommandLineError, ExitCode
+from dralithus.inventory import open_inventory
+from dralithus.query_command import APPLICATIONS, HOSTS, QueryCommand, make
+from dralithus.test import CaseData, CaseExecutor2, CatalogTestCase
+
+# A catalog with hosts in racks, and applications configured for some
+# of its environments.
+CATALOG = {
+  'environments/east.yaml':
+    'hosts:\n'
+    '  - {name: web1, labels: {rack: r12, role: web}}\n'
+    '  - {name: db1, labels: {rack: r13, role: db}}\n',
+  'environments/west.yaml': 'hosts:\n  - {name: web2, labels: {rack: r12}}\n  - cache1\n',
+  'applications/web.yaml': '',
+  'applications/api.yaml': '',
+  'configuration/web-west.yaml': '',
+  'configuration/api-east.yaml': '',
+}
+
+
+def make_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for making a QueryCommand
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('hosts_no_labels', CaseData(args=CommandLine(program='drl', command_name='hosts', global_options=Options([]), command_options=Options([]), parameters=set()), expected=QueryCommand(HOSTS, [], 0), error=None)),
+    ('hosts_labels', CaseData(args=CommandLine(program='drl', command_name='hosts', global_options=Options(['-v']), command_options=Options([]), parameters={'role=web', 'rack=r12'}), expected=QueryCommand(HOSTS, ['rack=r12', 'role=web'], 1), error=None)),
+    ('applications_label', CaseData(args=CommandLine(program='drl', command_name='applications', global_options=Options([]), command_options=Options([]), parameters={'rack=r12'}), expected=QueryCommand(APPLICATIONS, ['rack=r12'], 0), error=None)),
+    ('hosts_not_a_label', CaseData(args=CommandLine(program='drl', command_name='hosts', global_options=Options([]), command_options=Options([]), parameters={'r12'}), expected=None, error=CommandLineError)),
+  ]
+
+
+class TestQueryCommand(CatalogTestCase, CaseExecutor2):
+  """
+    Unit tests for the QueryCommand class.
+  """
+  catalog_files = CATALOG
+
+  def tearDown(self) -> None:
+    """
+      Close the inventory, and remove the catalog and cache directories.
+    """
+    open_inventory(self._catalog.name).close()
+    open_inventory.cache_clear()
+    super().tearDown()
+
+  def query(self, name: str, labels: list[str]) -> tuple[int, str]:
+    """
+      Run a query on the catalog.
+
+      :param name: What the query finds: HOSTS or APPLICATIONS
+      :param labels: The labels of the hosts
+      :return: The exit code, and what the command printed
+    """
+    stdout = io.StringIO()
+    with redirect_stdout(stdout):
+      exit_code = QueryCommand(name, labels, 0).execute()
+    return exit_code, stdout.getvalue()
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(make_cases())
+  def test_make(self, name: str, case: CaseData) -> None:
+    """
+      Test the make method of the query_command module.
+    """
+    self.execute(make, case)
+
+  def test_hosts(self) -> None:
+    """
+      Test that the hosts that carry every label are printed, and every
+      host if there are no labels.
+    """
+    self.assertEqual((ExitCode.SUCCESS, 'east web1\nwest web2\n'), self.query(HOSTS, ['rack=r12']))
+    self.assertEqual((ExitCode.SUCCESS, 'east web1\n'),
+                     self.query(HOSTS, ['rack=r12', 'role=web']))
+    self.assertEqual((ExitCode.SUCCESS, 'east db1\neast web1\nwest cache1\nwest web2\n'),
+                     self.query(HOSTS, []))
+    self.assertEqual((ExitCode.SUCCESS, ''), self.query(HOSTS, ['rack=r99']))
+
+  def test_applications(self) -> None:
+    """
+      Test that the applications deployed to the hosts that carry every
+      label are printed.
+    """
+    self.assertEqual((ExitCode.SUCCESS, 'api\nweb\n'), self.query(APPLICATIONS, ['rack=r12']))
+    self.assertEqual((ExitCode.SUCCESS, 'api\n'), self.query(APPLICATIONS, ['role=db']))
+    self.assertEqual((ExitCode.SUCCESS, ''), self.query(APPLICATIONS, ['rack=r99']))
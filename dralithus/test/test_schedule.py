@@ -0,0 +1,140 @@
+"""
+  test_schedule.py: Unit tests for the dralithus.schedule module
+"""
+# -------------------------------------------------------------------
+# test_schedule.py: Unit tests for the dralithus.schedule module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import unittest
+
+from parameterized import parameterized
+
+from dralithus.schedule import Schedule, Target
+from dralithus.test import CaseData, CaseExecutor2
+
+# A database, an API that uses it, and a front end that uses that, as
+# well as a cache, which the API also uses, and documentation.
+DEPENDS = {
+  'web': ['api'],
+  'api': ['db', 'cache'],
+  'db': [],
+  'cache': [],
+  'docs': [],
+}
+
+
+def cycle_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for the cycles Schedule detects
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('self', CaseData(args={'a': ['a']}, expected='a -> a', error=None)),
+    ('pair', CaseData(args={'a': ['b'], 'b': ['a']}, expected='a -> b -> a', error=None)),
+    ('below_cycle', CaseData(args={'a': ['b', 'db'], 'b': ['c'], 'c': ['a'], 'db': []}, expected='a -> b -> c -> a', error=None)),
+    ('above_cycle', CaseData(args={'web': ['b'], 'b': ['c'], 'c': ['b']}, expected='b -> c -> b', error=None)),
+    ('no_cycle', CaseData(args=DEPENDS, expected='', error=None)),
+  ]
+
+
+def plan_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for Schedule.plan
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('one_job', CaseData(args=(DEPENDS, ['dev'], 1), expected=[(1, 'cache@dev'), (2, 'db@dev'), (3, 'api@dev'), (4, 'docs@dev'), (5, 'web@dev')], error=None)),
+    ('two_jobs', CaseData(args=(DEPENDS, ['dev'], 2), expected=[(1, 'cache@dev'), (1, 'db@dev'), (2, 'api@dev'), (2, 'docs@dev'), (3, 'web@dev')], error=None)),
+    ('environments', CaseData(args=(DEPENDS, ['prod', 'dev'], 4), expected=[(1, 'cache@dev'), (1, 'cache@prod'), (1, 'db@dev'), (1, 'db@prod'), (2, 'api@dev'), (2, 'api@prod'), (2, 'docs@dev'), (2, 'docs@prod'), (3, 'web@dev'), (3, 'web@prod')], error=None)),
+    ('not_deployed', CaseData(args=({'web': ['api'], 'docs': []}, ['dev'], 1), expected=[(1, 'docs@dev'), (2, 'web@dev')], error=None)),
+  ]
+
+
+class TestSchedule(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the Schedule class.
+  """
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(cycle_cases())
+  def test_cycle(self, name: str, case: CaseData) -> None:
+    """
+      Test that applications that depend on each other are detected.
+    """
+    def cycle(depends: dict[str, list[str]]) -> str:
+      try:
+        Schedule(depends, ['dev'])
+      except ValueError as ex:
+        return str(ex)
+      return ''
+    self.execute(cycle, case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(plan_cases())
+  def test_plan(self, name: str, case: CaseData) -> None:
+    """
+      Test the order in which targets would be started.
+    """
+    def plan(args: tuple[dict[str, list[str]], list[str], int]) -> list[tuple[int, str]]:
+      return [(step, str(target)) for step, target in Schedule(args[0], args[1]).plan(args[2])]
+    self.execute(plan, case)
+
+  def test_critical_path(self) -> None:
+    """
+      Test the length of the chain of applications that depend on each
+      application.
+    """
+    schedule = Schedule(DEPENDS, ['dev'])
+    self.assertEqual({'db': 3, 'cache': 3, 'api': 2, 'web': 1, 'docs': 1},
+                     {application: schedule.critical_path(application) for application in DEPENDS})
+    self.assertEqual([Target('cache', 'dev'), Target('db', 'dev')],
+                     schedule.prerequisites(Target('api', 'dev')))
+
+  def test_ready(self) -> None:
+    """
+      Test that a target is only ready once what it depends on, in its
+      own environment, has been deployed.
+    """
+    schedule = Schedule(DEPENDS, ['dev', 'prod'])
+    self.assertEqual(10, len(schedule))
+    ready = [schedule.ready() for _ in range(6)]
+    self.assertEqual([Target('cache', 'dev'), Target('cache', 'prod'), Target('db', 'dev'),
+                      Target('db', 'prod'), Target('docs', 'dev'), Target('docs', 'prod')], ready)
+    self.assertIsNone(schedule.ready())
+    self.assertEqual([], schedule.done(Target('cache', 'dev'), True))
+    self.assertEqual([], schedule.done(Target('db', 'prod'), True))
+    self.assertIsNone(schedule.ready())
+    self.assertEqual([], schedule.done(Target('db', 'dev'), True))
+    self.assertEqual(Target('api', 'dev'), schedule.ready())
+    self.assertIsNone(schedule.ready())
+
+  def test_failed(self) -> None:
+    """
+      Test that a target that fails stops everything that depends on
+      it, directly or not, in its own environment, from being deployed.
+    """
+    schedule = Schedule(DEPENDS, ['dev', 'prod'])
+    while schedule.ready() is not None:
+      pass
+    self.assertEqual([Target('api', 'dev'), Target('web', 'dev')],
+                     schedule.done(Target('db', 'dev'), False))
+    self.assertEqual([], schedule.done(Target('cache', 'dev'), False))
+    for target in (Target('db', 'prod'), Target('cache', 'prod')):
+      schedule.done(target, True)
+    self.assertEqual(Target('api', 'prod'), schedule.ready())
@@ -0,0 +1,97 @@
+"""
+  test_schema.py: Unit tests for the dralithus.schema module
+"""
+# -------------------------------------------------------------------
+# test_schema.py: Unit tests for the dralithus.schema module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import glob
+import os
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from dralithus.schema import VM, fingerprint, validate, validator
+from dralithus.test import CaseData, CaseExecutor2
+
+
+def validate_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for validate
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('empty', CaseData(args=('environments', b''), expected=[], error=None)),
+    ('environment', CaseData(args=('environments', b'description: E\nlabels: {tier: prod, v: 2, on: true}\nhosts: [web1, {name: db1, labels: {rack: r12}}]\n'), expected=[], error=None)),
+    ('null_values', CaseData(args=('environments', b'description:\nlabels:\nhosts:\nconfiguration:\n'), expected=[], error=None)),
+    ('not_a_mapping', CaseData(args=('environments', b'- a\n'), expected=['f.yaml: The document must be object or null, not array'], error=None)),
+    ('invalid_yaml', CaseData(args=('applications', b'labels: [\n'), expected=['f.yaml: while parsing a flow node\ndid not find expected node content\n  in "<byte string>", line 2, column 1'], error=None)),
+    ('unknown_key', CaseData(args=('applications', b'hosts: [web1]\n'), expected=['f.yaml: hosts is not allowed'], error=None)),
+    ('label_value', CaseData(args=('applications', b'labels: {team: [a]}\n'), expected=['f.yaml: labels.team must be scalar, not array'], error=None)),
+    ('host_type', CaseData(args=('environments', b'hosts: [3]\n'), expected=['f.yaml: hosts[0] must be string or object, not integer'], error=None)),
+    ('host_name', CaseData(args=('environments', b'hosts: [{labels: {}}, {name: a, role: web}]\n'), expected=['f.yaml: hosts[0].name is required', 'f.yaml: hosts[1].role is not allowed'], error=None)),
+    ('host_label', CaseData(args=('environments', b'hosts: [{name: a, labels: {rack: {}}}]\n'), expected=['f.yaml: hosts[0].labels.rack must be scalar, not object'], error=None)),
+    ('depends', CaseData(args=('applications', b'depends: [db, cache]\n'), expected=[], error=None)),
+    ('depends_name', CaseData(args=('applications', b'depends: [db, {name: cache}]\n'), expected=['f.yaml: depends[1] must be string, not object'], error=None)),
+    ('environment_depends', CaseData(args=('environments', b'depends: [db]\n'), expected=['f.yaml: depends is not allowed'], error=None)),
+    ('schema_version', CaseData(args=('applications', b'schema: 1\n'), expected=[], error=None)),
+    ('unknown_schema_version', CaseData(args=('applications', b'schema: 2\n'), expected=['f.yaml: schema: Unknown version of the schema of applications: 2'], error=None)),
+    ('schema_not_integer', CaseData(args=('applications', b'schema: [1]\n'), expected=['f.yaml: schema: Unknown version of the schema of applications: [1]'], error=None)),
+    ('configuration', CaseData(args=('configuration', b'port: 80\nanything: [goes]\n'), expected=[], error=None)),
+    ('configuration_list', CaseData(args=('configuration', b'- 80\n'), expected=['f.yaml: The document must be object or null, not array'], error=None)),
+    ('vm', CaseData(args=(VM, b'meta: {description: A VM}\nnetwork: {}\n'), expected=[], error=None)),
+    ('vm_meta', CaseData(args=(VM, b'meta: {description: 3}\n'), expected=['f.yaml: meta.description must be string, not integer'], error=None)),
+  ]
+
+
+class TestSchema(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the dralithus.schema module
+  """
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(validate_cases())
+  def test_validate(self, name: str, case: CaseData) -> None:
+    """
+      Test checking the contents of a file against its schema.
+    """
+    self.execute(lambda args: validate(args[0], args[1], 'f.yaml'), case)
+
+  def test_catalog_is_valid(self) -> None:
+    """
+      Test that the files of the catalog in this repository are valid.
+    """
+    root = os.path.join(os.path.dirname(__file__), '..', '..')
+    for kind in ('environments', 'applications', 'configuration'):
+      for path in glob.glob(os.path.join(root, kind, '*.yaml')):
+        with open(path, 'rb') as file:
+          self.assertEqual([], validate(kind, file.read(), path))
+    with open(os.path.join(root, 'network.yaml'), 'rb') as file:
+      self.assertEqual([], validate(VM, file.read(), 'network.yaml'))
+
+  def test_compiled_once(self) -> None:
+    """
+      Test that each version of a schema is compiled once, and that the
+      fingerprints of the schemas of different kinds differ.
+    """
+    self.assertIs(validator('environments', 1), validator('environments', 1))
+    with mock.patch('dralithus.schema._compile') as compile_schema:
+      validate('environments', b'description: E\n', 'f.yaml')
+    compile_schema.assert_not_called()
+    self.assertNotEqual(fingerprint('environments'), fingerprint('applications'))
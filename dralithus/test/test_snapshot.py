@@ -0,0 +1,178 @@
+"""
+  test_snapshot.py: Unit tests for the dralithus.snapshot module
+"""
+# -------------------------------------------------------------------
+# test_snapshot.py: Unit tests for the dralithus.snapshot module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from dralithus import snapshot
+from dralithus.snapshot import Entry, documents, snapshot_path
+
+# A modification time well before any snapshot is written, so that
+# files are not racy unless a test makes them so.
+OLD_NS = 10**18
+
+
+class TestSnapshot(unittest.TestCase):
+  """
+    Unit tests for the dralithus.snapshot module
+  """
+  def setUp(self) -> None:
+    """
+      Create a catalog directory and a private cache directory.
+    """
+    # pylint: disable=consider-using-with
+    self._catalog = tempfile.TemporaryDirectory()
+    self._cache = tempfile.TemporaryDirectory()
+    os.mkdir(os.path.join(self._catalog.name, 'applications'))
+    self._environ = mock.patch.dict(os.environ, {'DRALITHUS_CACHE_DIR': self._cache.name})
+    self._environ.start()
+    self.write('alpha', 'description: Alpha\n')
+    self.write('beta', 'description: Beta\n')
+
+  def tearDown(self) -> None:
+    """
+      Remove the catalog and cache directories.
+    """
+    self._environ.stop()
+    self._catalog.cleanup()
+    self._cache.cleanup()
+
+  def write(self, name: str, contents: str, mtime_ns: int = OLD_NS) -> None:
+    """
+      Write an application file.
+
+      :param name: The name of the application
+      :param contents: The contents of the file
+      :param mtime_ns: The modification time to give the file
+    """
+    path = os.path.join(self._catalog.name, 'applications', f'{name}.yaml')
+    with open(path, 'w', encoding='utf-8') as file:
+      file.write(contents)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+  def documents(self) -> tuple[dict[str, Entry], list[str]]:
+    """
+      Read the applications through the snapshot.
+
+      :return: The entries, and the paths of the files that were parsed
+    """
+    with mock.patch.object(snapshot, 'parse_yaml', wraps=snapshot.parse_yaml) as parse_yaml:
+      entries = documents(self._catalog.name, 'applications')
+    parsed = sorted(os.path.basename(call.args[1]) for call in parse_yaml.call_args_list)
+    return entries, parsed
+
+  def test_cold_then_warm(self) -> None:
+    """
+      Test that every file is parsed once, and then read from the snapshot.
+    """
+    entries, parsed = self.documents()
+    self.assertEqual(['alpha.yaml', 'beta.yaml'], parsed)
+    self.assertEqual({'description': 'Alpha'}, entries['alpha'].document)
+    self.assertTrue(os.path.exists(snapshot_path(self._catalog.name, 'applications')))
+    with mock.patch.object(snapshot, '_write_snapshot') as write_snapshot:
+      warm, parsed = self.documents()
+    self.assertEqual([], parsed)
+    self.assertEqual(entries, warm)
+    write_snapshot.assert_not_called()
+
+  def test_not_private(self) -> None:
+    """
+      Test that a snapshot that others may write is not read, and
+      every file is parsed again.
+    """
+    self.documents()
+    os.chmod(snapshot_path(self._catalog.name, 'applications'), 0o666)
+    _, parsed = self.documents()
+    self.assertEqual(['alpha.yaml', 'beta.yaml'], parsed)
+
+  def test_changed_file(self) -> None:
+    """
+      Test that only a changed file is parsed again.
+    """
+    self.documents()
+    self.write('beta', 'description: Beta two\n')
+    entries, parsed = self.documents()
+    self.assertEqual(['beta.yaml'], parsed)
+    self.assertEqual({'description': 'Beta two'}, entries['beta'].document)
+    self.assertEqual({'description': 'Alpha'}, entries['alpha'].document)
+
+  def test_touched_file(self) -> None:
+    """
+      Test that a file whose modification time changed, but whose
+      contents did not, is not parsed again.
+    """
+    self.documents()
+    self.write('alpha', 'description: Alpha\n', OLD_NS + 10**9)
+    entries, parsed = self.documents()
+    self.assertEqual([], parsed)
+    self.assertEqual(OLD_NS + 10**9, entries['alpha'].mtime_ns)
+
+  def test_added_and_removed_files(self) -> None:
+    """
+      Test that added files are parsed and removed files are dropped.
+    """
+    self.documents()
+    os.remove(os.path.join(self._catalog.name, 'applications', 'alpha.yaml'))
+    self.write('gamma', 'description: Gamma\n')
+    entries, parsed = self.documents()
+    self.assertEqual(['gamma.yaml'], parsed)
+    self.assertEqual(['beta', 'gamma'], sorted(entries))
+
+  def test_racy_file(self) -> None:
+    """
+      Test that a file modified just before the snapshot was written
+      is checked against its hash, even if its size and modification
+      time are unchanged.
+    """
+    now_ns = time.time_ns()
+    self.write('alpha', 'description: Alpha\n', now_ns)
+    self.documents()
+    self.write('alpha', 'description: Omega\n', now_ns)
+    entries, parsed = self.documents()
+    self.assertEqual(['alpha.yaml'], parsed)
+    self.assertEqual({'description': 'Omega'}, entries['alpha'].document)
+
+  def test_invalid_file(self) -> None:
+    """
+      Test that a file that is not valid YAML is recorded with its error,
+      and not parsed again while it is unchanged.
+    """
+    self.write('broken', 'description: [unclosed\n')
+    entries, _ = self.documents()
+    self.assertIsNone(entries['broken'].document)
+    self.assertIn('broken.yaml', entries['broken'].error or '')
+    _, parsed = self.documents()
+    self.assertEqual([], parsed)
+
+  def test_corrupt_snapshot(self) -> None:
+    """
+      Test that a snapshot that cannot be read is rebuilt.
+    """
+    self.documents()
+    with open(snapshot_path(self._catalog.name, 'applications'), 'wb') as file:
+      file.write(b'not a pickle')
+    entries, parsed = self.documents()
+    self.assertEqual(['alpha.yaml', 'beta.yaml'], parsed)
+    self.assertEqual({'description': 'Beta'}, entries['beta'].document)
@@ -0,0 +1,334 @@
+"""
+  test_transport.py: Unit tests for the dralithus.transport module
+"""
+# -------------------------------------------------------------------
+# test_transport.py: Unit tests for the dralithus.transport module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from dralithus.test import CaseData, CaseExecutor2
+from dralithus.transport import (
+  FakeReply, FakeTransport, Job, LocalTransport, SshTransport, Transport)
+
+
+def run(transport: Transport, job: Job) -> tuple[int, list[tuple[str, bool]]]:
+  """
+    Run a job through a transport, on an event loop of its own.
+
+    :param transport: The transport
+    :param job: The job
+    :return: The exit code, and the lines written, each with whether it
+      was written to standard error
+  """
+  lines: list[tuple[str, bool]] = []
+
+  def write(line: str, error: bool = False) -> None:
+    lines.append((line, error))
+
+  exit_code = asyncio.run(transport.run(job, write))
+  return exit_code, lines
+
+
+def discard(line: str, error: bool = False) -> None:  # pylint: disable=unused-argument
+  """
+    Write nothing.
+
+    :param line: The line
+    :param error: Whether the line was written to standard error
+  """
+
+
+def arguments_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for SshTransport.arguments
+    :return:
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('shell', CaseData(args=Job('web1', 'echo hi; echo there', {}), expected=['ssh', '-o', 'BatchMode=yes', '--', 'web1', 'eval "$(cat)"; echo hi; echo there'], error=None)),
+    ('list', CaseData(args=Job('web1', ['echo', "it's here"], {}), expected=['ssh', '-o', 'BatchMode=yes', '--', 'web1', 'eval "$(cat)"; exec echo \'it\'"\'"\'s here\''], error=None)),
+    ('environ', CaseData(args=Job('db1', ['deploy'], {'A': '1', 'B': 'x y'}), expected=['ssh', '-o', 'BatchMode=yes', '--', 'db1', 'eval "$(cat)"; exec deploy'], error=None)),
+  ]
+
+
+class TestSshTransport(unittest.TestCase, CaseExecutor2):
+  """
+    Unit tests for the SshTransport class.
+  """
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(arguments_cases())
+  def test_arguments(self, name: str, case: CaseData) -> None:
+    """
+      Test the ssh command line that runs a job on its host.
+    """
+    self.execute(SshTransport().arguments, case)
+
+  def test_control_path(self) -> None:
+    """
+      Test that a job run over a master connection uses its socket.
+    """
+    self.assertEqual(['ssh', '-o', 'BatchMode=yes', '-o', 'ControlMaster=no', '-o',
+                      'ControlPath=/tmp/1', '--', 'web1', 'eval "$(cat)"; exec true'],
+                     SshTransport().arguments(Job('web1', ['true'], {}), '/tmp/1'))
+
+  def test_exports(self) -> None:
+    """
+      Test that the variables of a job are exported by the standard
+      input of the remote shell, quoted.
+    """
+    self.assertEqual(b"export A=1\nexport B='x y'\n",
+                     SshTransport.exports(Job('db1', ['deploy'], {'A': '1', 'B': 'x y'})))
+    self.assertEqual(b'', SshTransport.exports(Job('db1', ['deploy'], {})))
+
+
+# A stand-in for ssh, which runs commands on this machine, and keeps a
+# file at the control path as its master connection. Connecting to the
+# host down fails, as ssh does.
+FAKE_SSH = f"""#!{sys.executable}
+import os, subprocess, sys
+arguments = sys.argv[1:]
+options, log, control = {{}}, None, None
+while arguments[0] != '--':
+  option = arguments.pop(0)
+  if option == '-o':
+    key, value = arguments.pop(0).split('=', 1)
+    options[key] = value
+  elif option == '-E':
+    log = arguments.pop(0)
+  elif option == '-O':
+    control = arguments.pop(0)
+host = arguments[1]
+path = options['ControlPath']
+if control == 'check':
+  sys.exit(0 if os.path.exists(path) else 255)
+if control == 'exit':
+  os.remove(path)
+  sys.exit(0)
+if options.get('ControlMaster') == 'yes':
+  if host == 'down':
+    with open(log, 'a') as file:
+      file.write(f'ssh: connect to host {{host}} port 22: Connection refused\\n')
+    sys.exit(255)
+  with open(path, 'w') as file:
+    file.write(host)
+  with open(os.path.join(os.path.dirname(sys.argv[0]), 'connections'), 'a') as file:
+    file.write(f'{{host}} {{path}}\\n')
+  sys.exit(0)
+if not os.path.exists(path):
+  sys.exit(255)
+sys.exit(subprocess.run(['sh', '-c', arguments[2]]).returncode)
+"""
+
+
+class TestSshConnection(unittest.TestCase):
+  """
+    Unit tests for the master connections of the SshTransport class,
+    through a stand-in for ssh.
+  """
+  def setUp(self) -> None:
+    """
+      Write the stand-in for ssh in a temporary directory.
+    """
+    # pylint: disable=consider-using-with
+    self._directory = tempfile.TemporaryDirectory()
+    self._ssh = os.path.join(self._directory.name, 'ssh')
+    with open(self._ssh, 'w', encoding='utf-8') as file:
+      file.write(FAKE_SSH)
+    os.chmod(self._ssh, 0o755)
+
+  def tearDown(self) -> None:
+    """
+      Remove the temporary directory.
+    """
+    self._directory.cleanup()
+
+  def connections(self) -> list[tuple[str, str]]:
+    """
+      The master connections started, in order.
+
+      :return: The name of the host, and the control path, of each
+    """
+    with open(os.path.join(self._directory.name, 'connections'), encoding='utf-8') as file:
+      return [(line.split()[0], line.split()[1]) for line in file]
+
+  def test_shared(self) -> None:
+    """
+      Test that the commands run on a host share one master connection,
+      that a master connection that has stopped is replaced, and that
+      closing the transport stops them and removes their sockets.
+    """
+    transport = SshTransport(self._ssh, ())
+    lines: list[tuple[str, bool]] = []
+
+    def write(line: str, error: bool = False) -> None:
+      lines.append((line, error))
+
+    async def deploy() -> list[int]:
+      exit_codes = list(await asyncio.gather(*(
+        transport.run(Job('web1', f'echo $APP on $HOST; exit {i}',
+                          {'APP': f'app{i}', 'HOST': 'web1'}), write)
+        for i in range(3))))
+      exit_codes.append(await transport.run(Job('web2', ['echo', 'up'], {}), write))
+      # The master connection to web1 stops.
+      os.remove(self.connections()[0][1])
+      exit_codes.append(await transport.run(Job('web1', 'echo again', {}), write))
+      await transport.close()
+      return exit_codes
+
+    self.assertEqual([0, 1, 2, 0, 0], asyncio.run(deploy()))
+    self.assertEqual(sorted([('app0 on web1', False), ('app1 on web1', False),
+                             ('app2 on web1', False), ('up', False), ('again', False)]),
+                     sorted(lines))
+    connections = self.connections()
+    self.assertEqual(['web1', 'web2', 'web1'], [host for host, _ in connections])
+    self.assertEqual(1, transport.pool.evicted)
+    self.assertFalse(any(os.path.exists(os.path.dirname(path)) for _, path in connections))
+
+  def test_large_environment(self) -> None:
+    """
+      Test that the variables of a job reach the command however large
+      they are, as they are not on the command line of ssh, whose
+      arguments are each limited to 128KB on Linux.
+    """
+    job = Job('web1', 'echo ${#BIG} $END', {'BIG': 'x' * 1024 * 1024, 'END': 'end'})
+    self.assertEqual((0, [('1048576 end', False)]), run(SshTransport(self._ssh, ()), job))
+
+  def test_down(self) -> None:
+    """
+      Test that a host that cannot be connected to raises
+      ConnectionError, with the reason ssh gave.
+    """
+    with self.assertRaises(ConnectionError) as context:
+      run(SshTransport(self._ssh, ()), Job('down', 'true', {}))
+    self.assertEqual('Cannot connect to down: ssh: connect to host down port 22: '
+                     'Connection refused', str(context.exception))
+
+
+class TestLocalTransport(unittest.TestCase):
+  """
+    Unit tests for the LocalTransport class.
+  """
+  def test_streams(self) -> None:
+    """
+      Test that standard output and standard error are written apart,
+      each line as it is written, and that the exit code is returned.
+    """
+    self.assertEqual((3, [('out', False), ('err', True), ('more', False)]),
+                     run(LocalTransport(), Job('web1', 'echo out; sleep 0.1; echo err >&2; '
+                                           'sleep 0.1; echo more; exit 3', {})))
+
+  def test_environ(self) -> None:
+    """
+      Test that a list of arguments is run in the directory of the
+      transport, with the variables of the job added to the environment.
+    """
+    with tempfile.TemporaryDirectory() as directory, \
+        mock.patch.dict(os.environ, {'DRALITHUS_INHERITED': 'yes'}):
+      command = [sys.executable, '-c', 'import os; print(os.getcwd(), '
+                 'os.environ["DRALITHUS_HOST"], os.environ["DRALITHUS_INHERITED"])']
+      job = Job('web1', command, {'DRALITHUS_HOST': 'web1'})
+      self.assertEqual((0, [(f'{os.path.realpath(directory)} web1 yes', False)]),
+                       run(LocalTransport(directory), job))
+
+  def test_not_found(self) -> None:
+    """
+      Test that a program that does not exist raises OSError.
+    """
+    with self.assertRaises(OSError):
+      run(LocalTransport(), Job('web1', ['/nonexistent/program'], {}))
+
+  def test_long_lines(self) -> None:
+    """
+      Test that a line longer than the limit is split, and that a last
+      line without a newline is written.
+    """
+    with mock.patch('dralithus.transport._LINE_LIMIT', 4):
+      self.assertEqual((0, [('abcd', False), ('efgh', False), ('ij', False), ('', False),
+                            ('klmn', False), ('op', False)]),
+                       run(LocalTransport(), Job('web1', "printf 'abcdefghij\\n\\nklmnop'", {})))
+
+  def test_read_error(self) -> None:
+    """
+      Test that output that cannot be read raises OSError.
+    """
+    with mock.patch('asyncio.StreamReader.read', side_effect=ValueError('Separator is not found')):
+      with self.assertRaises(OSError) as context:
+        run(LocalTransport(), Job('web1', 'echo out', {}))
+    self.assertEqual('Cannot read the output of the command: Separator is not found',
+                     str(context.exception))
+
+  def test_cancelled(self) -> None:
+    """
+      Test that a command that is cancelled is killed, along with the
+      processes it started.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+      marker = os.path.join(directory, 'marker')
+
+      async def cancel() -> None:
+        await asyncio.wait_for(
+          LocalTransport(directory).run(Job('web1', f'(sleep 1; touch {marker}) & sleep 10', {}),
+                                        discard), 0.2)
+
+      started = time.perf_counter()
+      with self.assertRaises(TimeoutError):
+        asyncio.run(cancel())
+      self.assertLess(time.perf_counter() - started, 5)
+      time.sleep(1.5)
+      self.assertFalse(os.path.exists(marker))
+
+
+class TestFakeTransport(unittest.TestCase):
+  """
+    Unit tests for the FakeTransport class.
+  """
+  def test_replies(self) -> None:
+    """
+      Test that each host replies as it was told to, and that every job
+      is recorded.
+    """
+    transport = FakeTransport({'db1': FakeReply(('migrated',), ('slow',), 2)},
+                              FakeReply(('ok',)))
+    self.assertEqual((2, [('migrated', False), ('slow', True)]),
+                     run(transport, Job('db1', 'migrate', {})))
+    self.assertEqual((0, [('ok', False)]), run(transport, Job('web1', 'start', {})))
+    self.assertEqual([Job('db1', 'migrate', {}), Job('web1', 'start', {})], transport.jobs)
+
+  def test_most(self) -> None:
+    """
+      Test that the most jobs that ran on each host at once are counted.
+    """
+    transport = FakeTransport(default=FakeReply(seconds=0.01))
+
+    async def deploy() -> None:
+      await asyncio.gather(*(transport.run(Job(host, 'start', {}), discard)
+                             for host in ('web1', 'web1', 'web1', 'web2')))
+
+    asyncio.run(deploy())
+    self.assertEqual({'web1': 3, 'web2': 1}, transport.most)
+    self.assertEqual({'web1': 0, 'web2': 0}, transport.running)
@@ -0,0 +1,194 @@
+"""
+  test_validate_command.py: Unit tests for the dralithus.validate_command module
+"""
+# -------------------------------------------------------------------
+# test_validate_command.py: Unit tests for the dralithus.validate_command module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import io
+import os
+from contextlib import redirect_stdout
+from unittest import mock
+
+from parameterized import parameterized
+
+from dralithus import validate_command
+from dralithus.command import make
+from dralithus.errors import DralithusValidationError, ExitCode
+from dralithus.schema import VM
+from dralithus.test import CaseData, CaseExecutor2, CatalogTestCase
+from dralithus.validate_command import Target, ValidateCommand, kind_of
+
+CATALOG = {
+  'environments/dev.yaml': 'description: Development\nhosts: [web1]\n',
+  'environments/prod.yaml': 'labels: {tier: prod}\n',
+  'applications/web.yaml': 'configuration: {port: 80}\n',
+  'configuration/defaults.yaml': 'port: 8080\n',
+  'network.yaml': "'meta': {'description': 'A VM'}\n",
+  'notes.txt': 'Not a catalog file\n',
+}
+
+
+def make_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for making a ValidateCommand
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('validate_catalog', CaseData(args=['drl', 'validate'], expected=ValidateCommand('/catalog', [], 4, 0), error=None)),
+    ('validate_files_jobs', CaseData(args=['drl', 'validate', '-j', '2', 'a.yaml', 'b.yaml'], expected=ValidateCommand('/catalog', ['a.yaml', 'b.yaml'], 2, 0), error=None)),
+    ('validate_global_jobs_verbosity', CaseData(args=['drl', '-v', '--jobs=3', 'validate'], expected=ValidateCommand('/catalog', [], 3, 1), error=None)),
+  ]
+
+
+def kind_of_cases() -> list[tuple[str, CaseData]]:
+  """
+    A list of unittest cases for kind_of
+  """
+  # pylint: disable=line-too-long
+  return [
+    ('environment', CaseData(args='catalog/environments/dev.yaml', expected='environments', error=None)),
+    ('application', CaseData(args='/catalog/applications/web.yaml', expected='applications', error=None)),
+    ('configuration', CaseData(args='configuration/web-dev.yaml', expected='configuration', error=None)),
+    ('vm', CaseData(args='/catalog/network.yaml', expected=VM, error=None)),
+    ('vm_directory', CaseData(args='/catalog/vm/network.yaml', expected=VM, error=None)),
+  ]
+
+
+class TestValidateCommand(CatalogTestCase, CaseExecutor2):
+  """
+    Unit tests for the ValidateCommand class.
+  """
+  catalog_files = CATALOG
+
+  def run_command(self, paths: list[str] | None = None, jobs: int = 1) -> tuple[int, str]:
+    """
+      Run drl validate on the catalog.
+
+      :param paths: The files to check, or None to check the catalog
+      :param jobs: The number of processes to check files with
+      :return: The exit code, and what the command printed
+    """
+    stdout = io.StringIO()
+    command = ValidateCommand(self._catalog.name, paths or [], jobs, 1)
+    with redirect_stdout(stdout):
+      try:
+        exit_code = command.execute()
+      except DralithusValidationError as ex:
+        exit_code = ex.exit_code
+    return exit_code, stdout.getvalue()
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(make_cases())
+  def test_make(self, name: str, case: CaseData) -> None:
+    """
+      Test that command.make creates a validate command.
+    """
+    with mock.patch('os.cpu_count', return_value=4), \
+        mock.patch.dict(os.environ, {'DRALITHUS_CATALOG': '/catalog'}):
+      self.execute(make, case)
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(kind_of_cases())
+  def test_kind_of(self, name: str, case: CaseData) -> None:
+    """
+      Test finding the kind of a file from its path.
+    """
+    self.execute(kind_of, case)
+
+  def test_targets(self) -> None:
+    """
+      Test that every catalog file, and only catalog files, is checked.
+    """
+    command = ValidateCommand(self._catalog.name, [], 1, 0)
+    self.assertEqual([
+      Target('environments', os.path.join(self._catalog.name, 'environments', 'dev.yaml')),
+      Target('environments', os.path.join(self._catalog.name, 'environments', 'prod.yaml')),
+      Target('applications', os.path.join(self._catalog.name, 'applications', 'web.yaml')),
+      Target('configuration', os.path.join(self._catalog.name, 'configuration', 'defaults.yaml')),
+      Target(VM, os.path.join(self._catalog.name, 'network.yaml')),
+    ], list(command.targets()))
+
+  def test_invalid_files(self) -> None:
+    """
+      Test that what is wrong with each file is printed, and that the
+      command fails.
+    """
+    self.write('environments/bad.yaml', 'hosts: web1\nowner: me\n')
+    self.write('applications/broken.yaml', 'labels: [\n')
+    exit_code, output = self.run_command()
+    self.assertEqual(ExitCode.VALIDATION_ERROR, exit_code)
+    lines = output.splitlines()
+    bad = os.path.join(self._catalog.name, 'environments', 'bad.yaml')
+    self.assertEqual(
+      [f'{bad}: hosts must be array or null, not string', f'{bad}: owner is not allowed'],
+      lines[:2])
+    broken = os.path.join(self._catalog.name, 'applications', 'broken.yaml')
+    self.assertTrue(lines[2].startswith(broken))
+    self.assertEqual('Checked 7 files: 7 parsed, 0 unchanged since they last passed, 2 not valid',
+                     lines[-1])
+
+  def test_passed_files_skipped(self) -> None:
+    """
+      Test that a file whose contents passed is not parsed again, and
+      that a file that failed is.
+    """
+    bad = self.write('environments/bad.yaml', 'hosts: web1\n')
+    self.assertEqual(ExitCode.VALIDATION_ERROR, self.run_command()[0])
+    with mock.patch.object(
+        validate_command, 'validate', wraps=validate_command.validate) as validate:
+      self.assertEqual(ExitCode.VALIDATION_ERROR, self.run_command()[0])
+      self.assertEqual([bad], [call.args[2] for call in validate.call_args_list])
+      self.write('environments/bad.yaml', 'hosts: [web1]\n')
+      self.write('environments/prod.yaml', 'labels: {tier: production}\n')
+      validate.reset_mock()
+      exit_code, output = self.run_command()
+      self.assertEqual(ExitCode.SUCCESS, exit_code)
+      self.assertEqual(2, validate.call_count)
+      self.assertEqual(
+        'Checked 6 files: 2 parsed, 4 unchanged since they last passed, 0 not valid\n', output)
+      validate.reset_mock()
+      self.run_command()
+      validate.assert_not_called()
+
+  def test_some_files(self) -> None:
+    """
+      Test that checking some files does not forget the others.
+    """
+    self.run_command()
+    self.assertEqual(ExitCode.SUCCESS,
+                     self.run_command([os.path.join(self._catalog.name, 'network.yaml')])[0])
+    with mock.patch.object(validate_command, 'validate') as validate:
+      self.run_command()
+    validate.assert_not_called()
+
+  def test_process_pool(self) -> None:
+    """
+      Test that files are checked, in order, on a pool of processes.
+    """
+    for i in range(10):
+      self.write(f'applications/app{i}.yaml', 'labels: {team: [a]}\n' if i % 3 == 0 else '')
+    with mock.patch.object(validate_command, '_CHUNK_SIZE', 2):
+      exit_code, output = self.run_command(jobs=2)
+    self.assertEqual(ExitCode.VALIDATION_ERROR, exit_code)
+    self.assertEqual(
+      [f'{os.path.join(self._catalog.name, "applications", f"app{i}.yaml")}: labels.team must be '
+       'scalar, not array' for i in (0, 3, 6, 9)],
+      output.splitlines()[:-1])
@@ -0,0 +1,129 @@
+"""
+  test_watch.py: Unit tests for the dralithus.watch module
+"""
+# -------------------------------------------------------------------
+# test_watch.py: Unit tests for the dralithus.watch module
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+import os
+from unittest import mock
+
+from parameterized import parameterized
+
+from dralithus import environment as environment_module
+from dralithus.application import Application
+from dralithus.configuration import resolved
+from dralithus.environment import Environment
+from dralithus.errors import DralithusEnvironmentError
+from dralithus.test import CatalogTestCase
+from dralithus.watch import CatalogWatcher, load_catalog
+
+CATALOG = {
+  'environments/dev.yaml': 'description: Development\nlabels: {tier: dev}\n',
+  'environments/prod.yaml': 'labels: {tier: prod}\n',
+  'applications/web.yaml': 'configuration: {port: 80}\n',
+}
+
+# Whether each test uses inotify, or polls
+WATCHERS = [('inotify', True), ('polled', False)]
+
+
+class TestCatalogWatcher(CatalogTestCase):
+  """
+    Unit tests for the CatalogWatcher class.
+  """
+  catalog_files = CATALOG
+
+  def watcher(self, use_inotify: bool) -> CatalogWatcher:
+    """
+      Watch the catalog.
+
+      :param use_inotify: Whether to use inotify
+      :return: The watcher, which is closed when the test ends
+    """
+    watcher = CatalogWatcher(use_inotify)
+    self.addCleanup(watcher.close)
+    if use_inotify and not watcher.uses_inotify:
+      self.skipTest('inotify is not available')
+    return watcher
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(WATCHERS)
+  def test_changes(self, name: str, use_inotify: bool) -> None:
+    """
+      Test that files that are created, changed or removed are found,
+      and that files whose contents have not changed are not.
+    """
+    watcher = self.watcher(use_inotify)
+    self.assertEqual({}, watcher.changes())
+    self.write('environments/dev.yaml', 'description: Changed\n')
+    self.write('environments/prod.yaml', CATALOG['environments/prod.yaml'])
+    os.utime(os.path.join(self._catalog.name, 'applications', 'web.yaml'), ns=(0, 0))
+    self.write('environments/test.yaml', '')
+    self.write('environments/notes.txt', 'Not a catalog file\n')
+    os.remove(os.path.join(self._catalog.name, 'applications', 'web.yaml'))
+    self.assertEqual({'environments': {'dev', 'test'}, 'applications': {'web'}},
+                     watcher.changes())
+    self.assertEqual({}, watcher.changes())
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(WATCHERS)
+  def test_new_directory(self, name: str, use_inotify: bool) -> None:
+    """
+      Test that the files of a directory created after the catalog was
+      first watched are found.
+    """
+    watcher = self.watcher(use_inotify)
+    self.write('configuration/defaults.yaml', 'port: 8080\n')
+    self.assertEqual({'configuration': {'defaults'}}, watcher.changes())
+    self.write('configuration/web-dev.yaml', 'port: 8443\n')
+    self.assertEqual({'configuration': {'web-dev'}}, watcher.changes())
+
+  # noinspection PyUnusedLocal
+  # pylint: disable=unused-argument
+  @parameterized.expand(WATCHERS)
+  def test_refresh(self, name: str, use_inotify: bool) -> None:
+    """
+      Test that only the environments and applications whose files
+      changed are read again, and that they are updated in place.
+    """
+    load_catalog()
+    dev = Environment.load('dev')
+    web = Application.load('web')
+    self.assertEqual({'dev'}, {env.name for env in Environment.select(['tier=dev'])})
+    self.assertEqual(80, resolved('web', 'dev')['port'])
+    watcher = self.watcher(use_inotify)
+    self.write('environments/dev.yaml', 'labels: {tier: test}\nconfiguration: {port: 81}\n')
+    self.write('environments/stage.yaml', 'labels: {tier: dev}\n')
+    self.write('applications/api.yaml', 'labels: {team: a}\n')
+    os.remove(os.path.join(self._catalog.name, 'environments', 'prod.yaml'))
+    # pylint: disable=protected-access
+    with mock.patch.object(environment_module, '_read', wraps=environment_module._read) as read:
+      self.assertEqual(4, watcher.refresh())
+    self.assertEqual(['dev', 'prod', 'stage'], sorted(call.args[1] for call in read.call_args_list))
+    self.assertIs(dev, Environment.load('dev'))
+    self.assertEqual(('', {'tier': 'test'}), (dev.description, dev.labels))
+    self.assertIs(web, Application.load('web'))
+    self.assertEqual(81, resolved('web', 'dev')['port'])
+    self.assertEqual({'stage'}, {env.name for env in Environment.select(['tier=dev'])})
+    self.assertEqual({'api'}, {app.name for app in Application.select(['team=a'])})
+    with self.assertRaises(DralithusEnvironmentError):
+      Environment.load('prod')
+    self.assertEqual(0, watcher.refresh())
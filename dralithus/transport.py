@@ -0,0 +1,557 @@
+"""
+  transport.py: Run commands on hosts, over SSH, locally or in memory.
+"""
+# -------------------------------------------------------------------
+# transport.py: Run commands on hosts, over SSH, locally or in memory.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# A transport runs a command on a host, and streams what it writes to
+# standard output and standard error a line at a time. Transports are
+# coroutines, rather than threads, so that a deploy can wait on
+# thousands of hosts at once at the cost of a few kilobytes each.
+#
+# There are three:
+#
+#   local   runs the command in a subprocess of drl, in the catalog
+#           directory, whatever the host. It stands in for remote
+#           hosts on a single machine.
+#   ssh     runs the command on the host through the ssh program, so
+#           users, ports, keys and jump hosts are set up in
+#           ~/.ssh/config as they are for any other use of ssh. The
+#           first command to a host starts a master connection to it
+#           (ControlMaster in ssh_config(5)), which the commands after
+#           it share, so that only the first connects and
+#           authenticates. The variables of the job are sent to the
+#           remote shell on standard input, not on the command line,
+#           where any user of either host could read them, and which
+#           the configuration of a target could outgrow.
+#   fake    runs nothing, and replies for each host with the output
+#           and exit code it was given, so that the whole of a deploy
+#           can be tested in memory.
+#
+# The connections of the ssh and fake transports are kept in a pool
+# (see dralithus.pool) until the end of the run.
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import Callable, Mapping, NamedTuple, Protocol
+import asyncio
+import os
+import shlex
+import shutil
+import signal
+import tempfile
+
+from dralithus.catalog import catalog_directory
+from dralithus.pool import Connection, ConnectionPool
+
+# The longest line a command may write, in bytes. A longer line is
+# split into lines of this length.
+_LINE_LIMIT = 1024 * 1024
+
+# The most bytes of output read at a time
+_CHUNK_SIZE = 64 * 1024
+
+# The most commands a transport that runs a process for each runs at
+# the same time, so that drl does not run out of processes or file
+# descriptors
+MAX_PROCESSES = 256
+
+
+class Write(Protocol):  # pylint: disable=too-few-public-methods
+  """
+    Writes a line of the output of a command, without its newline.
+  """
+  def __call__(self, line: str, error: bool = False) -> None:
+    """
+      Write a line.
+
+      :param line: The line
+      :param error: Whether the line was written to standard error
+    """
+
+
+class Job(NamedTuple):
+  """
+    A command to run on a host.
+  """
+  host: str # The name of the host
+  command: str | list[str] # A command line for the shell, or a list of arguments
+  environ: Mapping[str, str] # The variables to set in the environment of the command
+  timeout: float | None = None # The seconds the command may run for, if limited
+
+
+class Transport(ABC):  # pylint: disable=too-few-public-methods
+  """
+    A way of running commands on hosts.
+  """
+  # The most commands the transport runs at the same time, on all
+  # hosts, or None if there is no limit
+  concurrency: int | None = None
+
+  @abstractmethod
+  async def run(self, job: Job, write: Write) -> int:
+    """
+      Run a command on a host, and wait for it to complete.
+
+      If the coroutine is cancelled, the command is stopped.
+
+      :param job: The host, and the command to run on it
+      :param write: Writes each line the command writes, as it is
+        written
+      :return: The exit code of the command
+      :raises OSError: If the command cannot be run
+    """
+
+  async def close(self) -> None:
+    """
+      Close whatever the transport keeps open between commands. It is
+      closed once every command run through it has completed.
+    """
+
+
+class LocalTransport(Transport):  # pylint: disable=too-few-public-methods
+  """
+    Runs commands in subprocesses, whatever the host.
+  """
+  concurrency = MAX_PROCESSES
+
+  def __init__(self, directory: str | None = None) -> None:
+    """
+      Initialize the transport.
+
+      :param directory: The directory to run commands in, or None for
+        the catalog directory
+    """
+    self._directory = directory
+
+  async def run(self, job: Job, write: Write) -> int:
+    """
+      Run a command in a subprocess. See Transport.run().
+    """
+    return await run_process(job.command, dict(os.environ, **job.environ),
+                             self._directory or catalog_directory(), write)
+
+
+class HostConnection(Connection):
+  """
+    A connection to a host, which runs commands on it.
+  """
+  @abstractmethod
+  async def run(self, job: Job, write: Write) -> int:
+    """
+      Run a command on the host. See Transport.run().
+    """
+
+
+class PooledTransport(Transport):
+  """
+    Runs commands over connections to hosts that are kept open in a
+    pool (see dralithus.pool) for as long as the transport is, and are
+    shared by every command run on the same host.
+  """
+  def __init__(self) -> None:
+    """
+      Initialize the transport.
+    """
+    self.pool: ConnectionPool[HostConnection] = ConnectionPool(self.connect)
+
+  @abstractmethod
+  def connect(self, host: str) -> HostConnection:
+    """
+      Make a connection to a host, which is opened by the pool.
+
+      :param host: The name of the host
+      :return: The connection
+    """
+
+  async def run(self, job: Job, write: Write) -> int:
+    """
+      Run a command over a connection to its host. See Transport.run().
+
+      :raises OSError: If the command cannot be run, or the host cannot
+        be connected to
+    """
+    async with self.pool.connection(job.host) as connection:
+      return await connection.run(job, write)
+
+  async def close(self) -> None:
+    """
+      Close every connection of the transport.
+    """
+    await self.pool.close()
+
+
+class SshTransport(PooledTransport):
+  """
+    Runs commands on hosts through the ssh program, over a master
+    connection to each host that their sessions share.
+  """
+  concurrency = MAX_PROCESSES
+
+  def __init__(
+      self, program: str = 'ssh', options: tuple[str, ...] = ('-o', 'BatchMode=yes')) -> None:
+    """
+      Initialize the transport.
+
+      :param program: The ssh program
+      :param options: The options to run it with. By default, it fails
+        rather than asking for a password.
+    """
+    super().__init__()
+    self.program = program
+    self.options = options
+    self._directory: str | None = None
+    self._connections = 0
+
+  def arguments(self, job: Job, control_path: str | None = None) -> list[str]:
+    """
+      The arguments that run a command on its host.
+
+      The remote shell runs what it reads on standard input, which
+      exports the variables of the job (see exports()), then runs the
+      command line, or the list of arguments, quoted.
+
+      :param job: The host, and the command to run on it
+      :param control_path: The socket of the master connection to run
+        it over, or None to connect
+      :return: The ssh command line
+    """
+    command = job.command if isinstance(job.command, str) else 'exec ' + shlex.join(job.command)
+    control = [] if control_path is None else [
+      '-o', 'ControlMaster=no', '-o', f'ControlPath={control_path}']
+    return [self.program, *self.options, *control, '--', job.host, f'eval "$(cat)"; {command}']
+
+  @staticmethod
+  def exports(job: Job) -> bytes:
+    """
+      The standard input of the remote shell, which exports the
+      variables of a job.
+
+      :param job: The host, the command, and its variables
+      :return: A line of shell for each variable, its value quoted
+    """
+    return ''.join(f'export {name}={shlex.quote(value)}\n'
+                   for name, value in job.environ.items()).encode('utf-8')
+
+  def connect(self, host: str) -> SshConnection:
+    """
+      Make a master connection to a host, with its socket in a
+      directory of the transport. See PooledTransport.connect().
+    """
+    if self._directory is None:
+      self._directory = tempfile.mkdtemp(prefix='drl-ssh-')
+    self._connections += 1
+    return SshConnection(self, host, os.path.join(self._directory, str(self._connections)))
+
+  async def close(self) -> None:
+    """
+      Close every master connection, and remove their sockets.
+    """
+    await super().close()
+    if self._directory is not None:
+      shutil.rmtree(self._directory, ignore_errors=True)
+      self._directory = None
+
+
+class SshConnection(HostConnection):
+  """
+    A master connection to a host, which the sessions of ssh share
+    through its control socket.
+  """
+  def __init__(self, transport: SshTransport, host: str, control_path: str) -> None:
+    """
+      Initialize the connection.
+
+      :param transport: The transport of the connection
+      :param host: The name of the host
+      :param control_path: The path of the control socket
+    """
+    self._transport = transport
+    self._host = host
+    self._control_path = control_path
+
+  async def open(self) -> None:
+    """
+      Start the master connection, and wait until it has authenticated.
+      What ssh logs is kept beside the socket, and the last line of it
+      is the error if it cannot connect.
+
+      :raises ConnectionError: If the host cannot be connected to
+    """
+    log = self._control_path + '.log'
+    exit_code = await self._ssh(
+      '-o', 'ControlMaster=yes', '-E', log, '-f', '-N', *self._transport.options)
+    if exit_code != 0:
+      try:
+        with open(log, encoding='utf-8', errors='replace') as file:
+          reason = ([line.strip() for line in file if line.strip()] or ['ssh failed'])[-1]
+      except OSError:
+        reason = 'ssh failed'
+      raise ConnectionError(f'Cannot connect to {self._host}: {reason}')
+
+  async def healthy(self) -> bool:
+    """
+      Check that the master connection is still running.
+    """
+    return await self._ssh('-O', 'check') == 0
+
+  async def close(self) -> None:
+    """
+      Stop the master connection.
+    """
+    await self._ssh('-O', 'exit')
+
+  async def run(self, job: Job, write: Write) -> int:
+    """
+      Run a command over the master connection. See Transport.run().
+    """
+    return await run_process(self._transport.arguments(job, self._control_path), None, None,
+                             write, self._transport.exports(job))
+
+  async def _ssh(self, *options: str) -> int:
+    """
+      Run ssh for the host, with the control socket, and no input or
+      output.
+
+      :param options: The options to run it with
+      :return: The exit code of ssh
+    """
+    process = await asyncio.create_subprocess_exec(
+      self._transport.program, '-o', f'ControlPath={self._control_path}', *options,
+      '--', self._host, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.DEVNULL,
+      stderr=asyncio.subprocess.DEVNULL)
+    try:
+      return await process.wait()
+    finally:
+      if process.returncode is None:
+        process.kill()
+        await asyncio.shield(process.wait())
+
+
+class FakeReply(NamedTuple):
+  """
+    What a fake host replies to every command.
+  """
+  stdout: tuple[str, ...] = () # The lines written to standard output
+  stderr: tuple[str, ...] = () # The lines written to standard error
+  exit_code: int = 0 # The exit code
+  seconds: float = 0.0 # How long the command takes
+
+
+class FakeTransport(PooledTransport):
+  """
+    Runs nothing, and replies as each host was told to, over fake
+    connections that take connect_seconds to open.
+  """
+  def __init__(self, replies: Mapping[str, FakeReply] | None = None,
+               default: FakeReply = FakeReply(), connect_seconds: float = 0.0) -> None:
+    """
+      Initialize the transport.
+
+      :param replies: The reply of each host, by name
+      :param default: The reply of hosts that are not in replies
+      :param connect_seconds: How long a connection takes to open
+    """
+    super().__init__()
+    self.replies = dict(replies or {})
+    self.default = default
+    self.connect_seconds = connect_seconds
+    self.unhealthy: set[str] = set() # The hosts whose connections fail their health check
+    self.jobs: list[Job] = [] # Every job run, in the order they started
+    self.running: dict[str, int] = {} # The number of jobs running on each host
+    self.most: dict[str, int] = {} # The most jobs that ran on each host at the same time
+
+  def connect(self, host: str) -> FakeConnection:
+    """
+      Make a fake connection to a host. See PooledTransport.connect().
+    """
+    return FakeConnection(self, host)
+
+
+class FakeConnection(HostConnection):
+  """
+    A connection to a fake host.
+  """
+  def __init__(self, transport: FakeTransport, host: str) -> None:
+    """
+      Initialize the connection.
+
+      :param transport: The transport of the connection
+      :param host: The name of the host
+    """
+    self._transport = transport
+    self._host = host
+    self.closed = False
+
+  async def open(self) -> None:
+    """
+      Wait for as long as the transport takes to connect.
+    """
+    await asyncio.sleep(self._transport.connect_seconds)
+
+  async def healthy(self) -> bool:
+    """
+      Check that the host is not one the transport was told is unhealthy.
+    """
+    return self._host not in self._transport.unhealthy
+
+  async def close(self) -> None:
+    """
+      Close the connection.
+    """
+    self.closed = True
+
+  async def run(self, job: Job, write: Write) -> int:
+    """
+      Reply to a command. See Transport.run().
+    """
+    assert not self.closed, 'The connection is closed.'
+    transport = self._transport
+    transport.jobs.append(job)
+    transport.running[job.host] = transport.running.get(job.host, 0) + 1
+    transport.most[job.host] = max(transport.most.get(job.host, 0), transport.running[job.host])
+    try:
+      reply = transport.replies.get(job.host, transport.default)
+      for line in reply.stdout:
+        write(line)
+      for line in reply.stderr:
+        write(line, True)
+      await asyncio.sleep(reply.seconds)
+      return reply.exit_code
+    finally:
+      transport.running[job.host] -= 1
+
+
+# The transports, by the name given to them in the 'transport' key of
+# the configuration of a target.
+TRANSPORTS: dict[str, Callable[[], Transport]] = {
+  'local': LocalTransport,
+  'ssh': SshTransport,
+  'fake': FakeTransport,
+}
+
+
+async def run_process(
+    command: str | list[str],
+    environ: Mapping[str, str] | None,
+    directory: str | None,
+    write: Write,
+    data: bytes | None = None) -> int:
+  """
+    Run a command in a subprocess, and wait for it to complete.
+
+    The command runs in a session of its own, so that if the coroutine
+    is cancelled, the command and every process it started are killed.
+
+    :param command: A command line for the shell, or a list of arguments
+    :param environ: The environment of the command, or None for that
+      of drl
+    :param directory: The directory to run it in, or None for the
+      current directory
+    :param write: Writes each line the command writes, as it is written
+    :param data: What to write to the standard input of the command, or
+      None for it to have none
+    :return: The exit code of the command
+    :raises OSError: If the command cannot be run, or its output cannot
+      be read
+  """
+  stdin = asyncio.subprocess.DEVNULL if data is None else asyncio.subprocess.PIPE
+  if isinstance(command, str):
+    process = await asyncio.create_subprocess_shell(
+      command, stdin=stdin, stdout=asyncio.subprocess.PIPE,
+      stderr=asyncio.subprocess.PIPE, cwd=directory, env=environ, start_new_session=True)
+  else:
+    process = await asyncio.create_subprocess_exec(
+      *command, stdin=stdin, stdout=asyncio.subprocess.PIPE,
+      stderr=asyncio.subprocess.PIPE, cwd=directory, env=environ, start_new_session=True)
+  try:
+    assert process.stdout is not None and process.stderr is not None
+    streams = [_stream(process.stdout, write, False), _stream(process.stderr, write, True)]
+    if data is not None:
+      assert process.stdin is not None
+      streams.append(_feed(process.stdin, data))
+    await asyncio.gather(*streams)
+    return await process.wait()
+  finally:
+    if process.returncode is None:
+      try:
+        os.killpg(process.pid, signal.SIGKILL)
+      except ProcessLookupError:
+        pass
+      await asyncio.shield(process.wait())
+
+
+async def _feed(stream: asyncio.StreamWriter, data: bytes) -> None:
+  """
+    Write data to the standard input of a command, and close it.
+
+    :param stream: The standard input of the command
+    :param data: The data
+  """
+  try:
+    stream.write(data)
+    await stream.drain()
+  except (BrokenPipeError, ConnectionResetError):
+    pass  # The command exited without reading all of its input
+  finally:
+    stream.close()
+
+
+async def _stream(stream: asyncio.StreamReader, write: Write, error: bool) -> None:
+  """
+    Write each line of a stream, as it is read.
+
+    The stream is read a chunk at a time, and split into lines here, so
+    that a line longer than _LINE_LIMIT is written as several lines,
+    rather than failing the read.
+
+    :param stream: The stream
+    :param write: Writes a line
+    :param error: Whether the stream is standard error
+    :raises OSError: If the stream cannot be read
+  """
+  pending = b''
+  while True:
+    try:
+      chunk = await stream.read(_CHUNK_SIZE)
+    except OSError:
+      raise
+    except Exception as ex:  # pylint: disable=broad-exception-caught
+      raise OSError(f'Cannot read the output of the command: {ex}') from ex
+    if len(chunk) == 0:
+      break
+    *lines, pending = (pending + chunk).split(b'\n')
+    for line in lines:
+      _write_line(line, write, error)
+    while len(pending) >= _LINE_LIMIT:
+      write(pending[:_LINE_LIMIT].decode(errors='replace'), error)
+      pending = pending[_LINE_LIMIT:]
+  if len(pending) > 0:
+    _write_line(pending, write, error)
+
+
+def _write_line(line: bytes, write: Write, error: bool) -> None:
+  """
+    Write a line, split into lines of at most _LINE_LIMIT bytes.
+
+    :param line: The line, without its newline
+    :param write: Writes a line
+    :param error: Whether the line was written to standard error
+  """
+  for start in range(0, max(len(line), 1), _LINE_LIMIT):
+    write(line[start:start + _LINE_LIMIT].decode(errors='replace'), error)
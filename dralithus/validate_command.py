@@ -0,0 +1,305 @@
+"""
+  validate_command.py: Define the ValidateCommand class.
+"""
+# -------------------------------------------------------------------
+# validate_command.py: Define the ValidateCommand class.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# drl validate checks catalog files against the schema of their kind
+# (see dralithus.schema): every file in the catalog, or the files named
+# on the command line.
+#
+# Parsing YAML is what takes the time, so the files that need to be
+# checked are parsed and checked on a pool of worker processes, in
+# chunks, so that each worker pays once for compiling the schemas.
+#
+# The SHA-256 hash of the contents of every file that passed is kept
+# in the cache directory, one file per catalog. The hash also covers
+# the schemas of the file's kind, so a file whose contents have not
+# changed is not checked again until its schema does. Only the hashes
+# of files that passed the last check of the whole catalog are kept.
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1, sha256
+from typing import Iterable, Iterator, NamedTuple, override
+import multiprocessing
+import os
+
+from dralithus.cache import cache_directory, write_atomically
+from dralithus.catalog import EXTENSION, catalog_directory, catalog_files
+from dralithus.command import Command
+from dralithus.command_line.command_line import CommandLine
+from dralithus.errors import DralithusValidationError, ExitCode
+from dralithus.schema import SCHEMAS, VM, fingerprint, validate
+
+# The kinds of catalog file that are kept in a directory of their own.
+KINDS = ('environments', 'applications', 'configuration')
+
+# The number of files each worker process checks at a time.
+_CHUNK_SIZE = 64
+
+# The size of a SHA-256 hash, in bytes.
+_DIGEST_SIZE = 32
+
+
+class Target(NamedTuple):
+  """
+    A file to be validated.
+  """
+  kind: str # The kind of the file: one of KINDS, or VM
+  path: str # The path of the file
+
+
+class ValidateCommand(Command):
+  """
+    Command to check catalog files against their schemas.
+  """
+  @override
+  def __init__(self, directory: str, paths: list[str], jobs: int, verbosity: int) -> None:
+    """
+      Initialize the 'validate' command.
+
+      :param directory: The catalog directory
+      :param paths: The files to check. If empty, every file in the
+        catalog is checked.
+      :param jobs: The number of processes to check files with
+      :param verbosity: The verbosity level of the command
+    """
+    super().__init__('validate', verbosity)
+    assert jobs > 0, 'Jobs must be a positive number.'
+    self._directory = directory
+    self._paths = paths
+    self._jobs = jobs
+
+  def __eq__(self, other: object) -> bool:
+    """
+      Check if two validate commands are equal.
+
+      :param other: The other command to compare with
+      :return: True if the commands are equal, False otherwise
+    """
+    if not isinstance(other, ValidateCommand):
+      return NotImplemented
+    return (super().__eq__(other)
+      and self.directory == other.directory
+      and self.paths == other.paths
+      and self.jobs == other.jobs)
+
+  def __str__(self) -> str:
+    """
+      Return a string representation of the validate command.
+
+      :return: A string representation of the validate command
+    """
+    return f'ValidateCommand(directory={self.directory}, paths={self.paths}, ' \
+      + f'jobs={self.jobs}, verbosity={self.verbosity})'
+
+  @property
+  def directory(self) -> str:
+    """
+      The catalog directory.
+
+      :return: The catalog directory
+    """
+    return self._directory
+
+  @property
+  def paths(self) -> list[str]:
+    """
+      The files to check.
+
+      :return: The files to check, or an empty list to check every
+        file in the catalog
+    """
+    return self._paths
+
+  @property
+  def jobs(self) -> int:
+    """
+      The number of processes to check files with.
+
+      :return: The number of jobs
+    """
+    return self._jobs
+
+  def targets(self) -> Iterator[Target]:
+    """
+      Find the files to check.
+
+      :return: An iterator over the files to check, in order
+    """
+    if len(self.paths) > 0:
+      for path in self.paths:
+        yield Target(kind_of(path), path)
+      return
+    for kind in KINDS:
+      for name in sorted(catalog_files(self.directory, kind)):
+        yield Target(kind, os.path.join(self.directory, kind, name + EXTENSION))
+    try:
+      with os.scandir(self.directory) as entries:
+        names = sorted(entry.name for entry in entries
+                       if entry.name.endswith(EXTENSION) and entry.is_file())
+    except (FileNotFoundError, NotADirectoryError):
+      names = []
+    for name in names:
+      yield Target(VM, os.path.join(self.directory, name))
+
+  @override
+  def execute(self) -> int:
+    """
+      Execute the 'validate' command.
+
+      What is wrong with each file that is not valid is printed, one
+      line each. At verbosity 1 and above, the number of files checked
+      is printed too.
+
+      :return: ExitCode.SUCCESS if every file is valid
+      :raises DralithusValidationError: If any file is not valid
+    """
+    path = passed_path(self.directory)
+    passed = read_passed(path)
+    still_passed: set[bytes] = set()
+    total = 0
+    unchanged = 0
+    invalid = 0
+    pending: list[tuple[Target, bytes, bytes]] = []
+    for target in self.targets():
+      total += 1
+      try:
+        with open(target.path, 'rb') as file:
+          data = file.read()
+      except OSError as ex:
+        print(f'{target.path}: {ex.strerror}')
+        invalid += 1
+        continue
+      digest = sha256(fingerprint(target.kind) + data).digest()
+      if digest in passed:
+        unchanged += 1
+        still_passed.add(digest)
+      else:
+        pending.append((target, data, digest))
+    for (target, _, digest), errors in zip(pending, self.check(pending)):
+      if len(errors) == 0:
+        still_passed.add(digest)
+        continue
+      invalid += 1
+      for error in errors:
+        print(error)
+    # Checking only some files says nothing about the others.
+    if len(self.paths) > 0:
+      still_passed |= passed
+    if still_passed != passed:
+      write_passed(path, still_passed)
+    if self.verbosity > 0:
+      print(f'Checked {total} files: {len(pending)} parsed, {unchanged} unchanged '
+            f'since they last passed, {invalid} not valid')
+    if invalid > 0:
+      raise DralithusValidationError(f'{invalid} of {total} files are not valid')
+    return ExitCode.SUCCESS
+
+  def check(self, pending: list[tuple[Target, bytes, bytes]]) -> Iterable[list[str]]:
+    """
+      Check files against their schemas.
+
+      The files are checked on a pool of processes if there are enough
+      of them to be worth starting one.
+
+      :param pending: The files to check, with their contents and hashes
+      :return: What is wrong with each file, in order
+    """
+    kinds = [target.kind for target, _, _ in pending]
+    contents = [data for _, data, _ in pending]
+    paths = [target.path for target, _, _ in pending]
+    jobs = min(self.jobs, -(-len(pending) // _CHUNK_SIZE))
+    if jobs <= 1:
+      return list(map(validate, kinds, contents, paths))
+    # The commands of drl batch run on threads, and forking a process
+    # that has threads is not safe.
+    context = multiprocessing.get_context(
+      'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+      return list(pool.map(validate, kinds, contents, paths, chunksize=_CHUNK_SIZE))
+
+
+def kind_of(path: str) -> str:
+  """
+    The kind of a catalog file.
+
+    :param path: The path of the file
+    :return: The name of the directory the file is in, if that is the
+      name of a kind of catalog file, and VM otherwise
+  """
+  kind = os.path.basename(os.path.dirname(os.path.abspath(path)))
+  return kind if kind in SCHEMAS and kind != VM else VM
+
+
+def passed_path(directory: str) -> str:
+  """
+    The path of the file of the hashes of the files of a catalog that
+    passed.
+
+    :param directory: The catalog directory
+    :return: The path of the file in the cache directory
+  """
+  catalog = sha1(directory.encode('utf-8'), usedforsecurity=False).hexdigest()[:12]
+  return os.path.join(cache_directory(), 'validate', f'{catalog}.passed')
+
+
+def read_passed(path: str) -> set[bytes]:
+  """
+    Read the hashes of the files that passed.
+
+    :param path: The path of the file of hashes
+    :return: The hashes. If the file cannot be read, there are none.
+  """
+  try:
+    with open(path, 'rb') as file:
+      data = file.read()
+  except OSError:
+    return set()
+  return {data[i:i + _DIGEST_SIZE] for i in range(0, len(data) - _DIGEST_SIZE + 1, _DIGEST_SIZE)}
+
+
+def write_passed(path: str, digests: set[bytes]) -> None:
+  """
+    Write the hashes of the files that passed.
+
+    It is only a cache, so failure to write it is ignored (see
+    dralithus.cache.write_atomically).
+
+    :param path: The path of the file of hashes
+    :param digests: The hashes
+  """
+  write_atomically(path, b''.join(sorted(digests)))
+
+
+def make(cmdln: CommandLine) -> ValidateCommand:
+  """
+    Create a validate command from the command line arguments.
+
+    The parameters are the files to check. If there are none, every
+    file in the catalog is checked.
+
+    :param cmdln: The command line object containing the parsed arguments
+    :return: The validate command object
+  """
+  jobs = cmdln.command_options.get('jobs', cmdln.global_options.get('jobs', None))
+  if jobs is None:
+    jobs = os.cpu_count() or 1
+  assert isinstance(jobs, int)
+  return ValidateCommand(catalog_directory(), list(cmdln.iter_parameters()), jobs, cmdln.verbosity)
@@ -0,0 +1,402 @@
+"""
+  watch.py: Keep the catalog loaded in a process up to date with its
+  files.
+"""
+# -------------------------------------------------------------------
+# watch.py: Keep the catalog loaded in a process up to date with its
+# files.
+#
+# Copyright (C) 2023-25 Sumanth Vepa.
+#
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License a
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see
+# <https://www.gnu.org/licenses/>.
+# -------------------------------------------------------------------
+# The daemon (see dralithus.daemon) loads the whole catalog once, and
+# the children it forks to run commands inherit it. A CatalogWatcher
+# lets it keep what it loaded up to date as the files of the catalog
+# are edited, so that each command sees the catalog as it is, without
+# loading any of it.
+#
+# On Linux, the environments, applications and configuration
+# directories are watched with inotify, which says which files may
+# have changed. Elsewhere, or if inotify cannot be used, the
+# directories are polled: every file is stat'ed, and a file is only
+# read again if its size or modification time has changed, or it was
+# modified shortly before the last poll (see dralithus.snapshot).
+# Either way, a file that may have changed is hashed, and only treated
+# as changed, and parsed again, if its contents have changed.
+#
+# Changes are applied by reloading only the environments and
+# applications whose files changed, in place (see
+# Environment.reload() and Application.reload()), and by forgetting
+# every merged configuration, which is merged again when it is next
+# used.
+from __future__ import annotations
+from hashlib import sha256
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+import os
+import stat
+import struct
+import sys
+import time
+
+from dralithus.application import Application
+from dralithus.catalog import EXTENSION, catalog_directory, catalog_files, is_valid_name
+from dralithus.configuration import reload as reload_configuration
+from dralithus.environment import Environment
+from dralithus.errors import DralithusError
+from dralithus.inventory import inventory_enabled, open_inventory
+from dralithus.snapshot import RACY_NS
+
+if TYPE_CHECKING:
+  import ctypes
+
+# The kinds of file that are watched, each in a directory of its own.
+KINDS = ('environments', 'applications', 'configuration')
+
+# How often, in seconds, an idle process polls the catalog for changes
+# if it cannot use inotify.
+POLL_INTERVAL = 1.0
+
+# The inotify events that are watched for (see inotify(7)).
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+
+# The events watched for in the directory of each kind of file, and in
+# the catalog directory, where only the directories matter.
+_FILE_EVENTS = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+                | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_DIRECTORY_EVENTS = _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_ONLYDIR
+
+# The header of each event read from inotify: the watch descriptor,
+# the mask of events, a cookie and the length of the name that follows.
+_EVENT = struct.Struct('iIII')
+
+
+class _Seen(NamedTuple):
+  """
+    A file, as it was when it was last checked.
+  """
+  size: int # The size of the file in bytes
+  mtime_ns: int # The modification time of the file in nanoseconds
+  digest: bytes # The SHA-256 hash of the contents of the file
+
+
+class _Inotify:
+  """
+    An inotify instance, used through the C library.
+  """
+  def __init__(self, libc: ctypes.CDLL, fd: int) -> None:
+    """
+      Initialize the instance.
+
+      :param libc: The C library
+      :param fd: The inotify file descriptor
+    """
+    self._libc = libc
+    self._fd = fd
+
+  @classmethod
+  def open(cls) -> _Inotify | None:
+    """
+      Create an inotify instance, if the platform has inotify.
+
+      :return: The instance, or None if inotify cannot be used
+    """
+    if not sys.platform.startswith('linux'):
+      return None
+    # ctypes is imported here, so that only a process that watches the
+    # catalog pays to import it.
+    import ctypes  # pylint: disable=import-outside-toplevel,redefined-outer-name
+    try:
+      libc = ctypes.CDLL(None, use_errno=True)
+      libc.inotify_init1.argtypes = [ctypes.c_int]
+      libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+      return None
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    return None if fd < 0 else cls(libc, fd)
+
+  def fileno(self) -> int:
+    """
+      The file descriptor, which is readable when there are events.
+
+      :return: The inotify file descriptor
+    """
+    return self._fd
+
+  def add_watch(self, path: str, mask: int) -> int | None:
+    """
+      Watch a directory.
+
+      :param path: The path of the directory
+      :param mask: The events to watch for
+      :return: The watch descriptor, or None if the directory cannot be
+        watched, e.g. because it does not exist
+    """
+    wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+    return None if wd < 0 else int(wd)
+
+  def read(self) -> list[tuple[int, int, str]]:
+    """
+      Read the events that have happened, without waiting for any.
+
+      :return: The watch descriptor, mask and name of each event
+    """
+    events: list[tuple[int, int, str]] = []
+    while True:
+      try:
+        data = os.read(self._fd, 65536)
+      except BlockingIOError:
+        return events
+      offset = 0
+      while offset < len(data):
+        wd, mask, _, length = _EVENT.unpack_from(data, offset)
+        offset += _EVENT.size
+        name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+        offset += length
+        events.append((wd, mask, name))
+
+  def close(self) -> None:
+    """
+      Close the instance, which removes its watches.
+    """
+    os.close(self._fd)
+
+
+class CatalogWatcher:
+  """
+    Watches the files of the catalog for changes.
+  """
+  def __init__(self, use_inotify: bool = True) -> None:
+    """
+      Initialize the watcher, and take note of the files of the
+      catalog as they are now.
+
+      :param use_inotify: Whether to use inotify, if the platform has
+        it, rather than polling
+    """
+    self._directory = catalog_directory()
+    self._seen: dict[str, dict[str, _Seen]] = {kind: {} for kind in KINDS}
+    self._inotify = _Inotify.open() if use_inotify else None
+    # The kind of the files in each watched directory, by watch
+    # descriptor. The catalog directory itself is ''.
+    self._watches: dict[int, str] = {}
+    if self._inotify is not None:
+      wd = self._inotify.add_watch(self._directory, _DIRECTORY_EVENTS)
+      if wd is None:
+        self._inotify.close()
+        self._inotify = None
+      else:
+        self._watches[wd] = ''
+        self._watch_directories()
+    self._polled_ns = 0
+    self._poll(KINDS)
+
+  @property
+  def uses_inotify(self) -> bool:
+    """Whether the catalog is watched with inotify, rather than polled."""
+    return self._inotify is not None
+
+  def fileno(self) -> int:
+    """
+      The file descriptor that is readable when the catalog may have
+      changed.
+
+      :return: The inotify file descriptor
+      :raises ValueError: If the catalog is polled
+    """
+    if self._inotify is None:
+      raise ValueError('The catalog is polled')
+    return self._inotify.fileno()
+
+  def close(self) -> None:
+    """
+      Stop watching the catalog.
+    """
+    if self._inotify is not None:
+      self._inotify.close()
+      self._inotify = None
+
+  def changes(self) -> dict[str, set[str]]:
+    """
+      Find the files whose contents have changed since the last time
+      this was called, including files created or removed.
+
+      :return: The names of the files that changed, by kind. Kinds in
+        which no file changed are left out.
+    """
+    if self._inotify is None:
+      return self._poll(KINDS)
+    rescan: set[str] = set()
+    candidates: dict[str, set[str]] = {kind: set() for kind in KINDS}
+    for wd, mask, name in self._inotify.read():
+      kind = self._watches.get(wd)
+      if mask & _IN_Q_OVERFLOW:
+        rescan.update(KINDS)
+      elif kind is None:
+        continue
+      elif mask & _IN_IGNORED:
+        del self._watches[wd]
+        rescan.add(kind)
+      elif kind == '':
+        if name in KINDS:
+          rescan.add(name)
+      elif name.endswith(EXTENSION):
+        candidates[kind].add(name[:-len(EXTENSION)])
+    if len(rescan) > 0:
+      self._watch_directories()
+    changes = self._poll(rescan)
+    for kind, names in candidates.items():
+      changed = {name for name in names if kind not in rescan and self._check(kind, name)}
+      if len(changed) > 0:
+        changes[kind] = changed
+    return changes
+
+  def refresh(self) -> int:
+    """
+      Reload the files of the catalog that have changed.
+
+      See reload().
+
+      :return: The number of files that changed
+    """
+    changes = self.changes()
+    if len(changes) > 0:
+      reload(changes)
+    return sum(len(names) for names in changes.values())
+
+  def _watch_directories(self) -> None:
+    """
+      Watch the directory of each kind of file that is not watched.
+    """
+    assert self._inotify is not None
+    watched = set(self._watches.values())
+    for kind in KINDS:
+      if kind not in watched:
+        wd = self._inotify.add_watch(os.path.join(self._directory, kind), _FILE_EVENTS)
+        if wd is not None:
+          self._watches[wd] = kind
+
+  def _poll(self, kinds: Iterable[str]) -> dict[str, set[str]]:
+    """
+      Stat every file of some kinds, and check those that may have
+      changed.
+
+      :param kinds: The kinds of file
+      :return: The names of the files that changed, by kind
+    """
+    polled_ns = time.time_ns()
+    changes: dict[str, set[str]] = {}
+    for kind in kinds:
+      files = catalog_files(self._directory, kind)
+      seen = self._seen[kind]
+      changed = seen.keys() - files.keys()
+      for name in changed:
+        del seen[name]
+      for name, stat_result in files.items():
+        previous = seen.get(name)
+        if previous is not None and previous.mtime_ns < self._polled_ns - RACY_NS \
+            and (previous.size, previous.mtime_ns) \
+              == (stat_result.st_size, stat_result.st_mtime_ns):
+          continue
+        if self._check(kind, name):
+          changed.add(name)
+      if len(changed) > 0:
+        changes[kind] = changed
+    self._polled_ns = polled_ns
+    return changes
+
+  def _check(self, kind: str, name: str) -> bool:
+    """
+      Check if the contents of a file have changed since it was last
+      checked, and take note of them.
+
+      :param kind: The kind of the file
+      :param name: The name of the file
+      :return: True if the file was created, removed or changed
+    """
+    seen = self._seen[kind]
+    previous = seen.get(name)
+    path = os.path.join(self._directory, kind, name + EXTENSION)
+    try:
+      if not is_valid_name(name):
+        raise FileNotFoundError(path)
+      with open(path, 'rb') as file:
+        stat_result = os.fstat(file.fileno())
+        if not stat.S_ISREG(stat_result.st_mode):
+          raise FileNotFoundError(path)
+        data = file.read()
+    except OSError:
+      return seen.pop(name, None) is not None
+    current = _Seen(stat_result.st_size, stat_result.st_mtime_ns, sha256(data).digest())
+    seen[name] = current
+    return previous is None or previous.digest != current.digest
+
+
+def load_catalog() -> None:
+  """
+    Load every environment and application in the catalog, and index
+    their labels, so that no command needs to.
+
+    Environments and applications whose files are not valid are left
+    out, so that the commands that use them say why.
+  """
+  for kind in (Environment, Application):
+    for name in kind.index():
+      try:
+        kind.load(name)
+      except DralithusError:
+        pass
+  _index_labels()
+
+
+def _index_labels() -> None:
+  """
+    Index the labels of the environments and applications in the
+    catalog, which have already been loaded.
+  """
+  for kind in (Environment, Application):
+    try:
+      kind.index().index_labels()
+    except (DralithusError, ValueError):
+      pass
+
+
+def reload(changes: dict[str, set[str]]) -> None:
+  """
+    Reload the files of the catalog that have changed.
+
+    Only the environments and applications whose files changed are
+    read again, and they are updated in place. Their labels are then
+    indexed again. Every merged configuration is forgotten, to be
+    merged again when it is next used.
+
+    :param changes: The names of the files that changed, by kind
+  """
+  if inventory_enabled():
+    open_inventory(catalog_directory()).refresh()
+  Environment.reload(changes.get('environments', ()))
+  Application.reload(changes.get('applications', ()))
+  reload_configuration()
+  _index_labels()
@@ -40,6 +40,9 @@ python3 -m pip install --upgrade pip
 python3 -m pip install pylint
 python3 -m pip install mypy
 
+# Reading environment, application and configuration files
+python3 -m pip install pyyaml
+
 # Testing support
 python3 -m pip install parameterized
 
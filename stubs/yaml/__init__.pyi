@@ -0,0 +1,115 @@
+# Type hints for the parts of PyYAML used by dralithus.
+
+from typing import IO, Any
+
+
+class YAMLError(Exception):
+  pass
+
+
+class Mark:
+  pass
+
+
+class Event:
+  start_mark: Mark
+  end_mark: Mark
+
+
+class NodeEvent(Event):
+  anchor: str | None
+
+
+class AliasEvent(NodeEvent):
+  pass
+
+
+class ScalarEvent(NodeEvent):
+  tag: str | None
+  implicit: tuple[bool, bool]
+  value: str
+  style: str | None
+
+
+class CollectionStartEvent(NodeEvent):
+  tag: str | None
+  implicit: bool
+  flow_style: bool | None
+
+
+class CollectionEndEvent(Event):
+  pass
+
+
+class StreamStartEvent(Event):
+  pass
+
+
+class StreamEndEvent(Event):
+  pass
+
+
+class DocumentStartEvent(Event):
+  pass
+
+
+class DocumentEndEvent(Event):
+  pass
+
+
+class SequenceStartEvent(CollectionStartEvent):
+  pass
+
+
+class SequenceEndEvent(CollectionEndEvent):
+  pass
+
+
+class MappingStartEvent(CollectionStartEvent):
+  pass
+
+
+class MappingEndEvent(CollectionEndEvent):
+  pass
+
+
+class Node:
+  tag: str
+  value: Any
+  start_mark: Mark
+  end_mark: Mark | None
+
+
+class ScalarNode(Node):
+  def __init__(
+      self, tag: str, value: str, start_mark: Mark, end_mark: Mark,
+      style: str | None = None) -> None: ...
+
+
+class SequenceNode(Node):
+  def __init__(
+      self, tag: str, value: list[Node], start_mark: Mark, end_mark: Mark | None,
+      flow_style: bool | None = None) -> None: ...
+
+
+class MappingNode(Node):
+  def __init__(
+      self, tag: str, value: list[tuple[Node, Node]], start_mark: Mark, end_mark: Mark | None,
+      flow_style: bool | None = None) -> None: ...
+
+
+class SafeLoader:
+  def __init__(self, stream: IO[bytes] | IO[str] | bytes | str) -> None: ...
+  def get_event(self) -> Event: ...
+  def peek_event(self) -> Event: ...
+  def check_event(self, *choices: type[Event]) -> bool: ...
+  def resolve(self, kind: type[Node], value: str | None, implicit: Any) -> str: ...
+  def construct_document(self, node: Node) -> Any: ...
+  def dispose(self) -> None: ...
+
+
+class CSafeLoader(SafeLoader):
+  pass
+
+
+def load(stream: IO[bytes] | IO[str] | bytes | str, Loader: type[SafeLoader]) -> Any: ...